@@ -2,6 +2,21 @@
 // WebSocket audio streaming client for VIOLIN_MVP
 // Protocol per frame: send TEXT meta (JSON) then BINARY (or base64-on-Android) audio bytes.
 // Fields now: MESSAGE_TYPE, RECORDING_ID, FRAME_NO, FRAME_DURATION_IN_MS, BYTES_LEN.
+// If the server accepts subprotocol 'violin.frame.v1', each frame is ONE binary message instead:
+// 16-byte little-endian header (VERSION u8, ENCODING u8, FRAME_DURATION_IN_MS u16,
+// RECORDING_ID u64, FRAME_NO u32) followed by the audio bytes.
+// Flow control: server sends {MESSAGE_TYPE:'FLOW', GRANT_THROUGH_FRAME_NO}. Frames above the grant are
+// held (paused) and sent in order when a larger grant arrives (resume). Before the first FLOW there
+// is no limit; resends are always allowed; STOP flushes held frames first.
+// Live results: server sends {MESSAGE_TYPE:'RESULT', PROCESSED_THROUGH_FRAME_NO, FRAMES:[...]} as frames
+// finish analysis (pitch/confidence/volume per frame); re-emitted as EVT_LIVE_RESULT. PLAY/PRACTICE
+// RESULTs also carry SCORE:{PYIN|CREPE:{INTONATION_PCT, TIMING_PCT, ...}}, the running score so far.
+// Heartbeat: server PINGs every few seconds and closes sockets that stay silent; reply PONG at once.
+// Resume: if /ws/stream drops mid-recording, reopen it and send {MESSAGE_TYPE:'RESUME', RECORDING_ID}
+// instead of START. The server answers RESUMED with what it already has; only the gap is resent.
+// Recording keeps going meanwhile (frames are held). RESUMED_YN 'N' stops the recording.
+// Multiplexing: the server lets one socket carry several RECORDING_IDs (each with its own START/STOP,
+// FLOW and ACK), so messages naming another RECORDING_ID are not ours and are ignored here.
 
 import { Audio } from 'expo-av';
 import * as FileSystem from 'expo-file-system';
@@ -236,8 +251,25 @@ const FRAME_MS = Number(CLIENT_APP_VARIABLES.AUDIO_STREAM_FRAME_SIZE_IN_MS) || 1
 const RESEND_BUFFER_SIZE = 128;
 const SEND_SLACK_MS = 5;  // Reduced from 15ms to 5ms for tighter timing
 
+// Single-message binary frames (see SERVER_ENGINE_WS_FRAME_PROTOCOL.py)
+const WS_SUBPROTOCOL_FRAME_V1 = 'violin.frame.v1';
+const FRAME_HEADER_VERSION = 1;
+const FRAME_HEADER_SIZE = 16;
+const FRAME_ENCODING_RAW = 0;
+
 let WS = null;
 let STREAMING = false;
+let BINARY_FRAMES = false;       // true once the server accepted WS_SUBPROTOCOL_FRAME_V1
+
+// Flow control (server credits)
+const HELD_FRAMES_MAX = 600;     // frames held while paused; oldest dropped beyond this (server zero-fills)
+let GRANT_THROUGH_FRAME_NO = Infinity;
+const HELD_FRAMES = [];
+
+// Reconnect-and-resume
+const RECONNECT_ATTEMPTS = 6;
+const RECONNECT_BACKOFF_MS = 500;
+let RECONNECTING = false;
 
 let FRAME_NO = 1;
 let COUNTDOWN_REMAINING_MS = 0;
@@ -363,20 +395,38 @@ function WS_SEND_JSON(obj) {
   }
 }
 
+function PACK_BINARY_FRAME({ recordingId, frameNo, frameMs, bytes }) {
+  const out = new Uint8Array(FRAME_HEADER_SIZE + bytes.byteLength);
+  const dv = new DataView(out.buffer);
+  const rid = Number(recordingId);
+  dv.setUint8(0, FRAME_HEADER_VERSION);
+  dv.setUint8(1, FRAME_ENCODING_RAW);
+  dv.setUint16(2, Number(frameMs), true);
+  dv.setUint32(4, rid % 4294967296, true);              // RECORDING_ID u64 as two u32 words (no BigInt)
+  dv.setUint32(8, Math.floor(rid / 4294967296), true);
+  dv.setUint32(12, Number(frameNo), true);
+  out.set(bytes, FRAME_HEADER_SIZE);
+  return out;
+}
+
 async function SEND_FRAME_PAIR({ recordingId, frameNo, frameMs, bytes }) {
   // LOG('Start function CLIENT_AUDIO_STREAM_MASTER.SEND_FRAME_PAIR');
   if (!WS || WS.readyState !== 1) return;
 
-  const header = {
-    MESSAGE_TYPE: 'FRAME',
-    RECORDING_ID: String(recordingId),
-    FRAME_NO: String(frameNo), // send as string
-    FRAME_DURATION_IN_MS: frameMs,
-    BYTES_LEN: bytes.byteLength,
-  };
+  if (BINARY_FRAMES) {
+    WS.send(PACK_BINARY_FRAME({ recordingId, frameNo, frameMs, bytes }));
+  } else {
+    const header = {
+      MESSAGE_TYPE: 'FRAME',
+      RECORDING_ID: String(recordingId),
+      FRAME_NO: String(frameNo), // send as string
+      FRAME_DURATION_IN_MS: frameMs,
+      BYTES_LEN: bytes.byteLength,
+    };
 
-  WS_SEND_JSON(header);
-  WS.send(bytes);
+    WS_SEND_JSON(header);
+    WS.send(bytes);
+  }
   
   // Force immediate transmission - prevent buffering delays
   if (WS.bufferedAmount > 0) {
@@ -396,6 +446,24 @@ async function SEND_FRAME_PAIR({ recordingId, frameNo, frameMs, bytes }) {
   });
 }
 
+function SEND_OR_HOLD_FRAME(frame) {
+  // Also hold while the socket is down (reconnecting); RESUMED drains them
+  if (HELD_FRAMES.length === 0 && frame.frameNo <= GRANT_THROUGH_FRAME_NO && WS && WS.readyState === 1) {
+    return SEND_FRAME_PAIR(frame);
+  }
+  HELD_FRAMES.push(frame);
+  if (HELD_FRAMES.length > HELD_FRAMES_MAX) {
+    const dropped = HELD_FRAMES.shift();
+    WARN('Flow control: hold buffer full, dropping frame', { frameNo: dropped.frameNo });
+  }
+}
+
+function DRAIN_HELD_FRAMES({ ignoreGrant = false } = {}) {
+  while (HELD_FRAMES.length && (ignoreGrant || HELD_FRAMES[0].frameNo <= GRANT_THROUGH_FRAME_NO)) {
+    SEND_FRAME_PAIR(HELD_FRAMES.shift());
+  }
+}
+
 // ========= resolves on onopen OR first banner message =========
 async function WS_OPEN_WITH_TIMEOUT(url, timeoutMs, { subprotocols } = {}) {
   return new Promise((resolve, reject) => {
@@ -452,11 +520,11 @@ async function WS_OPEN_WITH_TIMEOUT(url, timeoutMs, { subprotocols } = {}) {
 }
 
 // Retry wrapper for stream open
-async function WS_OPEN_WITH_RETRIES(url, timeoutMs, attempts = 2, backoffMs = 400) {
+async function WS_OPEN_WITH_RETRIES(url, timeoutMs, attempts = 2, backoffMs = 400, { subprotocols } = {}) {
   let lastErr;
   for (let i = 0; i < attempts; i++) {
     try {
-      return await WS_OPEN_WITH_TIMEOUT(url, timeoutMs);
+      return await WS_OPEN_WITH_TIMEOUT(url, timeoutMs, { subprotocols });
     } catch (e) {
       lastErr = e;
       if (i < attempts - 1) {
@@ -467,6 +535,61 @@ async function WS_OPEN_WITH_RETRIES(url, timeoutMs, attempts = 2, backoffMs = 40
   throw lastErr;
 }
 
+// Reopen /ws/stream after an unexpected close and reattach the recording (no START)
+async function RECONNECT_AND_RESUME(recordingId, attachHandlers) {
+  RECONNECTING = true;
+  DeviceEventEmitter.emit('EVT_CONDUCTOR_UPDATED', {
+    CONDUCTOR_MESSAGE_TEXT: 'Connection lost — reconnecting…',
+    CONDUCTOR_MOOD_GOOD_BAD_OR_NEUTRAL: 'NEUTRAL',
+    CONDUCTOR_MESSAGE_DISPLAY_FOR_DURATION_IN_MS: 3000,
+  });
+  try {
+    const ws = await WS_OPEN_WITH_RETRIES(GET_WS_URL(), 6000, RECONNECT_ATTEMPTS, RECONNECT_BACKOFF_MS, { subprotocols: [WS_SUBPROTOCOL_FRAME_V1] });
+    if (!STREAMING) {
+      try { ws.close(); } catch {}
+      return;
+    }
+    WS = ws;
+    BINARY_FRAMES = ws.protocol === WS_SUBPROTOCOL_FRAME_V1;
+    attachHandlers(ws);
+    WS_SEND_JSON({ MESSAGE_TYPE: 'RESUME', RECORDING_ID: recordingId });
+    LOG_CLIENT_MESSAGE({
+      recordingId: recordingId,
+      type: 'RESUME',
+      frameNo: null,
+    });
+  } catch (e) {
+    WARN('Reconnect failed', String(e));
+    DeviceEventEmitter.emit('EVT_CONDUCTOR_UPDATED', {
+      CONDUCTOR_MESSAGE_TEXT: 'Connection lost — recording stopped',
+      CONDUCTOR_MOOD_GOOD_BAD_OR_NEUTRAL: 'BAD',
+      CONDUCTOR_MESSAGE_DISPLAY_FOR_DURATION_IN_MS: 4000,
+    });
+    STOP_STREAMING_WS();
+  } finally {
+    RECONNECTING = false;
+  }
+}
+
+// Server has everything through MAX_FRAME_NO_RECEIVED except MISSING_FRAMES: resend those and the tail
+function RESEND_AFTER_RESUME(recordingId, msg) {
+  const held = new Set(HELD_FRAMES.map(f => f.frameNo));
+  const frameNos = new Set(Array.isArray(msg.MISSING_FRAMES) ? msg.MISSING_FRAMES.map(Number) : []);
+  for (let n = (Number(msg.MAX_FRAME_NO_RECEIVED) || 0) + 1; n < FRAME_NO; n++) frameNos.add(n);
+  for (const n of [...frameNos].sort((a, b) => a - b)) {
+    const entry = RESEND_BUFFER_GET(n);
+    if (entry && !held.has(n)) {
+      SEND_FRAME_PAIR({
+        recordingId: recordingId,
+        frameNo: n,
+        frameMs: entry.header.FRAME_DURATION_IN_MS,
+        bytes: entry.bytes,
+      });
+    }
+  }
+  DRAIN_HELD_FRAMES();
+}
+
 // ======================================================================
 
 // Conductor countdown — non-blocking & visible even while frames stream
@@ -570,7 +693,9 @@ export async function START_STREAMING_WS({ countdownBeats = 0, bpm = 60 }) {
   // 2) Real streaming WS (6s, with 2 attempts)
   // LOG('WS → connecting (stream)', { WS_URL, RECORDING_ID, AUDIO_STREAM_FILE_NAME });
   try {
-    WS = await WS_OPEN_WITH_RETRIES(WS_URL, 6000, 2, 500);
+    WS = await WS_OPEN_WITH_RETRIES(WS_URL, 6000, 2, 500, { subprotocols: [WS_SUBPROTOCOL_FRAME_V1] });
+    // Older servers accept no subprotocol → keep the TEXT+BINARY pair per frame
+    BINARY_FRAMES = WS.protocol === WS_SUBPROTOCOL_FRAME_V1;
   } catch (e) {
     // ERR('Stream WS failed to open', String(e));
     STREAMING = false;
@@ -578,7 +703,7 @@ export async function START_STREAMING_WS({ countdownBeats = 0, bpm = 60 }) {
     return;
   }
 
-  WS.onmessage = (evt) => {
+  const ON_MESSAGE = (evt) => {
     try {
       const isText = typeof evt.data === 'string';
       const payload = isText ? evt.data : '<binary>';
@@ -598,7 +723,10 @@ export async function START_STREAMING_WS({ countdownBeats = 0, bpm = 60 }) {
         ? evt.data
         : new TextDecoder().decode(evt.data);
       const msg = JSON_PARSE_SAFE(raw) || {};
-      if (msg.MESSAGE_TYPE === 'ACK') {
+      if (msg.RECORDING_ID != null && String(msg.RECORDING_ID) !== RECORDING_ID) return;
+      if (msg.MESSAGE_TYPE === 'PING') {
+        WS_SEND_JSON({ MESSAGE_TYPE: 'PONG', PING_NO: msg.PING_NO });
+      } else if (msg.MESSAGE_TYPE === 'ACK') {
         const missing = Array.isArray(msg.MISSING_FRAMES) ? msg.MISSING_FRAMES : [];
         //if (missing.length) LOG('Resend requested', { missing });
         for (const m of missing) {
@@ -612,17 +740,76 @@ export async function START_STREAMING_WS({ countdownBeats = 0, bpm = 60 }) {
             });
           }
         }
+      } else if (msg.MESSAGE_TYPE === 'FLOW') {
+        // Server credit: send through GRANT_THROUGH_FRAME_NO, hold the rest
+        const grant = Number(msg.GRANT_THROUGH_FRAME_NO);
+        if (Number.isFinite(grant)) {
+          const wasPaused = HELD_FRAMES.length > 0;
+          GRANT_THROUGH_FRAME_NO = grant;
+          DRAIN_HELD_FRAMES();
+          const paused = HELD_FRAMES.length > 0;
+          if (paused !== wasPaused) {
+            DeviceEventEmitter.emit('EVT_STREAM_FLOW', { paused, grant, held: HELD_FRAMES.length, backlogMs: msg.BACKLOG_MS });
+          }
+        }
+      } else if (msg.MESSAGE_TYPE === 'RESULT') {
+        // Live analysis for finished frames; PROCESSED_THROUGH_FRAME_NO = everything up to it is done
+        DeviceEventEmitter.emit('EVT_LIVE_RESULT', msg);
+      } else if (msg.MESSAGE_TYPE === 'RESUMED') {
+        if (msg.RESUMED_YN === 'Y') {
+          RESEND_AFTER_RESUME(RECORDING_ID, msg);
+        } else {
+          DeviceEventEmitter.emit('EVT_CONDUCTOR_UPDATED', {
+            CONDUCTOR_MESSAGE_TEXT: 'Connection lost — recording stopped',
+            CONDUCTOR_MOOD_GOOD_BAD_OR_NEUTRAL: 'BAD',
+            CONDUCTOR_MESSAGE_DISPLAY_FOR_DURATION_IN_MS: 4000,
+          });
+          STOP_STREAMING_WS();
+        }
+      } else if (msg.MESSAGE_TYPE === 'START_ACK') {
+        // Server admission control: ADMITTED | REDUCED | BUSY (+ RETRY_AFTER_MS) | FAILED (START could not be set up)
+        DeviceEventEmitter.emit('EVT_STREAM_ADMISSION', msg);
+        if (msg.ADMISSION === 'FAILED') {
+          DeviceEventEmitter.emit('EVT_CONDUCTOR_UPDATED', {
+            CONDUCTOR_MESSAGE_TEXT: 'Recording could not be started',
+            CONDUCTOR_MOOD_GOOD_BAD_OR_NEUTRAL: 'BAD',
+            CONDUCTOR_MESSAGE_DISPLAY_FOR_DURATION_IN_MS: 4000,
+          });
+          STOP_STREAMING_WS();
+        } else if (msg.ADMISSION === 'BUSY') {
+          const retrySec = Math.ceil((Number(msg.RETRY_AFTER_MS) || 0) / 1000);
+          DeviceEventEmitter.emit('EVT_CONDUCTOR_UPDATED', {
+            CONDUCTOR_MESSAGE_TEXT: `Server busy — try again in ${retrySec}s`,
+            CONDUCTOR_MOOD_GOOD_BAD_OR_NEUTRAL: 'BAD',
+            CONDUCTOR_MESSAGE_DISPLAY_FOR_DURATION_IN_MS: 4000,
+          });
+          STOP_STREAMING_WS();
+        } else if (msg.ADMISSION === 'REDUCED') {
+          DeviceEventEmitter.emit('EVT_CONDUCTOR_UPDATED', {
+            CONDUCTOR_MESSAGE_TEXT: 'Server is busy — using lighter analysis',
+            CONDUCTOR_MOOD_GOOD_BAD_OR_NEUTRAL: 'NEUTRAL',
+            CONDUCTOR_MESSAGE_DISPLAY_FOR_DURATION_IN_MS: 3000,
+          });
+        }
       } else {
         //LOG('WS message (parsed)', msg);
       }
     } catch {}
   };
-  WS.onclose = (evt) => {
-    // WARN('WS close', { code: evt.code, reason: evt.reason });
-  };
-  WS.onerror = (evt) => {
-    // ERR('WS error (after open)', { evt });
+  const ATTACH_WS_HANDLERS = (ws) => {
+    ws.onmessage = ON_MESSAGE;
+    ws.onclose = (evt) => {
+      // WARN('WS close', { code: evt.code, reason: evt.reason });
+      // Unexpected drop while recording → reopen and RESUME (STOP clears STREAMING before closing)
+      if (STREAMING && !RECONNECTING && ws === WS) {
+        RECONNECT_AND_RESUME(RECORDING_ID, ATTACH_WS_HANDLERS);
+      }
+    };
+    ws.onerror = (evt) => {
+      // ERR('WS error (after open)', { evt });
+    };
   };
+  ATTACH_WS_HANDLERS(WS);
 
   // Send START
   WS_SEND_JSON({ MESSAGE_TYPE: 'START', RECORDING_ID, AUDIO_STREAM_FILE_NAME });
@@ -635,6 +822,8 @@ export async function START_STREAMING_WS({ countdownBeats = 0, bpm = 60 }) {
   const MS_PER_BEAT = 60000 / Math.max(1, bpm);
   COUNTDOWN_REMAINING_MS = Math.max(0, Math.round(countdownBeats * MS_PER_BEAT));
   FRAME_NO = 1;
+  GRANT_THROUGH_FRAME_NO = Infinity;
+  HELD_FRAMES.length = 0;
   BOUNDARY_SENT = COUNTDOWN_REMAINING_MS === 0;
 
   // Kick the visible conductor countdown (non-blocking)
@@ -647,7 +836,7 @@ export async function START_STREAMING_WS({ countdownBeats = 0, bpm = 60 }) {
 
   // Non-overlapping loop driven by recorder slice duration (reduces timer drift)
   (async function LOOP() {
-    while (STREAMING && WS && WS.readyState === 1) {
+    while (STREAMING) {  // keeps recording while reconnecting; frames are held until RESUMED
       const tickStartTime = Date.now();
       try {
         const uri = await RECORD_MICRO_CHUNK(FRAME_MS);
@@ -682,7 +871,7 @@ export async function START_STREAMING_WS({ countdownBeats = 0, bpm = 60 }) {
         });
 
         const sendStartTime = Date.now();
-        await SEND_FRAME_PAIR({
+        await SEND_OR_HOLD_FRAME({
           recordingId: RECORDING_ID,
           frameNo: frameNoToSend,
           frameMs: FRAME_MS,
@@ -726,6 +915,7 @@ export async function STOP_STREAMING_WS() {
   try {
     if (WS && WS.readyState === 1) {
       const RECORDING_ID = String(CLIENT_APP_VARIABLES.RECORDING_ID || '');
+      DRAIN_HELD_FRAMES({ ignoreGrant: true });  // audio already recorded is not discarded on STOP
       WS_SEND_JSON({ MESSAGE_TYPE: 'STOP', RECORDING_ID });
       LOG_CLIENT_MESSAGE({
         recordingId: RECORDING_ID,
@@ -739,6 +929,7 @@ export async function STOP_STREAMING_WS() {
   WS = null;
 
   RESEND_BUFFER.clear();
+  HELD_FRAMES.length = 0;
   // LOG('Streaming stopped');
   // try { MIRROR_FLUSH_NOW(); } catch {}
   MARK_UI_DIRTY();
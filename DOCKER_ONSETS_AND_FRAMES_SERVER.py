@@ -1,44 +1,376 @@
 # ------------------------------------------------------------
 # DOCKER_ONSETS_AND_FRAMES_SERVER.py
 # A standalone Flask microservice that loads Magenta Onsets & Frames once,
-# then serves /transcribe requests quickly.
+# then serves streaming sessions (and one-shot /transcribe requests) quickly.
 #
 # Run inside Docker (recommended):
 #   python DOCKER_ONSETS_AND_FRAMES_SERVER.py
-# Exposes: POST /transcribe  (raw WAV/FLAC/MP3/OGG bytes)
-# Returns: {"notes":[{"onset_sec":..,"offset_sec":..,"pitch_midi":..,"velocity":..}, ...]}
+# Exposes:
+#   POST /session/start   {"sample_rate":16000}         → {"ok":true,"session_id":..}
+#   POST /session/ingest  raw PCM16LE mono bytes, headers X-Session-Id / X-Offset-Ms / X-Finalize / X-Sample-Rate
+#                         → {"ok":true,"commit_ms":..,"notes":[{"start_ms","end_ms","pitch","velocity"}, ...]}
+#   POST /transcribe      (raw WAV/FLAC/MP3/OGG bytes)
+#                         → {"notes":[{"onset_sec":..,"offset_sec":..,"pitch_midi":..,"velocity":..}, ...]}
+#   GET  /health
+#
+# Streaming: each session keeps its recent audio. Once enough new audio has arrived, the last
+# OAF_WINDOW_MS of it goes to the model; frames at least OAF_LOOKAHEAD_MS behind the newest audio
+# are decoded into notes exactly once. Windows from all sessions waiting at the same moment go
+# to the model as one batch. commit_ms is the watermark: every note ending at or before it has
+# been returned, and notes are returned once, in the response that commits them.
+#
+# OAF_MODEL=STANDIN swaps Magenta for a small numpy pitch tracker with the same outputs, so the
+# session path can be exercised on CPU without TensorFlow or weights.
 # ------------------------------------------------------------
 import os
 import io
+import time
+import uuid
+import queue
+import threading
+from concurrent.futures import Future
 import numpy as np
 import soundfile as sf
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 
-# Magenta / TF imports (heavy)
-from magenta.models.onsets_frames_transcription import configs, infer
-import tensorflow as tf
-
 MODEL_DIR = os.getenv("OAF_MODEL_DIR", "/models/onsets_frames")
+MODEL_KIND = os.getenv("OAF_MODEL", "MAGENTA").upper()          # MAGENTA | STANDIN
+PORT = int(os.getenv("OAF_PORT", "9077"))                       # matches EXPOSE in Dockerfile.oaf
 TARGET_SR = 16000
 
+HOP = 512                                                       # O&F spectrogram hop → 32 ms frames
+FRAME_MS = 1000 * HOP // TARGET_SR
+N_PITCHES = 88                                                  # piano roll, MIDI 21..108
+MIN_MIDI = 21
+
+WINDOW_FRAMES = max(8, int(os.getenv("OAF_WINDOW_MS", "2048")) // FRAME_MS)
+LOOKAHEAD_FRAMES = max(1, int(os.getenv("OAF_LOOKAHEAD_MS", "320")) // FRAME_MS)
+STEP_FRAMES = max(1, int(os.getenv("OAF_STEP_MS", "256")) // FRAME_MS)
+MAX_ADVANCE_FRAMES = WINDOW_FRAMES // 2 + LOOKAHEAD_FRAMES       # catch-up steps keep ≥ half a window of left context
+ONSET_THRESHOLD = float(os.getenv("OAF_ONSET_THRESHOLD", "0.5"))
+FRAME_THRESHOLD = float(os.getenv("OAF_FRAME_THRESHOLD", "0.5"))
+BATCH_MAX = int(os.getenv("OAF_BATCH_MAX", "16"))
+BATCH_WAIT_MS = float(os.getenv("OAF_BATCH_WAIT_MS", "5"))
+SESSION_IDLE_S = float(os.getenv("OAF_SESSION_IDLE_S", "300"))
+
+
+# ------------------------------------------------------------
+# Models: predict(WINDOWS[B, WINDOW_FRAMES*HOP]) →
+#   onset_probs[B, WINDOW_FRAMES, 88], frame_probs[B, WINDOW_FRAMES, 88], velocity[B, WINDOW_FRAMES, 88] (MIDI)
+# ------------------------------------------------------------
+class MagentaModel:
+    NAME = "Onsets & Frames"
+
+    def __init__(self, MODEL_DIR):
+        # Magenta / TF imports (heavy)
+        from magenta.models.onsets_frames_transcription import configs, data, infer
+        import tensorflow as tf
+        import librosa
+
+        self.infer, self.librosa = infer, librosa
+        config = configs.CONFIG_MAP["onsets_frames"]
+        self.hparams = config.hparams
+        self.hparams.parse("batch_size=1")
+        self.checkpoint_path = tf.train.latest_checkpoint(MODEL_DIR)
+        if not self.checkpoint_path:
+            raise RuntimeError(f"No checkpoint found in {MODEL_DIR}")
+
+        # One graph fed with a batch of mel windows; no estimator rebuild per request
+        self.graph = tf.Graph()
+        with self.graph.as_default():
+            self.spec_ph = tf.placeholder(tf.float32, [None, None, self.hparams.spec_n_bins, 1])
+            self.length_ph = tf.placeholder(tf.int32, [None])
+            features = data.FeatureTensors(spec=self.spec_ph, length=self.length_ph, sequence_id=tf.constant(""))
+            spec = config.model_fn(features, None, tf.estimator.ModeKeys.PREDICT, self.hparams, None)
+            self.fetch = {k: spec.predictions[k] for k in ("onset_probs", "frame_probs", "velocity_values")}
+            self.session = tf.Session()
+            tf.train.Saver().restore(self.session, self.checkpoint_path)
+
+    def _mel(self, X):
+        MEL = self.librosa.feature.melspectrogram(
+            y=X, sr=TARGET_SR, hop_length=HOP, fmin=self.hparams.spec_fmin,
+            n_mels=self.hparams.spec_n_bins, htk=self.hparams.spec_mel_htk,
+        ).astype(np.float32)
+        if self.hparams.spec_log_amplitude:
+            MEL = self.librosa.power_to_db(MEL)
+        return MEL.T[:WINDOW_FRAMES]
+
+    def predict(self, WINDOWS):
+        SPEC = np.stack([self._mel(X) for X in WINDOWS])[..., np.newaxis]
+        OUT = self.session.run(self.fetch, {self.spec_ph: SPEC, self.length_ph: np.full(len(WINDOWS), SPEC.shape[1], np.int32)})
+        VELOCITY = np.clip(OUT["velocity_values"] * 80.0 + 10.0, 1, 127)   # Magenta's velocity unscaling
+        return OUT["onset_probs"], OUT["frame_probs"], VELOCITY
+
+    def transcribe(self, audio):
+        # Returns list of pretty_midi.Note-like dicts:
+        # [{"onset_time": s, "offset_time": s, "pitch": int, "velocity": int}, ...]
+        notes_list, _ = self.infer.transcribe_audio(audio, self.hparams, self.checkpoint_path)
+        return notes_list
+
+
+class StandInModel:
+    """Monophonic harmonic-sum tracker shaped like O&F output (CPU only, no weights)."""
+    NAME = "stand-in"
+    N_FFT = 2048
+    HARMONICS = 4
+    MIN_DB = -50.0
+    ONSET_RISE_DB = 6.0
+
+    def __init__(self):
+        self.checkpoint_path = None
+        DF = TARGET_SR / self.N_FFT
+        F0 = 440.0 * 2.0 ** ((np.arange(MIN_MIDI, MIN_MIDI + N_PITCHES) - 69) / 12.0)
+        self.harmonic_bins = [np.minimum(np.round(h * F0 / DF).astype(int), self.N_FFT // 2) for h in range(1, self.HARMONICS + 1)]
+        self.window = np.hanning(self.N_FFT).astype(np.float32)
+
+    def predict(self, WINDOWS):
+        B = WINDOWS.shape[0]
+        PADDED = np.pad(WINDOWS, ((0, 0), (self.N_FFT // 2, self.N_FFT // 2)))
+        FRAMES = np.lib.stride_tricks.sliding_window_view(PADDED, self.N_FFT, axis=1)[:, ::HOP][:, :WINDOW_FRAMES]
+        WINDOWED = FRAMES * self.window
+        POWER = np.abs(np.fft.rfft(WINDOWED, axis=-1)) ** 2                                # [B, F, bins]
+        SALIENCE = sum(POWER[..., BINS] / h for h, BINS in enumerate(self.harmonic_bins, start=1))
+        BEST = SALIENCE.argmax(axis=-1)                                                   # [B, F]
+        LEVEL_DB = 10.0 * np.log10(np.mean(WINDOWED.astype(np.float64) ** 2, axis=-1) / 0.375 + 1e-12)   # Hann power gain
+
+        ON = LEVEL_DB > self.MIN_DB
+        PREV_BEST = np.concatenate([np.full((B, 1), -1), BEST[:, :-1]], axis=1)
+        PREV_ON = np.concatenate([np.zeros((B, 1), bool), ON[:, :-1]], axis=1)
+        PREV_DB = np.concatenate([np.full((B, 1), -120.0), LEVEL_DB[:, :-1]], axis=1)
+        ONSET = ON & (~PREV_ON | (BEST != PREV_BEST) | (LEVEL_DB - PREV_DB > self.ONSET_RISE_DB))
+
+        SHAPE = (B, WINDOW_FRAMES, N_PITCHES)
+        ONSET_PROBS, FRAME_PROBS, VELOCITY = np.zeros(SHAPE, np.float32), np.zeros(SHAPE, np.float32), np.zeros(SHAPE, np.float32)
+        b, f = np.indices(BEST.shape)
+        FRAME_PROBS[b, f, BEST] = ON
+        ONSET_PROBS[b, f, BEST] = ONSET
+        VELOCITY[b, f, BEST] = np.clip(127.0 * (LEVEL_DB + 60.0) / 60.0, 1, 127)
+        return ONSET_PROBS, FRAME_PROBS, VELOCITY
+
+    def transcribe(self, audio):
+        NOTES = _transcribe_via_session(np.asarray(audio, dtype=np.float32))
+        return [{"onset_time": n["start_ms"] / 1000.0, "offset_time": (n["end_ms"] + 1) / 1000.0,
+                 "pitch": n["pitch"], "velocity": n["velocity"]} for n in NOTES]
+
+
+# ------------------------------------------------------------
+# Cross-session batching: one model call for every window waiting at the same moment
+# ------------------------------------------------------------
+class InferenceBatcher:
+    def __init__(self, model):
+        self.model = model
+        self.jobs = queue.Queue()
+        self.lock = threading.Lock()
+        self.stats = {"batches": 0, "windows": 0, "max_batch": 0, "infer_ms_total": 0.0}
+        threading.Thread(target=self._worker, name="oaf-batcher", daemon=True).start()
+
+    def submit(self, WINDOWS):
+        FUTURES = []
+        for X in WINDOWS:
+            FUT = Future()
+            self.jobs.put((X, FUT))
+            FUTURES.append(FUT)
+        return [FUT.result() for FUT in FUTURES]
+
+    def _worker(self):
+        while True:
+            BATCH = [self.jobs.get()]
+            DEADLINE = time.monotonic() + BATCH_WAIT_MS / 1000.0
+            while len(BATCH) < BATCH_MAX:
+                try:
+                    BATCH.append(self.jobs.get(timeout=max(0.0, DEADLINE - time.monotonic())))
+                except queue.Empty:
+                    break
+            t0 = time.perf_counter()
+            try:
+                ONSET, FRAME, VELOCITY = self.model.predict(np.stack([X for X, _ in BATCH]))
+                for i, (_, FUT) in enumerate(BATCH):
+                    FUT.set_result((ONSET[i], FRAME[i], VELOCITY[i]))
+            except Exception as e:
+                for _, FUT in BATCH:
+                    FUT.set_exception(e)
+            with self.lock:
+                self.stats["batches"] += 1
+                self.stats["windows"] += len(BATCH)
+                self.stats["max_batch"] = max(self.stats["max_batch"], len(BATCH))
+                self.stats["infer_ms_total"] += (time.perf_counter() - t0) * 1000.0
+
+
+# ------------------------------------------------------------
+# Sessions
+# ------------------------------------------------------------
+class StreamSession:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buf = np.zeros(0, np.float32)
+        self.buf_start = 0                      # absolute sample index of buf[0]
+        self.received = 0                       # absolute samples received (gaps zero-filled)
+        self.decoded = 0                        # absolute frames already decoded
+        self.active_start = np.full(N_PITCHES, -1, np.int64)
+        self.active_velocity = np.zeros(N_PITCHES, np.float32)
+        self.prev_onset = np.zeros(N_PITCHES, bool)
+        self.last_seen = time.monotonic()
+
+    def append(self, OFFSET_MS, X):
+        START = OFFSET_MS * TARGET_SR // 1000
+        if START > self.received:               # frame gap → silence
+            X = np.concatenate([np.zeros(START - self.received, np.float32), X])
+        elif START < self.received:             # overlap / resend → keep only the new tail
+            X = X[self.received - START:]
+        if X.size:
+            self.buf = np.concatenate([self.buf, X])
+            self.received += X.size
+
+    def window(self, END_FRAME):
+        """Audio for frames [END_FRAME-WINDOW_FRAMES, END_FRAME), zero-padded before 0 and past the end."""
+        LO, HI = (END_FRAME - WINDOW_FRAMES) * HOP, END_FRAME * HOP
+        OUT = np.zeros(HI - LO, np.float32)
+        A, B = max(LO, self.buf_start), min(HI, self.buf_start + self.buf.size)
+        if B > A:
+            OUT[A - LO:B - LO] = self.buf[A - self.buf_start:B - self.buf_start]
+        return OUT
+
+    def plan(self, FINALIZE):
+        """(END_FRAME, DECODE_TO) per window needed to catch up."""
+        AVAILABLE = self.received // HOP
+        TARGET = -(-self.received // HOP) if FINALIZE else AVAILABLE - LOOKAHEAD_FRAMES
+        if not FINALIZE and TARGET - self.decoded < STEP_FRAMES:
+            return []
+        STEPS, DECODED = [], self.decoded
+        while DECODED < TARGET:
+            END = min(DECODED + MAX_ADVANCE_FRAMES, TARGET + (0 if FINALIZE else LOOKAHEAD_FRAMES))
+            DECODE_TO = min(TARGET, END if FINALIZE else END - LOOKAHEAD_FRAMES)
+            STEPS.append((END, DECODE_TO))
+            DECODED = DECODE_TO
+        return STEPS
+
+    def decode(self, END_FRAME, DECODE_TO, ONSET, FRAME, VELOCITY):
+        """O&F decoding: a note starts on an onset, lasts while its frame (or onset) is on, re-strikes on a new onset."""
+        NOTES = []
+        BASE = END_FRAME - WINDOW_FRAMES
+        for f in range(self.decoded, DECODE_TO):
+            ONSET_ON = ONSET[f - BASE] >= ONSET_THRESHOLD
+            FRAME_ON = (FRAME[f - BASE] >= FRAME_THRESHOLD) | ONSET_ON
+            ACTIVE = self.active_start >= 0
+            CLOSE = ACTIVE & (~FRAME_ON | (ONSET_ON & ~self.prev_onset))
+            for p in np.flatnonzero(CLOSE):
+                NOTES.append(self._note(p, f))
+            self.active_start[CLOSE] = -1
+            START = ONSET_ON & (self.active_start < 0)
+            self.active_start[START] = f
+            self.active_velocity[START] = VELOCITY[f - BASE][START]
+            self.prev_onset = ONSET_ON
+        self.decoded = DECODE_TO
+        return NOTES
+
+    def close_all(self):
+        NOTES = [self._note(p, self.decoded) for p in np.flatnonzero(self.active_start >= 0)]
+        self.active_start[:] = -1
+        return NOTES
+
+    def _note(self, p, END_FRAME):
+        return {
+            "start_ms": int(self.active_start[p]) * FRAME_MS,
+            "end_ms": END_FRAME * FRAME_MS - 1,
+            "pitch": MIN_MIDI + int(p),
+            "velocity": int(np.clip(round(float(self.active_velocity[p])), 1, 127)),
+        }
+
+    def trim(self):
+        KEEP_FROM = max(0, (self.decoded - WINDOW_FRAMES) * HOP)
+        if KEEP_FROM > self.buf_start:
+            self.buf = self.buf[KEEP_FROM - self.buf_start:]
+            self.buf_start = KEEP_FROM
+
+
+def _process(session, FINALIZE):
+    """Run every window the session is due for (batched with other sessions) and decode in order."""
+    STEPS = session.plan(FINALIZE)
+    OUTPUTS = BATCHER.submit([session.window(END) for END, _ in STEPS]) if STEPS else []
+    NOTES = []
+    for (END, DECODE_TO), (ONSET, FRAME, VELOCITY) in zip(STEPS, OUTPUTS):
+        NOTES.extend(session.decode(END, DECODE_TO, ONSET, FRAME, VELOCITY))
+    if FINALIZE:
+        NOTES.extend(session.close_all())
+    session.trim()
+    # Notes still sounding at a frame are closed at a later frame, so everything ending before the
+    # last decoded frame is final.
+    COMMIT_MS = session.decoded * FRAME_MS - 1 if FINALIZE else (session.decoded - 1) * FRAME_MS - 1
+    return NOTES, COMMIT_MS
+
+
+def _transcribe_via_session(audio):
+    session = StreamSession()
+    session.append(0, audio)
+    NOTES, _ = _process(session, FINALIZE=True)
+    return NOTES
+
+
+SESSIONS = {}
+SESSIONS_LOCK = threading.Lock()
+
+
+def _expire_idle_sessions():
+    NOW = time.monotonic()
+    with SESSIONS_LOCK:
+        for sid in [sid for sid, s in SESSIONS.items() if NOW - s.last_seen > SESSION_IDLE_S]:
+            del SESSIONS[sid]
+
+
+# ------------------------------------------------------------
+# App
+# ------------------------------------------------------------
 app = Flask(__name__)
 CORS(app)
 
-print("🔄 Loading Onsets & Frames model from:", MODEL_DIR, flush=True)
-config = configs.CONFIG_MAP["onsets_frames"]
-hparams = config.hparams
-hparams.parse("batch_size=1")
-checkpoint_path = tf.train.latest_checkpoint(MODEL_DIR)
-if not checkpoint_path:
-    raise RuntimeError(f"No checkpoint found in {MODEL_DIR}")
-
-# Note: infer.transcribe_audio handles inference
-print("✅ Model ready at checkpoint:", checkpoint_path, flush=True)
+print("🔄 Loading model:", MODEL_KIND, "from", MODEL_DIR, flush=True)
+MODEL = StandInModel() if MODEL_KIND == "STANDIN" else MagentaModel(MODEL_DIR)
+BATCHER = InferenceBatcher(MODEL)
+print("✅ Model ready at checkpoint:", MODEL.checkpoint_path, flush=True)
 
 @app.route("/health", methods=["GET"])
 def health():
-    return jsonify({"ok": True, "model": "Onsets & Frames", "checkpoint": checkpoint_path})
+    with BATCHER.lock:
+        stats = dict(BATCHER.stats)
+    return jsonify({"ok": True, "model": MODEL.NAME, "checkpoint": MODEL.checkpoint_path,
+                    "sessions": len(SESSIONS), "batching": stats})
+
+@app.route("/session/start", methods=["POST"])
+def session_start():
+    sr = int((request.get_json(silent=True) or {}).get("sample_rate", TARGET_SR))
+    if sr != TARGET_SR:
+        return jsonify({"ok": False, "error": f"sample_rate must be {TARGET_SR}"}), 400
+    _expire_idle_sessions()
+    session_id = uuid.uuid4().hex
+    with SESSIONS_LOCK:
+        SESSIONS[session_id] = StreamSession()
+    return jsonify({"ok": True, "session_id": session_id})
+
+@app.route("/session/ingest", methods=["POST"])
+def session_ingest():
+    try:
+        session_id = request.headers.get("X-Session-Id", "")
+        finalize = request.headers.get("X-Finalize", "0") == "1"
+        with SESSIONS_LOCK:
+            session = SESSIONS.get(session_id)
+        if session is None:
+            return jsonify({"ok": False, "error": "unknown session"}), 404
+        if int(request.headers.get("X-Sample-Rate", TARGET_SR)) != TARGET_SR:
+            return jsonify({"ok": False, "error": f"sample_rate must be {TARGET_SR}"}), 400
+
+        with session.lock:
+            session.last_seen = time.monotonic()
+            X = np.frombuffer(request.data, dtype="<i2").astype(np.float32) / 32767.0
+            session.append(max(0, int(request.headers.get("X-Offset-Ms", "0"))), X)
+            notes, commit_ms = _process(session, finalize)
+
+        if finalize:
+            with SESSIONS_LOCK:
+                SESSIONS.pop(session_id, None)
+        return jsonify({"ok": True, "commit_ms": commit_ms, "notes": notes})
+    except Exception as e:
+        return jsonify({"ok": False, "error": str(e)}), 500
 
 @app.route("/transcribe", methods=["POST"])
 def transcribe():
@@ -60,9 +392,7 @@ def transcribe():
             sr = TARGET_SR
 
         # Run inference
-        # Returns list of pretty_midi.Note-like dicts:
-        # [{"onset_time": s, "offset_time": s, "pitch": int, "velocity": int}, ...]
-        notes_list, _ = infer.transcribe_audio(audio, hparams, checkpoint_path)
+        notes_list = MODEL.transcribe(audio)
 
         # Normalize output to our field names
         out = []
@@ -78,5 +408,5 @@ def transcribe():
         return jsonify({"error": str(e)}), 500
 
 if __name__ == "__main__":
-    # Default port 8500 inside the container
-    app.run(host="0.0.0.0", port=8500)
+    # threaded: concurrent ingests from different sessions meet in the same batch
+    app.run(host="0.0.0.0", port=PORT, threaded=True)
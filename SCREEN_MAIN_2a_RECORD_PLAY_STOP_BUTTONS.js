@@ -102,6 +102,8 @@ async function RECORD_BUTTON_TAPPED_HANDLER() {
   MARK_UI_DIRTY(); // <- re-render immediately
 
   L_START_AUDIO_CHUNK_NO = 0;
+  L_PROCESSED_THROUGH_FRAME_NO = 0;
+  _lastLiveResultAt = 0;
 
   // Immediate “get ready” message
   setConductor('Get ready…', 'NEUTRAL', 1200);
@@ -220,10 +222,34 @@ function PAUSE_BUTTON_TAPPED_HANDLER() {
 // ─────────────────────────────────────────────────────────────
 let _refreshTimer = null;
 const REFRESH_CADENCE_MS = 300;
+// While the server pushes RESULT messages on the stream socket, panels refresh from the push and
+// the SP poll only runs this often (it still carries YN_STOP_RECORDING / YN_STOP_CLIENT_REFRESH_LOOP).
+const REFRESH_CADENCE_WITH_PUSH_MS = 2000;
+let _lastLiveResultAt = 0;
+let _lastPollAt = 0;
+let _lastPanelsRefreshAt = 0;
+let L_PROCESSED_THROUGH_FRAME_NO = 0;
+
+DeviceEventEmitter.addListener('EVT_LIVE_RESULT', (msg) => {
+  if (!CLIENT_APP_VARIABLES._IS_RECORDING) return;
+  if (String(msg?.RECORDING_ID) !== String(CLIENT_APP_VARIABLES.RECORDING_ID)) return;
+  _lastLiveResultAt = Date.now();
+  const through = Number(msg?.PROCESSED_THROUGH_FRAME_NO) || 0;
+  if (through > L_PROCESSED_THROUGH_FRAME_NO && _lastLiveResultAt - _lastPanelsRefreshAt >= REFRESH_CADENCE_MS) {
+    L_PROCESSED_THROUGH_FRAME_NO = through;
+    _lastPanelsRefreshAt = _lastLiveResultAt;
+    DeviceEventEmitter.emit(EVT_PANELS_REFRESH_REQUESTED);
+  }
+});
 
 async function REFRESH_LOOP_ITERATION() {
   if (!CLIENT_APP_VARIABLES._IS_RECORDING) return;
 
+  const now = Date.now();
+  const pushActive = now - _lastLiveResultAt < REFRESH_CADENCE_WITH_PUSH_MS;
+  if (pushActive && now - _lastPollAt < REFRESH_CADENCE_WITH_PUSH_MS) return;
+  _lastPollAt = now;
+
   try {
     const payload = {
       SP_NAME: 'P_CLIENT_SONG_AUDIO_CHUNK_PROCESSED_GET',
@@ -252,7 +278,7 @@ async function REFRESH_LOOP_ITERATION() {
       typeof CLIENT_APP_VARIABLES.START_AUDIO_CHUNK_NO === 'number' &&
       CLIENT_APP_VARIABLES.START_AUDIO_CHUNK_NO > L_START_AUDIO_CHUNK_NO
     ) {
-      DeviceEventEmitter.emit(EVT_PANELS_REFRESH_REQUESTED);
+      if (!pushActive) DeviceEventEmitter.emit(EVT_PANELS_REFRESH_REQUESTED);
       L_START_AUDIO_CHUNK_NO = CLIENT_APP_VARIABLES.START_AUDIO_CHUNK_NO;
       return;
     }
@@ -0,0 +1,143 @@
+# SERVER_ENGINE_ADMISSION_CONTROL.py
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, Optional, Tuple
+
+from SERVER_ENGINE_APP_VARIABLES import (
+    ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY,
+    AUDIO_FRAME_MS,
+    CREPE_HOP_IN_MS,
+    ADMISSION_CONTROL_YN,
+    ADMISSION_TARGET_UTILIZATION_PCT,
+    ADMISSION_MIN_COST_SAMPLES,
+    ADMISSION_DEFAULT_COST_MS,
+    ADMISSION_CLASS_ANALYZERS,
+    ADMISSION_RETRY_AFTER_MS_MIN,
+    ADMISSION_RETRY_AFTER_MS_MAX,
+    ONS_ENGINE,
+)
+from SERVER_ENGINE_APP_FUNCTIONS import CONSOLE_LOG
+from SERVER_ENGINE_ANALYZER_SCHEDULER import ANALYZER_SCHEDULER
+from SERVER_ENGINE_LOAD_POLICY import LOAD_POLICY, LADDER_APPLY
+
+PREFIX = "ADMISSION"
+
+CPU_CNT = os.cpu_count() or 1
+
+_DECISION_CNT: Dict[str, int] = {"ADMITTED": 0, "REDUCED": 0, "BUSY": 0}
+
+# ─────────────────────────────────────────────────────────────
+# Cost model
+# ─────────────────────────────────────────────────────────────
+# One recording needs (1000 / AUDIO_FRAME_MS) frames analyzed per second of audio; each analyzer it
+# runs occupies a worker slot for its measured ms per frame. Real time holds while, for every pool,
+# demand ≤ slots × 1000 ms/s × target utilization, and the sum over pools fits the box's cores.
+
+def ANALYZER_COST_MS(ANALYZER_NAME: str) -> float:
+    """Measured mean run time per frame (scheduler window), else the configured default."""
+    pool = ANALYZER_SCHEDULER.pools.get(ANALYZER_NAME)
+    if pool is not None and len(pool.run_ms) >= ADMISSION_MIN_COST_SAMPLES:
+        return sum(pool.run_ms) / len(pool.run_ms)
+    return float(ADMISSION_DEFAULT_COST_MS.get(ANALYZER_NAME, 0))
+
+
+def _recording_demand(COMPOSE_PLAY_OR_PRACTICE: Optional[str], COMPOSE_YN_RUN_FFT: Optional[str], REDUCED: bool) -> Dict[str, float]:
+    """ms of analyzer time per second of audio, by analyzer."""
+    CLASS = str(COMPOSE_PLAY_OR_PRACTICE or "").upper()
+    YN_RUN = dict(ADMISSION_CLASS_ANALYZERS.get(CLASS, ADMISSION_CLASS_ANALYZERS["COMPOSE"]))
+    if CLASS == "COMPOSE" and COMPOSE_YN_RUN_FFT == "Y":
+        YN_RUN["FFT"] = YN_RUN["ONS"] = "Y"
+    SETTINGS = LOAD_POLICY.rung_settings(len(LOAD_POLICY.ladder) - 1) if REDUCED else {}
+    if SETTINGS:
+        YN_RUN = LADDER_APPLY(YN_RUN, CLASS, SETTINGS)
+
+    FRAMES_PER_S = 1000.0 / AUDIO_FRAME_MS
+    DEMAND = {"VOLUME_1_MS": FRAMES_PER_S * ANALYZER_COST_MS("VOLUME_1_MS")}
+    for ANALYZER_NAME, YN in YN_RUN.items():
+        if YN != "Y" or (ANALYZER_NAME == "ONS" and ONS_ENGINE == "OAF"):  # OAF is remote, not local CPU
+            continue
+        COST_MS = ANALYZER_COST_MS(ANALYZER_NAME)
+        if ANALYZER_NAME == "CREPE" and SETTINGS.get("CREPE_HOP_IN_MS"):
+            COST_MS *= CREPE_HOP_IN_MS / float(SETTINGS["CREPE_HOP_IN_MS"])  # CREPE cost ∝ frames evaluated
+        DEMAND[ANALYZER_NAME] = FRAMES_PER_S * COST_MS
+    return DEMAND
+
+
+def _active_demand(EXCLUDE_RECORDING_ID: Optional[int] = None) -> Dict[str, float]:
+    """Summed demand of recordings already admitted and not yet stopped."""
+    TOTAL: Dict[str, float] = {}
+    for RECORDING_ID, CONFIG in list(ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY.items()):
+        if RECORDING_ID == EXCLUDE_RECORDING_ID or CONFIG.get("DT_RECORDING_END") is not None:
+            continue
+        if CONFIG.get("ADMISSION_DECISION") not in ("ADMITTED", "REDUCED"):
+            continue
+        for ANALYZER_NAME, MS in _recording_demand(
+            CONFIG.get("COMPOSE_PLAY_OR_PRACTICE"), CONFIG.get("COMPOSE_YN_RUN_FFT"),
+            CONFIG.get("ADMISSION_DECISION") == "REDUCED",
+        ).items():
+            TOTAL[ANALYZER_NAME] = TOTAL.get(ANALYZER_NAME, 0.0) + MS
+    return TOTAL
+
+
+def _capacity_ms_per_s(ANALYZER_NAME: str) -> float:
+    SLOTS = min(max(1, int(ANALYZER_SCHEDULER.concurrency.get(ANALYZER_NAME, 1))), CPU_CNT)
+    return SLOTS * 1000.0 * ADMISSION_TARGET_UTILIZATION_PCT / 100.0
+
+
+def _fits(DEMAND: Dict[str, float]) -> bool:
+    if sum(DEMAND.values()) > CPU_CNT * 1000.0 * ADMISSION_TARGET_UTILIZATION_PCT / 100.0:
+        return False
+    return all(MS <= _capacity_ms_per_s(ANALYZER_NAME) for ANALYZER_NAME, MS in DEMAND.items())
+
+
+def _combine(A: Dict[str, float], B: Dict[str, float]) -> Dict[str, float]:
+    return {K: A.get(K, 0.0) + B.get(K, 0.0) for K in set(A) | set(B)}
+
+
+def _retry_after_ms() -> int:
+    """Time for the current analyzer backlog to drain, clamped to the configured window."""
+    DRAIN_MS = 0.0
+    for ANALYZER_NAME, pool in ANALYZER_SCHEDULER.pools.items():
+        QUEUED = sum(q.qsize() for q in pool.queues) + pool.running
+        DRAIN_MS = max(DRAIN_MS, QUEUED * ANALYZER_COST_MS(ANALYZER_NAME) / pool.concurrency)
+    return int(min(ADMISSION_RETRY_AFTER_MS_MAX, max(ADMISSION_RETRY_AFTER_MS_MIN, DRAIN_MS)))
+
+# ─────────────────────────────────────────────────────────────
+# Decision
+# ─────────────────────────────────────────────────────────────
+
+def ADMISSION_DECIDE(RECORDING_ID: int, COMPOSE_PLAY_OR_PRACTICE: Optional[str], COMPOSE_YN_RUN_FFT: Optional[str]) -> Tuple[str, Dict[str, Any]]:
+    """
+    Returns (ADMISSION_DECISION, reply fields):
+      ADMITTED → full analysis fits the real-time budget
+      REDUCED  → only the deepest ladder rung fits; recording runs reduced for its whole life
+      BUSY     → neither fits; RETRY_AFTER_MS says when to try again
+    """
+    if ADMISSION_CONTROL_YN != "Y":
+        DECISION, REPLY = "ADMITTED", {}
+    else:
+        ACTIVE = _active_demand(EXCLUDE_RECORDING_ID=RECORDING_ID)
+        if _fits(_combine(ACTIVE, _recording_demand(COMPOSE_PLAY_OR_PRACTICE, COMPOSE_YN_RUN_FFT, REDUCED=False))):
+            DECISION, REPLY = "ADMITTED", {}
+        elif _fits(_combine(ACTIVE, _recording_demand(COMPOSE_PLAY_OR_PRACTICE, COMPOSE_YN_RUN_FFT, REDUCED=True))):
+            DECISION, REPLY = "REDUCED", {"ANALYSIS_LEVEL": LOAD_POLICY.ladder[-1].get("NAME")}
+        else:
+            DECISION, REPLY = "BUSY", {"RETRY_AFTER_MS": _retry_after_ms()}
+
+    _DECISION_CNT[DECISION] = _DECISION_CNT.get(DECISION, 0) + 1
+    CONSOLE_LOG(PREFIX, DECISION, {"rid": RECORDING_ID, "class": COMPOSE_PLAY_OR_PRACTICE, **REPLY})
+    return DECISION, REPLY
+
+
+def get_admission_status() -> Dict[str, Any]:
+    ACTIVE = _active_demand()
+    return {
+        "enabled": ADMISSION_CONTROL_YN == "Y",
+        "cpu_cnt": CPU_CNT,
+        "target_utilization_pct": ADMISSION_TARGET_UTILIZATION_PCT,
+        "cost_ms_per_frame": {name: round(ANALYZER_COST_MS(name), 2) for name in ADMISSION_DEFAULT_COST_MS},
+        "demand_ms_per_s": {name: round(ms, 1) for name, ms in ACTIVE.items()},
+        "capacity_ms_per_s": {name: round(_capacity_ms_per_s(name), 1) for name in ACTIVE},
+        "decisions": dict(_DECISION_CNT),
+    }
@@ -0,0 +1,246 @@
+# SERVER_ENGINE_ANALYZER_SCHEDULER.py
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from SERVER_ENGINE_APP_VARIABLES import (
+    ANALYZER_CONCURRENCY,
+    ANALYZER_QUEUE_MAXSIZE,
+    ANALYZER_ORDERED_BY_RECORDING,
+    ANALYZER_DEADLINE_MS,
+)
+from SERVER_ENGINE_APP_FUNCTIONS import CONSOLE_LOG, _stats_ms
+
+PREFIX = "ANALYZER_SCHEDULER"
+
+_METRIC_SAMPLES = 500  # rolling window for wait/run time stats
+
+# ─────────────────────────────────────────────────────────────
+# Per-analyzer bounded queues + fixed worker pools
+# ─────────────────────────────────────────────────────────────
+# Queues are earliest-deadline-first: (deadline, sequence) orders the heap, so a PRACTICE frame
+# enqueued behind a COMPOSE backlog still runs next; equal deadlines stay FIFO.
+# Admission never blocks: Stage-6 checks has_room() for every analyzer a frame needs and leaves the
+# frame for its next pass otherwise, so one saturated pool holds back only the frames that need it.
+# Stateless analyzers: one queue shared by N workers.
+# Analyzers that carry per-recording state (ANALYZER_ORDERED_BY_RECORDING): N lanes with one
+# worker each; a recording always maps to the same lane, so its frames run one at a time, in order.
+
+_JOB_SEQUENCE = itertools.count()
+
+class _AnalyzerJob:
+    __slots__ = ("RECORDING_ID", "AUDIO_FRAME_NO", "FN", "ARGS", "FUTURE", "T_ENQUEUED", "DEADLINE_TS", "SEQ")
+
+    def __init__(self, RECORDING_ID: int, AUDIO_FRAME_NO: int, FN: Callable[..., Awaitable[Any]], ARGS: Tuple[Any, ...],
+                 DEADLINE_TS: float):
+        self.RECORDING_ID = RECORDING_ID
+        self.AUDIO_FRAME_NO = AUDIO_FRAME_NO
+        self.FN = FN
+        self.ARGS = ARGS
+        self.FUTURE: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.T_ENQUEUED = time.perf_counter()
+        self.DEADLINE_TS = DEADLINE_TS
+        self.SEQ = next(_JOB_SEQUENCE)
+
+    def __lt__(self, other: "_AnalyzerJob") -> bool:
+        return (self.DEADLINE_TS, self.SEQ) < (other.DEADLINE_TS, other.SEQ)
+
+
+class _AnalyzerPool:
+    def __init__(self, name: str, concurrency: int, queue_maxsize: int, ordered: bool):
+        self.name = name
+        self.concurrency = max(1, int(concurrency))
+        self.ordered = ordered
+        lane_cnt = self.concurrency if ordered else 1
+        lane_maxsize = max(1, -(-int(queue_maxsize) // lane_cnt))
+        self.queues: List[asyncio.PriorityQueue] = [asyncio.PriorityQueue(maxsize=lane_maxsize) for _ in range(lane_cnt)]
+        # Ordered analyzers: a frame's deadline never sorts ahead of an earlier frame of its recording
+        self.last_deadline_ts: Dict[int, float] = {}
+        self.workers: List[asyncio.Task] = []
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.deferred = 0  # has_room() said no: the frame waited for Stage-6's next pass
+        self.wait_ms: Deque[float] = deque(maxlen=_METRIC_SAMPLES)
+        self.run_ms: Deque[float] = deque(maxlen=_METRIC_SAMPLES)
+
+    def start(self) -> List[asyncio.Task]:
+        if self.workers:
+            return []
+        for worker_no in range(self.concurrency):
+            queue = self.queues[worker_no] if self.ordered else self.queues[0]
+            self.workers.append(asyncio.create_task(self._worker(queue), name=f"analyzer_{self.name}_{worker_no}"))
+        return self.workers
+
+    def queue_for(self, RECORDING_ID: int) -> asyncio.PriorityQueue:
+        return self.queues[int(RECORDING_ID) % len(self.queues)]
+
+    def deadline_for(self, RECORDING_ID: int, DEADLINE_TS: float) -> float:
+        if not self.ordered:
+            return DEADLINE_TS
+        DEADLINE_TS = max(DEADLINE_TS, self.last_deadline_ts.get(RECORDING_ID, DEADLINE_TS))
+        self.last_deadline_ts[RECORDING_ID] = DEADLINE_TS
+        return DEADLINE_TS
+
+    async def _worker(self, queue: asyncio.PriorityQueue) -> None:
+        while True:
+            job: _AnalyzerJob = await queue.get()
+            t_start = time.perf_counter()
+            self.wait_ms.append((t_start - job.T_ENQUEUED) * 1000.0)
+            self.running += 1
+            try:
+                result = await job.FN(*job.ARGS)
+                if not job.FUTURE.done():
+                    job.FUTURE.set_result(result)
+                self.completed += 1
+            except asyncio.CancelledError:
+                if not job.FUTURE.done():
+                    job.FUTURE.cancel()
+                raise
+            except Exception as e:
+                self.failed += 1
+                if not job.FUTURE.done():
+                    job.FUTURE.set_exception(e)
+                CONSOLE_LOG(PREFIX, "ANALYZER_FAILED", {"analyzer": self.name, "rid": job.RECORDING_ID, "frame": job.AUDIO_FRAME_NO, "error": str(e)})
+            finally:
+                self.running -= 1
+                self.run_ms.append((time.perf_counter() - t_start) * 1000.0)
+                queue.task_done()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "ordered_by_recording": self.ordered,
+            "queue_depth": sum(q.qsize() for q in self.queues),
+            "queue_maxsize": sum(q.maxsize for q in self.queues),
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "deferred": self.deferred,
+            "wait_ms": _stats_ms(list(self.wait_ms)),
+            "run_ms": _stats_ms(list(self.run_ms)),
+        }
+
+
+class _DeadlineClassStats:
+    """Frame-level SLO attainment for one COMPOSE_PLAY_OR_PRACTICE class."""
+
+    def __init__(self, budget_ms: int):
+        self.budget_ms = budget_ms
+        self.met = 0
+        self.missed = 0
+        self.lateness_ms: Deque[float] = deque(maxlen=_METRIC_SAMPLES)  # DT_PROCESSING_END - deadline (negative = early)
+
+    def metrics(self) -> Dict[str, Any]:
+        total = self.met + self.missed
+        return {
+            "budget_ms": self.budget_ms,
+            "frames": total,
+            "met": self.met,
+            "missed": self.missed,
+            "attainment_pct": round(100.0 * self.met / total, 2) if total else None,
+            "lateness_ms": _stats_ms(list(self.lateness_ms)),
+        }
+
+
+class AnalyzerScheduler:
+    """Bounded, per-analyzer concurrency for Stage-6 analyzer runs, earliest deadline first."""
+
+    def __init__(self, concurrency: Dict[str, int], queue_maxsize: int, ordered_by_recording: set,
+                 deadline_ms: Dict[str, int]):
+        self.concurrency = dict(concurrency)
+        self.queue_maxsize = queue_maxsize
+        self.ordered_by_recording = set(ordered_by_recording)
+        self.deadline_ms = dict(deadline_ms)
+        self.pools: Dict[str, _AnalyzerPool] = {}
+        self.slo: Dict[str, _DeadlineClassStats] = {}
+
+    def _pool(self, ANALYZER_NAME: str) -> _AnalyzerPool:
+        pool = self.pools.get(ANALYZER_NAME)
+        if pool is None:
+            pool = _AnalyzerPool(
+                ANALYZER_NAME,
+                self.concurrency.get(ANALYZER_NAME, 1),
+                self.queue_maxsize,
+                ANALYZER_NAME in self.ordered_by_recording,
+            )
+            self.pools[ANALYZER_NAME] = pool
+        return pool
+
+    def start(self) -> List[asyncio.Task]:
+        """Create worker tasks for every configured analyzer (idempotent)."""
+        tasks: List[asyncio.Task] = []
+        for ANALYZER_NAME in self.concurrency:
+            tasks.extend(self._pool(ANALYZER_NAME).start())
+        return tasks
+
+    def frame_deadline(self, COMPOSE_PLAY_OR_PRACTICE: Optional[str], DT_FRAME_RECEIVED: Optional[datetime]) -> datetime:
+        """DT_FRAME_RECEIVED + the class budget (unknown classes get the most lenient budget)."""
+        budget_ms = self.deadline_ms.get(str(COMPOSE_PLAY_OR_PRACTICE or "").upper(), max(self.deadline_ms.values(), default=0))
+        return (DT_FRAME_RECEIVED or datetime.now()) + timedelta(milliseconds=budget_ms)
+
+    def has_room(self, ANALYZER_NAME: str, RECORDING_ID: int) -> bool:
+        """Whether the queue this recording's run would land on can take one more job right now."""
+        pool = self._pool(ANALYZER_NAME)
+        if pool.queue_for(RECORDING_ID).full():
+            pool.deferred += 1
+            return False
+        return True
+
+    def submit(self, ANALYZER_NAME: str, RECORDING_ID: int, AUDIO_FRAME_NO: int,
+               FN: Callable[..., Awaitable[Any]], *ARGS: Any, DEADLINE: Optional[datetime] = None) -> asyncio.Future:
+        """
+        Enqueue one analyzer run without waiting; raises asyncio.QueueFull when the queue is full (check has_room first).
+        Jobs run earliest DEADLINE first (no deadline = now). Returns a future resolved with the analyzer's result.
+        """
+        pool = self._pool(ANALYZER_NAME)
+        pool.start()
+        queue = pool.queue_for(RECORDING_ID)
+        if queue.full():
+            raise asyncio.QueueFull(f"{ANALYZER_NAME} queue full")
+        DEADLINE_TS = pool.deadline_for(int(RECORDING_ID), (DEADLINE or datetime.now()).timestamp())
+        job = _AnalyzerJob(int(RECORDING_ID), int(AUDIO_FRAME_NO), FN, ARGS, DEADLINE_TS)
+        queue.put_nowait(job)
+        return job.FUTURE
+
+    def record_frame_done(self, COMPOSE_PLAY_OR_PRACTICE: Optional[str], DEADLINE: Optional[datetime], DT_PROCESSING_END: datetime) -> None:
+        """Count a finished frame as met/missed against its class deadline."""
+        if DEADLINE is None:
+            return
+        CLASS = str(COMPOSE_PLAY_OR_PRACTICE or "").upper() or "UNKNOWN"
+        stats = self.slo.get(CLASS)
+        if stats is None:
+            stats = self.slo[CLASS] = _DeadlineClassStats(self.deadline_ms.get(CLASS, 0))
+        lateness_ms = (DT_PROCESSING_END - DEADLINE).total_seconds() * 1000.0
+        stats.lateness_ms.append(lateness_ms)
+        if lateness_ms <= 0:
+            stats.met += 1
+        else:
+            stats.missed += 1
+
+    def forget_recording(self, RECORDING_ID: int) -> None:
+        for pool in self.pools.values():
+            pool.last_deadline_ts.pop(int(RECORDING_ID), None)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "analyzers": {name: pool.metrics() for name, pool in self.pools.items()},
+            "slo_by_class": {CLASS: stats.metrics() for CLASS, stats in self.slo.items()},
+        }
+
+# ─────────────────────────────────────────────────────────────
+# Global scheduler instance
+# ─────────────────────────────────────────────────────────────
+
+ANALYZER_SCHEDULER = AnalyzerScheduler(ANALYZER_CONCURRENCY, ANALYZER_QUEUE_MAXSIZE, ANALYZER_ORDERED_BY_RECORDING, ANALYZER_DEADLINE_MS)
+
+def start_analyzer_scheduler() -> List[asyncio.Task]:
+    return ANALYZER_SCHEDULER.start()
+
+def get_analyzer_scheduler_metrics() -> Dict[str, Any]:
+    return ANALYZER_SCHEDULER.metrics()
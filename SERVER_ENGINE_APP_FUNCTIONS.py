@@ -362,6 +362,17 @@ def DB_EXEC_SP_SINGLE_ROW(conn, sp_name: str, **params) -> Dict[str, Any]:
     row = cur.fetchone()
     return dict(zip(cols, row)) if row else {}
 
+# Event-loop callers: pyodbc blocks, so connect + execute + fetch run on a worker thread
+def _DB_EXEC_SP_ON_NEW_CONNECTION(fetch: Callable[..., Any], sp_name: str, params: Dict[str, Any]) -> Any:
+    with DB_CONNECT_CTX() as conn:
+        return fetch(conn, sp_name, **params)
+
+async def DB_EXEC_SP_MULTIPLE_ROWS_ASYNC(sp_name: str, **params) -> List[Dict[str, Any]]:
+    return await asyncio.to_thread(_DB_EXEC_SP_ON_NEW_CONNECTION, DB_EXEC_SP_MULTIPLE_ROWS, sp_name, params)
+
+async def DB_EXEC_SP_SINGLE_ROW_ASYNC(sp_name: str, **params) -> Dict[str, Any]:
+    return await asyncio.to_thread(_DB_EXEC_SP_ON_NEW_CONNECTION, DB_EXEC_SP_SINGLE_ROW, sp_name, params)
+
 def DB_EXEC_SP_NO_RESULT(conn, sp_name: str, **params) -> Optional[int]:
     cur = conn.cursor()
     keys = list(params.keys())
@@ -51,11 +51,217 @@ AUDIO_SAMPLES_PER_FRAME = (AUDIO_FRAME_MS * AUDIO_SAMPLE_RATE) // 1000  # 4410 s
 AUDIO_BYTES_PER_FRAME = AUDIO_SAMPLES_PER_FRAME * AUDIO_BYTES_PER_SAMPLE  # 8820 bytes per 100ms frame
 PYIN_HOP_IN_MS = 20
 PYIN_OVERLAP_FOR_ACCURACY_OR_SPEED = "speed"  # Options: "speed", "accuracy"
+# Streaming pYIN: each frame is analyzed with frame_length samples of the previous frame as lookback (no
+# edge padding) and the pitch HMM's Viterbi forward pass is carried across frames instead of restarting.
+# PYIN then joins ANALYZER_ORDERED_BY_RECORDING. "N" = per-frame librosa.pyin(center=True).
+PYIN_STREAMING_YN = os.getenv("PYIN_STREAMING_YN", "Y")
 CREPE_HOP_IN_MS = 20
 CREPE_MODEL_SIZE = "tiny"  # Options: "tiny", "small", "medium", "full" (tiny is fastest on CPU)
 CREPE_BATCH_SIZE_CPU = 128   # Smaller batches for CPU (was 1024)
 CREPE_BATCH_SIZE_GPU = 1024  # Larger batches for GPU
 
+# ─────────────────────────────────────────────────────────────
+# Memory accounting
+# ─────────────────────────────────────────────────────────────
+MEMORY_HIGH_WATER_MARK_MB = int(os.getenv("MEMORY_HIGH_WATER_MARK_MB", "512"))  # 0 disables early release
+MEMORY_CHECK_INTERVAL_MS = int(os.getenv("MEMORY_CHECK_INTERVAL_MS", "1000"))
+
+# ─────────────────────────────────────────────────────────────
+# Analyzer scheduler (Stage-6)
+# ─────────────────────────────────────────────────────────────
+ANALYZER_CONCURRENCY = {  # max simultaneous runs per analyzer
+    "VOLUME_1_MS": int(os.getenv("ANALYZER_CONCURRENCY_VOLUME_1_MS", "2")),
+    "FFT": int(os.getenv("ANALYZER_CONCURRENCY_FFT", "1")),
+    "ONS": int(os.getenv("ANALYZER_CONCURRENCY_ONS", "2")),
+    "PYIN": int(os.getenv("ANALYZER_CONCURRENCY_PYIN", "2")),
+    "CREPE": int(os.getenv("ANALYZER_CONCURRENCY_CREPE", "1")),
+}
+ANALYZER_QUEUE_MAXSIZE = int(os.getenv("ANALYZER_QUEUE_MAXSIZE", "64"))  # per analyzer; Stage-6 defers a frame while any of its queues is full
+ANALYZER_ORDERED_BY_RECORDING = {"ONS"} | ({"PYIN"} if PYIN_STREAMING_YN == "Y" else set())  # analyzers with per-recording state: one frame at a time, in order
+ANALYZER_DEADLINE_MS = {  # frame deadline = DT_FRAME_RECEIVED + budget; earliest deadline runs first
+    "PRACTICE": int(os.getenv("ANALYZER_DEADLINE_MS_PRACTICE", "750")),
+    "PLAY": int(os.getenv("ANALYZER_DEADLINE_MS_PLAY", "1500")),
+    "COMPOSE": int(os.getenv("ANALYZER_DEADLINE_MS_COMPOSE", "10000")),
+}
+
+# ─────────────────────────────────────────────────────────────
+# Load-adaptive degradation ladder (Stage-6)
+# ─────────────────────────────────────────────────────────────
+# Rungs are cumulative: rung N applies every setting of rungs 1..N. Rung 0 = full analysis.
+#   SKIP_FFT_IN_COMPOSE                → COMPOSE frames drop FFT/ONS
+#   PYIN_OVERLAP_FOR_ACCURACY_OR_SPEED → per-frame override of the global PYIN setting (the PYIN_SPEED rung
+#                                        only exists while the global is "accuracy"; at "speed" it would shed nothing)
+#   CREPE_ONLY                         → pitch from CREPE alone (PYIN/FFT/ONS skipped)
+#   CREPE_HOP_IN_MS                    → per-frame override of the global CREPE hop
+ANALYZER_LADDER = [
+    {"NAME": "FULL"},
+    {"NAME": "SKIP_COMPOSE_FFT", "SKIP_FFT_IN_COMPOSE": True},
+    *([{"NAME": "PYIN_SPEED", "PYIN_OVERLAP_FOR_ACCURACY_OR_SPEED": "speed"}] if PYIN_OVERLAP_FOR_ACCURACY_OR_SPEED == "accuracy" else []),
+    {"NAME": "CREPE_ONLY", "CREPE_ONLY": True, "CREPE_HOP_IN_MS": 40},
+]
+LOAD_POLICY_INTERVAL_MS = int(os.getenv("LOAD_POLICY_INTERVAL_MS", "250"))
+LOAD_POLICY_LOOP_LAG_HIGH_MS = int(os.getenv("LOAD_POLICY_LOOP_LAG_HIGH_MS", "150"))   # step down above this...
+LOAD_POLICY_LOOP_LAG_LOW_MS = int(os.getenv("LOAD_POLICY_LOOP_LAG_LOW_MS", "40"))      # ...step up only below this
+LOAD_POLICY_QUEUE_FILL_HIGH_PCT = int(os.getenv("LOAD_POLICY_QUEUE_FILL_HIGH_PCT", "75"))
+LOAD_POLICY_QUEUE_FILL_LOW_PCT = int(os.getenv("LOAD_POLICY_QUEUE_FILL_LOW_PCT", "20"))
+LOAD_POLICY_STEP_DOWN_HOLD_MS = int(os.getenv("LOAD_POLICY_STEP_DOWN_HOLD_MS", "1000"))  # sustained overload before degrading
+LOAD_POLICY_STEP_UP_HOLD_MS = int(os.getenv("LOAD_POLICY_STEP_UP_HOLD_MS", "5000"))      # sustained calm before recovering
+
+# ─────────────────────────────────────────────────────────────
+# Admission control (START)
+# ─────────────────────────────────────────────────────────────
+# Demand = frames/s × measured ms per frame for each analyzer a recording runs; a START is admitted
+# only while every analyzer pool, and the box as a whole, stays under the target utilization.
+ADMISSION_CONTROL_YN = os.getenv("ADMISSION_CONTROL_YN", "Y")
+ADMISSION_TARGET_UTILIZATION_PCT = int(os.getenv("ADMISSION_TARGET_UTILIZATION_PCT", "70"))
+ADMISSION_MIN_COST_SAMPLES = 20  # below this many runs an analyzer is costed at its default
+ADMISSION_DEFAULT_COST_MS = {    # ms per Stage-6 frame (AUDIO_FRAME_MS of audio) until measured
+    "VOLUME_1_MS": 2,
+    "FFT": 20,
+    "ONS": 20,
+    "PYIN": 150,
+    "CREPE": 120,
+}
+ADMISSION_CLASS_ANALYZERS = {    # analyzer mix assumed per recording class (PLAY/PRACTICE flags come per frame from the song)
+    "COMPOSE": {"FFT": "N", "ONS": "N", "PYIN": "Y", "CREPE": "Y"},
+    "PLAY": {"FFT": "N", "ONS": "N", "PYIN": "Y", "CREPE": "N"},
+    "PRACTICE": {"FFT": "N", "ONS": "N", "PYIN": "Y", "CREPE": "N"},
+}
+ADMISSION_RETRY_AFTER_MS_MIN = int(os.getenv("ADMISSION_RETRY_AFTER_MS_MIN", "3000"))
+ADMISSION_RETRY_AFTER_MS_MAX = int(os.getenv("ADMISSION_RETRY_AFTER_MS_MAX", "60000"))
+
+# ─────────────────────────────────────────────────────────────
+# Song frame plan cache (START, PLAY/PRACTICE)
+# ─────────────────────────────────────────────────────────────
+# P_ENGINE_SONG_100_MS_AUDIO_FRAME_FOR_PLAY_AND_PRACTICE_GET returns the same per-frame plan for every
+# recording of one song, so the rows are kept per (SONG_ID, SONG_VERSION) from the recording parameters.
+# LRU beyond SONG_FRAME_PLAN_CACHE_MAX_SONGS; reloaded after SONG_FRAME_PLAN_CACHE_TTL_S or an explicit
+# POST /song_frame_plan_cache/invalidate.
+SONG_FRAME_PLAN_CACHE_YN = os.getenv("SONG_FRAME_PLAN_CACHE_YN", "Y")
+SONG_FRAME_PLAN_CACHE_MAX_SONGS = int(os.getenv("SONG_FRAME_PLAN_CACHE_MAX_SONGS", "64"))
+SONG_FRAME_PLAN_CACHE_TTL_S = int(os.getenv("SONG_FRAME_PLAN_CACHE_TTL_S", "600"))
+
+# ─────────────────────────────────────────────────────────────
+# Song reference index + running score (PLAY/PRACTICE)
+# ─────────────────────────────────────────────────────────────
+# P_ENGINE_SONG_REFERENCE_NOTE_GET (START_MS, END_MS, MIDI per expected note) is turned once per song into
+# per-ms numpy arrays (cached like the frame plan). PYIN/CREPE rows are scored against it as frames finish:
+# in tune = within SONG_SCORE_INTONATION_TOLERANCE_CENTS of the expected note, on time = the note is first
+# hit within SONG_SCORE_TIMING_TOLERANCE_MS of its start. Rows below SONG_SCORE_MIN_CONFIDENCE are ignored.
+SONG_SCORE_YN = os.getenv("SONG_SCORE_YN", "Y")
+SONG_SCORE_MIN_CONFIDENCE = float(os.getenv("SONG_SCORE_MIN_CONFIDENCE", "0.5"))
+SONG_SCORE_INTONATION_TOLERANCE_CENTS = float(os.getenv("SONG_SCORE_INTONATION_TOLERANCE_CENTS", "50"))
+SONG_SCORE_TIMING_TOLERANCE_MS = int(os.getenv("SONG_SCORE_TIMING_TOLERANCE_MS", "100"))
+
+# ─────────────────────────────────────────────────────────────
+# Streaming note segmenter (Stage-6, SOURCE_METHOD 'SEG')
+# ─────────────────────────────────────────────────────────────
+# Finished frames are walked in order: a ms is voiced when it has pitch (PYIN, else CREPE) with
+# confidence ≥ NOTE_SEGMENTER_MIN_CONFIDENCE and 1 ms volume ≥ NOTE_SEGMENTER_MIN_DB. A note ends after
+# NOTE_SEGMENTER_MAX_GAP_MS unvoiced or when another semitone holds NOTE_SEGMENTER_MIN_CHANGE_MS; notes
+# shorter than NOTE_SEGMENTER_MIN_NOTE_MS are dropped. Closed notes go straight to ENGINE_LOAD_NOTE.
+NOTE_SEGMENTER_YN = os.getenv("NOTE_SEGMENTER_YN", "Y")
+NOTE_SEGMENTER_SOURCE_ORDER = ("PYIN", "CREPE")
+NOTE_SEGMENTER_MIN_CONFIDENCE = float(os.getenv("NOTE_SEGMENTER_MIN_CONFIDENCE", "0.5"))
+NOTE_SEGMENTER_MIN_DB = float(os.getenv("NOTE_SEGMENTER_MIN_DB", "-50"))
+NOTE_SEGMENTER_MAX_GAP_MS = int(os.getenv("NOTE_SEGMENTER_MAX_GAP_MS", "30"))
+NOTE_SEGMENTER_MIN_CHANGE_MS = int(os.getenv("NOTE_SEGMENTER_MIN_CHANGE_MS", "40"))
+NOTE_SEGMENTER_MIN_NOTE_MS = int(os.getenv("NOTE_SEGMENTER_MIN_NOTE_MS", "60"))
+
+# ─────────────────────────────────────────────────────────────
+# Onset detection (the ONS analyzer, YN_RUN_ONS frames)
+# ─────────────────────────────────────────────────────────────
+# ONS_ENGINE picks what runs for a YN_RUN_ONS frame: 'FLUX' = in-process spectral flux onsets + HPS
+# pitch on AUDIO_ARRAY_16000 (SOURCE_METHOD 'FLUX'); 'OAF' = the Onsets & Frames container over HTTP.
+# Flux: dB-magnitude STFT (ONSET_FLUX_N_FFT window, ONSET_FLUX_HOP_MS hop, zero-padded to
+# ONSET_FLUX_N_FFT_PADDED for pitch); ODF = mean rectified dB rise per bin between FMIN and FMAX. An onset
+# is a local ODF peak ≥ its median over the last ONSET_FLUX_MEDIAN_MS + ONSET_FLUX_DELTA_DB, at least
+# ONSET_FLUX_MIN_INTER_ONSET_MS after the previous one.
+# A note runs to the next onset or until the hop level drops below ONSET_FLUX_MIN_DB.
+ONS_ENGINE = os.getenv("ONS_ENGINE", "FLUX").upper()
+ONSET_FLUX_N_FFT = int(os.getenv("ONSET_FLUX_N_FFT", "1024"))
+ONSET_FLUX_N_FFT_PADDED = int(os.getenv("ONSET_FLUX_N_FFT_PADDED", "4096"))
+ONSET_FLUX_HOP_MS = int(os.getenv("ONSET_FLUX_HOP_MS", "10"))
+ONSET_FLUX_DELTA_DB = float(os.getenv("ONSET_FLUX_DELTA_DB", "3.0"))
+ONSET_FLUX_MEDIAN_MS = int(os.getenv("ONSET_FLUX_MEDIAN_MS", "200"))
+ONSET_FLUX_MIN_INTER_ONSET_MS = int(os.getenv("ONSET_FLUX_MIN_INTER_ONSET_MS", "60"))
+ONSET_FLUX_MIN_DB = float(os.getenv("ONSET_FLUX_MIN_DB", "-50"))
+ONSET_FLUX_PITCH_MS = int(os.getenv("ONSET_FLUX_PITCH_MS", "50"))       # HPS over this much audio after the onset
+ONSET_FLUX_HPS_HARMONICS = int(os.getenv("ONSET_FLUX_HPS_HARMONICS", "4"))
+ONSET_FLUX_FMIN_HZ = float(os.getenv("ONSET_FLUX_FMIN_HZ", "180"))      # just under violin G3
+ONSET_FLUX_FMAX_HZ = float(os.getenv("ONSET_FLUX_FMAX_HZ", "2000"))
+
+# ─────────────────────────────────────────────────────────────
+# OAF session client (ONS_ENGINE='OAF')
+# ─────────────────────────────────────────────────────────────
+# One shared keep-alive pool (httpx.AsyncClient, else a requests.Session in worker threads). A session's
+# ingests go out one at a time, in frame order; sessions run concurrently up to OAF_CLIENT_MAX_CONNECTIONS.
+# After OAF_CIRCUIT_FAILURES consecutive failures (timeout, connection error, 5xx) calls fail fast for
+# OAF_CIRCUIT_RESET_MS, then a single trial call decides whether to close the circuit again.
+OAF_HOST = os.getenv("OAF_HOST", "127.0.0.1")
+OAF_CLIENT_MAX_CONNECTIONS = int(os.getenv("OAF_CLIENT_MAX_CONNECTIONS", "16"))
+OAF_CLIENT_CONNECT_TIMEOUT_S = float(os.getenv("OAF_CLIENT_CONNECT_TIMEOUT_S", "2"))
+OAF_CLIENT_START_TIMEOUT_S = float(os.getenv("OAF_CLIENT_START_TIMEOUT_S", "10"))
+OAF_CLIENT_INGEST_TIMEOUT_S = float(os.getenv("OAF_CLIENT_INGEST_TIMEOUT_S", "15"))
+OAF_CIRCUIT_FAILURES = int(os.getenv("OAF_CIRCUIT_FAILURES", "5"))
+OAF_CIRCUIT_RESET_MS = int(os.getenv("OAF_CIRCUIT_RESET_MS", "10000"))
+
+# ─────────────────────────────────────────────────────────────
+# Frame gap recovery (Stage-4)
+# ─────────────────────────────────────────────────────────────
+# A client frame missing below the highest frame received is a gap. After RESEND_AFTER_MS the client
+# is sent ACK {MISSING_FRAMES}; if the gap is still open after ZERO_FILL_AFTER_MS it is filled with
+# silence so Stage-3B (which splits strictly in order) never stalls on a single dropped frame.
+FRAME_REORDER_WINDOW_FRAMES = 128  # = client RESEND_BUFFER_SIZE; older gaps can no longer be resent
+FRAME_GAP_RESEND_AFTER_MS = int(os.getenv("FRAME_GAP_RESEND_AFTER_MS", "250"))
+FRAME_GAP_RESEND_INTERVAL_MS = int(os.getenv("FRAME_GAP_RESEND_INTERVAL_MS", "500"))  # repeat the request while open
+FRAME_GAP_ZERO_FILL_AFTER_MS = int(os.getenv("FRAME_GAP_ZERO_FILL_AFTER_MS", "2000"))
+
+# ─────────────────────────────────────────────────────────────
+# Flow control (server → client frame credits)
+# ─────────────────────────────────────────────────────────────
+# Backlog = audio received but not yet analyzed (unsplit client frames + split frames not finished
+# by Stage-6). Each recording is granted FLOW {GRANT_THROUGH_FRAME_NO}: the client may send up to
+# that frame and holds later ones until a new grant arrives. Grants never move backwards.
+FLOW_CONTROL_YN = os.getenv("FLOW_CONTROL_YN", "Y")
+FLOW_CONTROL_INTERVAL_MS = int(os.getenv("FLOW_CONTROL_INTERVAL_MS", "250"))
+FLOW_MAX_BACKLOG_MS = int(os.getenv("FLOW_MAX_BACKLOG_MS", "4000"))          # credit shrinks to zero at this backlog
+FLOW_GRANT_REFRESH_MS = int(os.getenv("FLOW_GRANT_REFRESH_MS", "1000"))      # resend an unchanged grant this often
+FLOW_DEFAULT_CLIENT_FRAME_MS = 100  # until the first client frame shows its real duration
+
+# ─────────────────────────────────────────────────────────────
+# Live result push (server → client, same /ws/stream socket)
+# ─────────────────────────────────────────────────────────────
+# When Stage-6 finishes a frame its pitch/confidence/volume go out as RESULT on the recording's
+# connection. Each connection has one bounded outbound queue; unsent RESULTs for a recording are
+# coalesced into one message while the client is slow, and dropped oldest-first when the queue is full.
+LIVE_RESULT_PUSH_YN = os.getenv("LIVE_RESULT_PUSH_YN", "Y")
+WS_OUTBOUND_QUEUE_MAXSIZE = int(os.getenv("WS_OUTBOUND_QUEUE_MAXSIZE", "64"))
+LIVE_RESULT_VOLUME_HOP_MS = 10            # 1 ms volume is reduced to the loudest dB per hop
+LIVE_RESULT_MAX_FRAMES_PER_MESSAGE = 20   # a coalesced RESULT keeps only the newest frames
+
+# ─────────────────────────────────────────────────────────────
+# Ingest queue (receive loop → per-connection consumer)
+# ─────────────────────────────────────────────────────────────
+# /ws/stream's receive loop only reads the socket and queues raw messages; one consumer per connection
+# unpacks, hashes and stores them. A frame that finds the queue full is dropped (Stage-4 asks for a
+# resend); control messages wait for room. Receive jitter is measured on the arrival timestamps.
+WS_INGEST_QUEUE_MAXSIZE = int(os.getenv("WS_INGEST_QUEUE_MAXSIZE", "256"))
+
+# ─────────────────────────────────────────────────────────────
+# Heartbeats + idle/abandoned reaping
+# ─────────────────────────────────────────────────────────────
+# Every open connection gets {MESSAGE_TYPE:'PING'} each WS_PING_INTERVAL_MS; any message (PONG, FRAME,
+# ...) counts as activity. Silent past WS_IDLE_TIMEOUT_MS → closed. A recording whose connection has
+# been closed for ABANDONED_RECORDING_GRACE_MS without STOP gets a synthesized STOP (finalize + purge).
+# A purged recording stays remembered for PURGED_RECORDING_TTL_MS so frames still in flight for it
+# (resends, queued copies) are dropped as PURGED instead of re-creating state nothing will consume.
+WS_PING_INTERVAL_MS = int(os.getenv("WS_PING_INTERVAL_MS", "5000"))
+WS_IDLE_TIMEOUT_MS = int(os.getenv("WS_IDLE_TIMEOUT_MS", "20000"))
+ABANDONED_RECORDING_GRACE_MS = int(os.getenv("ABANDONED_RECORDING_GRACE_MS", "15000"))
+PURGED_RECORDING_TTL_MS = int(os.getenv("PURGED_RECORDING_TTL_MS", "600000"))
+CONNECTION_REAPER_INTERVAL_MS = 1000
+
 
 # Audio frame alignment buffers (per recording) - Simple dictionary structure
 # Key: RECORDING_ID, Value: Dictionary with buffer data
@@ -74,6 +280,7 @@ class ENGINE_DB_LOG_RECORDING_CONFIG_DICT(TypedDict):
     COMPOSE_PLAY_OR_PRACTICE: NotRequired[Optional[str]]
     AUDIO_STREAM_FILE_NAME: NotRequired[Optional[str]]
     COMPOSE_YN_RUN_FFT: NotRequired[Optional[str]]
+    ADMISSION_DECISION: NotRequired[Optional[Literal["ADMITTED", "REDUCED", "BUSY", "FAILED"]]]
     WEBSOCKET_CONNECTION_ID: NotRequired[Optional[int]]
     DT_PROCESS_WEBSOCKET_START_MESSAGE_DONE: NotRequired[Optional[datetime.datetime]]
     MAX_PRE_SPLIT_AUDIO_FRAME_NO_SPLIT: NotRequired[Optional[int]]
@@ -115,7 +322,7 @@ class ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_DICT(TypedDict):
     DT_FRAME_RECEIVED: NotRequired[Optional[datetime.datetime]]
     DT_FRAME_PAIRED_WITH_WEBSOCKETS_METADATA: NotRequired[Optional[datetime.datetime]]
     AUDIO_FRAME_SIZE_BYTES: NotRequired[Optional[int]]
-    AUDIO_FRAME_ENCODING: NotRequired[Optional[Literal["raw", "pcm16", "base64", "hex"]]]
+    AUDIO_FRAME_ENCODING: NotRequired[Optional[Literal["raw", "pcm16", "base64", "hex", "zero_fill"]]]
     AUDIO_FRAME_SHA256_HEX: NotRequired[Optional[str]]
     WEBSOCKET_CONNECTION_ID: NotRequired[Optional[int]]
     PRE_SPLIT_AUDIO_FRAME_DURATION_IN_MS: NotRequired[Optional[int]]
@@ -148,6 +355,11 @@ class ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_DICT(TypedDict):
     YN_RUN_ONS: NotRequired[Optional[str]]
     YN_RUN_PYIN: NotRequired[Optional[str]]
     YN_RUN_CREPE: NotRequired[Optional[str]]
+    DT_FRAME_RECEIVED: NotRequired[Optional[datetime.datetime]]
+    DT_PROCESSING_DEADLINE: NotRequired[Optional[datetime.datetime]]       # memory-only: EDF key for Stage-6
+    ANALYZER_LADDER_RUNG: NotRequired[Optional[int]]                        # degradation rung the frame was dispatched at
+    PYIN_OVERLAP_FOR_ACCURACY_OR_SPEED: NotRequired[Optional[str]]          # per-frame override (ladder)
+    CREPE_HOP_IN_MS: NotRequired[Optional[int]]                             # per-frame override (ladder)
     DT_FRAME_DECODED_FROM_BASE64_TO_BYTES: NotRequired[Optional[datetime.datetime]]
 
     DT_FRAME_DECODED_FROM_BYTES_INTO_AUDIO_SAMPLES: NotRequired[Optional[datetime.datetime]]
@@ -215,4 +427,8 @@ RECORDING_CONFIG_ARRAY: Dict[int, RECORDING_CONFIG_DICT] = {}  #int = RECORDING_
 ENGINE_DB_LOG_STEPS_ARRAY: Dict[int, ENGINE_DB_LOG_STEPS_DICT] = {}  #int = STEP_ID
 ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY: Dict[int, ENGINE_DB_LOG_WEBSOCKET_CONNECTION_DICT] = {}  #int = WEBSOCKET_CONNECTION_ID
 ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ARRAY: Dict[int, ENGINE_DB_LOG_WEBSOCKET_MESSAGE_DICT] = {}  #int = MESSAGE_ID
+RECORDING_OUTSTANDING_WORK_ARRAY: Dict[int, int] = {}  #int = RECORDING_ID → units of work not yet finished
+RECORDING_FRAME_WINDOW_ARRAY: Dict[int, Dict[str, Any]] = {}  #int = RECORDING_ID → Stage-4 reorder window (received bitmap, open gaps)
+PURGED_RECORDING_ARRAY: Dict[int, datetime.datetime] = {}  #int = RECORDING_ID → DT purged; late frames for it are dropped until PURGED_RECORDING_TTL_MS
+LIVE_RESULT_ARRAY: Dict[int, Dict[int, Dict[str, Any]]] = {}  #int = RECORDING_ID, AUDIO_FRAME_NO → compact analyzer output awaiting push
 RESULT_SET_P_ENGINE_DB_LOG_COLUMNS_BY_TABLE_NAME_GET_ARRAY: Dict[str, RESULT_SET_P_ENGINE_DB_LOG_COLUMNS_BY_TABLE_NAME_GET_DICT] = {}  #str = TABLE_NAME
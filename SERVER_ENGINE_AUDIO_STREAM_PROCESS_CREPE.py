@@ -22,7 +22,7 @@ from SERVER_ENGINE_APP_VARIABLES import (
     SPLIT_100_MS_AUDIO_FRAME_ARRAY,               # volatile: raw bytes only
     ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY,  # durable: metadata only (assumed pre-populated)
     AUDIO_FRAME_MS,
-    CREPE_HOP_IN_MS,
+    CREPE_HOP_IN_MS as CREPE_HOP_IN_MS_DEFAULT,
     CREPE_MODEL_SIZE,
     CREPE_BATCH_SIZE_CPU,
     CREPE_BATCH_SIZE_GPU
@@ -34,6 +34,9 @@ from SERVER_ENGINE_APP_FUNCTIONS import (
     DB_BULK_INSERT,
     ENGINE_DB_LOG_FUNCTIONS_INS,  # logging decorator
 )
+from SERVER_ENGINE_LIVE_RESULTS import LIVE_RESULT_PUT_HZ
+from SERVER_ENGINE_SONG_SCORE import SONG_SCORE_PUT_HZ
+from SERVER_ENGINE_NOTE_SEGMENTER import NOTE_SEGMENTER_PUT_HZ
 
 PREFIX = "CREPE"
 
@@ -86,7 +89,8 @@ async def SERVER_ENGINE_AUDIO_STREAM_PROCESS_CREPE(
     AUDIO_FRAME_NO: int,
     AUDIO_16000: Optional[np.ndarray] = None,
 ) -> int:
-    # CREPE_HOP_IN_MS = 10
+    # Per-frame hop override from the load ladder, else the global setting
+    CREPE_HOP_IN_MS = int(ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY[RECORDING_ID][AUDIO_FRAME_NO].get("CREPE_HOP_IN_MS") or CREPE_HOP_IN_MS_DEFAULT)
     SAMPLE_RATE = 16000
     HOP = int(SAMPLE_RATE * CREPE_HOP_IN_MS / 1000)  # 16000 * 10 / 1000 = 160 (int) # 10 ms @ 16 kHz for CREPE
     #ANALYSIS_HOP_MS = 10     # CREPE hop size
@@ -183,6 +187,9 @@ async def SERVER_ENGINE_AUDIO_STREAM_PROCESS_CREPE(
             rows.append((int(START_MS_ARRAY[i]), int(END_MS_ARRAY[i]), hz, conf))
 
     ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY[RECORDING_ID][AUDIO_FRAME_NO]["CREPE_RECORD_CNT"] = len(rows)
+    LIVE_RESULT_PUT_HZ(RECORDING_ID, AUDIO_FRAME_NO, "CREPE", rows)
+    SONG_SCORE_PUT_HZ(RECORDING_ID, "CREPE", rows)
+    NOTE_SEGMENTER_PUT_HZ(RECORDING_ID, AUDIO_FRAME_NO, "CREPE", rows)
 
     if not rows:
         CONSOLE_LOG(PREFIX, "NO_ROWS", {"rid": RECORDING_ID, "frame": AUDIO_FRAME_NO})
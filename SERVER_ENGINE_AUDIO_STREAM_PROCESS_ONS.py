@@ -10,7 +10,6 @@ from typing import Iterable, List, Tuple, Optional, Dict, Any
 
 import asyncio
 import builtins as _bi
-import requests
 import numpy as np
 
 # pretty_midi no longer required for streaming JSON notes; keep optional
@@ -29,6 +28,7 @@ from SERVER_ENGINE_APP_FUNCTIONS import (
     DB_BULK_INSERT,
     ENGINE_DB_LOG_FUNCTIONS_INS,  # logging decorator
 )
+from SERVER_ENGINE_OAF_CLIENT import OAF_CLIENT
 
 PREFIX = "ONS"
 
@@ -51,6 +51,9 @@ NoteRow = Tuple[int, int, int, int, str]
 # ----------------------------------------------------------------------
 _ONS_STREAM_STATE: Dict[int, Dict[str, Any]] = {}
 
+_STATS = {"sessions_started": 0, "sessions_finalized": 0, "sessions_finalize_failed": 0,
+          "sessions_forgotten": 0, "tail_notes": 0}
+
 
 # ─────────────────────────────────────────────────────────────
 # DB bulk insert (frame-keyed)
@@ -95,29 +98,24 @@ def _float32_to_pcm16le_bytes(x: np.ndarray) -> bytes:
     return (x * 32767.0).astype("<i2", copy=False).tobytes()
 
 
-def _ons_service_url() -> str:
-    host = os.getenv("OAF_HOST", "127.0.0.1")
-    port = int(os.getenv("OAF_PORT", "9077"))
-    return f"http://{host}:{port}".rstrip("/")
-
-
-def _get_or_open_session(RECORDING_ID: int) -> Optional[str]:
+async def _get_or_open_session(RECORDING_ID: int) -> Optional[str]:
     """
     Ensure a streaming session exists for this RECORDING_ID.
-    POST /session/start {sample_rate} → {ok, session_id}
+    POST /session/start {sample_rate} → {ok, session_id}  (pooled, see SERVER_ENGINE_OAF_CLIENT)
     """
     state = _ONS_STREAM_STATE.get(RECORDING_ID)
     if state and state.get("open") and isinstance(state.get("session_id"), str):
         return _bi.str(state["session_id"])
 
-    url = _ons_service_url() + "/session/start"
-    resp = requests.post(url, json={"sample_rate": SAMPLE_RATE}, timeout=10)
-    if not resp.ok:
-        CONSOLE_LOG(PREFIX, "SESSION_START_HTTP_ERROR", {"rid": int(RECORDING_ID), "status": resp.status_code})
+    resp = await OAF_CLIENT.start_session(SAMPLE_RATE)
+    if resp is None:
+        return None                     # transport error / circuit open (logged by the client)
+    status, data = resp
+    if not 200 <= status < 300:
+        CONSOLE_LOG(PREFIX, "SESSION_START_HTTP_ERROR", {"rid": int(RECORDING_ID), "status": status})
         return None
 
-    data = resp.json()
-    if not data.get("ok"):
+    if not data or not data.get("ok"):
         CONSOLE_LOG(PREFIX, "SESSION_START_NOT_OK", {"rid": int(RECORDING_ID), "data": data})
         return None
 
@@ -131,15 +129,15 @@ def _get_or_open_session(RECORDING_ID: int) -> Optional[str]:
         "last_committed": -1,   # nothing committed yet
         "open": True,
     }
+    _STATS["sessions_started"] += 1
     return session_id
 
 
-def _session_ingest_and_get_notes(
+async def _session_ingest_and_get_notes(
     session_id: str,
     offset_ms: int,
     pcm16_bytes: bytes,
     finalize: bool = False,
-    timeout_s: int = 15,
 ) -> Optional[Dict[str, Any]]:
     """
     POST raw PCM bytes to /session/ingest with headers:
@@ -156,28 +154,22 @@ def _session_ingest_and_get_notes(
           ...
         ]
       }
+    Calls for one session go out one at a time, in call order, on a pooled keep-alive connection.
     """
-    url = _ons_service_url() + "/session/ingest"
-    headers = {
-        "Content-Type": "application/octet-stream",
-        "X-Session-Id": session_id,
-        "X-Offset-Ms": _bi.str(int(offset_ms)),
-        "X-Finalize": "1" if finalize else "0",
-        "X-Sample-Rate": _bi.str(int(SAMPLE_RATE)),
-    }
-
-    resp = requests.post(url, data=pcm16_bytes, headers=headers, timeout=timeout_s)
-
-    if not resp.ok:
-        # Some servers use 204 on finalize with no body; tolerate that by returning empty ok
-        if finalize and resp.status_code == 204:
-            return {"ok": True, "commit_ms": None, "notes": []}
-        CONSOLE_LOG(PREFIX, "SESSION_INGEST_HTTP_ERROR", {"sid": session_id, "status": resp.status_code})
+    resp = await OAF_CLIENT.ingest(session_id, offset_ms, pcm16_bytes, finalize, SAMPLE_RATE)
+    if resp is None:
+        return None                     # transport error / circuit open (logged by the client)
+    status, data = resp
+
+    # Some servers use 204 on finalize with no body; tolerate that by returning empty ok
+    if finalize and status == 204:
+        return {"ok": True, "commit_ms": None, "notes": []}
+    if not 200 <= status < 300:
+        CONSOLE_LOG(PREFIX, "SESSION_INGEST_HTTP_ERROR", {"sid": session_id, "status": status})
         return None
 
-    data = resp.json()
-    if not data.get("ok", False):
-        CONSOLE_LOG(PREFIX, "SESSION_INGEST_NOT_OK", {"sid": session_id, "data": {k: data.get(k) for k in ("ok","error","commit_ms")}})
+    if not data or not data.get("ok", False):
+        CONSOLE_LOG(PREFIX, "SESSION_INGEST_NOT_OK", {"sid": session_id, "data": {k: (data or {}).get(k) for k in ("ok","error","commit_ms")}})
         return None
 
     # Normalize shapes
@@ -269,7 +261,7 @@ async def SERVER_ENGINE_AUDIO_STREAM_PROCESS_ONS(
         return 0
 
     # Session
-    session_id = _get_or_open_session(int(RECORDING_ID))
+    session_id = await _get_or_open_session(int(RECORDING_ID))
     if not session_id:
         ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY[RECORDING_ID][AUDIO_FRAME_NO]["ONS_RECORD_CNT"] = 0
         ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY[RECORDING_ID][AUDIO_FRAME_NO]["DT_END_ONS"] = datetime.now()
@@ -279,9 +271,7 @@ async def SERVER_ENGINE_AUDIO_STREAM_PROCESS_ONS(
     pcm16_bytes = _float32_to_pcm16le_bytes(AUDIO_ARRAY_16000.astype(np.float32, copy=False))
     START_MS = FRAME_MS * max(int(AUDIO_FRAME_NO) - 1, 0)
 
-    # Blocking HTTP → run in a worker thread
-    resp = await asyncio.to_thread(
-        _session_ingest_and_get_notes,
+    resp = await _session_ingest_and_get_notes(
         session_id,
         START_MS,
         pcm16_bytes,
@@ -331,16 +321,17 @@ async def SERVER_ENGINE_AUDIO_STREAM_PROCESS_ONS(
 
 # ─────────────────────────────────────────────────────────────
 # PUBLIC ENTRY: finalize a recording’s O&F session
-#   Call this after STOP (or when you know the last frame arrived)
-#   to flush tail notes and close session server-side.
+#   Called from FINALIZE_RECORDING once the recording's last frame (and so its last
+#   ONS call) is done: flushes tail notes and closes the session server-side.
 # ─────────────────────────────────────────────────────────────
 @ENGINE_DB_LOG_FUNCTIONS_INS()
 async def SERVER_ENGINE_AUDIO_STREAM_PROCESS_ONS_FINALIZE(RECORDING_ID: int) -> int:
     """
-    Flush any remaining notes and close the streaming session.
+    Flush any remaining notes (one bulk insert) and close the streaming session.
+    Client-side state is released whether or not the service answered.
     Returns number of rows inserted during finalize (if any).
     """
-    state = _ONS_STREAM_STATE.get(int(RECORDING_ID))
+    state = _ONS_STREAM_STATE.pop(int(RECORDING_ID), None)
     if not state or not state.get("open"):
         return 0
 
@@ -348,38 +339,54 @@ async def SERVER_ENGINE_AUDIO_STREAM_PROCESS_ONS_FINALIZE(RECORDING_ID: int) ->
     if not session_id:
         return 0
 
-    # Send an empty ingest with finalize=1 (service should flush + close)
-    resp = await asyncio.to_thread(
-        _session_ingest_and_get_notes,
-        session_id,
-        offset_ms=int(state.get("last_committed", 0)),  # offset irrelevant for finalize
-        pcm16_bytes=b"",
-        finalize=True,
-    )
+    try:
+        # Send an empty ingest with finalize=1 (service should flush + close)
+        resp = await _session_ingest_and_get_notes(
+            session_id,
+            offset_ms=int(state.get("last_committed", 0)),  # offset irrelevant for finalize
+            pcm16_bytes=b"",
+            finalize=True,
+        )
+    finally:
+        OAF_CLIENT.forget_session(session_id)
 
-    inserted_total = 0
-    if resp and resp.get("ok", False):
-        commit_ms = resp.get("commit_ms")
-        notes = resp.get("notes", [])
-        last_committed_before = int(state.get("last_committed", -1))
+    if not resp or not resp.get("ok", False):
+        _STATS["sessions_finalize_failed"] += 1
+        CONSOLE_LOG(PREFIX, "FINALIZE_FAILED", {"rid": int(RECORDING_ID), "sid": session_id})
+        return 0
 
-        # Use AUDIO_FRAME_NO=0 for finalize inserts (or any sentinel) since they span frames
-        inserted_total = _insert_committed_notes(
-            RECORDING_ID=int(RECORDING_ID),
-            AUDIO_FRAME_NO=0,
-            notes=notes,
-            last_committed_before=last_committed_before,
-            commit_ms=commit_ms if commit_ms is not None else 10**12,  # treat as "commit all"
-        )
+    commit_ms = resp.get("commit_ms")
+    notes = resp.get("notes", [])
+    last_committed_before = int(state.get("last_committed", -1))
 
-    # Mark session closed
-    state["open"] = False
-    _ONS_STREAM_STATE[int(RECORDING_ID)] = state
+    # Use AUDIO_FRAME_NO=0 for finalize inserts (or any sentinel) since they span frames
+    inserted_total = await asyncio.to_thread(
+        _insert_committed_notes,
+        RECORDING_ID=int(RECORDING_ID),
+        AUDIO_FRAME_NO=0,
+        notes=notes,
+        last_committed_before=last_committed_before,
+        commit_ms=commit_ms if commit_ms is not None else 10**12,  # treat as "commit all"
+    )
+    _STATS["sessions_finalized"] += 1
+    _STATS["tail_notes"] += int(inserted_total)
 
     CONSOLE_LOG(PREFIX, "FINALIZE_OK", {
         "rid": int(RECORDING_ID),
         "rows_inserted": int(inserted_total),
-        "last_committed": int(state.get("last_committed", -1)),
+        "last_committed": last_committed_before,
     })
 
     return int(inserted_total)
+
+
+def ONS_FORGET_RECORDING(RECORDING_ID: int) -> None:
+    """Purge-time safety net: drop state left behind when finalize never ran or raised."""
+    state = _ONS_STREAM_STATE.pop(int(RECORDING_ID), None)
+    if state is not None:
+        _STATS["sessions_forgotten"] += 1
+        OAF_CLIENT.forget_session(_bi.str(state.get("session_id", "")))
+
+
+def get_ons_status() -> Dict[str, Any]:
+    return {"sessions_open": sum(1 for state in list(_ONS_STREAM_STATE.values()) if state.get("open")), **_STATS}
@@ -0,0 +1,250 @@
+# SERVER_ENGINE_AUDIO_STREAM_PROCESS_ONS_FLUX.py
+
+from __future__ import annotations
+
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from SERVER_ENGINE_APP_VARIABLES import (
+    ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY,  # per-frame metadata (assumed to exist)
+    AUDIO_FRAME_MS,
+    ONSET_FLUX_N_FFT,
+    ONSET_FLUX_N_FFT_PADDED,
+    ONSET_FLUX_HOP_MS,
+    ONSET_FLUX_DELTA_DB,
+    ONSET_FLUX_MEDIAN_MS,
+    ONSET_FLUX_MIN_INTER_ONSET_MS,
+    ONSET_FLUX_MIN_DB,
+    ONSET_FLUX_PITCH_MS,
+    ONSET_FLUX_HPS_HARMONICS,
+    ONSET_FLUX_FMIN_HZ,
+    ONSET_FLUX_FMAX_HZ,
+)
+from SERVER_ENGINE_APP_FUNCTIONS import (
+    CONSOLE_LOG,
+    DB_CONNECT_CTX,
+    ENGINE_DB_LOG_FUNCTIONS_INS,  # logging decorator
+)
+from SERVER_ENGINE_AUDIO_STREAM_PROCESS_ONS import ENGINE_LOAD_NOTE_INS, NoteRow
+
+PREFIX = "ONS_FLUX"
+
+# Constants
+SAMPLE_RATE = 16000
+SOURCE_METHOD = "FLUX"
+HOP = SAMPLE_RATE * ONSET_FLUX_HOP_MS // 1000
+
+# ─────────────────────────────────────────────────────────────
+# In-process streaming onset detector (alternative to the OAF container)
+# ─────────────────────────────────────────────────────────────
+# Runs as the ONS analyzer when ONS_ENGINE='FLUX'; ONS is in ANALYZER_ORDERED_BY_RECORDING, so a
+# recording's frames arrive here one at a time, in order, and the state below carries across them:
+#   BUF       samples not yet fully analyzed (the previous window overlap)
+#   PREV_DB   last hop's dB spectrum (spectral flux of the first new hop)
+#   ODF_HIST  recent ODF values (adaptive median threshold)
+#   CAND      last hop, waiting one hop for its peak decision
+#   NOTE      open note (start, summed spectra for HPS pitch, peak level)
+# Per frame the STFT and ODF are one batch of numpy; the per-hop decisions are a short loop (10 hops).
+# Notes are written to ENGINE_LOAD_NOTE when they close; STOP flushes the open one (AUDIO_FRAME_NO 0).
+
+_WINDOW = np.hanning(ONSET_FLUX_N_FFT).astype(np.float32)
+_MAG_SCALE = 2.0 / float(_WINDOW.sum())                    # full-scale sine → magnitude 1.0 (0 dB)
+_BIN_HZ = SAMPLE_RATE / float(ONSET_FLUX_N_FFT_PADDED)
+_BAND = slice(int(ONSET_FLUX_FMIN_HZ / _BIN_HZ), int(ONSET_FLUX_FMAX_HZ / _BIN_HZ) + 1)
+
+_ONS_FLUX_STATE: Dict[int, Dict[str, Any]] = {}
+_STATS = {"frames": 0, "onsets": 0, "notes": 0, "discontinuities": 0}
+
+
+def _NEW_STATE(FIRST_SAMPLE: int, AUDIO_FRAME_NO: int) -> Dict[str, Any]:
+    return {
+        "BUF": np.zeros(ONSET_FLUX_N_FFT - HOP, dtype=np.float32),
+        "BUF_START_SAMPLE": FIRST_SAMPLE - (ONSET_FLUX_N_FFT - HOP),
+        "NEXT_FRAME_NO": AUDIO_FRAME_NO,
+        "PREV_DB": None,
+        "ODF_HIST": deque(maxlen=max(1, ONSET_FLUX_MEDIAN_MS // ONSET_FLUX_HOP_MS)),
+        "PREV_ODF": 0.0,
+        "CAND": None,
+        "LAST_ONSET_MS": None,
+        "NOTE": None,
+    }
+
+
+def _VELOCITY(PEAK_DB: float) -> int:
+    if ONSET_FLUX_MIN_DB >= 0:
+        return 64
+    return int(np.clip(round(127.0 * (PEAK_DB - ONSET_FLUX_MIN_DB) / -ONSET_FLUX_MIN_DB), 1, 127))
+
+
+def _HPS_MIDI(MAG_SUM: np.ndarray) -> Optional[int]:
+    """Harmonic product spectrum (log domain) over FMIN..FMAX → nearest MIDI note, None if no peak."""
+    LOG_MAG = np.log(MAG_SUM + 1e-9)
+    K = np.arange(_BAND.start, min(_BAND.stop, MAG_SUM.size))
+    K = K[K * ONSET_FLUX_HPS_HARMONICS < MAG_SUM.size]
+    if K.size < 3:
+        return None
+    HPS = sum(LOG_MAG[K * h] for h in range(1, ONSET_FLUX_HPS_HARMONICS + 1))
+    i = int(np.argmax(HPS))
+    if 0 < i < K.size - 1:  # parabolic interpolation between padded bins
+        a, b, c = HPS[i - 1], HPS[i], HPS[i + 1]
+        DENOM = a - 2.0 * b + c
+        OFFSET = 0.5 * (a - c) / DENOM if DENOM != 0 else 0.0
+    else:
+        OFFSET = 0.0
+    F0_HZ = (K[i] + OFFSET) * _BIN_HZ
+    if F0_HZ <= 0:
+        return None
+    return int(round(69.0 + 12.0 * np.log2(F0_HZ / 440.0)))
+
+
+def _CLOSE_NOTE(S: Dict[str, Any], END_MS: int, NOTES: List[NoteRow]) -> None:
+    NOTE, S["NOTE"] = S["NOTE"], None
+    if NOTE is None or NOTE["HOPS"] == 0 or END_MS < NOTE["START_MS"]:
+        return
+    MIDI = _HPS_MIDI(NOTE["MAG_SUM"])
+    if MIDI is None:
+        return
+    NOTES.append((NOTE["START_MS"], int(END_MS), MIDI, _VELOCITY(NOTE["PEAK_DB"]), SOURCE_METHOD))
+
+
+def _DECIDE(S: Dict[str, Any], NEXT_ODF: float, NOTES: List[NoteRow]) -> None:
+    """Peak decision for CAND (one hop behind), then feed it to the open note."""
+    C = S["CAND"]
+    THRESHOLD = float(np.median(S["ODF_HIST"])) + ONSET_FLUX_DELTA_DB
+    ONSET = (
+        C["ODF"] > S["PREV_ODF"] and C["ODF"] >= NEXT_ODF and C["ODF"] >= THRESHOLD
+        and C["LEVEL_DB"] >= ONSET_FLUX_MIN_DB
+        and (S["LAST_ONSET_MS"] is None or C["MS"] - S["LAST_ONSET_MS"] >= ONSET_FLUX_MIN_INTER_ONSET_MS)
+    )
+    if ONSET:
+        _CLOSE_NOTE(S, C["MS"] - 1, NOTES)
+        S["NOTE"] = {"START_MS": C["MS"], "MAG_SUM": np.zeros_like(C["MAG"]), "HOPS": 0, "PEAK_DB": C["LEVEL_DB"]}
+        S["LAST_ONSET_MS"] = C["MS"]
+        _STATS["onsets"] += 1
+    elif S["NOTE"] is not None and C["LEVEL_DB"] < ONSET_FLUX_MIN_DB:
+        _CLOSE_NOTE(S, C["MS"] - 1, NOTES)  # released
+
+    NOTE = S["NOTE"]
+    if NOTE is not None:
+        NOTE["PEAK_DB"] = max(NOTE["PEAK_DB"], C["LEVEL_DB"])
+        if C["MS"] - NOTE["START_MS"] < ONSET_FLUX_PITCH_MS:
+            NOTE["MAG_SUM"] += C["MAG"]
+            NOTE["HOPS"] += 1
+    S["PREV_ODF"] = C["ODF"]
+
+
+def ONS_FLUX_PROCESS_FRAME(RECORDING_ID: int, AUDIO_FRAME_NO: int, AUDIO_ARRAY_16000: np.ndarray) -> List[NoteRow]:
+    """Analyze one frame (in order); returns the notes that closed in it."""
+    NOTES: List[NoteRow] = []
+    FIRST_SAMPLE = SAMPLE_RATE * AUDIO_FRAME_MS * (int(AUDIO_FRAME_NO) - 1) // 1000
+    S = _ONS_FLUX_STATE.get(int(RECORDING_ID))
+    if S is not None and S["NEXT_FRAME_NO"] != int(AUDIO_FRAME_NO):
+        _STATS["discontinuities"] += 1
+        NOTES.extend(ONS_FLUX_FLUSH(RECORDING_ID))
+        S = None
+    if S is None:
+        S = _ONS_FLUX_STATE[int(RECORDING_ID)] = _NEW_STATE(FIRST_SAMPLE, int(AUDIO_FRAME_NO))
+
+    BUF = np.concatenate((S["BUF"], AUDIO_ARRAY_16000.astype(np.float32, copy=False)))
+    N_HOPS = (BUF.size - ONSET_FLUX_N_FFT) // HOP + 1 if BUF.size >= ONSET_FLUX_N_FFT else 0
+    if N_HOPS > 0:
+        FRAMES = np.lib.stride_tricks.sliding_window_view(BUF, ONSET_FLUX_N_FFT)[::HOP][:N_HOPS]
+        MAG = np.abs(np.fft.rfft(FRAMES * _WINDOW, n=ONSET_FLUX_N_FFT_PADDED, axis=1)) * _MAG_SCALE
+        DB = 20.0 * np.log10(np.maximum(MAG[:, _BAND], 1e-4))
+        PREV_DB = DB[:1] if S["PREV_DB"] is None else S["PREV_DB"][None, :]
+        ODF = np.maximum(np.diff(np.vstack((PREV_DB, DB)), axis=0), 0.0).mean(axis=1)
+        NEWEST_HOP = FRAMES[:, -HOP:]
+        LEVEL_DB = 20.0 * np.log10(np.sqrt(np.mean(NEWEST_HOP * NEWEST_HOP, axis=1)) + 1e-6)
+        HOP_MS = (S["BUF_START_SAMPLE"] + np.arange(N_HOPS) * HOP + ONSET_FLUX_N_FFT - HOP) * 1000 // SAMPLE_RATE
+
+        for i in range(N_HOPS):
+            if S["CAND"] is not None:
+                _DECIDE(S, float(ODF[i]), NOTES)
+            S["ODF_HIST"].append(float(ODF[i]))
+            S["CAND"] = {"MS": int(HOP_MS[i]), "ODF": float(ODF[i]), "LEVEL_DB": float(LEVEL_DB[i]), "MAG": MAG[i]}
+        S["PREV_DB"] = DB[-1]
+
+    S["BUF"] = BUF[N_HOPS * HOP:]
+    S["BUF_START_SAMPLE"] += N_HOPS * HOP
+    S["NEXT_FRAME_NO"] = int(AUDIO_FRAME_NO) + 1
+    _STATS["frames"] += 1
+    _STATS["notes"] += len(NOTES)
+    return NOTES
+
+
+def ONS_FLUX_FLUSH(RECORDING_ID: int) -> List[NoteRow]:
+    """Decide the pending hop, close the open note at the end of the audio seen, drop the state."""
+    S = _ONS_FLUX_STATE.pop(int(RECORDING_ID), None)
+    NOTES: List[NoteRow] = []
+    if S is None:
+        return NOTES
+    if S["CAND"] is not None:
+        _DECIDE(S, float("-inf"), NOTES)
+        _CLOSE_NOTE(S, S["CAND"]["MS"] + ONSET_FLUX_HOP_MS - 1, NOTES)
+    return NOTES
+
+
+def ONS_FLUX_FORGET_RECORDING(RECORDING_ID: int) -> None:
+    _ONS_FLUX_STATE.pop(int(RECORDING_ID), None)
+
+
+def get_ons_flux_status() -> Dict[str, Any]:
+    return {"recordings": len(_ONS_FLUX_STATE), **_STATS}
+
+
+def _INSERT_NOTES(RECORDING_ID: int, AUDIO_FRAME_NO: int, NOTES: List[NoteRow]) -> None:
+    with DB_CONNECT_CTX() as conn:
+        ENGINE_LOAD_NOTE_INS(
+            conn=conn,
+            RECORDING_ID=int(RECORDING_ID),
+            AUDIO_FRAME_NO=int(AUDIO_FRAME_NO),
+            SAMPLE_RATE=SAMPLE_RATE,
+            rows_abs_with_src=NOTES,
+        )
+
+
+# ─────────────────────────────────────────────────────────────
+# PUBLIC ENTRY: per-frame ONS (in-process spectral flux)
+# ─────────────────────────────────────────────────────────────
+@ENGINE_DB_LOG_FUNCTIONS_INS()
+async def SERVER_ENGINE_AUDIO_STREAM_PROCESS_ONS_FLUX(
+    RECORDING_ID: int,
+    AUDIO_FRAME_NO: int,
+    AUDIO_ARRAY_16000: np.ndarray,
+) -> int:
+    """
+    Inputs:
+      • RECORDING_ID, AUDIO_FRAME_NO
+      • AUDIO_ARRAY_16000: mono float32 at 16 kHz
+    Returns number of NOTE rows inserted for this call (notes that closed in this frame).
+    """
+    ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY[RECORDING_ID][AUDIO_FRAME_NO]["DT_START_ONS"] = datetime.now()
+
+    if not isinstance(AUDIO_ARRAY_16000, np.ndarray) or AUDIO_ARRAY_16000.size == 0:
+        CONSOLE_LOG(PREFIX, "EMPTY_AUDIO", {"rid": int(RECORDING_ID), "frame": int(AUDIO_FRAME_NO)})
+        ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY[RECORDING_ID][AUDIO_FRAME_NO]["ONS_RECORD_CNT"] = 0
+        ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY[RECORDING_ID][AUDIO_FRAME_NO]["DT_END_ONS"] = datetime.now()
+        return 0
+
+    NOTES = ONS_FLUX_PROCESS_FRAME(int(RECORDING_ID), int(AUDIO_FRAME_NO), AUDIO_ARRAY_16000)
+    if NOTES:
+        _INSERT_NOTES(RECORDING_ID, AUDIO_FRAME_NO, NOTES)
+
+    ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY[RECORDING_ID][AUDIO_FRAME_NO]["ONS_RECORD_CNT"] = len(NOTES)
+    ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY[RECORDING_ID][AUDIO_FRAME_NO]["DT_END_ONS"] = datetime.now()
+    return len(NOTES)
+
+
+# ─────────────────────────────────────────────────────────────
+# PUBLIC ENTRY: finalize (STOP) — flush the open note
+# ─────────────────────────────────────────────────────────────
+@ENGINE_DB_LOG_FUNCTIONS_INS()
+async def SERVER_ENGINE_AUDIO_STREAM_PROCESS_ONS_FLUX_FINALIZE(RECORDING_ID: int) -> int:
+    NOTES = ONS_FLUX_FLUSH(int(RECORDING_ID))
+    if NOTES:
+        _INSERT_NOTES(RECORDING_ID, 0, NOTES)
+        CONSOLE_LOG(PREFIX, "FINALIZE_OK", {"rid": int(RECORDING_ID), "rows_inserted": len(NOTES)})
+    return len(NOTES)
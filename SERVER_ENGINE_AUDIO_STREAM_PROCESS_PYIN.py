@@ -2,19 +2,23 @@
 
 from __future__ import annotations
 
-from typing import Iterable, List, Tuple, Optional
+from typing import Any, Dict, Iterable, List, Tuple, Optional
 from datetime import datetime
 import numpy as np
 try:
     import librosa  # type: ignore
+    import librosa.core.pitch as _LIBROSA_PITCH  # type: ignore
+    import scipy.stats  # type: ignore
 except Exception:  # pragma: no cover
     librosa = None  # type: ignore
+    _LIBROSA_PITCH = None  # type: ignore
 
 from SERVER_ENGINE_APP_VARIABLES import (
     ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY,  # per-frame metadata (assumed to exist)
     AUDIO_FRAME_MS,
     PYIN_HOP_IN_MS,
-    PYIN_OVERLAP_FOR_ACCURACY_OR_SPEED
+    PYIN_OVERLAP_FOR_ACCURACY_OR_SPEED,
+    PYIN_STREAMING_YN,
 )
 from SERVER_ENGINE_APP_FUNCTIONS import (
     CONSOLE_LOG,
@@ -22,6 +26,9 @@ from SERVER_ENGINE_APP_FUNCTIONS import (
     DB_BULK_INSERT,
     ENGINE_DB_LOG_FUNCTIONS_INS,  # logging decorator
 )
+from SERVER_ENGINE_LIVE_RESULTS import LIVE_RESULT_PUT_HZ
+from SERVER_ENGINE_SONG_SCORE import SONG_SCORE_PUT_HZ
+from SERVER_ENGINE_NOTE_SEGMENTER import NOTE_SEGMENTER_PUT_HZ
 
 PREFIX = "PYIN"
 
@@ -63,10 +70,21 @@ def ENGINE_LOAD_HZ_INS(
 # ─────────────────────────────────────────────────────────────
 # pYIN core: OPTIMIZED version for speed
 # ─────────────────────────────────────────────────────────────
-def _pyin_relative_rows_optimized(audio_22050: np.ndarray, sample_rate: int = 22050) -> List[HZRow]:
+def _pyin_frame_length(hop_length: int, overlap: Optional[str] = None) -> Optional[int]:
+    overlap = overlap or PYIN_OVERLAP_FOR_ACCURACY_OR_SPEED
+    if overlap == "speed":
+        return max(hop_length * 2, 1024)  # Smaller frame for speed
+    if overlap == "accuracy":
+        return max(hop_length * 4, 2048)  # 75% overlap better Hz accuracy
+    CONSOLE_LOG(PREFIX, "INVALID_PYIN_OVERLAP_FOR_ACCURACY_OR_SPEED", {"overlap": overlap})
+    return None
+
+def _pyin_relative_rows_optimized(audio_22050: np.ndarray, sample_rate: int = 22050,
+                                  overlap: Optional[str] = None) -> List[HZRow]:
     """
     Optimized PYIN processing with reduced frame_length for faster processing.
     Speed vs accuracy trade-off: 20ms hop, smaller frames.
+    overlap overrides PYIN_OVERLAP_FOR_ACCURACY_OR_SPEED for this call (load ladder).
     """
     if librosa is None:
         CONSOLE_LOG(PREFIX, "LIBROSA_NOT_AVAILABLE")
@@ -79,13 +97,8 @@ def _pyin_relative_rows_optimized(audio_22050: np.ndarray, sample_rate: int = 22
     # Optimized parameters for speed vs accuracy trade-off
     # 20ms hop = faster processing, slightly less accurate
     hop_length = max(1, int(round(sample_rate * (PYIN_HOP_IN_MS / 1000))))  # 20ms hop for speed
-    # frame_length = max(hop_length * 2, 1024)  # Smaller frame for speed
-    if PYIN_OVERLAP_FOR_ACCURACY_OR_SPEED == "speed":
-        frame_length = max(hop_length * 2, 1024)  # Smaller frame for speed
-    elif PYIN_OVERLAP_FOR_ACCURACY_OR_SPEED == "accuracy":
-        frame_length = max(hop_length * 4, 2048) # 75% overlap better Hz accuracy
-    else:
-        CONSOLE_LOG(PREFIX, "INVALID_PYIN_OVERLAP_FOR_ACCURACY_OR_SPEED", {"overlap": PYIN_OVERLAP_FOR_ACCURACY_OR_SPEED})
+    frame_length = _pyin_frame_length(hop_length, overlap)
+    if frame_length is None:
         return []
 
 
@@ -104,6 +117,149 @@ def _pyin_relative_rows_optimized(audio_22050: np.ndarray, sample_rate: int = 22
 
     return rows_rel
 
+# ─────────────────────────────────────────────────────────────
+# pYIN core: streaming (PYIN_STREAMING_YN='Y')
+# ─────────────────────────────────────────────────────────────
+# librosa.pyin on a lone frame reflect/zero-pads both edges (center=True) and restarts its Viterbi at
+# every frame, so pitch glitches at each boundary. Here PYIN is in ANALYZER_ORDERED_BY_RECORDING and
+# each recording carries:
+#   CONTEXT   the last frame_length samples (accuracy size) before this frame: windows reach back into
+#             the previous frame instead of into padding
+#   DELTA     pYIN's voiced/unvoiced × pitch-bin HMM state: the Viterbi forward (max-product) pass,
+#             carried hop by hop; each hop reports its best state, i.e. librosa's decision without lookahead
+# The row at START_MS + k·hop uses the window centred on it, as center=True does. The last rows, whose
+# centred window would need the next frame, use the window ending at the frame's last sample instead
+# (centre at most frame_length/2 − hop early: ~3 ms for "speed", ~26 ms for "accuracy").
+# Observation probabilities are librosa's own pYIN model (librosa 0.11 internals, pinned in
+# requirements); without them the per-frame path is used.
+
+_PYIN_FMIN, _PYIN_FMAX = 180.0, 4000.0
+_PYIN_SWITCH_PROB = 0.01
+_PYIN_HELPERS = (
+    getattr(_LIBROSA_PITCH, "_cumulative_mean_normalized_difference", None),
+    getattr(_LIBROSA_PITCH, "_parabolic_interpolation", None),
+    getattr(_LIBROSA_PITCH, "__pyin_helper", None),
+)
+PYIN_STREAMING_AVAILABLE = all(_PYIN_HELPERS)
+
+_PYIN_MODELS: Dict[Tuple[int, int, int], Dict[str, Any]] = {}
+_PYIN_STREAM_STATE: Dict[int, Dict[str, Any]] = {}
+_STATS = {"frames": 0, "rows": 0, "discontinuities": 0}
+
+
+def _pyin_stream_model(sample_rate: int, hop_length: int, frame_length: int) -> Dict[str, Any]:
+    """Same parameters as librosa.pyin defaults (fmin=180, fmax=4000), built once per hop/frame size."""
+    KEY = (sample_rate, hop_length, frame_length)
+    M = _PYIN_MODELS.get(KEY)
+    if M is None:
+        thresholds = np.linspace(0, 1, 101)
+        n_bins_per_semitone = 10                                      # resolution=0.1
+        n_pitch_bins = int(np.floor(12 * n_bins_per_semitone * np.log2(_PYIN_FMAX / _PYIN_FMIN))) + 1
+        max_semitones_per_frame = round(35.92 * 12 * hop_length / sample_rate)
+        WIDTH = max_semitones_per_frame * n_bins_per_semitone + 1
+        TRANSITION = librosa.sequence.transition_local(n_pitch_bins, WIDTH, window="triangle", wrap=False)
+        # Banded view for the max-product step: BAND[j, k] = TRANSITION[j - WIDTH//2 + k, j]
+        J = np.arange(n_pitch_bins)[:, None]
+        I = J - WIDTH // 2 + np.arange(WIDTH)[None, :]
+        VALID = (I >= 0) & (I < n_pitch_bins)
+        BAND = np.zeros((n_pitch_bins, WIDTH))
+        BAND[VALID] = TRANSITION[I[VALID], np.broadcast_to(J, I.shape)[VALID]]
+        M = _PYIN_MODELS[KEY] = {
+            "min_period": int(np.floor(sample_rate / _PYIN_FMAX)),
+            "max_period": min(int(np.ceil(sample_rate / _PYIN_FMIN)), frame_length - 1),
+            "thresholds": thresholds,
+            "beta_probs": np.diff(scipy.stats.beta.cdf(thresholds, 2, 18)),
+            "n_pitch_bins": n_pitch_bins,
+            "n_bins_per_semitone": n_bins_per_semitone,
+            "BAND": BAND,
+            "HALF_WIDTH": WIDTH // 2,
+            "FREQS": _PYIN_FMIN * 2 ** (np.arange(n_pitch_bins) / (12 * n_bins_per_semitone)),
+        }
+    return M
+
+
+def _pyin_stream_rows(RECORDING_ID: int, AUDIO_FRAME_NO: int, audio_22050: np.ndarray,
+                      sample_rate: int = 22050, overlap: Optional[str] = None) -> List[HZRow]:
+    """
+    Same row shape as _pyin_relative_rows_optimized (relative to this frame's START_MS), one row per
+    hop in the frame, with context and HMM state carried from the recording's previous frame.
+    """
+    if sample_rate != 22050 or not isinstance(audio_22050, np.ndarray) or audio_22050.size == 0:
+        CONSOLE_LOG(PREFIX, "BAD_INPUT", {"sr": int(sample_rate), "size": int(getattr(audio_22050, "size", 0))})
+        return []
+
+    hop_length = max(1, int(round(sample_rate * (PYIN_HOP_IN_MS / 1000))))
+    frame_length = _pyin_frame_length(hop_length, overlap)
+    if frame_length is None:
+        return []
+    M = _pyin_stream_model(sample_rate, hop_length, frame_length)
+    N = M["n_pitch_bins"]
+
+    S = _PYIN_STREAM_STATE.get(int(RECORDING_ID))
+    if S is not None and S["NEXT_FRAME_NO"] != int(AUDIO_FRAME_NO):
+        _STATS["discontinuities"] += 1      # frame skipped (e.g. load ladder): start over
+        S = None
+    if S is None:
+        S = _PYIN_STREAM_STATE[int(RECORDING_ID)] = {
+            "CONTEXT": np.zeros(max(hop_length * 4, 2048), dtype=np.float32),   # silence before the first frame
+            "DELTA": np.full(2 * N, 1.0 / (2 * N)),
+            "NEXT_FRAME_NO": int(AUDIO_FRAME_NO),
+        }
+
+    FIRST_SAMPLE = sample_rate * AUDIO_FRAME_MS * (int(AUDIO_FRAME_NO) - 1) // 1000
+    y = np.concatenate((S["CONTEXT"], audio_22050.astype(np.float32, copy=False)))
+    Y0 = FIRST_SAMPLE - S["CONTEXT"].size                              # absolute sample of y[0]
+    S["CONTEXT"] = y[-S["CONTEXT"].size:]
+    S["NEXT_FRAME_NO"] = int(AUDIO_FRAME_NO) + 1
+    _STATS["frames"] += 1
+
+    # One row per point of the recording's hop grid inside this frame; windows centred, clamped to the frame end
+    ROW_SAMPLES = hop_length * np.arange(-(-FIRST_SAMPLE // hop_length), -(-(FIRST_SAMPLE + audio_22050.size) // hop_length))
+    if ROW_SAMPLES.size == 0:
+        return []
+    ENDS = np.minimum(ROW_SAMPLES + frame_length // 2, FIRST_SAMPLE + audio_22050.size)
+    y_frames = np.lib.stride_tricks.sliding_window_view(y, frame_length)[ENDS - frame_length - Y0].T
+
+    CMND, PARABOLIC, OBSERVATION = _PYIN_HELPERS
+    yin_frames = CMND(y_frames, M["min_period"], M["max_period"])
+    observation_probs, voiced_prob = OBSERVATION(
+        yin_frames, PARABOLIC(yin_frames), sample_rate, M["thresholds"], 2, M["beta_probs"], 0.01,
+        M["min_period"], _PYIN_FMIN, N, M["n_bins_per_semitone"],
+    )
+    observation_probs, voiced_prob = observation_probs[0], voiced_prob[0]
+
+    # Viterbi forward step through kron(switch, local pitch transition), rescaled to max 1 each hop
+    DELTA, BAND, H = S["DELTA"], M["BAND"], M["HALF_WIDTH"]
+    rows_rel: List[HZRow] = []
+    for t, ROW_SAMPLE in enumerate(ROW_SAMPLES):
+        V = (BAND * np.lib.stride_tricks.sliding_window_view(np.pad(DELTA[:N], H), BAND.shape[1])).max(axis=1)
+        U = (BAND * np.lib.stride_tricks.sliding_window_view(np.pad(DELTA[N:], H), BAND.shape[1])).max(axis=1)
+        PRED = np.concatenate((np.maximum((1 - _PYIN_SWITCH_PROB) * V, _PYIN_SWITCH_PROB * U),
+                               np.maximum(_PYIN_SWITCH_PROB * V, (1 - _PYIN_SWITCH_PROB) * U)))
+        DELTA = observation_probs[:, t] * PRED
+        PEAK = DELTA.max()
+        DELTA = DELTA / PEAK if PEAK > 0 else np.full(2 * N, 1.0 / (2 * N))
+        STATE = int(np.argmax(DELTA))
+        hz = float(M["FREQS"][STATE]) if STATE < N else float("nan")
+        start_ms_rel = int(round((int(ROW_SAMPLE) - FIRST_SAMPLE) * 1000.0 / sample_rate))
+        rows_rel.append((start_ms_rel, start_ms_rel + (PYIN_HOP_IN_MS - 1), hz, float(voiced_prob[t])))
+    S["DELTA"] = DELTA
+
+    _STATS["rows"] += len(rows_rel)
+    return rows_rel
+
+
+def PYIN_FORGET_RECORDING(RECORDING_ID: int) -> None:
+    _PYIN_STREAM_STATE.pop(int(RECORDING_ID), None)
+
+
+def get_pyin_status() -> Dict[str, Any]:
+    return {
+        "streaming": PYIN_STREAMING_YN == "Y" and PYIN_STREAMING_AVAILABLE,
+        "recordings": len(_PYIN_STREAM_STATE),
+        **_STATS,
+    }
+
 # ─────────────────────────────────────────────────────────────
 # pYIN core: relative rows @ ~10 ms on 22.05 kHz audio
 # ─────────────────────────────────────────────────────────────
@@ -197,9 +353,18 @@ async def SERVER_ENGINE_AUDIO_STREAM_PROCESS_PYIN(
     # Compute relative rows then offset to absolute ms using parallel processing
     ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY[RECORDING_ID][AUDIO_FRAME_NO]["DT_START_PYIN_RELATIVE_ROWS"] = datetime.now()
  
-    # Use optimized synchronous PYIN processing
+    # Use optimized synchronous PYIN processing (streaming when enabled)
     print(f"PYIN_MAIN: Processing frame {AUDIO_FRAME_NO} with optimized synchronous PYIN...")
-    rows_rel = _pyin_relative_rows_optimized(AUDIO_ARRAY_22050.astype(np.float32, copy=False), sample_rate=SAMPLE_RATE)
+    OVERLAP = ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY[RECORDING_ID][AUDIO_FRAME_NO].get("PYIN_OVERLAP_FOR_ACCURACY_OR_SPEED")
+    if PYIN_STREAMING_YN == "Y" and PYIN_STREAMING_AVAILABLE:
+        rows_rel = _pyin_stream_rows(
+            RECORDING_ID, AUDIO_FRAME_NO, AUDIO_ARRAY_22050.astype(np.float32, copy=False),
+            sample_rate=SAMPLE_RATE, overlap=OVERLAP,
+        )
+    else:
+        rows_rel = _pyin_relative_rows_optimized(
+            AUDIO_ARRAY_22050.astype(np.float32, copy=False), sample_rate=SAMPLE_RATE, overlap=OVERLAP,
+        )
     print(f"PYIN_MAIN: Completed, got {len(rows_rel) if rows_rel else 0} rows")
  
     ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY[RECORDING_ID][AUDIO_FRAME_NO]["DT_END_PYIN_RELATIVE_ROWS"] = datetime.now()
@@ -216,6 +381,9 @@ async def SERVER_ENGINE_AUDIO_STREAM_PROCESS_PYIN(
     ]
 
     ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY[RECORDING_ID][AUDIO_FRAME_NO]["PYIN_RECORD_CNT"] = len(rows_abs)
+    LIVE_RESULT_PUT_HZ(RECORDING_ID, AUDIO_FRAME_NO, "PYIN", rows_abs)
+    SONG_SCORE_PUT_HZ(RECORDING_ID, "PYIN", rows_abs)
+    NOTE_SEGMENTER_PUT_HZ(RECORDING_ID, AUDIO_FRAME_NO, "PYIN", rows_abs)
 
     ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY[RECORDING_ID][AUDIO_FRAME_NO]["DT_START_PYIN_ENGINE_LOAD_HZ_INS"] = datetime.now()
 
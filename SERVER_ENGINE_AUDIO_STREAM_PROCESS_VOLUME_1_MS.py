@@ -21,6 +21,8 @@ from SERVER_ENGINE_APP_FUNCTIONS import (
     DB_BULK_INSERT,
     ENGINE_DB_LOG_FUNCTIONS_INS,  # logging decorator
 )
+from SERVER_ENGINE_LIVE_RESULTS import LIVE_RESULT_PUT_VOLUME
+from SERVER_ENGINE_NOTE_SEGMENTER import NOTE_SEGMENTER_PUT_VOLUME
 
 PREFIX = "VOLUME_1_MS"
 
@@ -165,6 +167,8 @@ async def SERVER_ENGINE_AUDIO_STREAM_PROCESS_VOLUME_1_MS(
 
     # Stamp count
     ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY[RECORDING_ID][AUDIO_FRAME_NO]["VOLUME_1_MS_RECORD_CNT"] = len(rows_1ms)
+    LIVE_RESULT_PUT_VOLUME(RECORDING_ID, AUDIO_FRAME_NO, rows_1ms)
+    NOTE_SEGMENTER_PUT_VOLUME(RECORDING_ID, AUDIO_FRAME_NO, rows_1ms)
 
     # Insert
     with DB_CONNECT_CTX() as conn:
@@ -0,0 +1,182 @@
+# SERVER_ENGINE_CONNECTION_REAPER.py
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, Set
+
+from starlette.websockets import WebSocketState
+
+from SERVER_ENGINE_APP_VARIABLES import (
+    ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY,
+    ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY,
+    PURGED_RECORDING_ARRAY,
+    WS_PING_INTERVAL_MS,
+    WS_IDLE_TIMEOUT_MS,
+    ABANDONED_RECORDING_GRACE_MS,
+    PURGED_RECORDING_TTL_MS,
+    CONNECTION_REAPER_INTERVAL_MS,
+)
+from SERVER_ENGINE_APP_FUNCTIONS import CONSOLE_LOG, ENGINE_DB_LOG_TABLE_INS
+from SERVER_ENGINE_WS_OUTBOUND import WS_GET, WS_SEND_JSON, WS_UNREGISTER
+from SERVER_ENGINE_MEMORY_MONITOR import MEMORY_RECORDING_BYTES_GET
+
+PREFIX = "CONNECTION_REAPER"
+
+# ─────────────────────────────────────────────────────────────
+# Heartbeats, idle timeouts and abandoned recordings
+# ─────────────────────────────────────────────────────────────
+# Protocol (/ws/stream and /ws/observe):
+#   server → client {MESSAGE_TYPE:'PING', PING_NO}; client → server {MESSAGE_TYPE:'PONG', PING_NO}
+# Each pass:
+#   1) PING every open connection due for one
+#   2) close connections with no inbound message for WS_IDLE_TIMEOUT_MS (half-open phones, dead NAT)
+#   3) a recording with no STOP whose connection closed more than ABANDONED_RECORDING_GRACE_MS ago
+#      gets a synthesized STOP → Stage-3C → finalize + purge (the grace leaves room for a RESUME)
+#   4) forget closed connection rows that no recording references any more
+#   5) forget purged RECORDING_IDs older than PURGED_RECORDING_TTL_MS (Stage-2 drops their late frames until then)
+
+def _age_ms(now: datetime, then: datetime) -> float:
+    return (now - then).total_seconds() * 1000.0
+
+
+class ConnectionReaper:
+    def __init__(self):
+        self.ping_no = 0
+        self.idle_closed = 0
+        self.stops_synthesized = 0
+        self.connection_rows_forgotten = 0
+        self.purged_recordings_forgotten = 0
+        self.abandoned_pending: Set[int] = set()
+        self.abandoned_purged = 0
+        self.reclaimed_bytes = 0
+
+    async def ping(self, now: datetime) -> None:
+        for WEBSOCKET_CONNECTION_ID, ROW in list(ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY.items()):
+            if ROW.get("DT_CONNECTION_CLOSED") is not None or WS_GET(WEBSOCKET_CONNECTION_ID) is None:
+                continue
+            DT_LAST_PING_SENT = ROW.get("DT_LAST_PING_SENT")
+            if DT_LAST_PING_SENT is not None and _age_ms(now, DT_LAST_PING_SENT) < WS_PING_INTERVAL_MS:
+                continue
+            self.ping_no += 1
+            if await WS_SEND_JSON(WEBSOCKET_CONNECTION_ID, {"MESSAGE_TYPE": "PING", "PING_NO": self.ping_no}):
+                ROW["DT_LAST_PING_SENT"] = now
+
+    async def close_idle(self, now: datetime) -> None:
+        for WEBSOCKET_CONNECTION_ID, ROW in list(ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY.items()):
+            if ROW.get("DT_CONNECTION_CLOSED") is not None:
+                continue
+            DT_LAST_ACTIVITY = ROW.get("DT_LAST_MESSAGE_RECEIVED") or ROW.get("DT_CONNECTION_ACCEPTED") or now
+            IDLE_MS = _age_ms(now, DT_LAST_ACTIVITY)
+            if IDLE_MS < WS_IDLE_TIMEOUT_MS:
+                continue
+            WEBSOCKET = WS_GET(WEBSOCKET_CONNECTION_ID)
+            WS_UNREGISTER(WEBSOCKET_CONNECTION_ID)
+            if WEBSOCKET is not None and WEBSOCKET.client_state == WebSocketState.CONNECTED:
+                try:
+                    await WEBSOCKET.close(code=1001)
+                except Exception as e:
+                    CONSOLE_LOG(PREFIX, "CLOSE_FAILED", {"conn_id": WEBSOCKET_CONNECTION_ID, "error": str(e)})
+            ROW["DT_CONNECTION_CLOSED"] = now
+            ROW["CLOSED_BY_IDLE_TIMEOUT_YN"] = "Y"
+            ENGINE_DB_LOG_TABLE_INS("ENGINE_DB_LOG_WEBSOCKET_CONNECTION", ROW)
+            self.idle_closed += 1
+            CONSOLE_LOG(PREFIX, "IDLE_CONNECTION_CLOSED", {"conn_id": WEBSOCKET_CONNECTION_ID, "idle_ms": round(IDLE_MS)})
+
+    def stop_abandoned(self, now: datetime) -> None:
+        from SERVER_ENGINE_LISTEN_2_FOR_WS_MESSAGES import WEBSOCKET_MESSAGE_LOG
+
+        for RECORDING_ID, CONFIG in list(ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY.items()):
+            if CONFIG.get("DT_RECORDING_END") is not None or CONFIG.get("DT_ABANDONED_STOP_SYNTHESIZED") is not None:
+                continue
+            WEBSOCKET_CONNECTION_ID = CONFIG.get("WEBSOCKET_CONNECTION_ID")
+            ROW = ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY.get(WEBSOCKET_CONNECTION_ID) or {}
+            DT_CONNECTION_CLOSED = ROW.get("DT_CONNECTION_CLOSED")
+            if DT_CONNECTION_CLOSED is None or _age_ms(now, DT_CONNECTION_CLOSED) < ABANDONED_RECORDING_GRACE_MS:
+                continue
+            CONFIG["DT_ABANDONED_STOP_SYNTHESIZED"] = now
+            WEBSOCKET_MESSAGE_LOG(RECORDING_ID, "STOP", WEBSOCKET_CONNECTION_ID, now)
+            self.stops_synthesized += 1
+            self.abandoned_pending.add(int(RECORDING_ID))
+            CONSOLE_LOG(PREFIX, "ABANDONED_RECORDING_STOP", {
+                "rid": RECORDING_ID,
+                "conn_id": WEBSOCKET_CONNECTION_ID,
+                "closed_ms_ago": round(_age_ms(now, DT_CONNECTION_CLOSED)),
+                "held_bytes": MEMORY_RECORDING_BYTES_GET(RECORDING_ID)["TOTAL"],
+            })
+
+    def forget_closed_connections(self, now: datetime) -> None:
+        REFERENCED = {CONFIG.get("WEBSOCKET_CONNECTION_ID") for CONFIG in list(ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY.values())}
+        for WEBSOCKET_CONNECTION_ID, ROW in list(ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY.items()):
+            DT_CONNECTION_CLOSED = ROW.get("DT_CONNECTION_CLOSED")
+            if DT_CONNECTION_CLOSED is None or WEBSOCKET_CONNECTION_ID in REFERENCED:
+                continue
+            if _age_ms(now, DT_CONNECTION_CLOSED) < ABANDONED_RECORDING_GRACE_MS:
+                continue
+            ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY.pop(WEBSOCKET_CONNECTION_ID, None)
+            self.connection_rows_forgotten += 1
+
+    def forget_purged_recordings(self, now: datetime) -> None:
+        for RECORDING_ID, DT_PURGED in list(PURGED_RECORDING_ARRAY.items()):
+            if _age_ms(now, DT_PURGED) >= PURGED_RECORDING_TTL_MS:
+                PURGED_RECORDING_ARRAY.pop(RECORDING_ID, None)
+                self.purged_recordings_forgotten += 1
+
+    def recording_purged(self, RECORDING_ID: int, RECLAIMED_BYTES: int) -> None:
+        """LISTEN_7 purge hook: count what an abandoned recording was still holding."""
+        if int(RECORDING_ID) not in self.abandoned_pending:
+            return
+        self.abandoned_pending.discard(int(RECORDING_ID))
+        self.abandoned_purged += 1
+        self.reclaimed_bytes += RECLAIMED_BYTES
+        CONSOLE_LOG(PREFIX, "ABANDONED_RECORDING_PURGED", {"rid": RECORDING_ID, "reclaimed_bytes": RECLAIMED_BYTES})
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ping_interval_ms": WS_PING_INTERVAL_MS,
+            "idle_timeout_ms": WS_IDLE_TIMEOUT_MS,
+            "abandoned_grace_ms": ABANDONED_RECORDING_GRACE_MS,
+            "open_connections": sum(1 for ROW in list(ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY.values()) if ROW.get("DT_CONNECTION_CLOSED") is None),
+            "idle_closed": self.idle_closed,
+            "stops_synthesized": self.stops_synthesized,
+            "abandoned_pending_purge": sorted(self.abandoned_pending),
+            "abandoned_purged": self.abandoned_purged,
+            "reclaimed_bytes": self.reclaimed_bytes,
+            "reclaimed_mb": round(self.reclaimed_bytes / 1024 / 1024, 3),
+            "connection_rows_forgotten": self.connection_rows_forgotten,
+            "purged_recording_ttl_ms": PURGED_RECORDING_TTL_MS,
+            "purged_recordings_remembered": len(PURGED_RECORDING_ARRAY),
+            "purged_recordings_forgotten": self.purged_recordings_forgotten,
+            "ping_rtt_ms": {
+                WEBSOCKET_CONNECTION_ID: ROW.get("PING_RTT_MS")
+                for WEBSOCKET_CONNECTION_ID, ROW in list(ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY.items())
+                if ROW.get("DT_CONNECTION_CLOSED") is None and ROW.get("PING_RTT_MS") is not None
+            },
+        }
+
+# ─────────────────────────────────────────────────────────────
+# Global instance + background loop
+# ─────────────────────────────────────────────────────────────
+
+CONNECTION_REAPER = ConnectionReaper()
+
+def get_connection_reaper_status() -> Dict[str, Any]:
+    return CONNECTION_REAPER.status()
+
+
+async def SERVER_ENGINE_CONNECTION_REAPER_LOOP() -> None:
+    """Background task: heartbeats, idle close, abandoned-recording STOP."""
+    CONSOLE_LOG(PREFIX, "=== connection reaper starting ===", {"idle_timeout_ms": WS_IDLE_TIMEOUT_MS, "grace_ms": ABANDONED_RECORDING_GRACE_MS})
+    while True:
+        await asyncio.sleep(CONNECTION_REAPER_INTERVAL_MS / 1000.0)
+        try:
+            now = datetime.now()
+            await CONNECTION_REAPER.ping(now)
+            await CONNECTION_REAPER.close_idle(now)
+            CONNECTION_REAPER.stop_abandoned(now)
+            CONNECTION_REAPER.forget_closed_connections(now)
+            CONNECTION_REAPER.forget_purged_recordings(now)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            CONSOLE_LOG(PREFIX, "REAPER_ERROR", {"error": str(e)})
@@ -196,7 +196,10 @@ def create_database_and_tables(truncate_on_startup=False):
             DT_START_PYIN_RELATIVE_ROWS DATETIME,
             DT_END_PYIN_RELATIVE_ROWS DATETIME,
             DT_START_FFT_ENGINE_LOAD_FFT_INS DATETIME,
-            DT_END_FFT_ENGINE_LOAD_FFT_INS DATETIME
+            DT_END_FFT_ENGINE_LOAD_FFT_INS DATETIME,
+            ANALYZER_LADDER_RUNG INTEGER,
+            PYIN_OVERLAP_FOR_ACCURACY_OR_SPEED VARCHAR(20),
+            CREPE_HOP_IN_MS INTEGER
         )
     """)
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_log_split_recording_id ON ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME (RECORDING_ID)")
@@ -212,6 +215,7 @@ def create_database_and_tables(truncate_on_startup=False):
             COMPOSE_PLAY_OR_PRACTICE VARCHAR(50),
             AUDIO_STREAM_FILE_NAME VARCHAR(100),
             COMPOSE_YN_RUN_FFT CHAR(1),
+            ADMISSION_DECISION VARCHAR(20),
             DT_ADDED DATETIME,
             WEBSOCKET_CONNECTION_ID INTEGER,
             DT_RECORDING_END DATETIME,
@@ -0,0 +1,169 @@
+# SERVER_ENGINE_FLOW_CONTROL.py
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from SERVER_ENGINE_APP_VARIABLES import (
+    ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY,
+    ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_ARRAY,
+    ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY,
+    RECORDING_FRAME_WINDOW_ARRAY,
+    AUDIO_FRAME_MS,
+    AUDIO_SAMPLE_RATE,
+    AUDIO_BYTES_PER_SAMPLE,
+    FLOW_CONTROL_YN,
+    FLOW_CONTROL_INTERVAL_MS,
+    FLOW_MAX_BACKLOG_MS,
+    FLOW_GRANT_REFRESH_MS,
+    FLOW_DEFAULT_CLIENT_FRAME_MS,
+)
+from SERVER_ENGINE_APP_FUNCTIONS import CONSOLE_LOG
+from SERVER_ENGINE_WS_OUTBOUND import WS_SEND_JSON
+
+PREFIX = "FLOW_CONTROL"
+
+# ─────────────────────────────────────────────────────────────
+# Credit-based flow control
+# ─────────────────────────────────────────────────────────────
+# Protocol (/ws/stream, server → client TEXT):
+#   {MESSAGE_TYPE:'FLOW', RECORDING_ID, GRANT_THROUGH_FRAME_NO, BACKLOG_MS}
+# Client: before the first FLOW it sends freely; afterwards it sends frames ≤ GRANT_THROUGH_FRAME_NO
+# and holds later ones (paused). A larger grant resumes it; held frames go out in order. Resends
+# (MISSING_FRAMES) are always below the grant. On STOP the client flushes what it holds, then STOPs.
+#
+# Grant = highest frame received + (FLOW_MAX_BACKLOG_MS − backlog) / client frame ms, never lowered,
+# so in-flight audio is bounded by FLOW_MAX_BACKLOG_MS plus one grant interval.
+
+class FlowControl:
+    """Per-recording frame credits, recomputed every FLOW_CONTROL_INTERVAL_MS."""
+
+    def __init__(self, max_backlog_ms: int):
+        self.max_backlog_ms = max_backlog_ms
+        self.recordings: Dict[int, Dict[str, Any]] = {}
+
+    def backlog_ms(self, RECORDING_ID: int) -> float:
+        """Audio received for RECORDING_ID that Stage-6 has not finished analyzing."""
+        W = RECORDING_FRAME_WINDOW_ARRAY.get(RECORDING_ID) or {}
+        CONFIG = ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY.get(RECORDING_ID) or {}
+        UNSPLIT_CNT = max(0, W.get("MAX_FRAME_NO_RECEIVED", 0) - (CONFIG.get("MAX_PRE_SPLIT_AUDIO_FRAME_NO_SPLIT") or 0))
+        UNANALYZED_CNT = sum(
+            1 for ROW in list((ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY.get(RECORDING_ID) or {}).values())
+            if ROW.get("DT_FRAME_RECEIVED") is not None and ROW.get("DT_PROCESSING_END") is None
+        )
+        return UNSPLIT_CNT * self.client_frame_ms(RECORDING_ID) + UNANALYZED_CNT * AUDIO_FRAME_MS
+
+    def client_frame_ms(self, RECORDING_ID: int) -> float:
+        """Duration of the client's latest frame (PCM16 mono), else the default."""
+        W = RECORDING_FRAME_WINDOW_ARRAY.get(RECORDING_ID) or {}
+        ROW = (ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_ARRAY.get(RECORDING_ID) or {}).get(W.get("MAX_FRAME_NO_RECEIVED"))
+        SIZE_BYTES = (ROW or {}).get("AUDIO_FRAME_SIZE_BYTES") or 0
+        if SIZE_BYTES <= 0:
+            return float(FLOW_DEFAULT_CLIENT_FRAME_MS)
+        return SIZE_BYTES * 1000.0 / (AUDIO_BYTES_PER_SAMPLE * AUDIO_SAMPLE_RATE)
+
+    def update(self, RECORDING_ID: int, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Recompute the grant; returns the FLOW message to send, or None if nothing is due."""
+        now = time.monotonic() if now is None else now
+        W = RECORDING_FRAME_WINDOW_ARRAY.get(RECORDING_ID) or {}
+        MAX_FRAME_NO_RECEIVED = W.get("MAX_FRAME_NO_RECEIVED", 0)
+        BACKLOG_MS = self.backlog_ms(RECORDING_ID)
+        CREDIT_FRAMES = max(0, int((self.max_backlog_ms - BACKLOG_MS) // self.client_frame_ms(RECORDING_ID)))
+
+        S = self.recordings.setdefault(RECORDING_ID, {
+            "GRANT_THROUGH_FRAME_NO": 0,
+            "LAST_SENT": 0.0,
+            "GRANT_SENT_CNT": 0,
+            "BACKLOG_MS": 0.0,
+            "PEAK_BACKLOG_MS": 0.0,
+            "THROTTLED_SINCE": None,
+            "THROTTLED_MS_TOTAL": 0.0,
+            "THROTTLE_EPISODE_CNT": 0,
+        })
+        S["BACKLOG_MS"] = BACKLOG_MS
+        S["PEAK_BACKLOG_MS"] = max(S["PEAK_BACKLOG_MS"], BACKLOG_MS)
+
+        # Throttled = the client has used every frame it was granted and is holding the rest
+        THROTTLED = S["GRANT_SENT_CNT"] > 0 and MAX_FRAME_NO_RECEIVED >= S["GRANT_THROUGH_FRAME_NO"] and CREDIT_FRAMES == 0
+        if THROTTLED and S["THROTTLED_SINCE"] is None:
+            S["THROTTLED_SINCE"] = now
+            S["THROTTLE_EPISODE_CNT"] += 1
+            CONSOLE_LOG(PREFIX, "CLIENT_THROTTLED", {"rid": RECORDING_ID, "grant": S["GRANT_THROUGH_FRAME_NO"], "backlog_ms": round(BACKLOG_MS)})
+        elif not THROTTLED and S["THROTTLED_SINCE"] is not None:
+            THROTTLED_MS = (now - S["THROTTLED_SINCE"]) * 1000.0
+            S["THROTTLED_MS_TOTAL"] += THROTTLED_MS
+            S["THROTTLED_SINCE"] = None
+            CONSOLE_LOG(PREFIX, "CLIENT_RESUMED", {"rid": RECORDING_ID, "throttled_ms": round(THROTTLED_MS), "backlog_ms": round(BACKLOG_MS)})
+
+        GRANT_THROUGH_FRAME_NO = max(S["GRANT_THROUGH_FRAME_NO"], MAX_FRAME_NO_RECEIVED + CREDIT_FRAMES)
+        if GRANT_THROUGH_FRAME_NO == S["GRANT_THROUGH_FRAME_NO"] and (now - S["LAST_SENT"]) * 1000.0 < FLOW_GRANT_REFRESH_MS:
+            return None
+        S["GRANT_THROUGH_FRAME_NO"] = GRANT_THROUGH_FRAME_NO
+        S["LAST_SENT"] = now
+        S["GRANT_SENT_CNT"] += 1
+        return {
+            "MESSAGE_TYPE": "FLOW",
+            "RECORDING_ID": RECORDING_ID,
+            "GRANT_THROUGH_FRAME_NO": GRANT_THROUGH_FRAME_NO,
+            "BACKLOG_MS": round(BACKLOG_MS),
+        }
+
+    def regrant(self, RECORDING_ID: int) -> None:
+        """Resend the current grant on the next tick (the recording moved to a new connection)."""
+        S = self.recordings.get(int(RECORDING_ID))
+        if S is not None:
+            S["LAST_SENT"] = 0.0
+
+    def forget_recording(self, RECORDING_ID: int) -> None:
+        self.recordings.pop(int(RECORDING_ID), None)
+
+    def status(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        RECORDINGS = {}
+        for RECORDING_ID, S in list(self.recordings.items()):
+            THROTTLED_MS = S["THROTTLED_MS_TOTAL"]
+            if S["THROTTLED_SINCE"] is not None:
+                THROTTLED_MS += (now - S["THROTTLED_SINCE"]) * 1000.0
+            RECORDINGS[RECORDING_ID] = {
+                "grant_through_frame_no": S["GRANT_THROUGH_FRAME_NO"],
+                "backlog_ms": round(S["BACKLOG_MS"]),
+                "peak_backlog_ms": round(S["PEAK_BACKLOG_MS"]),
+                "throttled": S["THROTTLED_SINCE"] is not None,
+                "throttled_ms_total": round(THROTTLED_MS),
+                "throttle_episodes": S["THROTTLE_EPISODE_CNT"],
+                "grants_sent": S["GRANT_SENT_CNT"],
+            }
+        return {
+            "enabled": FLOW_CONTROL_YN == "Y",
+            "max_backlog_ms": self.max_backlog_ms,
+            "throttled_recordings": sum(1 for R in RECORDINGS.values() if R["throttled"]),
+            "recordings": RECORDINGS,
+        }
+
+# ─────────────────────────────────────────────────────────────
+# Global instance + background loop
+# ─────────────────────────────────────────────────────────────
+
+FLOW_CONTROL = FlowControl(FLOW_MAX_BACKLOG_MS)
+
+def get_flow_control_status() -> Dict[str, Any]:
+    return FLOW_CONTROL.status()
+
+
+async def SERVER_ENGINE_FLOW_CONTROL_LOOP() -> None:
+    """Background task: grant credits to every admitted, still-streaming recording."""
+    CONSOLE_LOG(PREFIX, "=== flow control starting ===", {"enabled": FLOW_CONTROL_YN, "max_backlog_ms": FLOW_MAX_BACKLOG_MS})
+    while True:
+        await asyncio.sleep(FLOW_CONTROL_INTERVAL_MS / 1000.0)
+        if FLOW_CONTROL_YN != "Y":
+            continue
+        for RECORDING_ID, CONFIG in list(ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY.items()):
+            if CONFIG.get("DT_PROCESS_WEBSOCKET_START_MESSAGE_DONE") is None or CONFIG.get("DT_RECORDING_END") is not None:
+                continue
+            try:
+                FLOW_MESSAGE = FLOW_CONTROL.update(RECORDING_ID)
+                if FLOW_MESSAGE is not None:
+                    await WS_SEND_JSON(CONFIG.get("WEBSOCKET_CONNECTION_ID"), FLOW_MESSAGE)
+            except Exception as e:
+                CONSOLE_LOG(PREFIX, "UPDATE_ERROR", {"rid": RECORDING_ID, "error": str(e)})
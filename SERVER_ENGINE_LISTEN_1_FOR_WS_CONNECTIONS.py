@@ -15,6 +15,8 @@ from SERVER_ENGINE_APP_FUNCTIONS import (
     CONSOLE_LOG,
     ENGINE_DB_LOG_FUNCTIONS_INS,  # centralized Start/End/Error logging
 )
+from SERVER_ENGINE_WS_OUTBOUND import WS_REGISTER
+from SERVER_ENGINE_WS_FRAME_PROTOCOL import WS_CHOOSE_SUBPROTOCOL
 
 _NEXT_CONN_ID = 1
 
@@ -37,10 +39,10 @@ def _requested_subprotocols(ws: WebSocket) -> List[str]:
 
 def _choose_subprotocol(requested: List[str]) -> Optional[str]:
     """
-    Very simple policy: echo back the first requested protocol.
-    Adjust here if you want to enforce a whitelist.
+    Whitelist: only protocols this server speaks (SERVER_ENGINE_WS_FRAME_PROTOCOL).
+    None → no subprotocol → legacy TEXT+BINARY frame pairing.
     """
-    return requested[0] if requested else None
+    return WS_CHOOSE_SUBPROTOCOL(requested)
 
 
 @ENGINE_DB_LOG_FUNCTIONS_INS()
@@ -92,10 +94,16 @@ async def SERVER_ENGINE_LISTEN_1_FOR_WS_CONNECTIONS(ws: WebSocket) -> int:
         "URL_SCHEME": scheme,
         "URL_PATH": path,
         "URL_QUERY_STRING": query_string,
+        # Frames dropped by Stage-2 ingest (see INGEST_AUDIO_FRAME)
+        "DUPLICATE_FRAME_CNT": 0,
+        "LATE_FRAME_CNT": 0,
+        "OUT_OF_WINDOW_FRAME_CNT": 0,
     }
 
     # Save full row in the in-memory array
     ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY[conn_id] = row
+    # Live socket for server → client replies (START_ACK, ...)
+    WS_REGISTER(conn_id, ws)
 
     # --- Persist to DB using the generic allowlisted path (fire-and-forget)
     ENGINE_DB_LOG_TABLE_INS("ENGINE_DB_LOG_WEBSOCKET_CONNECTION", row)
@@ -5,24 +5,273 @@ import asyncio
 import json
 from datetime import datetime
 from hashlib import sha256
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from fastapi import WebSocket, WebSocketDisconnect
 
 from SERVER_ENGINE_APP_VARIABLES import (
     ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ARRAY,
     ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY,
+    ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY,
     ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_ARRAY,  # metadata only (no bytes)
     PRE_SPLIT_AUDIO_FRAME_ARRAY,                # raw bytes only (volatile)
+    PURGED_RECORDING_ARRAY,
+    WS_INGEST_QUEUE_MAXSIZE,
 )
 from SERVER_ENGINE_APP_FUNCTIONS import (
     ENGINE_DB_LOG_TABLE_INS,   # allowlisted insert; supports fire_and_forget=True
     CONSOLE_LOG,
     ENGINE_DB_LOG_FUNCTIONS_INS,  # centralized Start/End/Error logging
 )
+from SERVER_ENGINE_PAYLOAD_LIFETIME import PAYLOAD_REGISTER_CONSUMERS, PRE_SPLIT
+from SERVER_ENGINE_LISTEN_7_FOR_FINISHED_RECORDINGS import RECORDING_WORK_ADD
+from SERVER_ENGINE_WS_OUTBOUND import WS_UNREGISTER, WS_SEND_JSON
+from SERVER_ENGINE_WS_FRAME_PROTOCOL import WS_SUBPROTOCOL_FRAME_V1, FRAME_UNPACK, FRAME_HEADER_UNPACK
+from SERVER_ENGINE_LISTEN_4_FOR_MISSING_FRAMES import FRAME_WINDOW_MARK_RECEIVED, FRAME_WINDOW_MARK_DROPPED
 
 L_MESSAGE_ID = 0
 
+def WEBSOCKET_MESSAGE_LOG(RECORDING_ID: int, MESSAGE_TYPE: str, WEBSOCKET_CONNECTION_ID: Optional[int], now: datetime) -> int:
+    """Store a non-FRAME message row for the Stage-3 scanners (also used for reaper-synthesized STOPs)."""
+    global L_MESSAGE_ID
+    L_MESSAGE_ID = L_MESSAGE_ID + 1
+    ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD = {
+        "MESSAGE_ID": L_MESSAGE_ID,
+        "DT_MESSAGE_RECEIVED": now,
+        "RECORDING_ID": RECORDING_ID,
+        "MESSAGE_TYPE": MESSAGE_TYPE or "TEXT",
+        "AUDIO_FRAME_NO": None,
+        "DT_MESSAGE_PROCESS_STARTED": None,
+        "WEBSOCKET_CONNECTION_ID": WEBSOCKET_CONNECTION_ID,
+    }
+    ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ARRAY[L_MESSAGE_ID] = ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD
+    ENGINE_DB_LOG_TABLE_INS("ENGINE_DB_LOG_WEBSOCKET_MESSAGE", ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD)
+    return L_MESSAGE_ID
+
+
+def _CONNECTION_CLOSED(WEBSOCKET_CONNECTION_ID: int, now: datetime) -> None:
+    """Stamp DT_CONNECTION_CLOSED once and drop the live socket."""
+    WS_UNREGISTER(WEBSOCKET_CONNECTION_ID)
+    ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD = ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY.get(WEBSOCKET_CONNECTION_ID)
+    if ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD is not None and ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD.get("DT_CONNECTION_CLOSED") is None:
+        ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD["DT_CONNECTION_CLOSED"] = now
+        ENGINE_DB_LOG_TABLE_INS("ENGINE_DB_LOG_WEBSOCKET_CONNECTION", ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD)
+
+def _COUNT_DROPPED_FRAME(WEBSOCKET_CONNECTION_ID: Optional[int], RECORDING_ID: int, AUDIO_FRAME_NO: int, DROP_REASON: str) -> None:
+    """Per-connection counters (in-memory extras on the connection row; not allowlisted for the DB)."""
+    ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD = ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY.get(WEBSOCKET_CONNECTION_ID)
+    if ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD is not None:
+        KEY = f"{DROP_REASON}_FRAME_CNT"
+        ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD[KEY] = ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD.get(KEY, 0) + 1
+    CONSOLE_LOG("LISTEN_2", f"FRAME_DROPPED_{DROP_REASON}", {"conn_id": WEBSOCKET_CONNECTION_ID, "rid": RECORDING_ID, "fno": AUDIO_FRAME_NO})
+
+
+# ──────────────────────────────────────────────────────────────
+# Frame ingest (shared by legacy pairing, violin.frame.v1 and Stage-4 zero-fill)
+# ──────────────────────────────────────────────────────────────
+def INGEST_AUDIO_FRAME(
+    RECORDING_ID: int,
+    AUDIO_FRAME_NO: int,
+    AUDIO_FRAME_BYTES: bytes,
+    now: datetime,
+    WEBSOCKET_CONNECTION_ID: int,
+    AUDIO_FRAME_ENCODING: str = "raw",
+) -> None:
+    """Log the FRAME message, stage the bytes for Stage-3B and record the pre-split metadata."""
+    global L_MESSAGE_ID
+
+    # START was answered BUSY: the client is told to stop, drop what is still in flight
+    if ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY.get(RECORDING_ID, {}).get("ADMISSION_DECISION") == "BUSY":
+        return
+
+    # Recording already finalized + purged (e.g. a resend in flight when STOP zero-filled the gaps):
+    # nothing downstream would consume or purge what this frame creates
+    if int(RECORDING_ID) in PURGED_RECORDING_ARRAY:
+        _COUNT_DROPPED_FRAME(WEBSOCKET_CONNECTION_ID, RECORDING_ID, AUDIO_FRAME_NO, "PURGED")
+        return
+
+    # Idempotent per (RECORDING_ID, AUDIO_FRAME_NO): the first copy wins, before any downstream work.
+    #   same SHA256      → DUPLICATE (resend of a frame we already hold)
+    #   different SHA256 → LATE      (real frame arriving after Stage-4 zero-filled its slot)
+    AUDIO_FRAME_SHA256_HEX = sha256(AUDIO_FRAME_BYTES).hexdigest()
+    ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_RECORD_0 = ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_ARRAY.get(RECORDING_ID, {}).get(AUDIO_FRAME_NO)
+    if ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_RECORD_0 is not None:
+        DROP_REASON = "DUPLICATE" if ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_RECORD_0.get("AUDIO_FRAME_SHA256_HEX") == AUDIO_FRAME_SHA256_HEX else "LATE"
+        _COUNT_DROPPED_FRAME(WEBSOCKET_CONNECTION_ID, RECORDING_ID, AUDIO_FRAME_NO, DROP_REASON)
+        return
+
+    # Reorder window (Stage-4): a frame below the window whose metadata is gone, or far ahead, is dropped
+    if not FRAME_WINDOW_MARK_RECEIVED(RECORDING_ID, AUDIO_FRAME_NO):
+        _COUNT_DROPPED_FRAME(WEBSOCKET_CONNECTION_ID, RECORDING_ID, AUDIO_FRAME_NO, "OUT_OF_WINDOW")
+        return
+
+    # log the FRAME message itself (now that we HAVE bytes)
+    L_MESSAGE_ID = L_MESSAGE_ID + 1
+    ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD = {
+        "MESSAGE_ID": L_MESSAGE_ID,
+        "DT_MESSAGE_RECEIVED": now,
+        "RECORDING_ID": RECORDING_ID,
+        "MESSAGE_TYPE": "FRAME",
+        "AUDIO_FRAME_NO": AUDIO_FRAME_NO,
+        "DT_MESSAGE_PROCESS_STARTED": None,
+        "WEBSOCKET_CONNECTION_ID": WEBSOCKET_CONNECTION_ID,
+    }
+    ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ARRAY[L_MESSAGE_ID] = ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD
+    # ENGINE_DB_LOG_TABLE_INS("ENGINE_DB_LOG_WEBSOCKET_MESSAGE", ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD)
+
+    PRE_SPLIT_AUDIO_FRAME_RECORD = PRE_SPLIT_AUDIO_FRAME_ARRAY.setdefault(RECORDING_ID, {})
+    PRE_SPLIT_AUDIO_FRAME_RECORD[AUDIO_FRAME_NO] = {
+        "RECORDING_ID": RECORDING_ID,
+        "AUDIO_FRAME_NO": AUDIO_FRAME_NO,
+        "AUDIO_FRAME_BYTES": AUDIO_FRAME_BYTES,
+    }
+    # Only Stage-3B reads the chunk bytes; they are dropped once it has split them
+    PAYLOAD_REGISTER_CONSUMERS(PRE_SPLIT, RECORDING_ID, AUDIO_FRAME_NO, ("SPLIT",))
+    # Outstanding until Stage-3B has split it
+    RECORDING_WORK_ADD(RECORDING_ID)
+
+    # Store in the array for later processing
+    ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_RECORD = ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_ARRAY.setdefault(RECORDING_ID, {})
+    ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_RECORD[AUDIO_FRAME_NO] = {
+        "RECORDING_ID": RECORDING_ID,
+        "AUDIO_FRAME_NO": AUDIO_FRAME_NO,
+        "START_MS": None,
+        "END_MS": None,
+        "DT_FRAME_RECEIVED": now,
+        "DT_FRAME_PAIRED_WITH_WEBSOCKETS_METADATA": now,
+        "AUDIO_FRAME_SIZE_BYTES": len(AUDIO_FRAME_BYTES),
+        "AUDIO_FRAME_ENCODING": AUDIO_FRAME_ENCODING,
+        "AUDIO_FRAME_SHA256_HEX": AUDIO_FRAME_SHA256_HEX,
+        "WEBSOCKET_CONNECTION_ID": WEBSOCKET_CONNECTION_ID,  # ignored by DB if not allowlisted
+    }
+
+    # 3) persist metadata (never the bytes); the stored row is already flat
+    # ENGINE_DB_LOG_TABLE_INS("ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME", ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_RECORD[AUDIO_FRAME_NO])
+
+
+# ──────────────────────────────────────────────────────────────
+# Per-connection ingest queue (receive ≠ process)
+# ──────────────────────────────────────────────────────────────
+# The receive loop only reads the socket, stamps arrival time and queues one tuple per message:
+#   ("FRAME",  RECORDING_ID, AUDIO_FRAME_NO, FRAME_DURATION_IN_MS, AUDIO_FRAME_BYTES, DT_RECEIVED)   legacy pair
+#   ("BINARY", MESSAGE_BYTES, DT_RECEIVED)                                                           violin.frame.v1
+#   ("TEXT",   RECORDING_ID, MESSAGE_TYPE, DT_RECEIVED)                                              START/STOP/RESUME/...
+# One consumer per connection unpacks, hashes and updates the stores in arrival order, so the socket
+# is drained even while a burst (resends, held frames after a FLOW grant) is being ingested.
+# Jitter (RFC 3550 style, on arrival times): D = (arrival gap) − (frame-number gap × frame duration),
+# J += (|D| − J) / 16. One estimate per connection, fed by consecutive frames of each recording on it.
+#
+# Multiplexing: one /ws/stream connection may carry several recordings at once (duet, teacher + student).
+# Every message names its RECORDING_ID; sequencing (Stage-4 window), FLOW credits, ACK resends and
+# Stage-3B split state are all per recording already. START/RESUME add the recording to the connection's
+# ACTIVE_RECORDING_IDS, STOP removes it; the socket is closed by the server only after the last STOP.
+IngestItem = Tuple[Any, ...]
+
+_INGEST_QUEUE_ARRAY: Dict[int, asyncio.Queue] = {}
+
+
+def _RECEIVE_JITTER(ROW: Dict[str, Any], RECORDING_ID: int, AUDIO_FRAME_NO: int, FRAME_DURATION_IN_MS: Optional[int], DT_RECEIVED: datetime) -> None:
+    """Update RECEIVE_JITTER_MS / RECEIVE_JITTER_MAX_MS (in-memory extras on the connection row)."""
+    LAST_ARRAY = ROW.setdefault("LAST_FRAME_ARRIVAL", {})  #int = RECORDING_ID → (AUDIO_FRAME_NO, DT_RECEIVED)
+    LAST = LAST_ARRAY.get(RECORDING_ID)
+    if LAST is not None and AUDIO_FRAME_NO <= LAST[0]:
+        return  # resend / reordered frame: not an arrival gap
+    if LAST is not None and FRAME_DURATION_IN_MS:
+        D_MS = (DT_RECEIVED - LAST[1]).total_seconds() * 1000.0 - (AUDIO_FRAME_NO - LAST[0]) * FRAME_DURATION_IN_MS
+        J = ROW.get("RECEIVE_JITTER_MS", 0.0)
+        ROW["RECEIVE_JITTER_MS"] = J + (abs(D_MS) - J) / 16.0
+        ROW["RECEIVE_JITTER_MAX_MS"] = max(ROW.get("RECEIVE_JITTER_MAX_MS", 0.0), abs(D_MS))
+    LAST_ARRAY[RECORDING_ID] = (AUDIO_FRAME_NO, DT_RECEIVED)
+
+
+def _INGEST_ONE(ITEM: IngestItem, WEBSOCKET_CONNECTION_ID: int, ROW: Dict[str, Any]) -> None:
+    KIND = ITEM[0]
+    if KIND == "TEXT":
+        _, RECORDING_ID, MESSAGE_TYPE, DT_RECEIVED = ITEM
+        WEBSOCKET_MESSAGE_LOG(RECORDING_ID, MESSAGE_TYPE, WEBSOCKET_CONNECTION_ID, DT_RECEIVED)
+        return
+
+    if KIND == "FRAME":
+        _, RECORDING_ID, AUDIO_FRAME_NO, FRAME_DURATION_IN_MS, AUDIO_FRAME_BYTES, DT_RECEIVED = ITEM
+        AUDIO_FRAME_ENCODING = "raw"
+    else:
+        _, MESSAGE_BYTES, DT_RECEIVED = ITEM
+        try:
+            FRAME_HEADER, AUDIO_FRAME_BYTES = FRAME_UNPACK(MESSAGE_BYTES)
+        except ValueError as e:
+            CONSOLE_LOG("LISTEN_2", "BAD_BINARY_FRAME", {"conn_id": WEBSOCKET_CONNECTION_ID, "error": str(e)})
+            return
+        RECORDING_ID = FRAME_HEADER["RECORDING_ID"]
+        AUDIO_FRAME_NO = FRAME_HEADER["AUDIO_FRAME_NO"]
+        FRAME_DURATION_IN_MS = FRAME_HEADER["FRAME_DURATION_IN_MS"]
+        AUDIO_FRAME_ENCODING = FRAME_HEADER["AUDIO_FRAME_ENCODING"]
+
+    _RECEIVE_JITTER(ROW, RECORDING_ID, AUDIO_FRAME_NO, FRAME_DURATION_IN_MS, DT_RECEIVED)
+    INGEST_AUDIO_FRAME(RECORDING_ID, AUDIO_FRAME_NO, AUDIO_FRAME_BYTES, DT_RECEIVED, WEBSOCKET_CONNECTION_ID, AUDIO_FRAME_ENCODING)
+
+
+async def _INGEST_CONSUMER(QUEUE: asyncio.Queue, WEBSOCKET_CONNECTION_ID: int, ROW: Dict[str, Any]) -> None:
+    """Drain the connection's ingest queue until the receive loop queues None."""
+    while True:
+        ITEM = await QUEUE.get()
+        if ITEM is None:
+            return
+        WAIT_MS = (datetime.now() - ITEM[-1]).total_seconds() * 1000.0
+        ROW["INGEST_WAIT_MAX_MS"] = max(ROW.get("INGEST_WAIT_MAX_MS", 0.0), WAIT_MS)
+        ROW["INGEST_WAIT_MS_TOTAL"] = ROW.get("INGEST_WAIT_MS_TOTAL", 0.0) + WAIT_MS
+        ROW["INGEST_CNT"] = ROW.get("INGEST_CNT", 0) + 1
+        try:
+            _INGEST_ONE(ITEM, WEBSOCKET_CONNECTION_ID, ROW)
+        except Exception as e:
+            CONSOLE_LOG("LISTEN_2", "INGEST_ERROR", {"conn_id": WEBSOCKET_CONNECTION_ID, "kind": ITEM[0], "error": str(e)})
+
+
+def _ENQUEUE_FRAME(QUEUE: asyncio.Queue, ITEM: IngestItem, WEBSOCKET_CONNECTION_ID: int, ROW: Dict[str, Any]) -> None:
+    """Never blocks the receive loop: a frame that finds the queue full is dropped (Stage-4 resends)."""
+    try:
+        QUEUE.put_nowait(ITEM)
+    except asyncio.QueueFull:
+        if ITEM[0] == "FRAME":
+            RECORDING_ID, AUDIO_FRAME_NO = ITEM[1], ITEM[2]
+        else:
+            try:
+                FRAME_HEADER = FRAME_HEADER_UNPACK(ITEM[1])  # fixed 16 bytes, the audio is not copied
+            except ValueError as e:
+                CONSOLE_LOG("LISTEN_2", "BAD_BINARY_FRAME", {"conn_id": WEBSOCKET_CONNECTION_ID, "error": str(e)})
+                return
+            RECORDING_ID, AUDIO_FRAME_NO = FRAME_HEADER["RECORDING_ID"], FRAME_HEADER["AUDIO_FRAME_NO"]
+        _COUNT_DROPPED_FRAME(WEBSOCKET_CONNECTION_ID, RECORDING_ID, AUDIO_FRAME_NO, "QUEUE_FULL")
+        # Known lost, not reordered: Stage-4 asks for it on its next scan, not after FRAME_GAP_RESEND_AFTER_MS
+        if int(RECORDING_ID) not in PURGED_RECORDING_ARRAY:
+            FRAME_WINDOW_MARK_DROPPED(RECORDING_ID, AUDIO_FRAME_NO)
+        return
+    ROW["INGEST_QUEUE_PEAK_DEPTH"] = max(ROW.get("INGEST_QUEUE_PEAK_DEPTH", 0), QUEUE.qsize())
+
+
+def get_ingest_status() -> Dict[str, Any]:
+    """Dropped-frame counters, ingest queue and receive jitter per connection."""
+    return {
+        "queue_maxsize": WS_INGEST_QUEUE_MAXSIZE,
+        "connections": {
+            WEBSOCKET_CONNECTION_ID: {
+                "duplicate_frames": ROW.get("DUPLICATE_FRAME_CNT", 0),
+                "late_frames": ROW.get("LATE_FRAME_CNT", 0),
+                "out_of_window_frames": ROW.get("OUT_OF_WINDOW_FRAME_CNT", 0),
+                "purged_frames": ROW.get("PURGED_FRAME_CNT", 0),
+                "queue_full_frames": ROW.get("QUEUE_FULL_FRAME_CNT", 0),
+                "active_recording_ids": sorted(ROW.get("ACTIVE_RECORDING_IDS", ())),
+                "queue_depth": _INGEST_QUEUE_ARRAY[WEBSOCKET_CONNECTION_ID].qsize() if WEBSOCKET_CONNECTION_ID in _INGEST_QUEUE_ARRAY else 0,
+                "queue_peak_depth": ROW.get("INGEST_QUEUE_PEAK_DEPTH", 0),
+                "ingest_wait_avg_ms": round(ROW.get("INGEST_WAIT_MS_TOTAL", 0.0) / max(1, ROW.get("INGEST_CNT", 0)), 2),
+                "ingest_wait_max_ms": round(ROW.get("INGEST_WAIT_MAX_MS", 0.0), 2),
+                "receive_jitter_ms": round(ROW.get("RECEIVE_JITTER_MS", 0.0), 2),
+                "receive_jitter_max_ms": round(ROW.get("RECEIVE_JITTER_MAX_MS", 0.0), 2),
+            }
+            for WEBSOCKET_CONNECTION_ID, ROW in list(ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY.items())
+        },
+    }
+
+
 # ──────────────────────────────────────────────────────────────
 # Main receive loop
 # ──────────────────────────────────────────────────────────────
@@ -32,123 +281,115 @@ async def SERVER_ENGINE_LISTEN_2_FOR_WS_MESSAGES(WEBSOCKET_MESSAGE: WebSocket, W
     Contract (paired receive):
       • When TEXT {MESSAGE_TYPE:'FRAME', RECORDING_ID, FRAME_NO} arrives,
         we synchronously await the very next BINARY and pair them atomically.
-      • Non-FRAME TEXT (START/STOP/etc.) is logged immediately.
-      • STOP → socket closed + connection row stamped.
-      • If a BINARY arrives without a prior FRAME header, we treat it as orphaned (RID=0, FRAME_NO=0).
+      • Non-FRAME TEXT (START/STOP/etc.) is queued in order with the frames.
+      • START/RESUME/STOP maintain the connection's ACTIVE_RECORDING_IDS (several recordings may share it).
+      • STOP of the last active recording → socket closed + connection row stamped.
+      • PING/PONG heartbeats only refresh DT_LAST_MESSAGE_RECEIVED (no message row).
+      • Disconnect (also mid-pair) → connection row stamped and the loop ends; the reaper finishes
+        any recording left without STOP.
+      • If a BINARY arrives without a prior FRAME header, it is ignored.
+    violin.frame.v1 (negotiated in Stage-1):
+      • Each BINARY is a whole frame (16-byte struct header + audio); no pairing, no per-frame JSON.
+      • TEXT messages are handled exactly as above.
+    Everything except heartbeats goes through the connection's ingest queue; this loop returns
+    only after the consumer has ingested what was already received.
     """
 
-    global L_MESSAGE_ID
-    
-    while True:
-        RAW_WEBSOCKET_MESSAGE = await WEBSOCKET_MESSAGE.receive()
-        now = datetime.now()
-
-        # ── Disconnect
-        if RAW_WEBSOCKET_MESSAGE.get("type") == "websocket.disconnect":
-            ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD = ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY.get(WEBSOCKET_CONNECTION_ID)
-            ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD["DT_CONNECTION_CLOSED"] = now
-            ENGINE_DB_LOG_TABLE_INS("ENGINE_DB_LOG_WEBSOCKET_CONNECTION", ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD)
-
-        # ── TEXT
-        WEBSOCKET_MESSAGE_TEXT = RAW_WEBSOCKET_MESSAGE.get("text")
-        if WEBSOCKET_MESSAGE_TEXT is not None:
-            WEBSOCKET_MESSAGE_JSON = json.loads(WEBSOCKET_MESSAGE_TEXT)
-
-            MESSAGE_TYPE = str(WEBSOCKET_MESSAGE_JSON.get("MESSAGE_TYPE") or 
-                               WEBSOCKET_MESSAGE_JSON.get("type", "")).upper()
-            RECORDING_ID = int(WEBSOCKET_MESSAGE_JSON.get("RECORDING_ID") or 0)
-
-            if MESSAGE_TYPE == "FRAME":              
-                AUDIO_FRAME_NO = int(WEBSOCKET_MESSAGE_JSON.get("AUDIO_FRAME_NO") or
-                                    WEBSOCKET_MESSAGE_JSON.get("FRAME_NO"))
-                # PAIRING: wait for the very next binary and only then log/enqueue
-                while True:
-                    RAW_WEBSOCKET_MESSAGE_2 = await WEBSOCKET_MESSAGE.receive()
-                    if RAW_WEBSOCKET_MESSAGE_2.get("type") == "websocket.disconnect":
-                        break
-                    if RAW_WEBSOCKET_MESSAGE_2.get("bytes") is not None: 
-                        AUDIO_FRAME_BYTES = RAW_WEBSOCKET_MESSAGE_2["bytes"]
-                        break
+    ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD = ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY.get(WEBSOCKET_CONNECTION_ID) or {}
+    BINARY_FRAMES_YN = "Y" if ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD.get("SERVER_ACCEPTED_SUBPROTOCOL") == WS_SUBPROTOCOL_FRAME_V1 else "N"
+    ACTIVE_RECORDING_IDS = ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD.setdefault("ACTIVE_RECORDING_IDS", set())
 
-                # log the FRAME message itself (now that we HAVE bytes)
-                L_MESSAGE_ID = L_MESSAGE_ID + 1
-                ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD = {
-                    "MESSAGE_ID": L_MESSAGE_ID,
-                    "DT_MESSAGE_RECEIVED": now,
-                    "RECORDING_ID": RECORDING_ID,
-                    "MESSAGE_TYPE": "FRAME",
-                    "AUDIO_FRAME_NO": AUDIO_FRAME_NO,
-                    "DT_MESSAGE_PROCESS_STARTED": None,
-                    "WEBSOCKET_CONNECTION_ID": WEBSOCKET_CONNECTION_ID,
-                }
-                ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ARRAY[L_MESSAGE_ID] = ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD
-                # ENGINE_DB_LOG_TABLE_INS("ENGINE_DB_LOG_WEBSOCKET_MESSAGE", ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD)
-
-                PRE_SPLIT_AUDIO_FRAME_RECORD = PRE_SPLIT_AUDIO_FRAME_ARRAY.setdefault(RECORDING_ID, {})
-                PRE_SPLIT_AUDIO_FRAME_RECORD[AUDIO_FRAME_NO] = {
-                    "RECORDING_ID": RECORDING_ID,
-                    "AUDIO_FRAME_NO": AUDIO_FRAME_NO,
-                    "AUDIO_FRAME_BYTES": AUDIO_FRAME_BYTES,
-                }
-
-                # Store in the array for later processing
-                ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_RECORD = ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_ARRAY.setdefault(RECORDING_ID, {})
-                ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_RECORD[AUDIO_FRAME_NO] = {
-                    "RECORDING_ID": RECORDING_ID,
-                    "AUDIO_FRAME_NO": AUDIO_FRAME_NO,
-                    "START_MS": None,
-                    "END_MS": None,
-                    "DT_FRAME_RECEIVED": now,
-                    "DT_FRAME_PAIRED_WITH_WEBSOCKETS_METADATA": now,
-                    "AUDIO_FRAME_SIZE_BYTES": len(AUDIO_FRAME_BYTES),
-                    "AUDIO_FRAME_ENCODING": "raw",
-                    "AUDIO_FRAME_SHA256_HEX": sha256(AUDIO_FRAME_BYTES).hexdigest(),
-                    "WEBSOCKET_CONNECTION_ID": WEBSOCKET_CONNECTION_ID,  # ignored by DB if not allowlisted
-                }
-                
-                # 3) persist metadata (never the bytes) - Create flat dictionary for DB insert
-                frame_data_for_db = {
-                    "RECORDING_ID": RECORDING_ID,
-                    "AUDIO_FRAME_NO": AUDIO_FRAME_NO,
-                    "START_MS": None,
-                    "END_MS": None,
-                    "DT_FRAME_RECEIVED": now,
-                    "DT_FRAME_PAIRED_WITH_WEBSOCKETS_METADATA": now,
-                    "AUDIO_FRAME_SIZE_BYTES": len(AUDIO_FRAME_BYTES),
-                    "AUDIO_FRAME_ENCODING": "raw",
-                    "AUDIO_FRAME_SHA256_HEX": sha256(AUDIO_FRAME_BYTES).hexdigest(),
-                    "WEBSOCKET_CONNECTION_ID": WEBSOCKET_CONNECTION_ID,  # ignored by DB if not allowlisted
-                }
-                
-                # DEBUG: Log what we're trying to insert
-                # print(f"DEBUG: Data being sent: {frame_data_for_db}")
-                # print(f"DEBUG: Keys: {list(frame_data_for_db.keys())}")
-                # print(f"DEBUG: Table: ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME")
-                
-                # Insert the single flat frame record
-                # ENGINE_DB_LOG_TABLE_INS("ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME", frame_data_for_db)
-
-            else:  #NON-FRAME
-                L_MESSAGE_ID =  L_MESSAGE_ID + 1
-                ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD = {
-                "MESSAGE_ID": L_MESSAGE_ID,
-                "DT_MESSAGE_RECEIVED": now,
-                "RECORDING_ID": RECORDING_ID,
-                "MESSAGE_TYPE": MESSAGE_TYPE or "TEXT",
-                "AUDIO_FRAME_NO": None,
-                "DT_MESSAGE_PROCESS_STARTED": None,
-                "WEBSOCKET_CONNECTION_ID": WEBSOCKET_CONNECTION_ID,
-                }
-                ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ARRAY[L_MESSAGE_ID] = ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD
-                ENGINE_DB_LOG_TABLE_INS("ENGINE_DB_LOG_WEBSOCKET_MESSAGE", ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD)
-
-            if MESSAGE_TYPE == "STOP":
-                # graceful close
-                await WEBSOCKET_MESSAGE.close()
-                ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD = ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY.get(WEBSOCKET_CONNECTION_ID)
-                ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD["DT_CONNECTION_CLOSED"] = now
-                ENGINE_DB_LOG_TABLE_INS("ENGINE_DB_LOG_WEBSOCKET_CONNECTION", ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD)
+    QUEUE: asyncio.Queue = asyncio.Queue(maxsize=WS_INGEST_QUEUE_MAXSIZE)
+    _INGEST_QUEUE_ARRAY[WEBSOCKET_CONNECTION_ID] = QUEUE
+    CONSUMER = asyncio.create_task(
+        _INGEST_CONSUMER(QUEUE, WEBSOCKET_CONNECTION_ID, ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD),
+        name=f"ws_ingest_{WEBSOCKET_CONNECTION_ID}",
+    )
+
+    try:
+        while True:
+            RAW_WEBSOCKET_MESSAGE = await WEBSOCKET_MESSAGE.receive()
+            now = datetime.now()
+
+            # ── Disconnect
+            if RAW_WEBSOCKET_MESSAGE.get("type") == "websocket.disconnect":
+                _CONNECTION_CLOSED(WEBSOCKET_CONNECTION_ID, now)
                 break
 
-        else:
-            continue
+            # Any traffic counts as liveness for the idle reaper
+            ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD["DT_LAST_MESSAGE_RECEIVED"] = now
+
+            # ── TEXT
+            WEBSOCKET_MESSAGE_TEXT = RAW_WEBSOCKET_MESSAGE.get("text")
+            if WEBSOCKET_MESSAGE_TEXT is not None:
+                WEBSOCKET_MESSAGE_JSON = json.loads(WEBSOCKET_MESSAGE_TEXT)
+
+                MESSAGE_TYPE = str(WEBSOCKET_MESSAGE_JSON.get("MESSAGE_TYPE") or 
+                                   WEBSOCKET_MESSAGE_JSON.get("type", "")).upper()
+                RECORDING_ID = int(WEBSOCKET_MESSAGE_JSON.get("RECORDING_ID") or 0)
+
+                if MESSAGE_TYPE == "PONG":
+                    # Heartbeat reply (PING sent by SERVER_ENGINE_CONNECTION_REAPER)
+                    DT_LAST_PING_SENT = ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD.get("DT_LAST_PING_SENT")
+                    if DT_LAST_PING_SENT is not None:
+                        ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD["PING_RTT_MS"] = round((now - DT_LAST_PING_SENT).total_seconds() * 1000.0)
+                    continue
+                if MESSAGE_TYPE == "PING":
+                    await WS_SEND_JSON(WEBSOCKET_CONNECTION_ID, {"MESSAGE_TYPE": "PONG"})
+                    continue
+
+                if MESSAGE_TYPE == "FRAME":              
+                    AUDIO_FRAME_NO = int(WEBSOCKET_MESSAGE_JSON.get("AUDIO_FRAME_NO") or
+                                        WEBSOCKET_MESSAGE_JSON.get("FRAME_NO"))
+                    FRAME_DURATION_IN_MS = WEBSOCKET_MESSAGE_JSON.get("FRAME_DURATION_IN_MS")
+                    # PAIRING: wait for the very next binary and only then queue
+                    AUDIO_FRAME_BYTES = None
+                    while True:
+                        RAW_WEBSOCKET_MESSAGE_2 = await WEBSOCKET_MESSAGE.receive()
+                        if RAW_WEBSOCKET_MESSAGE_2.get("type") == "websocket.disconnect":
+                            break
+                        if RAW_WEBSOCKET_MESSAGE_2.get("bytes") is not None: 
+                            AUDIO_FRAME_BYTES = RAW_WEBSOCKET_MESSAGE_2["bytes"]
+                            break
+
+                    if AUDIO_FRAME_BYTES is None:
+                        # Disconnected between header and bytes: the frame is lost, the socket is gone
+                        _CONNECTION_CLOSED(WEBSOCKET_CONNECTION_ID, datetime.now())
+                        break
+
+                    _ENQUEUE_FRAME(QUEUE, (
+                        "FRAME", RECORDING_ID, AUDIO_FRAME_NO,
+                        int(FRAME_DURATION_IN_MS) if FRAME_DURATION_IN_MS else None,
+                        AUDIO_FRAME_BYTES, now,
+                    ), WEBSOCKET_CONNECTION_ID, ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD)
+
+                else:  #NON-FRAME: never dropped, waits for room behind the frames already queued
+                    await QUEUE.put(("TEXT", RECORDING_ID, MESSAGE_TYPE, now))
+
+                if MESSAGE_TYPE in ("START", "RESUME") and RECORDING_ID:
+                    ACTIVE_RECORDING_IDS.add(RECORDING_ID)
+                if MESSAGE_TYPE == "STOP":
+                    ACTIVE_RECORDING_IDS.discard(RECORDING_ID)
+                    if ACTIVE_RECORDING_IDS:
+                        continue  # other recordings still stream on this connection
+                    # graceful close
+                    await WEBSOCKET_MESSAGE.close()
+                    _CONNECTION_CLOSED(WEBSOCKET_CONNECTION_ID, now)
+                    break
+
+            elif BINARY_FRAMES_YN == "Y" and RAW_WEBSOCKET_MESSAGE.get("bytes") is not None:
+                _ENQUEUE_FRAME(QUEUE, ("BINARY", RAW_WEBSOCKET_MESSAGE["bytes"], now),
+                               WEBSOCKET_CONNECTION_ID, ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD)
+
+            else:
+                continue
+    finally:
+        # Let the consumer finish what was received, then retire it
+        try:
+            await QUEUE.put(None)
+            await CONSUMER
+        except asyncio.CancelledError:
+            CONSUMER.cancel()
+            raise
+        finally:
+            _INGEST_QUEUE_ARRAY.pop(WEBSOCKET_CONNECTION_ID, None)
@@ -13,12 +13,19 @@ from SERVER_ENGINE_APP_VARIABLES import (
 )
 from SERVER_ENGINE_APP_FUNCTIONS import (
     ENGINE_DB_LOG_FUNCTIONS_INS,
-    DB_CONNECT_CTX,
-    DB_EXEC_SP_SINGLE_ROW,
-    DB_EXEC_SP_MULTIPLE_ROWS,
+    DB_EXEC_SP_SINGLE_ROW_ASYNC,
     ENGINE_DB_LOG_TABLE_INS, # loop/thread-safe scheduler
     CONSOLE_LOG
 )
+from SERVER_ENGINE_ADMISSION_CONTROL import ADMISSION_DECIDE
+from SERVER_ENGINE_WS_OUTBOUND import WS_SEND_JSON
+from SERVER_ENGINE_LIVE_RESULT_HUB import RESULT_HUB
+from SERVER_ENGINE_SONG_FRAME_PLAN_CACHE import SONG_FRAME_PLAN_CACHE
+from SERVER_ENGINE_SONG_SCORE import SONG_SCORE_START
+from SERVER_ENGINE_LISTEN_7_FOR_FINISHED_RECORDINGS import DISCARD_NOT_STARTED_RECORDING
+
+# STARTs run concurrently (their SPs are off the loop); Stage-3C holds a STOP until its START is done
+START_IN_FLIGHT_RECORDING_IDS = set()
 
 
 async def SERVER_ENGINE_LISTEN_3A_FOR_START() -> None:
@@ -44,7 +51,11 @@ async def SERVER_ENGINE_LISTEN_3A_FOR_START() -> None:
                 continue
             CONSOLE_LOG("SCANNER", f"3A_FOR_START: processing START message {MESSAGE_ID}")
             ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD["DT_MESSAGE_PROCESS_QUEUED_TO_START"] = datetime.now()
-            await PROCESS_WEBSOCKET_START_MESSAGE(MESSAGE_ID=MESSAGE_ID)
+            # Create task but don't await it: a class opening the same piece overlaps its SP round trips
+            RECORDING_ID = int(ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD.get("RECORDING_ID") or 0)
+            START_IN_FLIGHT_RECORDING_IDS.add(RECORDING_ID)
+            TASK = asyncio.create_task(PROCESS_WEBSOCKET_START_MESSAGE(MESSAGE_ID=MESSAGE_ID))
+            TASK.add_done_callback(lambda _TASK, RID=RECORDING_ID: START_IN_FLIGHT_RECORDING_IDS.discard(RID))
         
         # Sleep to prevent excessive CPU usage
         await asyncio.sleep(0.1)  # 100ms delay between scans
@@ -82,48 +93,64 @@ async def PROCESS_WEBSOCKET_START_MESSAGE(MESSAGE_ID: int) -> None:
       
     SPLIT_100_MS_AUDIO_FRAME_ARRAY[RECORDING_ID] = {}  # ← This was missing
     ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY[RECORDING_ID] = {}  # Initialize the correct array
-    PRE_SPLIT_AUDIO_FRAME_ARRAY[RECORDING_ID] = {}      # This too if needed
+    PRE_SPLIT_AUDIO_FRAME_ARRAY.setdefault(RECORDING_ID, {})  # keep frames that arrived before START was processed
     ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY[RECORDING_ID] = ENGINE_DB_LOG_RECORDING_CONFIG_RECORD
 
-    # 4) load base parameters
-    with DB_CONNECT_CTX() as CONN:
-        ROW = DB_EXEC_SP_SINGLE_ROW(CONN, "P_ENGINE_ALL_RECORDING_PARAMETERS_GET", RECORDING_ID=RECORDING_ID) or {}
+    try:
+        # 4) load base parameters (off the event loop)
+        ROW = await DB_EXEC_SP_SINGLE_ROW_ASYNC("P_ENGINE_ALL_RECORDING_PARAMETERS_GET", RECORDING_ID=RECORDING_ID) or {}
 
-    # Ensure per-recording accumulator exists and AUDIO_BYTES is a bytearray
-    RECORDING_CONFIG_RECORD = RECORDING_CONFIG_ARRAY.setdefault(RECORDING_ID, {"RECORDING_ID": RECORDING_ID})
-    if not isinstance(RECORDING_CONFIG_RECORD.get("AUDIO_BYTES"), bytearray):
-        RECORDING_CONFIG_RECORD["AUDIO_BYTES"] = bytearray()
-    RECORDING_CONFIG_ARRAY[RECORDING_ID] = RECORDING_CONFIG_RECORD
+        # Ensure per-recording accumulator exists and AUDIO_BYTES is a bytearray
+        RECORDING_CONFIG_RECORD = RECORDING_CONFIG_ARRAY.setdefault(RECORDING_ID, {"RECORDING_ID": RECORDING_ID})
+        if not isinstance(RECORDING_CONFIG_RECORD.get("AUDIO_BYTES"), bytearray):
+            RECORDING_CONFIG_RECORD["AUDIO_BYTES"] = bytearray()
+        RECORDING_CONFIG_ARRAY[RECORDING_ID] = RECORDING_CONFIG_RECORD
     
-    # Copy selected keys (extend as needed)
-    for K in ("COMPOSE_PLAY_OR_PRACTICE", "AUDIO_STREAM_FILE_NAME", "COMPOSE_YN_RUN_FFT"):
-        if K in ROW:
-            ENGINE_DB_LOG_RECORDING_CONFIG_RECORD[K] = ROW[K]
-            CONSOLE_LOG("STARTUP", f"Set {K} = {ROW[K]}")
-        else:
-            CONSOLE_LOG("STARTUP", f"Missing key: {K}")
-
-    # Debug logging after the loop
-    # CONSOLE_LOG("STARTUP", f"Final ENGINE_DB_LOG_RECORDING_CONFIG_RECORD keys: {list(ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.keys())}")
-    # CONSOLE_LOG("STARTUP", f"COMPOSE_YN_RUN_FFT value: {ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get('COMPOSE_YN_RUN_FFT', 'MISSING')}")
+        # Copy selected keys (extend as needed)
+        for K in ("COMPOSE_PLAY_OR_PRACTICE", "AUDIO_STREAM_FILE_NAME", "COMPOSE_YN_RUN_FFT", "SONG_ID", "SONG_VERSION"):
+            if K in ROW:
+                ENGINE_DB_LOG_RECORDING_CONFIG_RECORD[K] = ROW[K]
+                CONSOLE_LOG("STARTUP", f"Set {K} = {ROW[K]}")
+            else:
+                CONSOLE_LOG("STARTUP", f"Missing key: {K}")
 
-    ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY[RECORDING_ID] = ENGINE_DB_LOG_RECORDING_CONFIG_RECORD
+        # Debug logging after the loop
+        # CONSOLE_LOG("STARTUP", f"Final ENGINE_DB_LOG_RECORDING_CONFIG_RECORD keys: {list(ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.keys())}")
+        # CONSOLE_LOG("STARTUP", f"COMPOSE_YN_RUN_FFT value: {ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get('COMPOSE_YN_RUN_FFT', 'MISSING')}")
 
-    # Debug logging after storing in array
-    # CONSOLE_LOG("STARTUP", f"Stored in array - keys: {list(ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY[RECORDING_ID].keys())}")
-    # CONSOLE_LOG("STARTUP", f"Array COMPOSE_YN_RUN_FFT: {ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY[RECORDING_ID].get('COMPOSE_YN_RUN_FFT', 'MISSING')}")
+        ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY[RECORDING_ID] = ENGINE_DB_LOG_RECORDING_CONFIG_RECORD
 
-    COMPOSE_PLAY_OR_PRACTICE = str(ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get("COMPOSE_PLAY_OR_PRACTICE") or "").upper()
+        # Debug logging after storing in array
+        # CONSOLE_LOG("STARTUP", f"Stored in array - keys: {list(ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY[RECORDING_ID].keys())}")
+        # CONSOLE_LOG("STARTUP", f"Array COMPOSE_YN_RUN_FFT: {ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY[RECORDING_ID].get('COMPOSE_YN_RUN_FFT', 'MISSING')}")
+
+        COMPOSE_PLAY_OR_PRACTICE = str(ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get("COMPOSE_PLAY_OR_PRACTICE") or "").upper()
     
-    CONSOLE_LOG("3A_FOR_START", f"COMPOSE_PLAY_OR_PRACTICE: {COMPOSE_PLAY_OR_PRACTICE}", {"RECORDING_ID": RECORDING_ID} )
-
-    # 5) play/practice: pre-seed per-frame metadata (no bytes)
-    if COMPOSE_PLAY_OR_PRACTICE in ("PLAY", "PRACTICE"):
-        with DB_CONNECT_CTX() as CONN:
-            CONSOLE_LOG("3A_FOR_START", f"Calling P_ENGINE_SONG_100_MS_AUDIO_FRAME_FOR_PLAY_AND_PRACTICE_GET for RECORDING_ID: {RECORDING_ID}")
-            RES_SET_P_ENGINE_SONG_100_MS_AUDIO_FRAME_FOR_PLAY_AND_PRACTICE_GET = DB_EXEC_SP_MULTIPLE_ROWS(CONN, "P_ENGINE_SONG_100_MS_AUDIO_FRAME_FOR_PLAY_AND_PRACTICE_GET", RECORDING_ID=RECORDING_ID) or []
-            CONSOLE_LOG("3A_FOR_START", f"Stored procedure returned {len(RES_SET_P_ENGINE_SONG_100_MS_AUDIO_FRAME_FOR_PLAY_AND_PRACTICE_GET)} rows")
-            
+        CONSOLE_LOG("3A_FOR_START", f"COMPOSE_PLAY_OR_PRACTICE: {COMPOSE_PLAY_OR_PRACTICE}", {"RECORDING_ID": RECORDING_ID} )
+
+        # Admission control: would this recording push the engine past real time?
+        ADMISSION_DECISION, ADMISSION_REPLY = ADMISSION_DECIDE(
+            RECORDING_ID, COMPOSE_PLAY_OR_PRACTICE, ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get("COMPOSE_YN_RUN_FFT"),
+        )
+        ENGINE_DB_LOG_RECORDING_CONFIG_RECORD["ADMISSION_DECISION"] = ADMISSION_DECISION
+        START_ACK = {"MESSAGE_TYPE": "START_ACK", "RECORDING_ID": RECORDING_ID, "ADMISSION": ADMISSION_DECISION, **ADMISSION_REPLY}
+        if ADMISSION_DECISION == "BUSY":
+            # Not started: frames staged before the decision are released and the recording purged now
+            # (Stage-3B never splits it, so its STOP could not finalize it); later frames drop as PURGED
+            ENGINE_DB_LOG_RECORDING_CONFIG_RECORD["DT_PROCESS_WEBSOCKET_START_MESSAGE_DONE"] = None
+            ENGINE_DB_LOG_TABLE_INS("ENGINE_DB_LOG_RECORDING_CONFIG", ENGINE_DB_LOG_RECORDING_CONFIG_RECORD)
+            await WS_SEND_JSON(ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get("WEBSOCKET_CONNECTION_ID"), START_ACK)
+            await DISCARD_NOT_STARTED_RECORDING(RECORDING_ID, "BUSY")
+            return
+
+        # 5) play/practice: pre-seed per-frame metadata (no bytes); the song's plan is shared via the cache
+        if COMPOSE_PLAY_OR_PRACTICE in ("PLAY", "PRACTICE"):
+            CONSOLE_LOG("3A_FOR_START", f"Getting song frame plan for RECORDING_ID: {RECORDING_ID}", {"SONG_ID": ROW.get("SONG_ID")})
+            RES_SET_P_ENGINE_SONG_100_MS_AUDIO_FRAME_FOR_PLAY_AND_PRACTICE_GET = await SONG_FRAME_PLAN_CACHE.get(
+                RECORDING_ID, ROW.get("SONG_ID"), ROW.get("SONG_VERSION"),
+            )
+            CONSOLE_LOG("3A_FOR_START", f"Song frame plan has {len(RES_SET_P_ENGINE_SONG_100_MS_AUDIO_FRAME_FOR_PLAY_AND_PRACTICE_GET)} rows")
+
             # Error if no frames found for PLAY mode
             if len(RES_SET_P_ENGINE_SONG_100_MS_AUDIO_FRAME_FOR_PLAY_AND_PRACTICE_GET) == 0:
                 raise ValueError(f"PLAY mode requires pre-recorded frames, but P_ENGINE_SONG_100_MS_AUDIO_FRAME_FOR_PLAY_AND_PRACTICE_GET returned 0 rows for RECORDING_ID: {RECORDING_ID}")
@@ -146,6 +173,24 @@ async def PROCESS_WEBSOCKET_START_MESSAGE(MESSAGE_ID: int) -> None:
                     "AUDIO_FRAME_NO": SPLIT_100_MS_AUDIO_FRAME_NO
                 }
 
-    # 6) persist recording config - NON-BLOCKING
-    ENGINE_DB_LOG_RECORDING_CONFIG_RECORD["DT_PROCESS_WEBSOCKET_START_MESSAGE_DONE"] = datetime.now()
-    ENGINE_DB_LOG_TABLE_INS("ENGINE_DB_LOG_RECORDING_CONFIG", ENGINE_DB_LOG_RECORDING_CONFIG_RECORD)
+            # Running intonation/timing score against the song's reference index (never fails START)
+            await SONG_SCORE_START(RECORDING_ID, ROW.get("SONG_ID"), ROW.get("SONG_VERSION"))
+
+        # 6) persist recording config - NON-BLOCKING
+        ENGINE_DB_LOG_RECORDING_CONFIG_RECORD["DT_PROCESS_WEBSOCKET_START_MESSAGE_DONE"] = datetime.now()
+        ENGINE_DB_LOG_TABLE_INS("ENGINE_DB_LOG_RECORDING_CONFIG", ENGINE_DB_LOG_RECORDING_CONFIG_RECORD)
+
+        # 7) tell the client it is admitted (full or reduced analysis); its socket gets the live results
+        if ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get("WEBSOCKET_CONNECTION_ID") is not None:
+            RESULT_HUB.subscribe(RECORDING_ID, ENGINE_DB_LOG_RECORDING_CONFIG_RECORD["WEBSOCKET_CONNECTION_ID"])
+        await WS_SEND_JSON(ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get("WEBSOCKET_CONNECTION_ID"), START_ACK)
+    except Exception as e:
+        # e.g. PLAY/PRACTICE without a frame plan: same as BUSY, nothing will ever split this recording
+        CONSOLE_LOG("3A_FOR_START", "START_FAILED", {"RECORDING_ID": RECORDING_ID, "error": f"{e.__class__.__name__}: {e}"})
+        if ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get("DT_PROCESS_WEBSOCKET_START_MESSAGE_DONE") is not None:
+            raise  # already started: Stage-3B owns its frames, STOP finalizes it as usual
+        ENGINE_DB_LOG_RECORDING_CONFIG_RECORD["ADMISSION_DECISION"] = "FAILED"
+        await WS_SEND_JSON(ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get("WEBSOCKET_CONNECTION_ID"),
+                           {"MESSAGE_TYPE": "START_ACK", "RECORDING_ID": RECORDING_ID, "ADMISSION": "FAILED"})
+        await DISCARD_NOT_STARTED_RECORDING(RECORDING_ID, "FAILED")
+        raise
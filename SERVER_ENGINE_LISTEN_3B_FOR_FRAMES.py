@@ -49,6 +49,8 @@ from SERVER_ENGINE_APP_FUNCTIONS import (
     ENGINE_DB_LOG_FUNCTIONS_INS,  # Start/End/Error logger
     ENGINE_DB_LOG_TABLE_INS,              # allowlisted insert, fireand_forget
 )
+from SERVER_ENGINE_PAYLOAD_LIFETIME import PAYLOAD_CONSUMER_DONE, PRE_SPLIT
+from SERVER_ENGINE_LISTEN_7_FOR_FINISHED_RECORDINGS import RECORDING_WORK_ADD, RECORDING_WORK_DONE
 
 
 # ---------------------------------------------------------------------
@@ -191,11 +193,16 @@ async def SERVER_ENGINE_LISTEN_3B_FOR_FRAMES() -> None:
     while True:
         MESSAGE_ID_ARRAY.clear()
         for MESSAGE_ID, ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ROW in list(ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ARRAY.items()):
-            if ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ROW.get("DT_MESSAGE_PROCESS_QUEUED_TO_START") is None and \
-            str(ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ROW.get("MESSAGE_TYPE", "")).upper() == "FRAME" and \
-            ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY[ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ROW["RECORDING_ID"]]["DT_PROCESS_WEBSOCKET_START_MESSAGE_DONE"] is not None and \
-            (ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ROW["AUDIO_FRAME_NO"] == 1 or 
-             ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ROW["AUDIO_FRAME_NO"] == 1 + ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY[ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD["RECORDING_ID"]]["MAX_PRE_SPLIT_AUDIO_FRAME_NO_SPLIT"]):
+            if ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ROW.get("DT_MESSAGE_PROCESS_QUEUED_TO_START") is not None or \
+            str(ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ROW.get("MESSAGE_TYPE", "")).upper() != "FRAME":
+                continue
+            # FRAME can beat its START through the scanners; wait for the config row
+            ENGINE_DB_LOG_RECORDING_CONFIG_RECORD = ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY.get(ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ROW["RECORDING_ID"])
+            if ENGINE_DB_LOG_RECORDING_CONFIG_RECORD is None or \
+            ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get("DT_PROCESS_WEBSOCKET_START_MESSAGE_DONE") is None:
+                continue
+            # Strictly in order; a gap is closed by a resend or Stage-4 zero-fill
+            if ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ROW["AUDIO_FRAME_NO"] == 1 + (ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get("MAX_PRE_SPLIT_AUDIO_FRAME_NO_SPLIT") or 0):
                 MESSAGE_ID_ARRAY.append(MESSAGE_ID)
 
         for MESSAGE_ID in MESSAGE_ID_ARRAY:
@@ -203,8 +210,10 @@ async def SERVER_ENGINE_LISTEN_3B_FOR_FRAMES() -> None:
             ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD = ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ARRAY.get(MESSAGE_ID)
             if ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD is None:
                 continue
-            # Create task but don't await it (runs concurrently)
-            asyncio.create_task(PROCESS_WEBSOCKET_FRAME_MESSAGE(MESSAGE_ID=MESSAGE_ID))
+            # Create task but don't await it (runs concurrently); the message's unit of work
+            # (taken in Stage-2) is released however the task ends
+            TASK = asyncio.create_task(PROCESS_WEBSOCKET_FRAME_MESSAGE(MESSAGE_ID=MESSAGE_ID))
+            TASK.add_done_callback(lambda _TASK, RID=ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD["RECORDING_ID"]: RECORDING_WORK_DONE(RID))
         
         # if MESSAGE_ID_ARRAY:
         #     CONSOLE_LOG("SCANNER", f"3B_FOR_FRAMES: found {len(MESSAGE_ID_ARRAY)} FRAME messages to process")
@@ -257,6 +266,9 @@ async def PROCESS_WEBSOCKET_FRAME_MESSAGE(MESSAGE_ID: int) -> None:
     # Add the chunk to the buffer directly
     RECORDING_CONFIG_RECORD['AUDIO_BYTES'].extend(PRE_SPLIT_AUDIO_FRAME_BYTES)
     ENGINE_DB_LOG_RECORDING_CONFIG_RECORD['TOTAL_BYTES_RECEIVED'] += len(PRE_SPLIT_AUDIO_FRAME_BYTES)
+
+    # The chunk now lives in the accumulator; this stage was its only consumer
+    PAYLOAD_CONSUMER_DONE(PRE_SPLIT, RECORDING_ID, PRE_SPLIT_AUDIO_FRAME_NO, "SPLIT")
       
     ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD = ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY.setdefault(RECORDING_ID, {})
 
@@ -264,13 +276,15 @@ async def PROCESS_WEBSOCKET_FRAME_MESSAGE(MESSAGE_ID: int) -> None:
     while len(RECORDING_CONFIG_RECORD['AUDIO_BYTES']) >= AUDIO_BYTES_PER_FRAME:
         # Extract exactly one frame
         SPLIT_100_MS_AUDIO_FRAME_BYTES = bytes(RECORDING_CONFIG_RECORD['AUDIO_BYTES'][:AUDIO_BYTES_PER_FRAME])
-        RECORDING_CONFIG_RECORD['AUDIO_BYTES'] = RECORDING_CONFIG_RECORD['AUDIO_BYTES'][AUDIO_BYTES_PER_FRAME:]
+        del RECORDING_CONFIG_RECORD['AUDIO_BYTES'][:AUDIO_BYTES_PER_FRAME]  # in place; no per-frame copy of the remainder
 
         TOTAL_SPLIT_100_MS_FRAMES_PRODUCED = ENGINE_DB_LOG_RECORDING_CONFIG_RECORD['TOTAL_SPLIT_100_MS_FRAMES_PRODUCED'] or 0
 
         SPLIT_100_MS_AUDIO_FRAME_NO = TOTAL_SPLIT_100_MS_FRAMES_PRODUCED + 1
         
         ENGINE_DB_LOG_RECORDING_CONFIG_RECORD['TOTAL_SPLIT_100_MS_FRAMES_PRODUCED'] += 1
+        # Outstanding until Stage-6 has finished with it
+        RECORDING_WORK_ADD(RECORDING_ID)
         
         SPLIT_100_MS_AUDIO_FRAME_START_MS = (SPLIT_100_MS_AUDIO_FRAME_NO - 1) * AUDIO_FRAME_MS
         SPLIT_100_MS_AUDIO_FRAME_END_MS = SPLIT_100_MS_AUDIO_FRAME_START_MS + (AUDIO_FRAME_MS - 1)
@@ -283,6 +297,8 @@ async def PROCESS_WEBSOCKET_FRAME_MESSAGE(MESSAGE_ID: int) -> None:
             "END_MS": SPLIT_100_MS_AUDIO_FRAME_END_MS,
             "AUDIO_FRAME_SIZE_BYTES": len(SPLIT_100_MS_AUDIO_FRAME_BYTES),
             "AUDIO_FRAME_SHA256_HEX": sha256(SPLIT_100_MS_AUDIO_FRAME_BYTES).hexdigest(),
+            # Arrival of the client chunk that completed this frame; Stage-6 deadlines start here
+            "DT_FRAME_RECEIVED": ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_ARRAY[RECORDING_ID][PRE_SPLIT_AUDIO_FRAME_NO].get("DT_FRAME_RECEIVED") or DT_MESSAGE_RECEIVED,
             "NOTE": f"Time-based frame: {SPLIT_100_MS_AUDIO_FRAME_START_MS}-{SPLIT_100_MS_AUDIO_FRAME_END_MS}ms (from client frame {PRE_SPLIT_AUDIO_FRAME_NO})",
             # Add default analyzer flags
             "YN_RUN_FFT": "N",
@@ -8,7 +8,6 @@ from hashlib import sha256
 
 from SERVER_ENGINE_APP_VARIABLES import (
     ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ARRAY,
-    ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY,
     ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY,
     AUDIO_BYTES_PER_FRAME,                       # frame size constants
     AUDIO_SAMPLES_PER_FRAME,                     # samples per frame
@@ -19,6 +18,8 @@ from SERVER_ENGINE_APP_FUNCTIONS import (
     ENGINE_DB_LOG_TABLE_INS,
     CONSOLE_LOG
 )
+from SERVER_ENGINE_LISTEN_7_FOR_FINISHED_RECORDINGS import RECORDING_FINISHED_CHECK
+from SERVER_ENGINE_LISTEN_3A_FOR_START import START_IN_FLIGHT_RECORDING_IDS
 
 # ─────────────────────────────────────────────────────────────
 # Scanner: queue unprocessed STOP messages
@@ -33,7 +34,8 @@ async def SERVER_ENGINE_LISTEN_3C_FOR_STOP() -> None:
         MESSAGE_ID_ARRAY.clear()
         for MESSAGE_ID, ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD in list(ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ARRAY.items()):
             if (ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD.get("DT_MESSAGE_PROCESS_QUEUED_TO_START") is None and 
-                str(ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD.get("MESSAGE_TYPE", "")).upper() == "STOP"):
+                str(ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD.get("MESSAGE_TYPE", "")).upper() == "STOP" and
+                ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD.get("RECORDING_ID") not in START_IN_FLIGHT_RECORDING_IDS):
                 MESSAGE_ID_ARRAY.append(MESSAGE_ID)
 
         if MESSAGE_ID_ARRAY:
@@ -61,15 +63,16 @@ async def PROCESS_WEBSOCKET_STOP_MESSAGE(MESSAGE_ID: int) -> None:
     ENGINE_DB_LOG_TABLE_INS("ENGINE_DB_LOG_WEBSOCKET_MESSAGE", ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD)
 
     RECORDING_ID = ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD["RECORDING_ID"]
-    ENGINE_DB_LOG_RECORDING_CONFIG_RECORD = ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY.get(RECORDING_ID, {})
-    WEBSOCKET_CONNECTION_ID = (ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get("WEBSOCKET_CONNECTION_ID") or 
-                              ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD.get("WEBSOCKET_CONNECTION_ID"))
+    if RECORDING_ID not in ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY:
+        ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ARRAY.pop(MESSAGE_ID, None)
+        return
 
-    ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD = ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY[WEBSOCKET_CONNECTION_ID]
-    ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD["DT_CONNECTION_CLOSED"] = datetime.now()
-    ENGINE_DB_LOG_TABLE_INS("ENGINE_DB_LOG_WEBSOCKET_CONNECTION", ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD)
+    # The connection may still carry other recordings: Stage-2 closes it (and stamps the row) after the last STOP
 
     ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY[RECORDING_ID]["DT_RECORDING_END"] = datetime.now()
     ENGINE_DB_LOG_TABLE_INS("ENGINE_DB_LOG_RECORDING_CONFIG", ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY[RECORDING_ID])
 
     ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ARRAY.pop(MESSAGE_ID, None)
+
+    # Purge right away if nothing is left in flight; otherwise the last RECORDING_WORK_DONE does it
+    RECORDING_FINISHED_CHECK(RECORDING_ID)
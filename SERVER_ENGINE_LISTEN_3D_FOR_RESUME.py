@@ -0,0 +1,137 @@
+# SERVER_ENGINE_LISTEN_3D_FOR_RESUME.py
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+
+from starlette.websockets import WebSocketState
+
+from SERVER_ENGINE_APP_VARIABLES import (
+    ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ARRAY,
+    ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY,
+    ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY,
+    RECORDING_FRAME_WINDOW_ARRAY,
+)
+from SERVER_ENGINE_APP_FUNCTIONS import (
+    ENGINE_DB_LOG_FUNCTIONS_INS,
+    ENGINE_DB_LOG_TABLE_INS,
+    CONSOLE_LOG
+)
+from SERVER_ENGINE_WS_OUTBOUND import WS_GET, WS_SEND_JSON, WS_UNREGISTER
+from SERVER_ENGINE_LISTEN_4_FOR_MISSING_FRAMES import FRAME_WINDOW_LAST_CONTIGUOUS, FRAME_WINDOW_MISSING
+from SERVER_ENGINE_LIVE_RESULT_HUB import RESULT_HUB
+from SERVER_ENGINE_FLOW_CONTROL import FLOW_CONTROL
+
+# ─────────────────────────────────────────────────────────────
+# Reconnect-and-resume
+# ─────────────────────────────────────────────────────────────
+# Protocol (/ws/stream, first TEXT on a new connection instead of START):
+#   client → {MESSAGE_TYPE:'RESUME', RECORDING_ID}
+#   server → {MESSAGE_TYPE:'RESUMED', RECORDING_ID, RESUMED_YN:'Y', LAST_CONTIGUOUS_FRAME_NO,
+#             MAX_FRAME_NO_RECEIVED, MISSING_FRAMES}
+#          | {MESSAGE_TYPE:'RESUMED', RECORDING_ID, RESUMED_YN:'N', REASON}
+# The client resends MISSING_FRAMES and everything above MAX_FRAME_NO_RECEIVED, then carries on.
+# Only the in-memory binding moves to the new WEBSOCKET_CONNECTION_ID: no START re-processing, no SP.
+# Resume is possible until the reaper synthesizes STOP (ABANDONED_RECORDING_GRACE_MS after the drop).
+
+# ─────────────────────────────────────────────────────────────
+# Scanner: queue unprocessed RESUME messages
+# ─────────────────────────────────────────────────────────────
+async def SERVER_ENGINE_LISTEN_3D_FOR_RESUME() -> None:
+    """
+    Find RESUME messages not yet queued, stamp queue time, and rebind the recording.
+    """
+    CONSOLE_LOG("SCANNER", "=== 3D_FOR_RESUME scanner starting ===")
+    MESSAGE_ID_ARRAY = []
+    while True:
+        MESSAGE_ID_ARRAY.clear()
+        for MESSAGE_ID, ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD in list(ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ARRAY.items()):
+            if (ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD.get("DT_MESSAGE_PROCESS_QUEUED_TO_START") is None and
+                str(ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD.get("MESSAGE_TYPE", "")).upper() == "RESUME"):
+                MESSAGE_ID_ARRAY.append(MESSAGE_ID)
+
+        for MESSAGE_ID in MESSAGE_ID_ARRAY:
+            ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD = ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ARRAY.get(MESSAGE_ID)
+            if ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD is None:
+                continue
+            CONSOLE_LOG("SCANNER", f"3D_FOR_RESUME: processing RESUME message {MESSAGE_ID}")
+            ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD["DT_MESSAGE_PROCESS_QUEUED_TO_START"] = datetime.now()
+            await PROCESS_WEBSOCKET_RESUME_MESSAGE(MESSAGE_ID=MESSAGE_ID)
+
+        # Sleep to prevent excessive CPU usage
+        await asyncio.sleep(0.1)  # 100ms delay between scans
+
+# ─────────────────────────────────────────────────────────────
+# Worker: process a single RESUME message
+# ─────────────────────────────────────────────────────────────
+@ENGINE_DB_LOG_FUNCTIONS_INS()
+async def PROCESS_WEBSOCKET_RESUME_MESSAGE(MESSAGE_ID: int) -> None:
+    ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD = ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ARRAY.pop(MESSAGE_ID, None)
+    if ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD is None:
+        return
+    ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD["DT_MESSAGE_PROCESS_STARTED"] = datetime.now()
+    ENGINE_DB_LOG_TABLE_INS("ENGINE_DB_LOG_WEBSOCKET_MESSAGE", ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD)
+
+    RECORDING_ID = ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD["RECORDING_ID"]
+    NEW_WEBSOCKET_CONNECTION_ID = ENGINE_DB_LOG_WEBSOCKET_MESSAGE_RECORD["WEBSOCKET_CONNECTION_ID"]
+    ENGINE_DB_LOG_RECORDING_CONFIG_RECORD = ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY.get(RECORDING_ID)
+
+    # Only a recording that START admitted and that has not been stopped (by the client or the reaper)
+    REASON = None
+    if ENGINE_DB_LOG_RECORDING_CONFIG_RECORD is None:
+        REASON = "UNKNOWN_RECORDING"
+    elif ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get("DT_RECORDING_END") is not None or \
+         ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get("DT_ABANDONED_STOP_SYNTHESIZED") is not None:
+        REASON = "RECORDING_ENDED"
+    elif ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get("DT_PROCESS_WEBSOCKET_START_MESSAGE_DONE") is None:
+        REASON = "NOT_STARTED"
+    if REASON is not None:
+        CONSOLE_LOG("3D_FOR_RESUME", "RESUME_REFUSED", {"rid": RECORDING_ID, "conn_id": NEW_WEBSOCKET_CONNECTION_ID, "reason": REASON})
+        await WS_SEND_JSON(NEW_WEBSOCKET_CONNECTION_ID, {
+            "MESSAGE_TYPE": "RESUMED", "RECORDING_ID": RECORDING_ID, "RESUMED_YN": "N", "REASON": REASON,
+        })
+        return
+
+    # Rebind: replies, FLOW grants, ACK resend requests and live results now go to the new socket
+    OLD_WEBSOCKET_CONNECTION_ID = ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get("WEBSOCKET_CONNECTION_ID")
+    ENGINE_DB_LOG_RECORDING_CONFIG_RECORD["WEBSOCKET_CONNECTION_ID"] = NEW_WEBSOCKET_CONNECTION_ID
+    ENGINE_DB_LOG_RECORDING_CONFIG_RECORD["RESUME_CNT"] = ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get("RESUME_CNT", 0) + 1
+    ENGINE_DB_LOG_RECORDING_CONFIG_RECORD["DT_LAST_RESUMED"] = datetime.now()
+    if OLD_WEBSOCKET_CONNECTION_ID is not None and OLD_WEBSOCKET_CONNECTION_ID != NEW_WEBSOCKET_CONNECTION_ID:
+        RESULT_HUB.unsubscribe(OLD_WEBSOCKET_CONNECTION_ID, RECORDING_ID)
+        (ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY.get(OLD_WEBSOCKET_CONNECTION_ID) or {}).get("ACTIVE_RECORDING_IDS", set()).discard(RECORDING_ID)
+        # Half-open old socket (client already gave up on it): close it so it stops holding a writer,
+        # unless other recordings are still multiplexed on it
+        OLD_SOCKET_SHARED = any(
+            CONFIG.get("WEBSOCKET_CONNECTION_ID") == OLD_WEBSOCKET_CONNECTION_ID and CONFIG.get("DT_RECORDING_END") is None
+            for CONFIG in list(ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY.values())
+        )
+        OLD_WEBSOCKET = None if OLD_SOCKET_SHARED else WS_GET(OLD_WEBSOCKET_CONNECTION_ID)
+        if not OLD_SOCKET_SHARED:
+            WS_UNREGISTER(OLD_WEBSOCKET_CONNECTION_ID)
+        if OLD_WEBSOCKET is not None and OLD_WEBSOCKET.client_state == WebSocketState.CONNECTED:
+            try:
+                await OLD_WEBSOCKET.close(code=1001)
+            except Exception as e:
+                CONSOLE_LOG("3D_FOR_RESUME", "OLD_SOCKET_CLOSE_FAILED", {"conn_id": OLD_WEBSOCKET_CONNECTION_ID, "error": str(e)})
+    RESULT_HUB.subscribe(RECORDING_ID, NEW_WEBSOCKET_CONNECTION_ID)
+    FLOW_CONTROL.regrant(RECORDING_ID)
+
+    W = RECORDING_FRAME_WINDOW_ARRAY.get(RECORDING_ID) or {}
+    RESUMED = {
+        "MESSAGE_TYPE": "RESUMED",
+        "RECORDING_ID": RECORDING_ID,
+        "RESUMED_YN": "Y",
+        "LAST_CONTIGUOUS_FRAME_NO": FRAME_WINDOW_LAST_CONTIGUOUS(RECORDING_ID),
+        "MAX_FRAME_NO_RECEIVED": W.get("MAX_FRAME_NO_RECEIVED", 0),
+        "MISSING_FRAMES": FRAME_WINDOW_MISSING(RECORDING_ID),
+    }
+    CONSOLE_LOG("3D_FOR_RESUME", "RECORDING_RESUMED", {
+        "rid": RECORDING_ID,
+        "old_conn_id": OLD_WEBSOCKET_CONNECTION_ID,
+        "new_conn_id": NEW_WEBSOCKET_CONNECTION_ID,
+        "last_contiguous": RESUMED["LAST_CONTIGUOUS_FRAME_NO"],
+        "missing": len(RESUMED["MISSING_FRAMES"]),
+    })
+    ENGINE_DB_LOG_TABLE_INS("ENGINE_DB_LOG_RECORDING_CONFIG", ENGINE_DB_LOG_RECORDING_CONFIG_RECORD)
+    await WS_SEND_JSON(NEW_WEBSOCKET_CONNECTION_ID, RESUMED)
@@ -0,0 +1,212 @@
+# SERVER_ENGINE_LISTEN_4_FOR_MISSING_FRAMES.py
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+from SERVER_ENGINE_APP_VARIABLES import (
+    ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY,
+    ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY,
+    ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_ARRAY,
+    RECORDING_FRAME_WINDOW_ARRAY,
+    AUDIO_BYTES_PER_FRAME,
+    FRAME_REORDER_WINDOW_FRAMES,
+    FRAME_GAP_RESEND_AFTER_MS,
+    FRAME_GAP_RESEND_INTERVAL_MS,
+    FRAME_GAP_ZERO_FILL_AFTER_MS,
+)
+from SERVER_ENGINE_APP_FUNCTIONS import CONSOLE_LOG
+from SERVER_ENGINE_WS_OUTBOUND import WS_SEND_JSON
+
+PREFIX = "LISTEN_4"
+
+# ─────────────────────────────────────────────────────────────
+# Per-recording reorder window
+# ─────────────────────────────────────────────────────────────
+# BASE_FRAME_NO   = lowest client frame not yet received (everything below arrived or was zero-filled)
+# RECEIVED_BITMAP = bit i set ⇔ frame BASE_FRAME_NO + i arrived out of order
+# Gaps are the clear bits below MAX_FRAME_NO_RECEIVED, plus DROPPED_FRAME_NOS: frames Stage-2 read the
+# header of but dropped unqueued (ingest queue full). Those are known lost, not reordered, so their
+# resend is requested on the next scan. Stage-2 marks every frame on arrival;
+# a frame already marked (duplicate) or below BASE (late, already zero-filled) is refused.
+
+def _window(RECORDING_ID: int) -> Dict[str, Any]:
+    return RECORDING_FRAME_WINDOW_ARRAY.setdefault(int(RECORDING_ID), {
+        "BASE_FRAME_NO": 1,
+        "RECEIVED_BITMAP": 0,
+        "MAX_FRAME_NO_RECEIVED": 0,
+        "GAP_FIRST_SEEN": {},          # AUDIO_FRAME_NO → monotonic time the gap was first seen
+        "RESEND_LAST_SENT": {},        # AUDIO_FRAME_NO → monotonic time of the latest MISSING_FRAMES
+        "DROPPED_FRAME_NOS": set(),    # dropped by Stage-2 before ingest; resend without waiting
+        "RESEND_REQUEST_CNT": 0,
+        "FRAMES_REQUESTED_CNT": 0,
+        "FRAMES_RECOVERED_CNT": 0,
+        "ZERO_FILLED_FRAME_CNT": 0,
+        "LATE_OR_DUPLICATE_FRAME_CNT": 0,
+        "OUT_OF_WINDOW_FRAME_CNT": 0,
+        "INGEST_DROPPED_FRAME_CNT": 0,
+    })
+
+
+def FRAME_WINDOW_MARK_RECEIVED(RECORDING_ID: int, AUDIO_FRAME_NO: int) -> bool:
+    """Record an arrival; False → duplicate, late or far outside the window (caller drops it)."""
+    W = _window(RECORDING_ID)
+    OFFSET = int(AUDIO_FRAME_NO) - W["BASE_FRAME_NO"]
+    if OFFSET < 0 or (W["RECEIVED_BITMAP"] >> OFFSET) & 1:
+        W["LATE_OR_DUPLICATE_FRAME_CNT"] += 1
+        return False
+    if OFFSET >= 2 * FRAME_REORDER_WINDOW_FRAMES:
+        W["OUT_OF_WINDOW_FRAME_CNT"] += 1
+        CONSOLE_LOG(PREFIX, "FRAME_OUT_OF_WINDOW", {"rid": int(RECORDING_ID), "fno": int(AUDIO_FRAME_NO), "base": W["BASE_FRAME_NO"]})
+        return False
+
+    W["RECEIVED_BITMAP"] |= 1 << OFFSET
+    W["MAX_FRAME_NO_RECEIVED"] = max(W["MAX_FRAME_NO_RECEIVED"], int(AUDIO_FRAME_NO))
+    W["GAP_FIRST_SEEN"].pop(int(AUDIO_FRAME_NO), None)
+    W["DROPPED_FRAME_NOS"].discard(int(AUDIO_FRAME_NO))
+    if W["RESEND_LAST_SENT"].pop(int(AUDIO_FRAME_NO), None) is not None:
+        W["FRAMES_RECOVERED_CNT"] += 1
+
+    # Slide BASE past the contiguous run that is now complete
+    CONTIGUOUS_CNT = (W["RECEIVED_BITMAP"] ^ (W["RECEIVED_BITMAP"] + 1)).bit_length() - 1
+    W["RECEIVED_BITMAP"] >>= CONTIGUOUS_CNT
+    W["BASE_FRAME_NO"] += CONTIGUOUS_CNT
+    return True
+
+
+def FRAME_WINDOW_MARK_DROPPED(RECORDING_ID: int, AUDIO_FRAME_NO: int) -> None:
+    """Stage-2 dropped this frame before ingest: list it as missing and request it on the next scan."""
+    W = _window(RECORDING_ID)
+    AUDIO_FRAME_NO = int(AUDIO_FRAME_NO)
+    OFFSET = AUDIO_FRAME_NO - W["BASE_FRAME_NO"]
+    if OFFSET < 0 or (W["RECEIVED_BITMAP"] >> OFFSET) & 1 or OFFSET >= 2 * FRAME_REORDER_WINDOW_FRAMES:
+        return  # already held, already zero-filled, or too far ahead to be kept anyway
+    W["DROPPED_FRAME_NOS"].add(AUDIO_FRAME_NO)
+    W["INGEST_DROPPED_FRAME_CNT"] += 1
+    if AUDIO_FRAME_NO in W["RESEND_LAST_SENT"]:
+        W["RESEND_LAST_SENT"][AUDIO_FRAME_NO] = 0.0  # the resent copy was dropped too: ask again now
+
+
+def FRAME_WINDOW_LAST_CONTIGUOUS(RECORDING_ID: int) -> int:
+    """Highest frame number below which nothing is missing (0 before the first frame)."""
+    W = RECORDING_FRAME_WINDOW_ARRAY.get(int(RECORDING_ID))
+    return 0 if W is None else W["BASE_FRAME_NO"] - 1
+
+
+def FRAME_WINDOW_MISSING(RECORDING_ID: int) -> List[int]:
+    W = RECORDING_FRAME_WINDOW_ARRAY.get(int(RECORDING_ID))
+    if W is None:
+        return []
+    BASE, BITMAP, MAX_FRAME_NO = W["BASE_FRAME_NO"], W["RECEIVED_BITMAP"], W["MAX_FRAME_NO_RECEIVED"]
+    return [BASE + i for i in range(MAX_FRAME_NO - BASE) if not (BITMAP >> i) & 1] + \
+           sorted(N for N in W["DROPPED_FRAME_NOS"] if N > MAX_FRAME_NO)
+
+# ─────────────────────────────────────────────────────────────
+# Scanner: request resends, zero-fill expired gaps
+# ─────────────────────────────────────────────────────────────
+async def SERVER_ENGINE_LISTEN_4_FOR_MISSING_FRAMES() -> None:
+    """
+    Every 100 ms, for each started recording with gaps:
+      • gap open ≥ FRAME_GAP_RESEND_AFTER_MS → ACK {MISSING_FRAMES} (repeated every RESEND_INTERVAL)
+      • gap open ≥ FRAME_GAP_ZERO_FILL_AFTER_MS, older than the client's resend buffer,
+        or the recording already STOPped → fill with silence
+    """
+    CONSOLE_LOG("SCANNER", "=== 4_FOR_MISSING_FRAMES scanner starting ===")
+    while True:
+        for RECORDING_ID in list(RECORDING_FRAME_WINDOW_ARRAY.keys()):
+            try:
+                await PROCESS_RECORDING_FRAME_GAPS(RECORDING_ID)
+            except Exception as e:
+                CONSOLE_LOG(PREFIX, "GAP_SCAN_ERROR", {"rid": RECORDING_ID, "error": str(e)})
+
+        # Sleep to prevent excessive CPU usage
+        await asyncio.sleep(0.1)  # 100ms delay between scans
+
+
+async def PROCESS_RECORDING_FRAME_GAPS(RECORDING_ID: int) -> None:
+    ENGINE_DB_LOG_RECORDING_CONFIG_RECORD = ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY.get(RECORDING_ID)
+    if ENGINE_DB_LOG_RECORDING_CONFIG_RECORD is None or \
+       ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get("DT_PROCESS_WEBSOCKET_START_MESSAGE_DONE") is None:
+        return
+    W = RECORDING_FRAME_WINDOW_ARRAY.get(RECORDING_ID)
+    MISSING_FRAME_NO_ARRAY = FRAME_WINDOW_MISSING(RECORDING_ID)
+    if W is None or not MISSING_FRAME_NO_ARRAY:
+        return
+
+    now = time.monotonic()
+    STOPPED = ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get("DT_RECORDING_END") is not None
+    # Connection dropped without STOP: leave the gaps for RESUME (Stage-3D) or the reaper's STOP
+    ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD = ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY.get(ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get("WEBSOCKET_CONNECTION_ID")) or {}
+    if not STOPPED and ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD.get("DT_CONNECTION_CLOSED") is not None:
+        return
+    RESEND_FRAME_NO_ARRAY: List[int] = []
+    for AUDIO_FRAME_NO in MISSING_FRAME_NO_ARRAY:
+        OPEN_MS = (now - W["GAP_FIRST_SEEN"].setdefault(AUDIO_FRAME_NO, now)) * 1000.0
+        if STOPPED or OPEN_MS >= FRAME_GAP_ZERO_FILL_AFTER_MS or \
+           W["MAX_FRAME_NO_RECEIVED"] - AUDIO_FRAME_NO >= FRAME_REORDER_WINDOW_FRAMES:
+            ZERO_FILL_FRAME(RECORDING_ID, AUDIO_FRAME_NO, round(OPEN_MS))
+        elif (OPEN_MS >= FRAME_GAP_RESEND_AFTER_MS or AUDIO_FRAME_NO in W["DROPPED_FRAME_NOS"]) and \
+             (now - W["RESEND_LAST_SENT"].get(AUDIO_FRAME_NO, 0.0)) * 1000.0 >= FRAME_GAP_RESEND_INTERVAL_MS:
+            RESEND_FRAME_NO_ARRAY.append(AUDIO_FRAME_NO)
+
+    if RESEND_FRAME_NO_ARRAY:
+        # Same message the client already answers from its RESEND_BUFFER
+        SENT = await WS_SEND_JSON(ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get("WEBSOCKET_CONNECTION_ID"), {
+            "MESSAGE_TYPE": "ACK",
+            "RECORDING_ID": RECORDING_ID,
+            "MISSING_FRAMES": RESEND_FRAME_NO_ARRAY,
+        })
+        if SENT:
+            for AUDIO_FRAME_NO in RESEND_FRAME_NO_ARRAY:
+                if AUDIO_FRAME_NO not in W["RESEND_LAST_SENT"]:
+                    W["FRAMES_REQUESTED_CNT"] += 1
+                W["RESEND_LAST_SENT"][AUDIO_FRAME_NO] = now
+            W["RESEND_REQUEST_CNT"] += 1
+            CONSOLE_LOG(PREFIX, "MISSING_FRAMES_SENT", {"rid": RECORDING_ID, "frames": RESEND_FRAME_NO_ARRAY})
+
+
+def ZERO_FILL_FRAME(RECORDING_ID: int, AUDIO_FRAME_NO: int, OPEN_MS: int = 0) -> None:
+    """Ingest silence for a frame that will not arrive, sized like its nearest received neighbour."""
+    from SERVER_ENGINE_LISTEN_2_FOR_WS_MESSAGES import INGEST_AUDIO_FRAME  # lazy: Stage-2 imports this module
+
+    ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_RECORD = ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_ARRAY.get(RECORDING_ID, {})
+    W = RECORDING_FRAME_WINDOW_ARRAY[RECORDING_ID]
+    AUDIO_FRAME_SIZE_BYTES = next(
+        (ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_RECORD[N].get("AUDIO_FRAME_SIZE_BYTES")
+         for N in range(AUDIO_FRAME_NO + 1, W["MAX_FRAME_NO_RECEIVED"] + 1)
+         if N in ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_RECORD),
+        None,
+    ) or AUDIO_BYTES_PER_FRAME
+    AUDIO_FRAME_SIZE_BYTES -= AUDIO_FRAME_SIZE_BYTES % 2  # whole PCM16 samples
+
+    ENGINE_DB_LOG_RECORDING_CONFIG_RECORD = ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY.get(RECORDING_ID, {})
+    INGEST_AUDIO_FRAME(
+        RECORDING_ID,
+        AUDIO_FRAME_NO,
+        bytes(AUDIO_FRAME_SIZE_BYTES),
+        datetime.now(),
+        ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get("WEBSOCKET_CONNECTION_ID"),
+        "zero_fill",
+    )
+    W["ZERO_FILLED_FRAME_CNT"] += 1
+    CONSOLE_LOG(PREFIX, "FRAME_ZERO_FILLED", {"rid": RECORDING_ID, "fno": AUDIO_FRAME_NO, "bytes": AUDIO_FRAME_SIZE_BYTES, "open_ms": OPEN_MS})
+
+
+def get_frame_gap_status() -> Dict[str, Any]:
+    RECORDINGS = {}
+    for RECORDING_ID, W in list(RECORDING_FRAME_WINDOW_ARRAY.items()):
+        RECORDINGS[RECORDING_ID] = {
+            "last_contiguous_frame_no": W["BASE_FRAME_NO"] - 1,
+            "max_frame_no_received": W["MAX_FRAME_NO_RECEIVED"],
+            "open_gaps": FRAME_WINDOW_MISSING(RECORDING_ID),
+            "resend_requests": W["RESEND_REQUEST_CNT"],
+            "frames_requested": W["FRAMES_REQUESTED_CNT"],
+            "frames_recovered": W["FRAMES_RECOVERED_CNT"],
+            "frames_zero_filled": W["ZERO_FILLED_FRAME_CNT"],
+            "frames_late_or_duplicate": W["LATE_OR_DUPLICATE_FRAME_CNT"],
+            "frames_out_of_window": W["OUT_OF_WINDOW_FRAME_CNT"],
+            "frames_dropped_on_ingest": W["INGEST_DROPPED_FRAME_CNT"],
+        }
+    return {"recordings": RECORDINGS}
@@ -3,28 +3,95 @@ from __future__ import annotations
 
 import asyncio
 from datetime import datetime
+from typing import Any, Dict
 
 from SERVER_ENGINE_APP_VARIABLES import (
     ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY,  # durable: per-frame metadata (no bytes/arrays)
     SPLIT_100_MS_AUDIO_FRAME_ARRAY,
-    ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY
+    ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY,
                    # volatile: per-frame bytes/arrays
+    ONS_ENGINE,
 )
 from SERVER_ENGINE_APP_FUNCTIONS import (
     ENGINE_DB_LOG_FUNCTIONS_INS,
     CONSOLE_LOG,
     ENGINE_DB_LOG_TABLE_INS
 )
+from SERVER_ENGINE_PAYLOAD_LIFETIME import (
+    PAYLOAD_REGISTER_CONSUMERS,
+    PAYLOAD_CONSUMER_DONE,
+    SPLIT_100_MS,
+)
+from SERVER_ENGINE_LISTEN_7_FOR_FINISHED_RECORDINGS import RECORDING_WORK_ADD, RECORDING_WORK_DONE
+from SERVER_ENGINE_ANALYZER_SCHEDULER import ANALYZER_SCHEDULER
+from SERVER_ENGINE_LOAD_POLICY import LOAD_POLICY, LADDER_APPLY
+from SERVER_ENGINE_LIVE_RESULTS import LIVE_RESULT_PUSH
+from SERVER_ENGINE_NOTE_SEGMENTER import NOTE_SEGMENTER_FRAME_DONE
 
 # Per-frame analyzers (all async)
 from SERVER_ENGINE_AUDIO_STREAM_PROCESS_FFT import SERVER_ENGINE_AUDIO_STREAM_PROCESS_FFT
 from SERVER_ENGINE_AUDIO_STREAM_PROCESS_PYIN import SERVER_ENGINE_AUDIO_STREAM_PROCESS_PYIN
 from SERVER_ENGINE_AUDIO_STREAM_PROCESS_CREPE import SERVER_ENGINE_AUDIO_STREAM_PROCESS_CREPE
+from SERVER_ENGINE_AUDIO_STREAM_PROCESS_ONS import SERVER_ENGINE_AUDIO_STREAM_PROCESS_ONS
+from SERVER_ENGINE_AUDIO_STREAM_PROCESS_ONS_FLUX import SERVER_ENGINE_AUDIO_STREAM_PROCESS_ONS_FLUX
 from SERVER_ENGINE_AUDIO_STREAM_PROCESS_VOLUME_1_MS import SERVER_ENGINE_AUDIO_STREAM_PROCESS_VOLUME_1_MS
 from SERVER_ENGINE_AUDIO_STREAM_PROCESS_VOLUME_10_MS import SERVER_ENGINE_AUDIO_STREAM_PROCESS_VOLUME_10_MS
 
 PREFIX = "STAGE6_FRAMES"
 
+# ONS analyzer: in-process spectral flux, or the Onsets & Frames container (ONS_ENGINE='OAF')
+ONS_ANALYZER = SERVER_ENGINE_AUDIO_STREAM_PROCESS_ONS if ONS_ENGINE == "OAF" else SERVER_ENGINE_AUDIO_STREAM_PROCESS_ONS_FLUX
+
+
+async def _RUN_ANALYZER(ANALYZER_NAME: str, RECORDING_ID: int, AUDIO_FRAME_NO: int, ANALYZER, AUDIO_ARRAY) -> int:
+    """Run one analyzer; release its payload reference and unit of work however it ends."""
+    try:
+        return await ANALYZER(RECORDING_ID, AUDIO_FRAME_NO, AUDIO_ARRAY)
+    finally:
+        PAYLOAD_CONSUMER_DONE(SPLIT_100_MS, RECORDING_ID, AUDIO_FRAME_NO, ANALYZER_NAME)
+        RECORDING_WORK_DONE(RECORDING_ID)
+
+# ─────────────────────────────────────────────────────────────
+# Analyzer plan: what a frame gets at the current ladder rung (no side effects)
+# ─────────────────────────────────────────────────────────────
+def _PLAN_THE_AUDIO_FRAME(RECORDING_ID: int, AUDIO_FRAME_NO: int) -> Dict[str, Any]:
+    """Ladder rung/settings, final YN_RUN_* flags and (ANALYZER_NAME, analyzer, input array) per analyzer."""
+    ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD = ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY[RECORDING_ID][AUDIO_FRAME_NO]
+    SPLIT_100_MS_AUDIO_FRAME_RECORD = SPLIT_100_MS_AUDIO_FRAME_ARRAY[RECORDING_ID][AUDIO_FRAME_NO]
+    AUDIO_ARRAY_22050 = SPLIT_100_MS_AUDIO_FRAME_RECORD["AUDIO_ARRAY_22050"]
+    AUDIO_ARRAY_16000 = SPLIT_100_MS_AUDIO_FRAME_RECORD["AUDIO_ARRAY_16000"]
+
+    # Per-frame gating flags (set in Stage-3A/3B depending on mode)
+    YN_RUN = {K: ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD.get(f"YN_RUN_{K}") for K in ("FFT", "ONS", "PYIN", "CREPE")}
+
+    # Degradation ladder: the rung in force at dispatch decides what this frame gets
+    ANALYZER_LADDER_RUNG, LADDER_SETTINGS = LOAD_POLICY.peek()
+    ENGINE_DB_LOG_RECORDING_CONFIG_RECORD = ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY.get(RECORDING_ID, {})
+    if ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get("ADMISSION_DECISION") == "REDUCED":
+        # Admitted on a reduced-analysis offer: never richer than the deepest rung
+        LADDER_SETTINGS = {**LADDER_SETTINGS, **LOAD_POLICY.rung_settings(len(LOAD_POLICY.ladder) - 1)}
+    if LADDER_SETTINGS:
+        YN_RUN = LADDER_APPLY(YN_RUN, ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get("COMPOSE_PLAY_OR_PRACTICE"), LADDER_SETTINGS)
+
+    # (ANALYZER_NAME, analyzer, input array) for every analyzer this frame needs
+    ANALYZER_ARRAY = [("VOLUME_1_MS", SERVER_ENGINE_AUDIO_STREAM_PROCESS_VOLUME_1_MS, AUDIO_ARRAY_16000)]
+    # ANALYZER_ARRAY.append(("VOLUME_10_MS", SERVER_ENGINE_AUDIO_STREAM_PROCESS_VOLUME_10_MS, AUDIO_ARRAY_16000))
+    if YN_RUN["FFT"] == "Y":
+        ANALYZER_ARRAY.append(("FFT", SERVER_ENGINE_AUDIO_STREAM_PROCESS_FFT, AUDIO_ARRAY_16000))
+    if YN_RUN["ONS"] == "Y":
+        ANALYZER_ARRAY.append(("ONS", ONS_ANALYZER, AUDIO_ARRAY_16000))
+    if YN_RUN["PYIN"] == "Y":
+        ANALYZER_ARRAY.append(("PYIN", SERVER_ENGINE_AUDIO_STREAM_PROCESS_PYIN, AUDIO_ARRAY_22050))
+    if YN_RUN["CREPE"] == "Y":
+        ANALYZER_ARRAY.append(("CREPE", SERVER_ENGINE_AUDIO_STREAM_PROCESS_CREPE, AUDIO_ARRAY_16000))
+
+    return {
+        "ANALYZER_LADDER_RUNG": ANALYZER_LADDER_RUNG,
+        "LADDER_SETTINGS": LADDER_SETTINGS,
+        "YN_RUN": YN_RUN,
+        "ANALYZER_ARRAY": ANALYZER_ARRAY,
+    }
+
 # ─────────────────────────────────────────────────────────────
 # Scanner: queue frames that are ready to analyze
 # ─────────────────────────────────────────────────────────────
@@ -33,101 +100,111 @@ async def SERVER_ENGINE_LISTEN_6_FOR_AUDIO_FRAMES_TO_PROCESS() -> None:
     while True:
         SPLIT_100_MS_AUDIO_FRAME_NO_ARRAY = [
             (int(RECORDING_ID), int(AUDIO_FRAME_NO))
-            for RECORDING_ID, ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY_2 in ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY.items()
-            for AUDIO_FRAME_NO, ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD in ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY_2.items()
+            for RECORDING_ID, ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY_2 in list(ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY.items())
+            for AUDIO_FRAME_NO, ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD in list(ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY_2.items())
             if ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD.get("DT_PROCESSING_QUEUED_TO_START") is None and
                ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD.get("DT_FRAME_RESAMPLED_22050") is not None
         ]
 
+        # Earliest deadline first across recordings (PRACTICE/PLAY ahead of COMPOSE backlog);
+        # frame order within a recording is kept because its deadlines grow with DT_FRAME_RECEIVED
+        for RECORDING_ID, AUDIO_FRAME_NO in SPLIT_100_MS_AUDIO_FRAME_NO_ARRAY:
+            ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD = ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY[RECORDING_ID][AUDIO_FRAME_NO]
+            ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD["DT_PROCESSING_DEADLINE"] = ANALYZER_SCHEDULER.frame_deadline(
+                ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY.get(RECORDING_ID, {}).get("COMPOSE_PLAY_OR_PRACTICE"),
+                ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD.get("DT_FRAME_RECEIVED"),
+            )
+        SPLIT_100_MS_AUDIO_FRAME_NO_ARRAY.sort(key=lambda KEY: (
+            ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY[KEY[0]][KEY[1]]["DT_PROCESSING_DEADLINE"], KEY[0], KEY[1]
+        ))
+
+        # Dispatch never waits on a queue: a frame whose analyzer queues are not all free stays for the next
+        # pass (re-sorted by deadline, so a PRACTICE frame arriving meanwhile goes first), and so do the later
+        # frames of its recording, so they still reach the analyzer queues in frame order.
+        DEFERRED_RECORDING_IDS = set()
         for RECORDING_ID, AUDIO_FRAME_NO in SPLIT_100_MS_AUDIO_FRAME_NO_ARRAY:
-            ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY[RECORDING_ID][AUDIO_FRAME_NO]["DT_PROCESSING_QUEUED_TO_START"] = datetime.now()
-            # CONSOLE_LOG(PREFIX, "queuing_frame_for_analysis", {
-            #     "rid": RECORDING_ID,
-            #     "frame": AUDIO_FRAME_NO,
-            #     "note": "Audio arrays ready, queuing for analysis"
-            # })
-            # Create task but don't await it (runs concurrently)
-            asyncio.create_task(PROCESS_THE_AUDIO_FRAME(RECORDING_ID=RECORDING_ID, AUDIO_FRAME_NO=AUDIO_FRAME_NO))
-        
-        # if SPLIT_100_MS_AUDIO_FRAME_NO_ARRAY:
-        #     CONSOLE_LOG("SCANNER", f"6_FOR_AUDIO_FRAMES: found {len(SPLIT_100_MS_AUDIO_FRAME_NO_ARRAY)} frames ready to analyze")
-        
+            if RECORDING_ID in DEFERRED_RECORDING_IDS:
+                continue
+            try:
+                PLAN = _PLAN_THE_AUDIO_FRAME(RECORDING_ID, AUDIO_FRAME_NO)
+                if not all(ANALYZER_SCHEDULER.has_room(ANALYZER_NAME, RECORDING_ID) for ANALYZER_NAME, _, _ in PLAN["ANALYZER_ARRAY"]):
+                    DEFERRED_RECORDING_IDS.add(RECORDING_ID)
+                    continue
+                ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY[RECORDING_ID][AUDIO_FRAME_NO]["DT_PROCESSING_QUEUED_TO_START"] = datetime.now()
+                await PROCESS_THE_AUDIO_FRAME(RECORDING_ID=RECORDING_ID, AUDIO_FRAME_NO=AUDIO_FRAME_NO, PLAN=PLAN)
+            except Exception as e:
+                CONSOLE_LOG(PREFIX, "DISPATCH_FAILED", {"rid": RECORDING_ID, "frame": AUDIO_FRAME_NO, "error": str(e)})
+                (ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY.get(RECORDING_ID, {}).get(AUDIO_FRAME_NO) or {})["DT_PROCESSING_QUEUED_TO_START"] = datetime.now()
+                RECORDING_WORK_DONE(RECORDING_ID)  # the frame's unit of work (taken in Stage-3B)
+
         # Sleep to prevent excessive CPU usage
         await asyncio.sleep(0.1)  # 100ms delay between scans
 
 
 # ─────────────────────────────────────────────────────────────
-# Worker: process a single frame (run analyzers in parallel)
+# Worker: dispatch a single frame to the analyzer scheduler
 # ─────────────────────────────────────────────────────────────
 @ENGINE_DB_LOG_FUNCTIONS_INS()
-async def PROCESS_THE_AUDIO_FRAME(RECORDING_ID: int, AUDIO_FRAME_NO: int) -> None:
+async def PROCESS_THE_AUDIO_FRAME(RECORDING_ID: int, AUDIO_FRAME_NO: int, PLAN: Dict[str, Any]) -> None:
+    """PLAN comes from _PLAN_THE_AUDIO_FRAME; the scanner has checked every analyzer queue in it has room."""
     CONSOLE_LOG("SCANNER", f"PROCESS_THE_AUDIO_FRAME: {RECORDING_ID}, {AUDIO_FRAME_NO}")
     # 1) Mark processing started
     ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD = ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY[RECORDING_ID][AUDIO_FRAME_NO]
     ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD["DT_PROCESSING_START"] = datetime.now()
 
-    # 2) Get audio arrays from volatile store (SIMPLE - no complex checks)
-    SPLIT_100_MS_AUDIO_FRAME_RECORD = SPLIT_100_MS_AUDIO_FRAME_ARRAY[RECORDING_ID][AUDIO_FRAME_NO]
-    AUDIO_ARRAY_22050 = SPLIT_100_MS_AUDIO_FRAME_RECORD["AUDIO_ARRAY_22050"]
-    CONSOLE_LOG(PREFIX, "PROCESS_THE_AUDIO_FRAME", {"rid": RECORDING_ID, "frame": AUDIO_FRAME_NO, "size1": SPLIT_100_MS_AUDIO_FRAME_RECORD["AUDIO_ARRAY_22050"]})
-    CONSOLE_LOG(PREFIX, "PROCESS_THE_AUDIO_FRAME", {"rid": RECORDING_ID, "frame": AUDIO_FRAME_NO, "size2": len(AUDIO_ARRAY_22050)})
-
-    AUDIO_ARRAY_16000 = SPLIT_100_MS_AUDIO_FRAME_RECORD["AUDIO_ARRAY_16000"]
-
-    # Per-frame gating flags (set in Stage-3A/3B depending on mode)
-    YN_RUN_FFT   = ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD["YN_RUN_FFT"]
-    YN_RUN_PYIN  = ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD["YN_RUN_PYIN"]
-    YN_RUN_CREPE = ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD["YN_RUN_CREPE"]
-
-    AUDIO_PROCESSING_TASK_ARRAY: list[asyncio.Task] = []
-
-    AUDIO_PROCESSING_TASK_ARRAY.append(asyncio.create_task(
-        SERVER_ENGINE_AUDIO_STREAM_PROCESS_VOLUME_1_MS(
-            int(RECORDING_ID),
-            int(AUDIO_FRAME_NO),
-            AUDIO_ARRAY_16000  # 22.05k
-        )
-    ))
-
-    # AUDIO_PROCESSING_TASK_ARRAY.append(asyncio.create_task(
-    #     SERVER_ENGINE_AUDIO_STREAM_PROCESS_VOLUME_10_MS(
-    #         int(RECORDING_ID),
-    #         int(AUDIO_FRAME_NO),
-    #         AUDIO_ARRAY_16000  # 22.05k
-    #     )
-    # ))
-
-    if YN_RUN_FFT == "Y":
-        AUDIO_PROCESSING_TASK_ARRAY.append(asyncio.create_task(
-            SERVER_ENGINE_AUDIO_STREAM_PROCESS_FFT(
-                int(RECORDING_ID),
-                int(AUDIO_FRAME_NO),
-                AUDIO_ARRAY_16000  # 22.05k
-            )
-        ))
-
-    if YN_RUN_PYIN == "Y":
-        AUDIO_PROCESSING_TASK_ARRAY.append(asyncio.create_task(
-            SERVER_ENGINE_AUDIO_STREAM_PROCESS_PYIN(
-                int(RECORDING_ID),
-                int(AUDIO_FRAME_NO),
-                AUDIO_ARRAY_22050  # 22.05k
-            )
-        ))
-
-    if YN_RUN_CREPE == "Y":
-        AUDIO_PROCESSING_TASK_ARRAY.append(asyncio.create_task(
-            SERVER_ENGINE_AUDIO_STREAM_PROCESS_CREPE(
-                int(RECORDING_ID),
-                int(AUDIO_FRAME_NO),
-                AUDIO_ARRAY_16000  # 16k
+    # 2) Record the rung and what actually runs, so the logged row and payload release agree with it
+    LOAD_POLICY.count_frame(PLAN["ANALYZER_LADDER_RUNG"])
+    ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD["ANALYZER_LADDER_RUNG"] = PLAN["ANALYZER_LADDER_RUNG"]
+    if PLAN["LADDER_SETTINGS"]:
+        for K, YN in PLAN["YN_RUN"].items():
+            ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD[f"YN_RUN_{K}"] = YN
+        for K in ("PYIN_OVERLAP_FOR_ACCURACY_OR_SPEED", "CREPE_HOP_IN_MS"):
+            if K in PLAN["LADDER_SETTINGS"]:
+                ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD[K] = PLAN["LADDER_SETTINGS"][K]
+    ANALYZER_ARRAY = PLAN["ANALYZER_ARRAY"]
+
+    # The 16k/22.05k arrays are dropped as soon as the last of these analyzers finishes
+    PAYLOAD_REGISTER_CONSUMERS(SPLIT_100_MS, RECORDING_ID, AUDIO_FRAME_NO, [NAME for NAME, _, _ in ANALYZER_ARRAY])
+
+    # 3) Enqueue on the bounded per-analyzer queues (never waits; room was checked by the scanner)
+    RECORDING_WORK_ADD(RECORDING_ID, len(ANALYZER_ARRAY))
+    DEADLINE = ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD.get("DT_PROCESSING_DEADLINE")
+    ANALYZER_FUTURE_ARRAY: list[asyncio.Future] = []
+    for ANALYZER_NO, (ANALYZER_NAME, ANALYZER, AUDIO_ARRAY) in enumerate(ANALYZER_ARRAY):
+        try:
+            ANALYZER_FUTURE_ARRAY.append(ANALYZER_SCHEDULER.submit(
+                ANALYZER_NAME, RECORDING_ID, AUDIO_FRAME_NO,
+                _RUN_ANALYZER, ANALYZER_NAME, int(RECORDING_ID), int(AUDIO_FRAME_NO), ANALYZER, AUDIO_ARRAY,
+                DEADLINE=DEADLINE,
+            ))
+        except BaseException:
+            # Analyzers that never reached a queue will not run _RUN_ANALYZER's cleanup
+            for NOT_QUEUED_NAME, _, _ in ANALYZER_ARRAY[ANALYZER_NO:]:
+                PAYLOAD_CONSUMER_DONE(SPLIT_100_MS, RECORDING_ID, AUDIO_FRAME_NO, NOT_QUEUED_NAME)
+            RECORDING_WORK_DONE(RECORDING_ID, len(ANALYZER_ARRAY) - ANALYZER_NO)
+            raise
+
+    # 4) Completion is tracked off the dispatch path
+    asyncio.create_task(_FINISH_THE_AUDIO_FRAME(RECORDING_ID, AUDIO_FRAME_NO, ANALYZER_FUTURE_ARRAY))
+
+
+async def _FINISH_THE_AUDIO_FRAME(RECORDING_ID: int, AUDIO_FRAME_NO: int, ANALYZER_FUTURE_ARRAY: list[asyncio.Future]) -> None:
+    """Wait for the frame's analyzers, stamp DT_PROCESSING_END, segment notes, push the live result, release the frame's unit of work."""
+    try:
+        if ANALYZER_FUTURE_ARRAY:
+            await asyncio.gather(*ANALYZER_FUTURE_ARRAY, return_exceptions=True)
+
+        ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD = ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY.get(RECORDING_ID, {}).get(AUDIO_FRAME_NO)
+        if ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD is not None:
+            ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD["DT_PROCESSING_END"] = datetime.now()
+            ANALYZER_SCHEDULER.record_frame_done(
+                ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY.get(RECORDING_ID, {}).get("COMPOSE_PLAY_OR_PRACTICE"),
+                ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD.get("DT_PROCESSING_DEADLINE"),
+                ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD["DT_PROCESSING_END"],
             )
-        ))
-
-    # # Wait for all tasks to complete
-    # if AUDIO_PROCESSING_TASK_ARRAY:
-    #     await asyncio.gather(*AUDIO_PROCESSING_TASK_ARRAY, return_exceptions=True)
-
-    # # 4) Mark processing completed
-    # ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD["DT_PROCESSING_END"] = datetime.now()
-    ENGINE_DB_LOG_TABLE_INS("ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME", ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY[RECORDING_ID][AUDIO_FRAME_NO])
+            ENGINE_DB_LOG_TABLE_INS("ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME", ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD)
+        FRAME_RECORD = ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD or {}
+        await NOTE_SEGMENTER_FRAME_DONE(RECORDING_ID, AUDIO_FRAME_NO, FRAME_RECORD.get("START_MS"), FRAME_RECORD.get("END_MS"))
+        await LIVE_RESULT_PUSH(RECORDING_ID, AUDIO_FRAME_NO)
+    finally:
+        RECORDING_WORK_DONE(RECORDING_ID)
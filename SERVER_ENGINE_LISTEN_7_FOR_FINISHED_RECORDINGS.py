@@ -14,8 +14,9 @@ from SERVER_ENGINE_APP_VARIABLES import (
     SPLIT_100_MS_AUDIO_FRAME_ARRAY,
     RECORDING_CONFIG_ARRAY,
     ENGINE_DB_LOG_STEPS_ARRAY,
-    
-
+    RECORDING_OUTSTANDING_WORK_ARRAY,
+    RECORDING_FRAME_WINDOW_ARRAY,
+    PURGED_RECORDING_ARRAY,
 )
 
 from SERVER_ENGINE_APP_FUNCTIONS import (
@@ -23,37 +24,92 @@ from SERVER_ENGINE_APP_FUNCTIONS import (
     ENGINE_DB_LOG_TABLE_INS,
     CONSOLE_LOG
 )
+from SERVER_ENGINE_PAYLOAD_LIFETIME import PAYLOAD_FORGET_RECORDING, PAYLOAD_CONSUMER_DONE, PRE_SPLIT
+from SERVER_ENGINE_ANALYZER_SCHEDULER import ANALYZER_SCHEDULER
+from SERVER_ENGINE_FLOW_CONTROL import FLOW_CONTROL
+from SERVER_ENGINE_LIVE_RESULTS import LIVE_RESULT_FORGET_RECORDING
+from SERVER_ENGINE_SONG_SCORE import SONG_SCORE
+from SERVER_ENGINE_NOTE_SEGMENTER import NOTE_SEGMENTER, NOTE_SEGMENTER_FINALIZE
+from SERVER_ENGINE_AUDIO_STREAM_PROCESS_ONS_FLUX import SERVER_ENGINE_AUDIO_STREAM_PROCESS_ONS_FLUX_FINALIZE, ONS_FLUX_FORGET_RECORDING
+from SERVER_ENGINE_AUDIO_STREAM_PROCESS_ONS import SERVER_ENGINE_AUDIO_STREAM_PROCESS_ONS_FINALIZE, ONS_FORGET_RECORDING
+from SERVER_ENGINE_AUDIO_STREAM_PROCESS_PYIN import PYIN_FORGET_RECORDING
+from SERVER_ENGINE_LIVE_RESULT_HUB import RESULT_HUB
+from SERVER_ENGINE_MEMORY_MONITOR import MEMORY_RECORDING_BYTES_GET
+from SERVER_ENGINE_CONNECTION_REAPER import CONNECTION_REAPER
+
+# ─────────────────────────────────────────────────────────────
+# Outstanding-work counters (no scanning)
+# ─────────────────────────────────────────────────────────────
+# One unit of work is held for each:
+#   • FRAME message received but not yet split         (Stage-2 → Stage-3B)
+#   • split frame produced but not yet fully dispatched (Stage-3B → Stage-6)
+#   • analyzer run dispatched for a frame              (Stage-6 → analyzer end)
+# The recording is finalized and purged the moment the count is zero after STOP.
+
+def RECORDING_WORK_ADD(RECORDING_ID: int, WORK_CNT: int = 1) -> None:
+    RECORDING_ID = int(RECORDING_ID)
+    RECORDING_OUTSTANDING_WORK_ARRAY[RECORDING_ID] = RECORDING_OUTSTANDING_WORK_ARRAY.get(RECORDING_ID, 0) + WORK_CNT
+
+
+def RECORDING_WORK_DONE(RECORDING_ID: int, WORK_CNT: int = 1) -> None:
+    RECORDING_ID = int(RECORDING_ID)
+    OUTSTANDING_WORK_CNT = RECORDING_OUTSTANDING_WORK_ARRAY.get(RECORDING_ID, 0) - WORK_CNT
+    if OUTSTANDING_WORK_CNT < 0:
+        CONSOLE_LOG("LISTEN_7", "outstanding_work_underflow", {"rid": RECORDING_ID, "cnt": OUTSTANDING_WORK_CNT})
+        OUTSTANDING_WORK_CNT = 0
+    RECORDING_OUTSTANDING_WORK_ARRAY[RECORDING_ID] = OUTSTANDING_WORK_CNT
+    if OUTSTANDING_WORK_CNT == 0:
+        RECORDING_FINISHED_CHECK(RECORDING_ID)
+
+
+def RECORDING_FINISHED_CHECK(RECORDING_ID: int) -> None:
+    """Queue finalize + purge once STOP has been processed and no work is outstanding."""
+    ENGINE_DB_LOG_RECORDING_CONFIG_RECORD = ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY.get(RECORDING_ID)
+    if ENGINE_DB_LOG_RECORDING_CONFIG_RECORD is None:
+        return
+    if ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get("DT_RECORDING_END") is None:
+        return
+    if ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get("DT_RECORDING_DATA_QUEUED_FOR_PURGING") is not None:
+        return
+    if RECORDING_OUTSTANDING_WORK_ARRAY.get(RECORDING_ID, 0) > 0:
+        return
 
-async def SERVER_ENGINE_LISTEN_7_FOR_FINISHED_RECORDINGS() -> None:
+    CONSOLE_LOG("LISTEN_7", "recording_finished", {"rid": int(RECORDING_ID)})
+    ENGINE_DB_LOG_RECORDING_CONFIG_RECORD["DT_RECORDING_DATA_QUEUED_FOR_PURGING"] = datetime.now()
+    asyncio.create_task(FINALIZE_RECORDING(RECORDING_ID=int(RECORDING_ID)))
+
+
+async def DISCARD_NOT_STARTED_RECORDING(RECORDING_ID: int, REASON: str) -> None:
     """
-    Find recordings where:
-      • DT_RECORDING_END is not null, and
-      • there are no frames for that RECORDING_ID with DT_PROCESSING_END == null
-    Then queue RECORDING_FINISHED for cleanup/purge.
+    START answered BUSY or failed: Stage-3B never splits this recording, so the frames staged before the
+    decision would hold their work units forever and STOP could never finalize it. Release them and purge
+    now; frames still in flight are then dropped as PURGED.
     """
-    CONSOLE_LOG("SCANNER", "=== 7_FOR_FINISHED_RECORDINGS scanner starting ===")
-    while True:
-        for RECORDING_ID, ENGINE_DB_LOG_RECORDING_CONFIG_RECORD in list(ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY.items()):
-            DT_RECORDING_END = ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get("DT_RECORDING_END")
-            if not DT_RECORDING_END:
-                continue
-            # Skip if already purged
-            if ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get("DT_RECORDING_DATA_QUEUED_FOR_PURGING"):
-                continue
-
-            ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_ARRAY_2 = ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_ARRAY.get(RECORDING_ID, {})
-            ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_ARRAY_3 = any(
-                fr.get("DT_PROCESSING_END") is None for fr in ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_ARRAY_2.values()
-            ) if ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_ARRAY_2 else False
-
-            if not ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_ARRAY_3:
-                # SAFE from worker threads; schedules on main loop
-                CONSOLE_LOG("SCANNER", f"7_FOR_FINISHED_RECORDINGS: found finished recording {RECORDING_ID} to purge")
-                ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY[RECORDING_ID]["DT_RECORDING_DATA_QUEUED_FOR_PURGING"] = datetime.now()
-                asyncio.create_task(PURGE_RECORDING_DATA(RECORDING_ID=int(RECORDING_ID)))
-        
-        # Sleep to prevent excessive CPU usage
-        await asyncio.sleep(0.1)  # 100ms delay between scans
+    RECORDING_ID = int(RECORDING_ID)
+    ENGINE_DB_LOG_RECORDING_CONFIG_RECORD = ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY.get(RECORDING_ID)
+    if ENGINE_DB_LOG_RECORDING_CONFIG_RECORD is None or ENGINE_DB_LOG_RECORDING_CONFIG_RECORD.get("DT_RECORDING_DATA_QUEUED_FOR_PURGING") is not None:
+        return
+    ENGINE_DB_LOG_RECORDING_CONFIG_RECORD["DT_RECORDING_DATA_QUEUED_FOR_PURGING"] = datetime.now()
+
+    STAGED_FRAME_NO_ARRAY = list(PRE_SPLIT_AUDIO_FRAME_ARRAY.get(RECORDING_ID, {}))
+    for AUDIO_FRAME_NO in STAGED_FRAME_NO_ARRAY:
+        PAYLOAD_CONSUMER_DONE(PRE_SPLIT, RECORDING_ID, AUDIO_FRAME_NO, "SPLIT")
+    RECORDING_WORK_DONE(RECORDING_ID, len(STAGED_FRAME_NO_ARRAY))
+
+    CONSOLE_LOG("LISTEN_7", "recording_not_started", {"rid": RECORDING_ID, "reason": REASON, "staged_frames": len(STAGED_FRAME_NO_ARRAY)})
+    await PURGE_RECORDING_DATA(RECORDING_ID=RECORDING_ID)
+
+
+@ENGINE_DB_LOG_FUNCTIONS_INS()
+async def FINALIZE_RECORDING(RECORDING_ID: int) -> None:
+    """Last-chance flushes for per-recording analyzer state, then purge."""
+    try:
+        await NOTE_SEGMENTER_FINALIZE(RECORDING_ID)
+        await SERVER_ENGINE_AUDIO_STREAM_PROCESS_ONS_FLUX_FINALIZE(RECORDING_ID)
+        await SERVER_ENGINE_AUDIO_STREAM_PROCESS_ONS_FINALIZE(RECORDING_ID)
+        ENGINE_DB_LOG_TABLE_INS("ENGINE_DB_LOG_RECORDING_CONFIG", ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY[RECORDING_ID])
+    finally:
+        await PURGE_RECORDING_DATA(RECORDING_ID=RECORDING_ID)
 
 @ENGINE_DB_LOG_FUNCTIONS_INS()
 async def PURGE_RECORDING_DATA(RECORDING_ID: int) -> None:
@@ -61,12 +117,29 @@ async def PURGE_RECORDING_DATA(RECORDING_ID: int) -> None:
     ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY[RECORDING_ID]["DT_RECORDING_DATA_PURGED"] = datetime.now()
     ENGINE_DB_LOG_TABLE_INS("ENGINE_DB_LOG_RECORDING_CONFIG", ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY[RECORDING_ID])
 
+    # Payload still held at purge time (non-zero mostly for abandoned / failed recordings)
+    RECLAIMED_BYTES = MEMORY_RECORDING_BYTES_GET(RECORDING_ID)["TOTAL"]
+    RECLAIMED_FRAME_CNT = (len(ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_ARRAY.get(RECORDING_ID, {}))
+                           + len(ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY.get(RECORDING_ID, {})))
+
     # Remove durable per-frame metadata and volatile audio arrays
     ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_ARRAY.pop(RECORDING_ID, None)
     PRE_SPLIT_AUDIO_FRAME_ARRAY.pop(RECORDING_ID, None)
     ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY.pop(RECORDING_ID, None)
     SPLIT_100_MS_AUDIO_FRAME_ARRAY.pop(RECORDING_ID, None)
     RECORDING_CONFIG_ARRAY.pop(RECORDING_ID, None)
+    PAYLOAD_FORGET_RECORDING(RECORDING_ID)
+    RECORDING_OUTSTANDING_WORK_ARRAY.pop(RECORDING_ID, None)
+    RECORDING_FRAME_WINDOW_ARRAY.pop(RECORDING_ID, None)
+    ANALYZER_SCHEDULER.forget_recording(RECORDING_ID)
+    FLOW_CONTROL.forget_recording(RECORDING_ID)
+    LIVE_RESULT_FORGET_RECORDING(RECORDING_ID)
+    SONG_SCORE.forget_recording(RECORDING_ID)
+    NOTE_SEGMENTER.forget_recording(RECORDING_ID)
+    ONS_FLUX_FORGET_RECORDING(RECORDING_ID)
+    ONS_FORGET_RECORDING(RECORDING_ID)
+    PYIN_FORGET_RECORDING(RECORDING_ID)
+    await RESULT_HUB.close_recording(RECORDING_ID)
     ENGINE_DB_LOG_STEPS_ARRAY.clear()
     
 
@@ -78,12 +151,18 @@ async def PURGE_RECORDING_DATA(RECORDING_ID: int) -> None:
     for MESSAGE_ID in ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ARRAY_2:
         ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ARRAY.pop(MESSAGE_ID, None)
 
-    # Remove the websocket connection row using the connection id from the config, if present
+    # The connection row stays: other recordings may share the socket. The reaper forgets it once it is
+    # closed and no recording references it.
     WEBSOCKET_CONNECTION_ID = ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY.get(RECORDING_ID, {}).get("WEBSOCKET_CONNECTION_ID")
-    if WEBSOCKET_CONNECTION_ID is not None:
-        ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY.pop(WEBSOCKET_CONNECTION_ID, None)
+    (ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY.get(WEBSOCKET_CONNECTION_ID) or {}).get("ACTIVE_RECORDING_IDS", set()).discard(RECORDING_ID)
 
-    # Finally remove the config row itself
+    # Finally remove the config row itself; frames still in flight are dropped from here on (Stage-2)
     ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY.pop(RECORDING_ID, None)
+    PURGED_RECORDING_ARRAY[int(RECORDING_ID)] = datetime.now()
 
-    CONSOLE_LOG("LISTEN_7", "recording_finished_cleanup_done", {"rid": int(RECORDING_ID)})
+    CONNECTION_REAPER.recording_purged(RECORDING_ID, RECLAIMED_BYTES)
+    CONSOLE_LOG("LISTEN_7", "recording_finished_cleanup_done", {
+        "rid": int(RECORDING_ID),
+        "reclaimed_bytes": RECLAIMED_BYTES,
+        "reclaimed_frame_rows": RECLAIMED_FRAME_CNT,
+    })
@@ -0,0 +1,138 @@
+# SERVER_ENGINE_LIVE_RESULTS.py
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Tuple
+
+from SERVER_ENGINE_APP_VARIABLES import (
+    LIVE_RESULT_ARRAY,
+    AUDIO_FRAME_MS,
+    LIVE_RESULT_PUSH_YN,
+    LIVE_RESULT_VOLUME_HOP_MS,
+    LIVE_RESULT_MAX_FRAMES_PER_MESSAGE,
+)
+from SERVER_ENGINE_APP_FUNCTIONS import CONSOLE_LOG
+from SERVER_ENGINE_LIVE_RESULT_HUB import RESULT_HUB
+from SERVER_ENGINE_SONG_SCORE import SONG_SCORE
+
+PREFIX = "LIVE_RESULTS"
+
+# ─────────────────────────────────────────────────────────────
+# Live result push
+# ─────────────────────────────────────────────────────────────
+# Protocol (/ws/stream and /ws/observe, server → client TEXT), one message per finished 100 ms frame:
+#   {MESSAGE_TYPE:'RESULT', RECORDING_ID, PROCESSED_THROUGH_FRAME_NO,
+#    FRAMES:[{AUDIO_FRAME_NO, START_MS, END_MS,
+#             PITCH:{PYIN|CREPE:{MS:[offset], HZ:[..], CONF:[..]}},
+#             VOLUME:{HOP_MS, DB:[..]}}],
+#    SCORE:{PYIN|CREPE:{INTONATION_PCT, MEAN_ABS_CENTS, TIMING_PCT, MEAN_ONSET_MS, NOTES_DUE, NOTES_HIT}}}
+# MS offsets are relative to START_MS. PROCESSED_THROUGH_FRAME_NO is the contiguous watermark: every
+# frame ≤ it has finished Stage-6 (the DB panels are complete up to there).
+# SCORE (PLAY/PRACTICE with a song reference index only) is the running score so far, see SERVER_ENGINE_SONG_SCORE.
+# Each RESULT is published once to RESULT_HUB (the phone's connection plus any /ws/observe viewers).
+# While a subscriber is slow, RESULTs for one recording still waiting in its outbound queue are merged
+# into one message that keeps the newest LIVE_RESULT_MAX_FRAMES_PER_MESSAGE frames.
+
+_WATERMARK_ARRAY: Dict[int, Dict[str, Any]] = {}  #int = RECORDING_ID → {THROUGH, DONE (frames finished above THROUGH)}
+
+_STATS = {"messages_published": 0, "deliveries": 0, "frames_trimmed": 0, "no_subscriber": 0}
+
+
+def _LIVE_RESULT_RECORD(RECORDING_ID: int, AUDIO_FRAME_NO: int) -> Dict[str, Any]:
+    START_MS = AUDIO_FRAME_MS * (AUDIO_FRAME_NO - 1)
+    return LIVE_RESULT_ARRAY.setdefault(RECORDING_ID, {}).setdefault(AUDIO_FRAME_NO, {
+        "AUDIO_FRAME_NO": AUDIO_FRAME_NO,
+        "START_MS": START_MS,
+        "END_MS": START_MS + AUDIO_FRAME_MS - 1,
+        "PITCH": {},
+    })
+
+
+def LIVE_RESULT_PUT_HZ(RECORDING_ID: int, AUDIO_FRAME_NO: int, SOURCE_METHOD: str, rows_abs: Iterable[Tuple[int, int, float, float]]) -> None:
+    """Keep a compact copy of one analyzer's ENGINE_LOAD_HZ rows (START_MS, END_MS, HZ, CONFIDENCE)."""
+    if LIVE_RESULT_PUSH_YN != "Y":
+        return
+    R = _LIVE_RESULT_RECORD(RECORDING_ID, AUDIO_FRAME_NO)
+    MS, HZ, CONF = [], [], []
+    for (start_ms, _end_ms, hz, confidence) in rows_abs:
+        MS.append(int(start_ms) - R["START_MS"])
+        HZ.append(round(float(hz), 2))
+        CONF.append(round(float(confidence), 3))
+    R["PITCH"][SOURCE_METHOD] = {"MS": MS, "HZ": HZ, "CONF": CONF}
+
+
+def LIVE_RESULT_PUT_VOLUME(RECORDING_ID: int, AUDIO_FRAME_NO: int, rows_1ms: Iterable[Tuple[int, float, float]]) -> None:
+    """Reduce 1 ms volume rows (START_MS, RMS, DB) to the loudest dB per LIVE_RESULT_VOLUME_HOP_MS."""
+    if LIVE_RESULT_PUSH_YN != "Y":
+        return
+    R = _LIVE_RESULT_RECORD(RECORDING_ID, AUDIO_FRAME_NO)
+    DB = [None] * -(-AUDIO_FRAME_MS // LIVE_RESULT_VOLUME_HOP_MS)
+    for (start_ms, _rms, db) in rows_1ms:
+        HOP_NO = (int(start_ms) - R["START_MS"]) // LIVE_RESULT_VOLUME_HOP_MS
+        if 0 <= HOP_NO < len(DB) and (DB[HOP_NO] is None or db > DB[HOP_NO]):
+            DB[HOP_NO] = db
+    R["VOLUME"] = {"HOP_MS": LIVE_RESULT_VOLUME_HOP_MS, "DB": [None if db is None else round(float(db), 1) for db in DB]}
+
+
+def LIVE_RESULT_MERGE(PENDING: Dict[str, Any], NEW: Dict[str, Any]) -> None:
+    """Fold NEW into a RESULT still waiting in the outbound queue (newest frames win)."""
+    FRAMES = PENDING["FRAMES"] + NEW["FRAMES"]
+    if len(FRAMES) > LIVE_RESULT_MAX_FRAMES_PER_MESSAGE:
+        _STATS["frames_trimmed"] += len(FRAMES) - LIVE_RESULT_MAX_FRAMES_PER_MESSAGE
+        FRAMES = FRAMES[-LIVE_RESULT_MAX_FRAMES_PER_MESSAGE:]
+    PENDING["FRAMES"] = FRAMES
+    PENDING["PROCESSED_THROUGH_FRAME_NO"] = max(PENDING["PROCESSED_THROUGH_FRAME_NO"], NEW["PROCESSED_THROUGH_FRAME_NO"])
+    if "SCORE" in NEW:
+        PENDING["SCORE"] = NEW["SCORE"]
+
+
+def _ADVANCE_WATERMARK(RECORDING_ID: int, AUDIO_FRAME_NO: int) -> int:
+    W = _WATERMARK_ARRAY.setdefault(RECORDING_ID, {"THROUGH": 0, "DONE": set()})
+    if AUDIO_FRAME_NO > W["THROUGH"]:
+        W["DONE"].add(AUDIO_FRAME_NO)
+    while W["THROUGH"] + 1 in W["DONE"]:
+        W["THROUGH"] += 1
+        W["DONE"].discard(W["THROUGH"])
+    return W["THROUGH"]
+
+
+def LIVE_RESULT_WATERMARK(RECORDING_ID: int) -> int:
+    return (_WATERMARK_ARRAY.get(int(RECORDING_ID)) or {}).get("THROUGH", 0)
+
+
+async def LIVE_RESULT_PUSH(RECORDING_ID: int, AUDIO_FRAME_NO: int) -> None:
+    """Stage-6: the frame's analyzers are done — publish its RESULT to the recording's subscribers."""
+    R = LIVE_RESULT_ARRAY.get(RECORDING_ID, {}).pop(AUDIO_FRAME_NO, None)
+    if LIVE_RESULT_PUSH_YN != "Y":
+        return
+    if R is None:
+        R = _LIVE_RESULT_RECORD(RECORDING_ID, AUDIO_FRAME_NO)
+        LIVE_RESULT_ARRAY[RECORDING_ID].pop(AUDIO_FRAME_NO, None)
+
+    PROCESSED_THROUGH_FRAME_NO = _ADVANCE_WATERMARK(RECORDING_ID, AUDIO_FRAME_NO)
+    MESSAGE = {
+        "MESSAGE_TYPE": "RESULT",
+        "RECORDING_ID": RECORDING_ID,
+        "PROCESSED_THROUGH_FRAME_NO": PROCESSED_THROUGH_FRAME_NO,
+        "FRAMES": [R],
+    }
+    SCORE = SONG_SCORE.score(RECORDING_ID, PROCESSED_THROUGH_FRAME_NO * AUDIO_FRAME_MS)
+    if SCORE:
+        MESSAGE["SCORE"] = SCORE
+    DELIVERED_CNT = await RESULT_HUB.publish(RECORDING_ID, MESSAGE, COALESCE_KEY=("RESULT", RECORDING_ID), MERGE=LIVE_RESULT_MERGE)
+    _STATS["messages_published"] += 1
+    _STATS["deliveries"] += DELIVERED_CNT
+    if DELIVERED_CNT == 0:
+        _STATS["no_subscriber"] += 1
+
+
+def LIVE_RESULT_FORGET_RECORDING(RECORDING_ID: int) -> None:
+    LIVE_RESULT_ARRAY.pop(RECORDING_ID, None)
+    _WATERMARK_ARRAY.pop(RECORDING_ID, None)
+
+
+def get_live_result_status() -> Dict[str, Any]:
+    return {
+        "enabled": LIVE_RESULT_PUSH_YN == "Y",
+        **_STATS,
+        "watermarks": {RECORDING_ID: W["THROUGH"] for RECORDING_ID, W in list(_WATERMARK_ARRAY.items())},
+    }
@@ -0,0 +1,137 @@
+# SERVER_ENGINE_LIVE_RESULT_HUB.py
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Optional, Set
+
+from fastapi import WebSocket
+
+from SERVER_ENGINE_APP_VARIABLES import ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY
+from SERVER_ENGINE_APP_FUNCTIONS import CONSOLE_LOG, ENGINE_DB_LOG_TABLE_INS
+from SERVER_ENGINE_WS_OUTBOUND import WS_SEND_JSON, WS_UNREGISTER
+
+PREFIX = "LIVE_RESULT_HUB"
+
+# ─────────────────────────────────────────────────────────────
+# Pub/sub fan-out of live results, keyed by RECORDING_ID
+# ─────────────────────────────────────────────────────────────
+# Stage-6 publishes each RESULT once; every subscribed connection gets it through its own bounded
+# WS_OUTBOUND queue (coalesced / oldest dropped there), so a slow observer never blocks the pipeline
+# or the other subscribers. The recording's own /ws/stream connection is subscribed at START.
+#
+# Observers (/ws/observe[?RECORDING_ID=n], client → server TEXT):
+#   {MESSAGE_TYPE:'SUBSCRIBE', RECORDING_ID}   → {MESSAGE_TYPE:'SUBSCRIBED', RECORDING_ID, PROCESSED_THROUGH_FRAME_NO}
+#   {MESSAGE_TYPE:'UNSUBSCRIBE', RECORDING_ID} → {MESSAGE_TYPE:'UNSUBSCRIBED', RECORDING_ID}
+# After purge every subscriber gets {MESSAGE_TYPE:'RECORDING_ENDED', RECORDING_ID}.
+
+class LiveResultHub:
+    def __init__(self):
+        self.subscribers: Dict[int, Set[int]] = {}  #int = RECORDING_ID → WEBSOCKET_CONNECTION_IDs
+        self.published = 0
+        self.delivered = 0
+        self.gone = 0
+
+    def subscribe(self, RECORDING_ID: int, WEBSOCKET_CONNECTION_ID: int) -> None:
+        self.subscribers.setdefault(int(RECORDING_ID), set()).add(int(WEBSOCKET_CONNECTION_ID))
+
+    def unsubscribe(self, WEBSOCKET_CONNECTION_ID: int, RECORDING_ID: Optional[int] = None) -> None:
+        """Drop one subscription, or every subscription of the connection when RECORDING_ID is None."""
+        for RID in ([int(RECORDING_ID)] if RECORDING_ID is not None else list(self.subscribers)):
+            CONN_IDS = self.subscribers.get(RID)
+            if CONN_IDS is None:
+                continue
+            CONN_IDS.discard(int(WEBSOCKET_CONNECTION_ID))
+            if not CONN_IDS:
+                self.subscribers.pop(RID, None)
+
+    async def publish(
+        self,
+        RECORDING_ID: int,
+        MESSAGE: Dict[str, Any],
+        COALESCE_KEY: Optional[Hashable] = None,
+        MERGE: Optional[Callable[[Dict[str, Any], Dict[str, Any]], None]] = None,
+    ) -> int:
+        """Queue MESSAGE for every subscriber of RECORDING_ID; returns how many accepted it."""
+        self.published += 1
+        DELIVERED_CNT = 0
+        for WEBSOCKET_CONNECTION_ID in list(self.subscribers.get(RECORDING_ID, ())):
+            # Each subscriber's queue may merge into its pending copy, so none share the top-level dict
+            COPY = {**MESSAGE, "FRAMES": list(MESSAGE["FRAMES"])} if "FRAMES" in MESSAGE else dict(MESSAGE)
+            if await WS_SEND_JSON(WEBSOCKET_CONNECTION_ID, COPY, COALESCE_KEY=COALESCE_KEY, MERGE=MERGE):
+                DELIVERED_CNT += 1
+            else:
+                self.gone += 1
+                self.unsubscribe(WEBSOCKET_CONNECTION_ID, RECORDING_ID)
+        self.delivered += DELIVERED_CNT
+        return DELIVERED_CNT
+
+    async def close_recording(self, RECORDING_ID: int) -> None:
+        """Recording purged: tell its subscribers and forget them."""
+        for WEBSOCKET_CONNECTION_ID in self.subscribers.pop(int(RECORDING_ID), set()):
+            await WS_SEND_JSON(WEBSOCKET_CONNECTION_ID, {"MESSAGE_TYPE": "RECORDING_ENDED", "RECORDING_ID": int(RECORDING_ID)})
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "published": self.published,
+            "delivered": self.delivered,
+            "subscribers_gone": self.gone,
+            "subscribers": {RECORDING_ID: sorted(CONN_IDS) for RECORDING_ID, CONN_IDS in list(self.subscribers.items())},
+        }
+
+
+RESULT_HUB = LiveResultHub()
+
+def get_live_result_hub_status() -> Dict[str, Any]:
+    return RESULT_HUB.status()
+
+# ─────────────────────────────────────────────────────────────
+# /ws/observe receive loop
+# ─────────────────────────────────────────────────────────────
+async def SERVER_ENGINE_LIVE_RESULT_OBSERVE(WEBSOCKET: WebSocket, WEBSOCKET_CONNECTION_ID: int) -> None:
+    """Read-only viewer: (un)subscribe to recordings; results arrive via RESULT_HUB."""
+    from SERVER_ENGINE_LIVE_RESULTS import LIVE_RESULT_WATERMARK
+
+    async def _SUBSCRIBE(RECORDING_ID: int) -> None:
+        RESULT_HUB.subscribe(RECORDING_ID, WEBSOCKET_CONNECTION_ID)
+        CONSOLE_LOG(PREFIX, "SUBSCRIBED", {"conn_id": WEBSOCKET_CONNECTION_ID, "rid": RECORDING_ID})
+        await WS_SEND_JSON(WEBSOCKET_CONNECTION_ID, {
+            "MESSAGE_TYPE": "SUBSCRIBED",
+            "RECORDING_ID": RECORDING_ID,
+            "PROCESSED_THROUGH_FRAME_NO": LIVE_RESULT_WATERMARK(RECORDING_ID),
+        })
+
+    RECORDING_ID_QS = WEBSOCKET.query_params.get("RECORDING_ID")
+    if RECORDING_ID_QS and RECORDING_ID_QS.isdigit():
+        await _SUBSCRIBE(int(RECORDING_ID_QS))
+
+    try:
+        while True:
+            RAW_WEBSOCKET_MESSAGE = await WEBSOCKET.receive()
+            if RAW_WEBSOCKET_MESSAGE.get("type") == "websocket.disconnect":
+                break
+            # Any traffic (PONG included) keeps the connection clear of the idle reaper
+            (ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY.get(WEBSOCKET_CONNECTION_ID) or {})["DT_LAST_MESSAGE_RECEIVED"] = datetime.now()
+            WEBSOCKET_MESSAGE_TEXT = RAW_WEBSOCKET_MESSAGE.get("text")
+            if WEBSOCKET_MESSAGE_TEXT is None:
+                continue
+            try:
+                WEBSOCKET_MESSAGE_JSON = json.loads(WEBSOCKET_MESSAGE_TEXT)
+                MESSAGE_TYPE = str(WEBSOCKET_MESSAGE_JSON.get("MESSAGE_TYPE") or "").upper()
+                RECORDING_ID = int(WEBSOCKET_MESSAGE_JSON.get("RECORDING_ID") or 0)
+            except (ValueError, TypeError, AttributeError) as e:
+                CONSOLE_LOG(PREFIX, "BAD_MESSAGE", {"conn_id": WEBSOCKET_CONNECTION_ID, "error": str(e)})
+                continue
+
+            if MESSAGE_TYPE == "SUBSCRIBE" and RECORDING_ID:
+                await _SUBSCRIBE(RECORDING_ID)
+            elif MESSAGE_TYPE == "UNSUBSCRIBE" and RECORDING_ID:
+                RESULT_HUB.unsubscribe(WEBSOCKET_CONNECTION_ID, RECORDING_ID)
+                await WS_SEND_JSON(WEBSOCKET_CONNECTION_ID, {"MESSAGE_TYPE": "UNSUBSCRIBED", "RECORDING_ID": RECORDING_ID})
+    finally:
+        RESULT_HUB.unsubscribe(WEBSOCKET_CONNECTION_ID)
+        WS_UNREGISTER(WEBSOCKET_CONNECTION_ID)
+        ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD = ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY.get(WEBSOCKET_CONNECTION_ID)
+        if ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD is not None:
+            ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD["DT_CONNECTION_CLOSED"] = datetime.now()
+            ENGINE_DB_LOG_TABLE_INS("ENGINE_DB_LOG_WEBSOCKET_CONNECTION", ENGINE_DB_LOG_WEBSOCKET_CONNECTION_RECORD)
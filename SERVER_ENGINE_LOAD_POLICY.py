@@ -0,0 +1,160 @@
+# SERVER_ENGINE_LOAD_POLICY.py
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from SERVER_ENGINE_APP_VARIABLES import (
+    ANALYZER_LADDER,
+    LOAD_POLICY_INTERVAL_MS,
+    LOAD_POLICY_LOOP_LAG_HIGH_MS,
+    LOAD_POLICY_LOOP_LAG_LOW_MS,
+    LOAD_POLICY_QUEUE_FILL_HIGH_PCT,
+    LOAD_POLICY_QUEUE_FILL_LOW_PCT,
+    LOAD_POLICY_STEP_DOWN_HOLD_MS,
+    LOAD_POLICY_STEP_UP_HOLD_MS,
+)
+from SERVER_ENGINE_APP_FUNCTIONS import CONSOLE_LOG, _stats_ms
+from SERVER_ENGINE_ANALYZER_SCHEDULER import ANALYZER_SCHEDULER
+
+PREFIX = "LOAD_POLICY"
+
+# ─────────────────────────────────────────────────────────────
+# Degradation ladder driven by event-loop lag + analyzer queue fill
+# ─────────────────────────────────────────────────────────────
+# Overloaded = loop lag above the HIGH mark OR fullest analyzer queue above its HIGH fill.
+# Calm       = both below their LOW marks. Between the marks the rung is held (hysteresis).
+# One rung per step: down after STEP_DOWN_HOLD_MS of overload, up after STEP_UP_HOLD_MS of calm.
+
+class LoadPolicy:
+    """Chooses the analyzer ladder rung Stage-6 applies to newly dispatched frames."""
+
+    def __init__(self, ladder: List[Dict[str, Any]]):
+        self.ladder = ladder or [{"NAME": "FULL"}]
+        self.rung = 0
+        self.loop_lag_ms: Deque[float] = deque(maxlen=240)
+        self.last_loop_lag_ms = 0.0
+        self.last_queue_fill_pct = 0.0
+        self.overloaded_since: Optional[float] = None
+        self.calm_since: Optional[float] = None
+        self.transitions: Deque[Dict[str, Any]] = deque(maxlen=50)
+        self.frames_by_rung: Dict[int, int] = {}
+
+    def rung_settings(self, rung: Optional[int] = None) -> Dict[str, Any]:
+        """Cumulative settings of rungs 1..rung (later rungs override earlier keys)."""
+        rung = self.rung if rung is None else rung
+        settings: Dict[str, Any] = {}
+        for step in self.ladder[1:rung + 1]:
+            settings.update({k: v for k, v in step.items() if k != "NAME"})
+        return settings
+
+    def peek(self) -> Tuple[int, Dict[str, Any]]:
+        """(rung number, cumulative settings) in force now, without counting a frame."""
+        return self.rung, self.rung_settings()
+
+    def count_frame(self, rung: int) -> None:
+        self.frames_by_rung[rung] = self.frames_by_rung.get(rung, 0) + 1
+
+    def current(self) -> Tuple[int, Dict[str, Any]]:
+        """(rung number, cumulative settings) for a frame being dispatched now."""
+        self.count_frame(self.rung)
+        return self.peek()
+
+    def _queue_fill_pct(self) -> float:
+        fill = 0.0
+        for pool in ANALYZER_SCHEDULER.pools.values():
+            capacity = sum(q.maxsize for q in pool.queues)
+            if capacity:
+                fill = max(fill, 100.0 * sum(q.qsize() for q in pool.queues) / capacity)
+        return fill
+
+    def observe(self, loop_lag_ms: float, now: Optional[float] = None) -> None:
+        """Feed one sample; steps the ladder when a hold time has elapsed."""
+        now = time.monotonic() if now is None else now
+        self.last_loop_lag_ms = loop_lag_ms
+        self.loop_lag_ms.append(loop_lag_ms)
+        self.last_queue_fill_pct = self._queue_fill_pct()
+
+        overloaded = loop_lag_ms > LOAD_POLICY_LOOP_LAG_HIGH_MS or self.last_queue_fill_pct > LOAD_POLICY_QUEUE_FILL_HIGH_PCT
+        calm = loop_lag_ms < LOAD_POLICY_LOOP_LAG_LOW_MS and self.last_queue_fill_pct < LOAD_POLICY_QUEUE_FILL_LOW_PCT
+
+        self.overloaded_since = (self.overloaded_since or now) if overloaded else None
+        self.calm_since = (self.calm_since or now) if calm else None
+
+        if self.overloaded_since is not None and self.rung < len(self.ladder) - 1 and \
+           (now - self.overloaded_since) * 1000.0 >= LOAD_POLICY_STEP_DOWN_HOLD_MS:
+            self._step(self.rung + 1, "overload")
+            self.overloaded_since = now
+        elif self.calm_since is not None and self.rung > 0 and \
+             (now - self.calm_since) * 1000.0 >= LOAD_POLICY_STEP_UP_HOLD_MS:
+            self._step(self.rung - 1, "recovered")
+            self.calm_since = now
+
+    def _step(self, rung: int, reason: str) -> None:
+        transition = {
+            "dt": datetime.now().isoformat(timespec="milliseconds"),
+            "from": self.rung,
+            "to": rung,
+            "name": self.ladder[rung].get("NAME"),
+            "reason": reason,
+            "loop_lag_ms": round(self.last_loop_lag_ms, 1),
+            "queue_fill_pct": round(self.last_queue_fill_pct, 1),
+        }
+        self.rung = rung
+        self.transitions.append(transition)
+        CONSOLE_LOG(PREFIX, "LADDER_STEP", transition)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "rung": self.rung,
+            "rung_name": self.ladder[self.rung].get("NAME"),
+            "settings": self.rung_settings(),
+            "ladder": [step.get("NAME") for step in self.ladder],
+            "loop_lag_ms": _stats_ms(list(self.loop_lag_ms)),
+            "queue_fill_pct": round(self.last_queue_fill_pct, 1),
+            "frames_by_rung": dict(self.frames_by_rung),
+            "transitions": list(self.transitions),
+        }
+
+
+def LADDER_APPLY(YN_RUN: Dict[str, str], COMPOSE_PLAY_OR_PRACTICE: Optional[str], SETTINGS: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Apply rung settings to a frame's analyzer flags.
+    YN_RUN: {"FFT": "Y"/"N", "ONS": ..., "PYIN": ..., "CREPE": ...}; returns a new dict.
+    """
+    YN_RUN = dict(YN_RUN)
+    if SETTINGS.get("SKIP_FFT_IN_COMPOSE") and str(COMPOSE_PLAY_OR_PRACTICE or "").upper() == "COMPOSE":
+        YN_RUN["FFT"] = "N"
+    if SETTINGS.get("CREPE_ONLY"):
+        YN_RUN["CREPE"] = "Y" if "Y" in (YN_RUN.get("PYIN"), YN_RUN.get("CREPE")) else "N"
+        YN_RUN["PYIN"] = "N"
+        YN_RUN["FFT"] = "N"
+    if YN_RUN.get("FFT") != "Y":
+        YN_RUN["ONS"] = "N"  # ONS rides with FFT
+    return YN_RUN
+
+# ─────────────────────────────────────────────────────────────
+# Global policy instance
+# ─────────────────────────────────────────────────────────────
+
+LOAD_POLICY = LoadPolicy(ANALYZER_LADDER)
+
+def get_load_policy_status() -> Dict[str, Any]:
+    return LOAD_POLICY.status()
+
+
+async def SERVER_ENGINE_LOAD_POLICY_LOOP() -> None:
+    """Background task: measure loop lag (sleep overshoot) and step the ladder."""
+    CONSOLE_LOG(PREFIX, "=== load policy starting ===", {"ladder": [step.get("NAME") for step in LOAD_POLICY.ladder]})
+    interval_s = LOAD_POLICY_INTERVAL_MS / 1000.0
+    while True:
+        t0 = time.monotonic()
+        await asyncio.sleep(interval_s)
+        loop_lag_ms = max(0.0, (time.monotonic() - t0 - interval_s) * 1000.0)
+        try:
+            LOAD_POLICY.observe(loop_lag_ms)
+        except Exception as e:
+            CONSOLE_LOG(PREFIX, "OBSERVE_ERROR", {"error": str(e)})
@@ -0,0 +1,237 @@
+# SERVER_ENGINE_MEMORY_MONITOR.py
+from __future__ import annotations
+
+import asyncio
+import os
+import tracemalloc
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+try:
+    import psutil  # type: ignore
+except Exception:  # pragma: no cover
+    psutil = None  # type: ignore
+
+from SERVER_ENGINE_APP_VARIABLES import (
+    PRE_SPLIT_AUDIO_FRAME_ARRAY,                    # volatile: client chunk bytes
+    SPLIT_100_MS_AUDIO_FRAME_ARRAY,                 # volatile: analyzer arrays
+    RECORDING_CONFIG_ARRAY,                         # volatile: split accumulator
+    ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_ARRAY,
+    ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY,
+    MEMORY_HIGH_WATER_MARK_MB,
+    MEMORY_CHECK_INTERVAL_MS,
+)
+from SERVER_ENGINE_APP_FUNCTIONS import CONSOLE_LOG
+
+PREFIX = "MEMORY"
+
+# Analyzer → DT_END_* stamp; VOLUME_1_MS always runs, the rest are YN-gated.
+_ANALYZER_END_STAMPS = {
+    "VOLUME_1_MS": ("DT_END_VOLUME_1_MS", None),
+    "FFT": ("DT_END_FFT", "YN_RUN_FFT"),
+    "ONS": ("DT_END_ONS", "YN_RUN_ONS"),
+    "PYIN": ("DT_END_PYIN", "YN_RUN_PYIN"),
+    "CREPE": ("DT_END_CREPE", "YN_RUN_CREPE"),
+}
+
+_TRACEMALLOC_BASELINE: Optional[tracemalloc.Snapshot] = None
+_HIGH_WATER_RELEASE_CNT = 0
+_HIGH_WATER_RELEASED_BYTES = 0
+_DT_LAST_HIGH_WATER_RELEASE: Optional[datetime] = None
+
+# ─────────────────────────────────────────────────────────────
+# Byte accounting
+# ─────────────────────────────────────────────────────────────
+def _payload_nbytes(value: Any) -> int:
+    """Bytes held by one payload value (ndarray / bytes-like); 0 for anything else."""
+    if value is None:
+        return 0
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, memoryview):
+        return value.nbytes
+    return 0
+
+
+def _record_nbytes(record: Dict[str, Any]) -> int:
+    return sum(_payload_nbytes(v) for v in record.values())
+
+
+def MEMORY_RECORDING_BYTES_GET(RECORDING_ID: int) -> Dict[str, int]:
+    """Bytes of audio payload held for one recording, per store."""
+    PRE_SPLIT_BYTES = sum(_record_nbytes(r) for r in list(PRE_SPLIT_AUDIO_FRAME_ARRAY.get(RECORDING_ID, {}).values()))
+    SPLIT_BYTES = sum(_record_nbytes(r) for r in list(SPLIT_100_MS_AUDIO_FRAME_ARRAY.get(RECORDING_ID, {}).values()))
+    ACCUMULATOR_BYTES = _record_nbytes(RECORDING_CONFIG_ARRAY.get(RECORDING_ID, {}))
+    return {
+        "PRE_SPLIT_AUDIO_FRAME_ARRAY": PRE_SPLIT_BYTES,
+        "SPLIT_100_MS_AUDIO_FRAME_ARRAY": SPLIT_BYTES,
+        "RECORDING_CONFIG_ARRAY": ACCUMULATOR_BYTES,
+        "TOTAL": PRE_SPLIT_BYTES + SPLIT_BYTES + ACCUMULATOR_BYTES,
+    }
+
+
+def MEMORY_ACCOUNTING_GET() -> Dict[str, Any]:
+    """Per-recording and per-store payload bytes, plus process RSS when psutil is available."""
+    RECORDING_ID_SET = set(PRE_SPLIT_AUDIO_FRAME_ARRAY) | set(SPLIT_100_MS_AUDIO_FRAME_ARRAY) | set(RECORDING_CONFIG_ARRAY)
+
+    BY_RECORDING: Dict[int, Dict[str, Any]] = {}
+    BY_STORE = {"PRE_SPLIT_AUDIO_FRAME_ARRAY": 0, "SPLIT_100_MS_AUDIO_FRAME_ARRAY": 0, "RECORDING_CONFIG_ARRAY": 0}
+    for RECORDING_ID in sorted(RECORDING_ID_SET):
+        BYTES = MEMORY_RECORDING_BYTES_GET(RECORDING_ID)
+        BY_RECORDING[RECORDING_ID] = {
+            **BYTES,
+            "PRE_SPLIT_FRAME_CNT": len(PRE_SPLIT_AUDIO_FRAME_ARRAY.get(RECORDING_ID, {})),
+            "SPLIT_100_MS_FRAME_CNT": len(SPLIT_100_MS_AUDIO_FRAME_ARRAY.get(RECORDING_ID, {})),
+        }
+        for STORE in BY_STORE:
+            BY_STORE[STORE] += BYTES[STORE]
+
+    TOTAL_BYTES = sum(BY_STORE.values())
+    OUT: Dict[str, Any] = {
+        "timestamp": datetime.now().isoformat(),
+        "total_payload_bytes": TOTAL_BYTES,
+        "total_payload_mb": round(TOTAL_BYTES / 1024 / 1024, 3),
+        "by_store": BY_STORE,
+        "by_recording": BY_RECORDING,
+        "high_water_mark_mb": MEMORY_HIGH_WATER_MARK_MB,
+        "high_water_release_cnt": _HIGH_WATER_RELEASE_CNT,
+        "high_water_released_bytes": _HIGH_WATER_RELEASED_BYTES,
+        "dt_last_high_water_release": _DT_LAST_HIGH_WATER_RELEASE.isoformat() if _DT_LAST_HIGH_WATER_RELEASE else None,
+    }
+    if psutil is not None:
+        try:
+            OUT["process_rss_mb"] = round(psutil.Process().memory_info().rss / 1024 / 1024, 2)
+        except Exception:
+            pass
+    return OUT
+
+# ─────────────────────────────────────────────────────────────
+# tracemalloc snapshots / diffs
+# ─────────────────────────────────────────────────────────────
+def _stat_to_dict(stat: Any) -> Dict[str, Any]:
+    frame = stat.traceback[0] if stat.traceback else None
+    out = {
+        "file": frame.filename if frame else None,
+        "line": frame.lineno if frame else None,
+        "size_kb": round(stat.size / 1024, 2),
+        "count": stat.count,
+    }
+    if hasattr(stat, "size_diff"):
+        out["size_diff_kb"] = round(stat.size_diff / 1024, 2)
+        out["count_diff"] = stat.count_diff
+    return out
+
+
+def MEMORY_TRACEMALLOC_SNAPSHOT(top: int = 10) -> Dict[str, Any]:
+    """Start tracing if needed, take a snapshot and keep it as the baseline for the next diff."""
+    global _TRACEMALLOC_BASELINE
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(int(os.getenv("MEMORY_TRACEMALLOC_FRAMES", "1")))
+    _TRACEMALLOC_BASELINE = tracemalloc.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        "traced_current_mb": round(current / 1024 / 1024, 3),
+        "traced_peak_mb": round(peak / 1024 / 1024, 3),
+        "top": [_stat_to_dict(s) for s in _TRACEMALLOC_BASELINE.statistics("lineno")[:top]],
+    }
+
+
+def MEMORY_TRACEMALLOC_DIFF(top: int = 10) -> Dict[str, Any]:
+    """Diff a fresh snapshot against the baseline; the fresh snapshot becomes the new baseline."""
+    global _TRACEMALLOC_BASELINE
+    if not tracemalloc.is_tracing() or _TRACEMALLOC_BASELINE is None:
+        return {"error": "no baseline snapshot; call /memory?snapshot=true first"}
+    SNAPSHOT = tracemalloc.take_snapshot()
+    STATS = SNAPSHOT.compare_to(_TRACEMALLOC_BASELINE, "lineno")
+    _TRACEMALLOC_BASELINE = SNAPSHOT
+    return {"top": [_stat_to_dict(s) for s in STATS[:top]]}
+
+
+def MEMORY_TRACEMALLOC_STOP() -> None:
+    global _TRACEMALLOC_BASELINE
+    _TRACEMALLOC_BASELINE = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+# ─────────────────────────────────────────────────────────────
+# Early release of consumed payloads
+# ─────────────────────────────────────────────────────────────
+def _split_frame_consumed(ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD: Dict[str, Any]) -> bool:
+    """True once every analyzer scheduled for the frame has stamped its DT_END_*."""
+    if ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD.get("DT_PROCESSING_END") is not None:
+        return True
+    if ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD.get("DT_PROCESSING_START") is None:
+        return False
+    for DT_END_KEY, YN_KEY in _ANALYZER_END_STAMPS.values():
+        if YN_KEY is not None and ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD.get(YN_KEY) != "Y":
+            continue
+        if ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_RECORD.get(DT_END_KEY) is None:
+            return False
+    return True
+
+
+def MEMORY_RELEASE_CONSUMED_PAYLOADS(RECORDING_ID: Optional[int] = None) -> int:
+    """
+    Drop payloads nobody will read again:
+      • pre-split chunk bytes already appended to the split accumulator
+      • 16k / 22.05k arrays whose analyzers have all finished
+    Metadata rows are left untouched. Returns bytes released.
+    """
+    RELEASED = 0
+    RECORDING_ID_ARRAY = [RECORDING_ID] if RECORDING_ID is not None else list(PRE_SPLIT_AUDIO_FRAME_ARRAY) + list(SPLIT_100_MS_AUDIO_FRAME_ARRAY)
+
+    for RID in dict.fromkeys(RECORDING_ID_ARRAY):
+        META_ARRAY = ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_ARRAY.get(RID, {})
+        for AUDIO_FRAME_NO, PRE_SPLIT_AUDIO_FRAME_RECORD in list(PRE_SPLIT_AUDIO_FRAME_ARRAY.get(RID, {}).items()):
+            if META_ARRAY.get(AUDIO_FRAME_NO, {}).get("DT_FRAME_SPLIT_INTO_100_MS_FRAMES") is None:
+                continue
+            RELEASED += _payload_nbytes(PRE_SPLIT_AUDIO_FRAME_RECORD.pop("AUDIO_FRAME_BYTES", None))
+
+        META_ARRAY = ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY.get(RID, {})
+        for AUDIO_FRAME_NO, SPLIT_100_MS_AUDIO_FRAME_RECORD in list(SPLIT_100_MS_AUDIO_FRAME_ARRAY.get(RID, {}).items()):
+            if not _split_frame_consumed(META_ARRAY.get(AUDIO_FRAME_NO, {})):
+                continue
+            for KEY in ("AUDIO_FRAME_BYTES", "AUDIO_ARRAY_16000", "AUDIO_ARRAY_22050"):
+                RELEASED += _payload_nbytes(SPLIT_100_MS_AUDIO_FRAME_RECORD.pop(KEY, None))
+
+    return RELEASED
+
+
+def MEMORY_HIGH_WATER_CHECK() -> int:
+    """Release consumed payloads when held payload bytes exceed MEMORY_HIGH_WATER_MARK_MB."""
+    global _HIGH_WATER_RELEASE_CNT, _HIGH_WATER_RELEASED_BYTES, _DT_LAST_HIGH_WATER_RELEASE
+    if MEMORY_HIGH_WATER_MARK_MB <= 0:
+        return 0
+
+    TOTAL_BYTES = sum(MEMORY_RECORDING_BYTES_GET(RID)["TOTAL"]
+                      for RID in set(PRE_SPLIT_AUDIO_FRAME_ARRAY) | set(SPLIT_100_MS_AUDIO_FRAME_ARRAY) | set(RECORDING_CONFIG_ARRAY))
+    if TOTAL_BYTES <= MEMORY_HIGH_WATER_MARK_MB * 1024 * 1024:
+        return 0
+
+    RELEASED = MEMORY_RELEASE_CONSUMED_PAYLOADS()
+    _HIGH_WATER_RELEASE_CNT += 1
+    _HIGH_WATER_RELEASED_BYTES += RELEASED
+    _DT_LAST_HIGH_WATER_RELEASE = datetime.now()
+    CONSOLE_LOG(PREFIX, "HIGH_WATER_RELEASE", {
+        "held_mb": round(TOTAL_BYTES / 1024 / 1024, 2),
+        "mark_mb": MEMORY_HIGH_WATER_MARK_MB,
+        "released_mb": round(RELEASED / 1024 / 1024, 2),
+    })
+    return RELEASED
+
+
+async def SERVER_ENGINE_MEMORY_MONITOR_LOOP() -> None:
+    """Background task: enforce the payload high-water mark."""
+    CONSOLE_LOG(PREFIX, "=== memory monitor starting ===", {"high_water_mark_mb": MEMORY_HIGH_WATER_MARK_MB})
+    while True:
+        try:
+            MEMORY_HIGH_WATER_CHECK()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            CONSOLE_LOG(PREFIX, "HIGH_WATER_CHECK_ERROR", {"error": str(e)})
+        await asyncio.sleep(MEMORY_CHECK_INTERVAL_MS / 1000.0)
@@ -0,0 +1,278 @@
+# SERVER_ENGINE_NOTE_SEGMENTER.py
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from SERVER_ENGINE_APP_VARIABLES import (
+    AUDIO_FRAME_MS,
+    NOTE_SEGMENTER_YN,
+    NOTE_SEGMENTER_SOURCE_ORDER,
+    NOTE_SEGMENTER_MIN_CONFIDENCE,
+    NOTE_SEGMENTER_MIN_DB,
+    NOTE_SEGMENTER_MAX_GAP_MS,
+    NOTE_SEGMENTER_MIN_CHANGE_MS,
+    NOTE_SEGMENTER_MIN_NOTE_MS,
+)
+from SERVER_ENGINE_APP_FUNCTIONS import CONSOLE_LOG, DB_CONNECT_CTX
+from SERVER_ENGINE_AUDIO_STREAM_PROCESS_ONS import ENGINE_LOAD_NOTE_INS, NoteRow
+
+PREFIX = "NOTE_SEGMENTER"
+
+SOURCE_METHOD = "SEG"
+SAMPLE_RATE = 16000               # onsets/offsets follow the 1 ms volume track (16 kHz)
+
+# ─────────────────────────────────────────────────────────────
+# Streaming note segmentation from pitch + 1 ms volume
+# ─────────────────────────────────────────────────────────────
+# PYIN/CREPE and VOLUME_1_MS hand over their rows per frame; when Stage-6 finishes a frame it is
+# segmented, strictly in frame order (frames finishing early wait for the ones before them).
+# A frame covers its Stage-3B START_MS..END_MS (handed over with frame_done; AUDIO_FRAME_MS grid otherwise).
+# Per frame (numpy): rows → per-ms MIDI and dB → semitone label per ms (-1 = unvoiced) → runs.
+# Per run (a handful per frame) a small state machine carried across frames:
+#   • unvoiced for NOTE_SEGMENTER_MAX_GAP_MS           → the open note ends at its last voiced ms
+#   • another semitone for NOTE_SEGMENTER_MIN_CHANGE_MS → the open note ends, the new one starts
+#   • shorter excursions (vibrato, scoops, dropouts)   → stay part of the open note
+# NOTE_MIDI_PITCH_NO = the note's semitone, VOLUME_MIDI_VELOCITY_NO = its peak dB mapped onto 1..127.
+# STOP: FINALIZE_RECORDING flushes what is left (AUDIO_FRAME_NO 0, like the ONS finalize).
+
+def _NEW_NOTE(LABEL: int, START_MS: int, END_MS: int, PEAK_DB: float) -> Dict[str, Any]:
+    return {"LABEL": LABEL, "START_MS": START_MS, "END_MS": END_MS, "PEAK_DB": PEAK_DB}
+
+
+def _VELOCITY(PEAK_DB: float, MIN_DB: float) -> int:
+    if not np.isfinite(PEAK_DB) or MIN_DB >= 0:
+        return 64
+    return int(np.clip(round(127.0 * (PEAK_DB - MIN_DB) / -MIN_DB), 1, 127))
+
+
+def _FILL_PER_MS(MS: np.ndarray, START_MS: np.ndarray, END_MS: np.ndarray, VALUE: np.ndarray) -> np.ndarray:
+    """Value of the row covering each ms (rows sorted by START_MS, END_MS inclusive), NaN where none does."""
+    OUT = np.full(MS.size, np.nan, dtype=np.float64)
+    if START_MS.size == 0:
+        return OUT
+    IDX = np.searchsorted(START_MS, MS, side="right") - 1
+    COVERED = IDX >= 0
+    IDX_OK = np.where(COVERED, IDX, 0)
+    COVERED &= MS <= END_MS[IDX_OK]
+    OUT[COVERED] = VALUE[IDX_OK[COVERED]]
+    return OUT
+
+
+class NoteSegmenter:
+    def __init__(self, MIN_CONFIDENCE: float, MIN_DB: float, MAX_GAP_MS: int, MIN_CHANGE_MS: int, MIN_NOTE_MS: int):
+        self.min_confidence = MIN_CONFIDENCE
+        self.min_db = MIN_DB
+        self.max_gap_ms = MAX_GAP_MS
+        self.min_change_ms = MIN_CHANGE_MS
+        self.min_note_ms = MIN_NOTE_MS
+        self.recordings: Dict[int, Dict[str, Any]] = {}
+        self.stats = {"frames_segmented": 0, "frames_waited": 0, "notes_emitted": 0, "notes_too_short": 0}
+
+    def _state(self, RECORDING_ID: int) -> Dict[str, Any]:
+        return self.recordings.setdefault(int(RECORDING_ID), {
+            "FRAMES": {},          # AUDIO_FRAME_NO → {"HZ": {SOURCE_METHOD: rows}, "VOLUME": rows, "DONE": bool, "MS_RANGE": (start, end)}
+            "NEXT_FRAME_NO": 1,
+            "NOTE": None,          # open note
+            "PENDING": None,       # different semitone not yet held long enough to replace NOTE
+        })
+
+    # ── inputs (called next to the LIVE_RESULT_PUT_* hooks) ──
+    def put_hz(self, RECORDING_ID: int, AUDIO_FRAME_NO: int, SOURCE_METHOD: str, rows_abs: Iterable[Tuple[int, int, float, float]]) -> None:
+        F = self._state(RECORDING_ID)["FRAMES"].setdefault(int(AUDIO_FRAME_NO), {"HZ": {}, "VOLUME": None, "DONE": False})
+        F["HZ"][SOURCE_METHOD] = list(rows_abs)
+
+    def put_volume(self, RECORDING_ID: int, AUDIO_FRAME_NO: int, rows_1ms: Iterable[Tuple[int, float, float]]) -> None:
+        F = self._state(RECORDING_ID)["FRAMES"].setdefault(int(AUDIO_FRAME_NO), {"HZ": {}, "VOLUME": None, "DONE": False})
+        F["VOLUME"] = list(rows_1ms)
+
+    # ── segmentation ──
+    def frame_done(self, RECORDING_ID: int, AUDIO_FRAME_NO: int,
+                   START_MS: Optional[int] = None, END_MS: Optional[int] = None) -> List[NoteRow]:
+        """Stage-6 finished AUDIO_FRAME_NO (covering START_MS..END_MS): segment every frame now contiguous; returns the notes closed."""
+        S = self._state(RECORDING_ID)
+        F = S["FRAMES"].setdefault(int(AUDIO_FRAME_NO), {"HZ": {}, "VOLUME": None, "DONE": False})
+        F["DONE"] = True
+        if START_MS is not None and END_MS is not None:
+            F["MS_RANGE"] = (int(START_MS), int(END_MS))
+        NOTES: List[NoteRow] = []
+        while (S["FRAMES"].get(S["NEXT_FRAME_NO"]) or {}).get("DONE"):
+            self._segment_frame(S, S["NEXT_FRAME_NO"], S["FRAMES"].pop(S["NEXT_FRAME_NO"]), NOTES)
+            S["NEXT_FRAME_NO"] += 1
+        if int(AUDIO_FRAME_NO) in S["FRAMES"]:
+            self.stats["frames_waited"] += 1  # finished before an earlier frame
+        return NOTES
+
+    def finalize(self, RECORDING_ID: int) -> List[NoteRow]:
+        """End of recording: segment what is left (skipping frames that never finished), close the open note."""
+        S = self.recordings.pop(int(RECORDING_ID), None)
+        if S is None:
+            return []
+        NOTES: List[NoteRow] = []
+        for FRAME_NO in sorted(S["FRAMES"]):
+            if FRAME_NO >= S["NEXT_FRAME_NO"] and S["FRAMES"][FRAME_NO]["DONE"]:
+                self._segment_frame(S, FRAME_NO, S["FRAMES"][FRAME_NO], NOTES)
+        self._close(S, NOTES)
+        return NOTES
+
+    def forget_recording(self, RECORDING_ID: int) -> None:
+        self.recordings.pop(int(RECORDING_ID), None)
+
+    def _frame_labels(self, AUDIO_FRAME_NO: int, F: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(ms, semitone label or -1, dB) for every ms of the frame."""
+        START_MS, END_MS = F.get("MS_RANGE") or (AUDIO_FRAME_MS * (AUDIO_FRAME_NO - 1), AUDIO_FRAME_MS * AUDIO_FRAME_NO - 1)
+        MS = np.arange(START_MS, END_MS + 1, dtype=np.int64)
+
+        MIDI = np.full(MS.size, np.nan)
+        for SOURCE in NOTE_SEGMENTER_SOURCE_ORDER:
+            ROWS = F["HZ"].get(SOURCE)
+            if ROWS:
+                P = np.asarray(ROWS, dtype=np.float64).reshape(-1, 4)
+                P = P[(P[:, 3] >= self.min_confidence) & (P[:, 2] > 0.0)]
+                P = P[np.argsort(P[:, 0], kind="stable")]
+                MIDI = _FILL_PER_MS(MS, P[:, 0].astype(np.int64), P[:, 1].astype(np.int64), 69.0 + 12.0 * np.log2(P[:, 2] / 440.0))
+                break
+
+        DB = np.full(MS.size, np.nan)
+        if F["VOLUME"]:
+            V = np.asarray(F["VOLUME"], dtype=np.float64).reshape(-1, 3)
+            V = V[np.argsort(V[:, 0], kind="stable")]
+            # 1 ms rows: each one holds until the next (the last one to the end of the frame)
+            DB = _FILL_PER_MS(MS, V[:, 0].astype(np.int64), np.full(V.shape[0], MS[-1]), V[:, 2])
+
+        VOICED = np.isfinite(MIDI) & ~(DB < self.min_db)  # no volume row → pitch alone decides
+        LABEL = np.where(VOICED, np.rint(np.nan_to_num(MIDI)), -1).astype(np.int32)
+        return MS, LABEL, DB
+
+    def _segment_frame(self, S: Dict[str, Any], AUDIO_FRAME_NO: int, F: Dict[str, Any], NOTES: List[NoteRow]) -> None:
+        MS, LABEL, DB = self._frame_labels(AUDIO_FRAME_NO, F)
+        RUN_START = np.concatenate(([0], np.flatnonzero(LABEL[1:] != LABEL[:-1]) + 1))
+        RUN_END = np.concatenate((RUN_START[1:], [LABEL.size])) - 1
+        RUN_PEAK_DB = np.fmax.reduceat(DB, RUN_START)
+        for i0, i1, PEAK_DB in zip(RUN_START.tolist(), RUN_END.tolist(), RUN_PEAK_DB.tolist()):
+            self._run(S, int(LABEL[i0]), int(MS[i0]), int(MS[i1]), PEAK_DB, NOTES)
+        self.stats["frames_segmented"] += 1
+
+    def _run(self, S: Dict[str, Any], LABEL: int, START_MS: int, END_MS: int, PEAK_DB: float, NOTES: List[NoteRow]) -> None:
+        NOTE = S["NOTE"]
+        if NOTE is not None and START_MS - NOTE["END_MS"] - 1 >= self.max_gap_ms:
+            self._close(S, NOTES)   # a gap between frames (one never finished) counts as silence
+            NOTE = None
+
+        if LABEL < 0:
+            S["PENDING"] = None
+            if NOTE is not None and END_MS - NOTE["END_MS"] >= self.max_gap_ms:
+                self._close(S, NOTES)
+            return
+
+        if NOTE is None:
+            S["NOTE"] = _NEW_NOTE(LABEL, START_MS, END_MS, PEAK_DB)
+            return
+
+        NOTE["END_MS"] = END_MS
+        if LABEL == NOTE["LABEL"]:
+            NOTE["PEAK_DB"] = np.fmax(NOTE["PEAK_DB"], PEAK_DB)
+            S["PENDING"] = None
+            return
+
+        PENDING = S["PENDING"]
+        if PENDING is not None and PENDING["LABEL"] == LABEL and PENDING["END_MS"] == START_MS - 1:
+            PENDING["END_MS"] = END_MS
+            PENDING["PEAK_DB"] = np.fmax(PENDING["PEAK_DB"], PEAK_DB)
+        else:
+            PENDING = S["PENDING"] = _NEW_NOTE(LABEL, START_MS, END_MS, PEAK_DB)
+        if PENDING["END_MS"] - PENDING["START_MS"] + 1 >= self.min_change_ms:
+            NOTE["END_MS"] = PENDING["START_MS"] - 1
+            self._close(S, NOTES)
+            S["NOTE"], S["PENDING"] = PENDING, None
+
+    def _close(self, S: Dict[str, Any], NOTES: List[NoteRow]) -> None:
+        NOTE, S["NOTE"], S["PENDING"] = S["NOTE"], None, None
+        if NOTE is None:
+            return
+        if NOTE["END_MS"] - NOTE["START_MS"] + 1 < self.min_note_ms:
+            self.stats["notes_too_short"] += 1
+            return
+        NOTES.append((NOTE["START_MS"], NOTE["END_MS"], NOTE["LABEL"], _VELOCITY(NOTE["PEAK_DB"], self.min_db), SOURCE_METHOD))
+        self.stats["notes_emitted"] += 1
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": NOTE_SEGMENTER_YN == "Y",
+            "recordings": len(self.recordings),
+            "frames_waiting": sum(len(S["FRAMES"]) for S in list(self.recordings.values())),
+            **self.stats,
+        }
+
+# ─────────────────────────────────────────────────────────────
+# Global instance + hooks
+# ─────────────────────────────────────────────────────────────
+
+NOTE_SEGMENTER = NoteSegmenter(
+    NOTE_SEGMENTER_MIN_CONFIDENCE, NOTE_SEGMENTER_MIN_DB,
+    NOTE_SEGMENTER_MAX_GAP_MS, NOTE_SEGMENTER_MIN_CHANGE_MS, NOTE_SEGMENTER_MIN_NOTE_MS,
+)
+
+def get_note_segmenter_status() -> Dict[str, Any]:
+    return NOTE_SEGMENTER.status()
+
+
+def NOTE_SEGMENTER_PUT_HZ(RECORDING_ID: int, AUDIO_FRAME_NO: int, SOURCE_METHOD: str, rows_abs: Iterable[Tuple[int, int, float, float]]) -> None:
+    if NOTE_SEGMENTER_YN == "Y":
+        NOTE_SEGMENTER.put_hz(RECORDING_ID, AUDIO_FRAME_NO, SOURCE_METHOD, rows_abs)
+
+
+def NOTE_SEGMENTER_PUT_VOLUME(RECORDING_ID: int, AUDIO_FRAME_NO: int, rows_1ms: Iterable[Tuple[int, float, float]]) -> None:
+    if NOTE_SEGMENTER_YN == "Y":
+        NOTE_SEGMENTER.put_volume(RECORDING_ID, AUDIO_FRAME_NO, rows_1ms)
+
+
+def _NOTE_ROWS_INS(RECORDING_ID: int, AUDIO_FRAME_NO: int, NOTES: List[NoteRow]) -> None:
+    with DB_CONNECT_CTX() as conn:
+        ENGINE_LOAD_NOTE_INS(
+            conn=conn,
+            RECORDING_ID=int(RECORDING_ID),
+            AUDIO_FRAME_NO=int(AUDIO_FRAME_NO),
+            SAMPLE_RATE=SAMPLE_RATE,
+            rows_abs_with_src=NOTES,
+        )
+
+
+async def _WRITE_NOTES(RECORDING_ID: int, AUDIO_FRAME_NO: int, NOTES: List[NoteRow]) -> int:
+    if not NOTES:
+        return 0
+    try:
+        await asyncio.to_thread(_NOTE_ROWS_INS, RECORDING_ID, AUDIO_FRAME_NO, NOTES)
+    except Exception as e:
+        CONSOLE_LOG(PREFIX, "DB_INSERT_FAILED", {"rid": int(RECORDING_ID), "frame": int(AUDIO_FRAME_NO), "notes": len(NOTES), "error": str(e)})
+        return 0
+    return len(NOTES)
+
+
+async def NOTE_SEGMENTER_FRAME_DONE(RECORDING_ID: int, AUDIO_FRAME_NO: int,
+                                    START_MS: Optional[int] = None, END_MS: Optional[int] = None) -> int:
+    """Stage-6 (frame finished): segment up to the contiguous watermark; returns ENGINE_LOAD_NOTE rows written."""
+    if NOTE_SEGMENTER_YN != "Y":
+        return 0
+    try:
+        NOTES = NOTE_SEGMENTER.frame_done(RECORDING_ID, AUDIO_FRAME_NO, START_MS, END_MS)
+    except Exception as e:
+        CONSOLE_LOG(PREFIX, "SEGMENT_FAILED", {"rid": int(RECORDING_ID), "frame": int(AUDIO_FRAME_NO), "error": str(e)})
+        return 0
+    return await _WRITE_NOTES(RECORDING_ID, AUDIO_FRAME_NO, NOTES)
+
+
+async def NOTE_SEGMENTER_FINALIZE(RECORDING_ID: int) -> int:
+    """FINALIZE_RECORDING: flush the open note; returns ENGINE_LOAD_NOTE rows written."""
+    if NOTE_SEGMENTER_YN != "Y":
+        return 0
+    try:
+        NOTES = NOTE_SEGMENTER.finalize(RECORDING_ID)
+    except Exception as e:
+        CONSOLE_LOG(PREFIX, "FINALIZE_FAILED", {"rid": int(RECORDING_ID), "error": str(e)})
+        return 0
+    INSERTED = await _WRITE_NOTES(RECORDING_ID, 0, NOTES)
+    CONSOLE_LOG(PREFIX, "FINALIZE_OK", {"rid": int(RECORDING_ID), "rows_inserted": INSERTED})
+    return INSERTED
@@ -0,0 +1,194 @@
+# SERVER_ENGINE_OAF_CLIENT.py
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+# httpx gives real async I/O; without it the same pool runs on a requests.Session in worker threads
+try:
+    import httpx  # type: ignore
+except Exception:  # pragma: no cover
+    httpx = None  # type: ignore
+import requests
+from requests.adapters import HTTPAdapter
+
+from SERVER_ENGINE_APP_VARIABLES import (
+    OAF_HOST,
+    OAF_PORT,
+    OAF_CLIENT_MAX_CONNECTIONS,
+    OAF_CLIENT_CONNECT_TIMEOUT_S,
+    OAF_CLIENT_START_TIMEOUT_S,
+    OAF_CLIENT_INGEST_TIMEOUT_S,
+    OAF_CIRCUIT_FAILURES,
+    OAF_CIRCUIT_RESET_MS,
+)
+from SERVER_ENGINE_APP_FUNCTIONS import CONSOLE_LOG, _stats_ms
+
+PREFIX = "OAF_CLIENT"
+
+_METRIC_SAMPLES = 500  # rolling window per endpoint
+
+# ─────────────────────────────────────────────────────────────
+# Onsets & Frames session API client
+# ─────────────────────────────────────────────────────────────
+#   POST /session/start  {sample_rate}                          → {ok, session_id}
+#   POST /session/ingest raw PCM16, X-Session-Id / X-Offset-Ms / X-Finalize / X-Sample-Rate
+#                                                               → {ok, commit_ms, notes}
+# post() returns (status, JSON body or None), or None when the call failed or the circuit is open.
+# HTTP/1.1 has no usable pipelining, so "in order" means: one ingest per session in flight, queued
+# behind a per-session lock in call order, each on a warm pooled connection.
+
+class OafClient:
+    def __init__(self, BASE_URL: str, MAX_CONNECTIONS: int, CONNECT_TIMEOUT_S: float,
+                 FAILURE_THRESHOLD: int, RESET_MS: int):
+        self.base_url = BASE_URL.rstrip("/")
+        self.max_connections = MAX_CONNECTIONS
+        self.connect_timeout_s = CONNECT_TIMEOUT_S
+        self.failure_threshold = FAILURE_THRESHOLD
+        self.reset_ms = RESET_MS
+        self.transport = "httpx" if httpx is not None else "requests"
+        self._client: Any = None                                      # httpx.AsyncClient | requests.Session
+        self._session_locks: Dict[str, asyncio.Lock] = {}
+        # Circuit breaker
+        self.state = "CLOSED"                                        # CLOSED | OPEN | HALF_OPEN
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.stats = {"calls": 0, "failures": 0, "short_circuited": 0, "circuit_opened": 0}
+        self.latency_ms: Dict[str, Deque[float]] = {}
+
+    # ── pool ──
+    def _get_client(self) -> Any:
+        if self._client is None:
+            if httpx is not None:
+                self._client = httpx.AsyncClient(
+                    base_url=self.base_url,
+                    limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                )
+            else:
+                SESSION = requests.Session()
+                ADAPTER = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_connections)
+                SESSION.mount("http://", ADAPTER)
+                SESSION.mount("https://", ADAPTER)
+                self._client = SESSION
+        return self._client
+
+    async def aclose(self) -> None:
+        CLIENT, self._client = self._client, None
+        if CLIENT is None:
+            return
+        if httpx is not None and isinstance(CLIENT, httpx.AsyncClient):
+            await CLIENT.aclose()
+        else:
+            CLIENT.close()
+
+    def session_lock(self, SESSION_ID: str) -> asyncio.Lock:
+        """Serializes one session's ingests in call order."""
+        return self._session_locks.setdefault(SESSION_ID, asyncio.Lock())
+
+    def forget_session(self, SESSION_ID: str) -> None:
+        self._session_locks.pop(SESSION_ID, None)
+
+    # ── circuit breaker ──
+    def _admit(self) -> bool:
+        if self.state == "CLOSED":
+            return True
+        if self.state == "OPEN" and (time.monotonic() - self.opened_at) * 1000.0 >= self.reset_ms:
+            self.state = "HALF_OPEN"
+        if self.state == "HALF_OPEN" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def _record(self, OK: bool, PATH: str) -> None:
+        if self.state == "HALF_OPEN":
+            self.trial_in_flight = False
+        if OK:
+            if self.state != "CLOSED":
+                CONSOLE_LOG(PREFIX, "CIRCUIT_CLOSED", {"path": PATH})
+            self.state = "CLOSED"
+            self.consecutive_failures = 0
+            return
+        self.stats["failures"] += 1
+        self.consecutive_failures += 1
+        if self.state == "HALF_OPEN" or (self.state == "CLOSED" and self.consecutive_failures >= self.failure_threshold):
+            self.state = "OPEN"
+            self.opened_at = time.monotonic()
+            self.stats["circuit_opened"] += 1
+            CONSOLE_LOG(PREFIX, "CIRCUIT_OPEN", {"path": PATH, "failures": self.consecutive_failures, "reset_ms": self.reset_ms})
+
+    # ── calls ──
+    async def post(self, PATH: str, TIMEOUT_S: float, JSON: Optional[Dict[str, Any]] = None,
+                   CONTENT: Optional[bytes] = None, HEADERS: Optional[Dict[str, str]] = None) -> Optional[Tuple[int, Optional[Dict[str, Any]]]]:
+        if not self._admit():
+            self.stats["short_circuited"] += 1
+            return None
+        self.stats["calls"] += 1
+        CLIENT = self._get_client()
+        t0 = time.perf_counter()
+        try:
+            if httpx is not None and isinstance(CLIENT, httpx.AsyncClient):
+                resp = await CLIENT.post(
+                    PATH, json=JSON, content=CONTENT, headers=HEADERS,
+                    timeout=httpx.Timeout(TIMEOUT_S, connect=self.connect_timeout_s),
+                )
+            else:
+                resp = await asyncio.to_thread(
+                    CLIENT.post, self.base_url + PATH, json=JSON, data=CONTENT, headers=HEADERS,
+                    timeout=(self.connect_timeout_s, TIMEOUT_S),
+                )
+            STATUS = resp.status_code
+            try:
+                BODY = resp.json() if resp.content else None
+            except ValueError:
+                BODY = None
+        except Exception as e:
+            self._record(False, PATH)
+            CONSOLE_LOG(PREFIX, "CALL_FAILED", {"path": PATH, "error": f"{e.__class__.__name__}: {e}"})
+            return None
+        finally:
+            self.latency_ms.setdefault(PATH, deque(maxlen=_METRIC_SAMPLES)).append((time.perf_counter() - t0) * 1000.0)
+        self._record(STATUS < 500, PATH)
+        return STATUS, BODY
+
+    async def start_session(self, SAMPLE_RATE: int) -> Optional[Tuple[int, Optional[Dict[str, Any]]]]:
+        return await self.post("/session/start", OAF_CLIENT_START_TIMEOUT_S, JSON={"sample_rate": int(SAMPLE_RATE)})
+
+    async def ingest(self, SESSION_ID: str, OFFSET_MS: int, PCM16_BYTES: bytes, FINALIZE: bool,
+                     SAMPLE_RATE: int) -> Optional[Tuple[int, Optional[Dict[str, Any]]]]:
+        HEADERS = {
+            "Content-Type": "application/octet-stream",
+            "X-Session-Id": SESSION_ID,
+            "X-Offset-Ms": str(int(OFFSET_MS)),
+            "X-Finalize": "1" if FINALIZE else "0",
+            "X-Sample-Rate": str(int(SAMPLE_RATE)),
+        }
+        async with self.session_lock(SESSION_ID):
+            return await self.post("/session/ingest", OAF_CLIENT_INGEST_TIMEOUT_S, CONTENT=PCM16_BYTES, HEADERS=HEADERS)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "transport": self.transport,
+            "pool_open": self._client is not None,
+            "max_connections": self.max_connections,
+            "circuit": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "sessions_in_flight": sum(1 for LOCK in list(self._session_locks.values()) if LOCK.locked()),
+            **self.stats,
+            "latency_ms": {PATH: _stats_ms(list(SAMPLES)) for PATH, SAMPLES in list(self.latency_ms.items())},
+        }
+
+# ─────────────────────────────────────────────────────────────
+# Global instance
+# ─────────────────────────────────────────────────────────────
+
+OAF_CLIENT = OafClient(
+    f"http://{OAF_HOST}:{OAF_PORT}", OAF_CLIENT_MAX_CONNECTIONS, OAF_CLIENT_CONNECT_TIMEOUT_S,
+    OAF_CIRCUIT_FAILURES, OAF_CIRCUIT_RESET_MS,
+)
+
+def get_oaf_client_status() -> Dict[str, Any]:
+    return OAF_CLIENT.status()
@@ -72,6 +72,7 @@ print("STARTUP DELAY COMPLETED")
 # ── WS connection + message handlers ─────────────────────────
 from SERVER_ENGINE_LISTEN_1_FOR_WS_CONNECTIONS import SERVER_ENGINE_LISTEN_1_FOR_WS_CONNECTIONS
 from SERVER_ENGINE_LISTEN_2_FOR_WS_MESSAGES    import SERVER_ENGINE_LISTEN_2_FOR_WS_MESSAGES
+from SERVER_ENGINE_LIVE_RESULT_HUB import SERVER_ENGINE_LIVE_RESULT_OBSERVE
 
 # ── Process monitoring and cleanup ───
 from SERVER_ENGINE_PROCESS_MONITOR import PROCESS_MONITOR, PROCESS_MONITOR_HEARTBEAT
@@ -80,8 +81,14 @@ from SERVER_ENGINE_PROCESS_MONITOR import PROCESS_MONITOR, PROCESS_MONITOR_HEART
 from SERVER_ENGINE_LISTEN_3A_FOR_START import SERVER_ENGINE_LISTEN_3A_FOR_START
 from SERVER_ENGINE_LISTEN_3B_FOR_FRAMES import SERVER_ENGINE_LISTEN_3B_FOR_FRAMES
 from SERVER_ENGINE_LISTEN_3C_FOR_STOP import SERVER_ENGINE_LISTEN_3C_FOR_STOP
+from SERVER_ENGINE_LISTEN_3D_FOR_RESUME import SERVER_ENGINE_LISTEN_3D_FOR_RESUME
+from SERVER_ENGINE_LISTEN_4_FOR_MISSING_FRAMES import SERVER_ENGINE_LISTEN_4_FOR_MISSING_FRAMES
 from SERVER_ENGINE_LISTEN_6_FOR_AUDIO_FRAMES_TO_PROCESS import SERVER_ENGINE_LISTEN_6_FOR_AUDIO_FRAMES_TO_PROCESS
-from SERVER_ENGINE_LISTEN_7_FOR_FINISHED_RECORDINGS import SERVER_ENGINE_LISTEN_7_FOR_FINISHED_RECORDINGS
+from SERVER_ENGINE_MEMORY_MONITOR import SERVER_ENGINE_MEMORY_MONITOR_LOOP
+from SERVER_ENGINE_ANALYZER_SCHEDULER import start_analyzer_scheduler
+from SERVER_ENGINE_LOAD_POLICY import SERVER_ENGINE_LOAD_POLICY_LOOP
+from SERVER_ENGINE_FLOW_CONTROL import SERVER_ENGINE_FLOW_CONTROL_LOOP
+from SERVER_ENGINE_CONNECTION_REAPER import SERVER_ENGINE_CONNECTION_REAPER_LOOP
 
 from SERVER_ENGINE_APP_FUNCTIONS import (
     # ENGINE_DB_LOG_FUNCTIONS_INS,
@@ -159,6 +166,96 @@ async def resources():
     except Exception as e:
         return {"error": f"Failed to get resource status: {e}"}
 
+@APP.get("/memory")
+# @ENGINE_DB_LOG_FUNCTIONS_INS()
+async def memory(snapshot: bool = False, diff: bool = False, release: bool = False, top: int = 10):
+    """
+    Audio payload bytes held per recording and per store.
+      ?snapshot=true  → start tracemalloc (if needed) and take a baseline snapshot
+      ?diff=true      → top allocation deltas since the last snapshot/diff
+      ?release=true   → release consumed payloads now, regardless of the high-water mark
+    """
+    try:
+        from SERVER_ENGINE_MEMORY_MONITOR import (
+            MEMORY_ACCOUNTING_GET,
+            MEMORY_TRACEMALLOC_SNAPSHOT,
+            MEMORY_TRACEMALLOC_DIFF,
+            MEMORY_RELEASE_CONSUMED_PAYLOADS,
+        )
+
+        out: Dict[str, Any] = {}
+        if release:
+            out["released_bytes"] = MEMORY_RELEASE_CONSUMED_PAYLOADS()
+        out["accounting"] = MEMORY_ACCOUNTING_GET()
+        if diff:
+            out["tracemalloc_diff"] = MEMORY_TRACEMALLOC_DIFF(top=top)
+        if snapshot:
+            out["tracemalloc_snapshot"] = MEMORY_TRACEMALLOC_SNAPSHOT(top=top)
+        return out
+    except Exception as e:
+        return {"error": f"Failed to get memory status: {e}"}
+
+@APP.get("/metrics")
+# @ENGINE_DB_LOG_FUNCTIONS_INS()
+async def metrics():
+    """Per-analyzer queue depth, in-flight count, wait/run percentiles and per-class deadline (SLO) attainment."""
+    try:
+        from SERVER_ENGINE_ANALYZER_SCHEDULER import get_analyzer_scheduler_metrics
+        from SERVER_ENGINE_LOAD_POLICY import get_load_policy_status
+        from SERVER_ENGINE_ADMISSION_CONTROL import get_admission_status
+        from SERVER_ENGINE_LISTEN_4_FOR_MISSING_FRAMES import get_frame_gap_status
+        from SERVER_ENGINE_LISTEN_2_FOR_WS_MESSAGES import get_ingest_status
+        from SERVER_ENGINE_FLOW_CONTROL import get_flow_control_status
+        from SERVER_ENGINE_LIVE_RESULTS import get_live_result_status
+        from SERVER_ENGINE_LIVE_RESULT_HUB import get_live_result_hub_status
+        from SERVER_ENGINE_CONNECTION_REAPER import get_connection_reaper_status
+        from SERVER_ENGINE_WS_OUTBOUND import get_ws_outbound_metrics
+        from SERVER_ENGINE_SONG_FRAME_PLAN_CACHE import get_song_frame_plan_cache_status
+        from SERVER_ENGINE_SONG_SCORE import get_song_score_status
+        from SERVER_ENGINE_NOTE_SEGMENTER import get_note_segmenter_status
+        from SERVER_ENGINE_AUDIO_STREAM_PROCESS_ONS_FLUX import get_ons_flux_status
+        from SERVER_ENGINE_OAF_CLIENT import get_oaf_client_status
+        from SERVER_ENGINE_AUDIO_STREAM_PROCESS_ONS import get_ons_status
+        from SERVER_ENGINE_AUDIO_STREAM_PROCESS_PYIN import get_pyin_status
+
+        return {
+            "analyzer_scheduler": get_analyzer_scheduler_metrics(),
+            "load_policy": get_load_policy_status(),
+            "admission": get_admission_status(),
+            "frame_gaps": get_frame_gap_status(),
+            "ingest": get_ingest_status(),
+            "flow_control": get_flow_control_status(),
+            "live_results": get_live_result_status(),
+            "live_result_hub": get_live_result_hub_status(),
+            "connection_reaper": get_connection_reaper_status(),
+            "ws_outbound": get_ws_outbound_metrics(),
+            "song_frame_plan_cache": get_song_frame_plan_cache_status(),
+            "song_score": get_song_score_status(),
+            "note_segmenter": get_note_segmenter_status(),
+            "ons_flux": get_ons_flux_status(),
+            "oaf_client": get_oaf_client_status(),
+            "ons": get_ons_status(),
+            "pyin": get_pyin_status(),
+        }
+    except Exception as e:
+        return {"error": f"Failed to get metrics: {e}"}
+
+@APP.post("/song_frame_plan_cache/invalidate")
+# @ENGINE_DB_LOG_FUNCTIONS_INS()
+async def song_frame_plan_cache_invalidate(SONG_ID: Optional[int] = None):
+    """Drop the cached frame plan and reference index of one song (?SONG_ID=n, every version) or of every song."""
+    try:
+        from SERVER_ENGINE_SONG_FRAME_PLAN_CACHE import SONG_FRAME_PLAN_CACHE
+        from SERVER_ENGINE_SONG_REFERENCE_INDEX import SONG_REFERENCE_INDEX_CACHE
+
+        return {
+            "invalidated": SONG_FRAME_PLAN_CACHE.invalidate(SONG_ID),
+            "reference_index_invalidated": SONG_REFERENCE_INDEX_CACHE.invalidate(SONG_ID),
+            "song_id": SONG_ID,
+        }
+    except Exception as e:
+        return {"error": f"Failed to invalidate song frame plan cache: {e}"}
+
 @APP.get("/routes")
 # @ENGINE_DB_LOG_FUNCTIONS_INS()
 async def list_routes():
@@ -185,6 +282,16 @@ async def ws_stream(ws: WebSocket):
     conn_id = await SERVER_ENGINE_LISTEN_1_FOR_WS_CONNECTIONS(ws)
     await SERVER_ENGINE_LISTEN_2_FOR_WS_MESSAGES(ws, WEBSOCKET_CONNECTION_ID=conn_id)
 
+# -----------------------------
+# WS: /ws/observe  (read-only live results, any number of viewers per recording)
+# -----------------------------
+@APP.websocket("/ws/observe")
+# @ENGINE_DB_LOG_FUNCTIONS_INS()
+async def ws_observe(ws: WebSocket):
+    CONSOLE_LOG("WS/OBSERVE", "incoming", {"peer": _ws_peer(ws)})
+    conn_id = await SERVER_ENGINE_LISTEN_1_FOR_WS_CONNECTIONS(ws)
+    await SERVER_ENGINE_LIVE_RESULT_OBSERVE(ws, WEBSOCKET_CONNECTION_ID=conn_id)
+
 # -----------------------------
 # WS: /ws/echo
 # -----------------------------
@@ -249,6 +356,13 @@ async def _shutdown():
         
     except Exception as e:
         CONSOLE_LOG("SHUTDOWN", f"Resource cleanup failed: {e}")
+
+    # Close the pooled O&F connections
+    try:
+        from SERVER_ENGINE_OAF_CLIENT import OAF_CLIENT
+        await OAF_CLIENT.aclose()
+    except Exception as e:
+        CONSOLE_LOG("SHUTDOWN", f"OAF client close failed: {e}")
     
     await PROCESS_MONITOR.graceful_shutdown()
     DB_ENGINE_SHUTDOWN()
@@ -308,15 +422,43 @@ async def _startup():
     CONSOLE_LOG("STARTUP", "Creating task for SERVER_ENGINE_LISTEN_3C_FOR_STOP")
     scanner_3c = asyncio.create_task(SERVER_ENGINE_LISTEN_3C_FOR_STOP())
     PROCESS_MONITOR.register_task("scanner_3c", scanner_3c)
+
+    CONSOLE_LOG("STARTUP", "Creating task for SERVER_ENGINE_LISTEN_3D_FOR_RESUME")
+    scanner_3d = asyncio.create_task(SERVER_ENGINE_LISTEN_3D_FOR_RESUME())
+    PROCESS_MONITOR.register_task("scanner_3d", scanner_3d)
+
+    CONSOLE_LOG("STARTUP", "Creating task for SERVER_ENGINE_LISTEN_4_FOR_MISSING_FRAMES")
+    scanner_4 = asyncio.create_task(SERVER_ENGINE_LISTEN_4_FOR_MISSING_FRAMES())
+    PROCESS_MONITOR.register_task("scanner_4", scanner_4)
     
+    # Analyzer worker pools must exist before Stage-6 starts submitting to them
+    CONSOLE_LOG("STARTUP", "Creating analyzer scheduler workers")
+    for analyzer_worker in start_analyzer_scheduler():
+        PROCESS_MONITOR.register_task(analyzer_worker.get_name(), analyzer_worker)
+
+    CONSOLE_LOG("STARTUP", "Creating task for SERVER_ENGINE_LOAD_POLICY_LOOP")
+    load_policy = asyncio.create_task(SERVER_ENGINE_LOAD_POLICY_LOOP())
+    PROCESS_MONITOR.register_task("load_policy", load_policy)
+
+    CONSOLE_LOG("STARTUP", "Creating task for SERVER_ENGINE_FLOW_CONTROL_LOOP")
+    flow_control = asyncio.create_task(SERVER_ENGINE_FLOW_CONTROL_LOOP())
+    PROCESS_MONITOR.register_task("flow_control", flow_control)
+
+    CONSOLE_LOG("STARTUP", "Creating task for SERVER_ENGINE_CONNECTION_REAPER_LOOP")
+    connection_reaper = asyncio.create_task(SERVER_ENGINE_CONNECTION_REAPER_LOOP())
+    PROCESS_MONITOR.register_task("connection_reaper", connection_reaper)
+
     CONSOLE_LOG("STARTUP", "Creating task for SERVER_ENGINE_LISTEN_6_FOR_AUDIO_FRAMES_TO_PROCESS")
     scanner_6 = asyncio.create_task(SERVER_ENGINE_LISTEN_6_FOR_AUDIO_FRAMES_TO_PROCESS())
     PROCESS_MONITOR.register_task("scanner_6", scanner_6)
     
-    CONSOLE_LOG("STARTUP", "Creating task for SERVER_ENGINE_LISTEN_7_FOR_FINISHED_RECORDINGS")
-    scanner_7 = asyncio.create_task(SERVER_ENGINE_LISTEN_7_FOR_FINISHED_RECORDINGS())
-    PROCESS_MONITOR.register_task("scanner_7", scanner_7)
-    
+    # Stage-7 (finished recordings) has no scanner: the last unit of outstanding work after
+    # STOP triggers finalize + purge directly (see RECORDING_WORK_DONE).
+
+    CONSOLE_LOG("STARTUP", "Creating task for SERVER_ENGINE_MEMORY_MONITOR_LOOP")
+    memory_monitor = asyncio.create_task(SERVER_ENGINE_MEMORY_MONITOR_LOOP())
+    PROCESS_MONITOR.register_task("memory_monitor", memory_monitor)
+
     CONSOLE_LOG("STARTUP", "=== All background scanner tasks created and registered successfully ===")
 
 # Dev entry
@@ -0,0 +1,73 @@
+# SERVER_ENGINE_PAYLOAD_LIFETIME.py
+from __future__ import annotations
+
+from typing import Dict, Iterable, Set, Tuple
+
+from SERVER_ENGINE_APP_VARIABLES import (
+    PRE_SPLIT_AUDIO_FRAME_ARRAY,        # volatile: client chunk bytes
+    SPLIT_100_MS_AUDIO_FRAME_ARRAY,     # volatile: analyzer arrays
+)
+from SERVER_ENGINE_APP_FUNCTIONS import CONSOLE_LOG
+
+PREFIX = "PAYLOAD_LIFETIME"
+
+# Payload stores with reference-counted lifetimes
+PRE_SPLIT = "PRE_SPLIT"
+SPLIT_100_MS = "SPLIT_100_MS"
+
+_STORE_ARRAYS = {
+    PRE_SPLIT: PRE_SPLIT_AUDIO_FRAME_ARRAY,
+    SPLIT_100_MS: SPLIT_100_MS_AUDIO_FRAME_ARRAY,
+}
+
+# (STORE, RECORDING_ID, AUDIO_FRAME_NO) → consumers that still have to finish
+_PENDING_CONSUMERS: Dict[Tuple[str, int, int], Set[str]] = {}
+
+_RELEASED_PAYLOAD_CNT = 0
+
+
+def PAYLOAD_REGISTER_CONSUMERS(STORE: str, RECORDING_ID: int, AUDIO_FRAME_NO: int, CONSUMERS: Iterable[str]) -> None:
+    """
+    Declare which stages still read a payload. The payload is dropped when the last one
+    calls PAYLOAD_CONSUMER_DONE. Registering an empty set releases it immediately.
+    """
+    KEY = (STORE, int(RECORDING_ID), int(AUDIO_FRAME_NO))
+    PENDING = _PENDING_CONSUMERS.setdefault(KEY, set())
+    PENDING.update(CONSUMERS)
+    if not PENDING:
+        _release(KEY)
+
+
+def PAYLOAD_CONSUMER_DONE(STORE: str, RECORDING_ID: int, AUDIO_FRAME_NO: int, CONSUMER: str) -> None:
+    """Mark one consumer finished (success or failure); release the payload on the last one."""
+    KEY = (STORE, int(RECORDING_ID), int(AUDIO_FRAME_NO))
+    PENDING = _PENDING_CONSUMERS.get(KEY)
+    if PENDING is None:
+        return
+    PENDING.discard(CONSUMER)
+    if not PENDING:
+        _release(KEY)
+
+
+def PAYLOAD_FORGET_RECORDING(RECORDING_ID: int) -> None:
+    """Drop refcount bookkeeping for a purged recording."""
+    for KEY in [K for K in _PENDING_CONSUMERS if K[1] == int(RECORDING_ID)]:
+        _PENDING_CONSUMERS.pop(KEY, None)
+
+
+def PAYLOAD_LIFETIME_STATUS_GET() -> Dict[str, int]:
+    return {
+        "pending_payload_cnt": len(_PENDING_CONSUMERS),
+        "released_payload_cnt": _RELEASED_PAYLOAD_CNT,
+    }
+
+
+def _release(KEY: Tuple[str, int, int]) -> None:
+    """Remove the whole volatile entry; metadata rows in the ENGINE_DB_LOG_* stores stay."""
+    global _RELEASED_PAYLOAD_CNT
+    STORE, RECORDING_ID, AUDIO_FRAME_NO = KEY
+    _PENDING_CONSUMERS.pop(KEY, None)
+    RECORDING_ARRAY = _STORE_ARRAYS[STORE].get(RECORDING_ID)
+    if RECORDING_ARRAY is not None and RECORDING_ARRAY.pop(AUDIO_FRAME_NO, None) is not None:
+        _RELEASED_PAYLOAD_CNT += 1
+    # CONSOLE_LOG(PREFIX, "released", {"store": STORE, "rid": RECORDING_ID, "frame": AUDIO_FRAME_NO})
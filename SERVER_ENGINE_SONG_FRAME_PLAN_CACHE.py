@@ -0,0 +1,140 @@
+# SERVER_ENGINE_SONG_FRAME_PLAN_CACHE.py
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from SERVER_ENGINE_APP_VARIABLES import (
+    SONG_FRAME_PLAN_CACHE_YN,
+    SONG_FRAME_PLAN_CACHE_MAX_SONGS,
+    SONG_FRAME_PLAN_CACHE_TTL_S,
+)
+from SERVER_ENGINE_APP_FUNCTIONS import CONSOLE_LOG, DB_EXEC_SP_MULTIPLE_ROWS_ASYNC
+
+PREFIX = "SONG_FRAME_PLAN_CACHE"
+
+SP_NAME = "P_ENGINE_SONG_100_MS_AUDIO_FRAME_FOR_PLAY_AND_PRACTICE_GET"
+
+# ─────────────────────────────────────────────────────────────
+# Song frame plan: LRU + TTL, one load in flight per song
+# ─────────────────────────────────────────────────────────────
+# Key = (SONG_ID, SONG_VERSION). The SP is called with the RECORDING_ID of the first START that misses;
+# STARTs for the same song arriving meanwhile await that same load instead of calling the SP again.
+# Cached rows are shared between recordings: read them, never modify them.
+# Without a SONG_ID (or with SONG_FRAME_PLAN_CACHE_YN != 'Y') every START calls the SP.
+# Other per-song data loaded at START reuses the class with its own SP_NAME and a BUILD(rows) step
+# (e.g. SERVER_ENGINE_SONG_REFERENCE_INDEX caches numpy arrays instead of rows).
+
+class SongFramePlanCache:
+    def __init__(self, MAX_SONGS: int, TTL_S: int, SP_NAME: str = SP_NAME, BUILD: Optional[Callable[[List[Dict[str, Any]]], Any]] = None):
+        self.max_songs = MAX_SONGS
+        self.ttl_s = TTL_S
+        self.sp_name = SP_NAME
+        self.build = BUILD
+        self.entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()  # key → (loaded at, rows or BUILD(rows))
+        self.loading: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0            # STARTs that joined a load already in flight
+        self.expired = 0
+        self.evicted = 0
+        self.invalidated = 0
+        self.load_ms: List[float] = []
+
+    async def _load(self, RECORDING_ID: int) -> Any:
+        ROWS = await DB_EXEC_SP_MULTIPLE_ROWS_ASYNC(self.sp_name, RECORDING_ID=RECORDING_ID) or []
+        if self.build is None or not ROWS:
+            return ROWS
+        return await asyncio.to_thread(self.build, ROWS)
+
+    def _fresh(self, KEY: Hashable, now: float) -> Any:
+        ENTRY = self.entries.get(KEY)
+        if ENTRY is None:
+            return None
+        if now - ENTRY[0] >= self.ttl_s:
+            del self.entries[KEY]
+            self.expired += 1
+            return None
+        self.entries.move_to_end(KEY)
+        return ENTRY[1]
+
+    def _store(self, KEY: Hashable, ROWS: Any, now: float) -> None:
+        self.entries[KEY] = (now, ROWS)
+        self.entries.move_to_end(KEY)
+        while len(self.entries) > self.max_songs:
+            self.entries.popitem(last=False)
+            self.evicted += 1
+
+    async def get(self, RECORDING_ID: int, SONG_ID: Any, SONG_VERSION: Any = None) -> Any:
+        if SONG_FRAME_PLAN_CACHE_YN != "Y" or SONG_ID is None:
+            return await self._load(RECORDING_ID)
+
+        KEY = (SONG_ID, SONG_VERSION)
+        ROWS = self._fresh(KEY, time.monotonic())
+        if ROWS is not None:
+            self.hits += 1
+            return ROWS
+
+        LOADING = self.loading.get(KEY)
+        if LOADING is not None:
+            self.waits += 1
+            return await asyncio.shield(LOADING)
+
+        self.misses += 1
+        LOADING = asyncio.get_running_loop().create_future()
+        self.loading[KEY] = LOADING
+        t0 = time.perf_counter()
+        try:
+            ROWS = await self._load(RECORDING_ID)
+        except BaseException as e:
+            LOADING.set_exception(e)
+            LOADING.exception()  # retrieved: waiters (if any) re-raise it themselves
+            raise
+        finally:
+            self.loading.pop(KEY, None)
+        self.load_ms.append((time.perf_counter() - t0) * 1000.0)
+        del self.load_ms[:-100]
+        if ROWS is not None and len(ROWS):  # an empty plan is an error upstream; do not pin it
+            self._store(KEY, ROWS, time.monotonic())
+        LOADING.set_result(ROWS)
+        CONSOLE_LOG(PREFIX, "LOADED", {"sp": self.sp_name, "song_id": SONG_ID, "song_version": SONG_VERSION, "rid": RECORDING_ID, "size": len(ROWS)})
+        return ROWS
+
+    def invalidate(self, SONG_ID: Any = None) -> int:
+        """Drop one song (every version) or, with SONG_ID None, everything; returns entries dropped."""
+        KEYS = [KEY for KEY in self.entries if SONG_ID is None or str(KEY[0]) == str(SONG_ID)]
+        for KEY in KEYS:
+            del self.entries[KEY]
+        self.invalidated += len(KEYS)
+        CONSOLE_LOG(PREFIX, "INVALIDATED", {"sp": self.sp_name, "song_id": SONG_ID, "entries": len(KEYS)})
+        return len(KEYS)
+
+    def status(self) -> Dict[str, Any]:
+        LOOKUPS = self.hits + self.misses + self.waits
+        return {
+            "enabled": SONG_FRAME_PLAN_CACHE_YN == "Y",
+            "sp": self.sp_name,
+            "max_songs": self.max_songs,
+            "ttl_s": self.ttl_s,
+            "songs": len(self.entries),
+            "loading": len(self.loading),
+            "hits": self.hits,
+            "misses": self.misses,
+            "waits": self.waits,
+            "hit_pct": round(100.0 * (self.hits + self.waits) / LOOKUPS, 1) if LOOKUPS else None,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "invalidated": self.invalidated,
+            "load_ms_avg": round(sum(self.load_ms) / len(self.load_ms), 1) if self.load_ms else None,
+        }
+
+# ─────────────────────────────────────────────────────────────
+# Global instance
+# ─────────────────────────────────────────────────────────────
+
+SONG_FRAME_PLAN_CACHE = SongFramePlanCache(SONG_FRAME_PLAN_CACHE_MAX_SONGS, SONG_FRAME_PLAN_CACHE_TTL_S)
+
+def get_song_frame_plan_cache_status() -> Dict[str, Any]:
+    return SONG_FRAME_PLAN_CACHE.status()
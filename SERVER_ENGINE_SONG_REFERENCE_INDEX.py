@@ -0,0 +1,61 @@
+# SERVER_ENGINE_SONG_REFERENCE_INDEX.py
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import numpy as np
+
+from SERVER_ENGINE_APP_VARIABLES import (
+    SONG_FRAME_PLAN_CACHE_MAX_SONGS,
+    SONG_FRAME_PLAN_CACHE_TTL_S,
+)
+from SERVER_ENGINE_SONG_FRAME_PLAN_CACHE import SongFramePlanCache
+
+SP_NAME = "P_ENGINE_SONG_REFERENCE_NOTE_GET"
+
+# ─────────────────────────────────────────────────────────────
+# Song reference index: expected pitch per ms
+# ─────────────────────────────────────────────────────────────
+# Built once per (SONG_ID, SONG_VERSION) from the song's notes (START_MS, END_MS inclusive, MIDI), in
+# recording ms (frame 1 starts at 0 ms, same as ENGINE_LOAD_HZ):
+#   EXPECTED_MIDI[ms]  float32, NaN during rests
+#   NOTE_NO[ms]        int32 index into the NOTE_* arrays, -1 during rests
+#   NOTE_START_MS / NOTE_END_MS (int32), NOTE_MIDI (float32), one entry per note in start order
+# The arrays are shared by every recording of the song: read them, never write them.
+
+def BUILD_SONG_REFERENCE_INDEX(ROWS: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    NOTES = sorted(
+        (int(R["START_MS"]), int(R["END_MS"]), float(R["MIDI"]))
+        for R in ROWS
+        if R.get("START_MS") is not None and R.get("END_MS") is not None and R.get("MIDI") is not None
+    )
+    NOTE_START_MS = np.array([N[0] for N in NOTES], dtype=np.int32)
+    NOTE_END_MS = np.array([N[1] for N in NOTES], dtype=np.int32)
+    NOTE_MIDI = np.array([N[2] for N in NOTES], dtype=np.float32)
+
+    LENGTH_MS = int(NOTE_END_MS.max()) + 1 if NOTES else 0
+    EXPECTED_MIDI = np.full(LENGTH_MS, np.nan, dtype=np.float32)
+    NOTE_NO = np.full(LENGTH_MS, -1, dtype=np.int32)
+    for i, (start_ms, end_ms, midi) in enumerate(NOTES):  # later notes win where two overlap
+        EXPECTED_MIDI[max(start_ms, 0):end_ms + 1] = midi
+        NOTE_NO[max(start_ms, 0):end_ms + 1] = i
+
+    return {
+        "EXPECTED_MIDI": EXPECTED_MIDI,
+        "NOTE_NO": NOTE_NO,
+        "NOTE_START_MS": NOTE_START_MS,
+        "NOTE_END_MS": NOTE_END_MS,
+        "NOTE_MIDI": NOTE_MIDI,
+    }
+
+# ─────────────────────────────────────────────────────────────
+# Global instance (same LRU/TTL knobs as the frame plan)
+# ─────────────────────────────────────────────────────────────
+
+SONG_REFERENCE_INDEX_CACHE = SongFramePlanCache(
+    SONG_FRAME_PLAN_CACHE_MAX_SONGS, SONG_FRAME_PLAN_CACHE_TTL_S,
+    SP_NAME=SP_NAME, BUILD=BUILD_SONG_REFERENCE_INDEX,
+)
+
+def get_song_reference_index_status() -> Dict[str, Any]:
+    return SONG_REFERENCE_INDEX_CACHE.status()
@@ -0,0 +1,147 @@
+# SERVER_ENGINE_SONG_SCORE.py
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from SERVER_ENGINE_APP_VARIABLES import (
+    SONG_SCORE_YN,
+    SONG_SCORE_MIN_CONFIDENCE,
+    SONG_SCORE_INTONATION_TOLERANCE_CENTS,
+    SONG_SCORE_TIMING_TOLERANCE_MS,
+)
+from SERVER_ENGINE_APP_FUNCTIONS import CONSOLE_LOG
+from SERVER_ENGINE_SONG_REFERENCE_INDEX import SONG_REFERENCE_INDEX_CACHE
+
+PREFIX = "SONG_SCORE"
+
+_NEVER_MS = np.iinfo(np.int64).max
+
+# ─────────────────────────────────────────────────────────────
+# Running intonation + timing score (in memory, no SQL per frame)
+# ─────────────────────────────────────────────────────────────
+# START attaches the song's reference index; every PYIN/CREPE frame then folds its rows in with a few
+# numpy ops. Per recording and SOURCE_METHOD:
+#   intonation: confident pitched rows inside a note, in tune vs. not, and their mean |cents| error
+#   timing:     first in-tune ms per note; a note is on time if that is within the tolerance of its start
+# A note counts toward timing once it was hit or its tolerance window lies below the processed watermark.
+# Analyzers run in worker threads, hence the lock.
+
+class SongScore:
+    def __init__(self, MIN_CONFIDENCE: float, TOLERANCE_CENTS: float, TOLERANCE_MS: int):
+        self.min_confidence = MIN_CONFIDENCE
+        self.tolerance_cents = TOLERANCE_CENTS
+        self.tolerance_ms = TOLERANCE_MS
+        self.recordings: Dict[int, Dict[str, Any]] = {}  # RECORDING_ID → {INDEX, SOURCES: {SOURCE_METHOD → state}}
+        self.lock = threading.Lock()
+
+    def attach(self, RECORDING_ID: int, INDEX: Dict[str, np.ndarray]) -> None:
+        with self.lock:
+            self.recordings[int(RECORDING_ID)] = {"INDEX": INDEX, "SOURCES": {}}
+
+    def put_hz(self, RECORDING_ID: int, SOURCE_METHOD: str, rows_abs: Iterable[Tuple[int, int, float, float]]) -> None:
+        """Fold one frame's (START_MS, END_MS, HZ, CONFIDENCE) rows into the running score."""
+        R = self.recordings.get(int(RECORDING_ID))
+        if R is None:
+            return
+        A = np.asarray(list(rows_abs), dtype=np.float64).reshape(-1, 4)
+        if A.shape[0] == 0:
+            return
+        INDEX = R["INDEX"]
+        MS = A[:, 0].astype(np.int64)
+        HZ = A[:, 2]
+        KEEP = (A[:, 3] >= self.min_confidence) & (HZ > 0.0) & (MS >= 0) & (MS < INDEX["NOTE_NO"].size)
+        MS, HZ = MS[KEEP], HZ[KEEP]
+        NOTE = INDEX["NOTE_NO"][MS]
+        IN_NOTE = NOTE >= 0
+        MS, HZ, NOTE = MS[IN_NOTE], HZ[IN_NOTE], NOTE[IN_NOTE]
+
+        CENTS = 1200.0 * np.log2(HZ / 440.0) + 6900.0 - 100.0 * INDEX["EXPECTED_MIDI"][MS]
+        IN_TUNE = np.abs(CENTS) <= self.tolerance_cents
+
+        with self.lock:
+            S = R["SOURCES"].get(SOURCE_METHOD)
+            if S is None:
+                S = R["SOURCES"][SOURCE_METHOD] = {
+                    "PITCHED_ROWS": 0,
+                    "IN_TUNE_ROWS": 0,
+                    "ABS_CENTS_SUM": 0.0,
+                    "NOTE_FIRST_HIT_MS": np.full(INDEX["NOTE_START_MS"].size, _NEVER_MS, dtype=np.int64),
+                }
+            S["PITCHED_ROWS"] += int(MS.size)
+            S["IN_TUNE_ROWS"] += int(IN_TUNE.sum())
+            S["ABS_CENTS_SUM"] += float(np.abs(CENTS).sum())
+            np.minimum.at(S["NOTE_FIRST_HIT_MS"], NOTE[IN_TUNE], MS[IN_TUNE])
+
+    def score(self, RECORDING_ID: int, THROUGH_MS: int) -> Optional[Dict[str, Any]]:
+        """Per SOURCE_METHOD score with audio analyzed through THROUGH_MS; None if the recording has no index."""
+        R = self.recordings.get(int(RECORDING_ID))
+        if R is None:
+            return None
+        NOTE_START_MS = R["INDEX"]["NOTE_START_MS"].astype(np.int64)
+        SCORE: Dict[str, Any] = {}
+        with self.lock:
+            for SOURCE_METHOD, S in R["SOURCES"].items():
+                HIT = S["NOTE_FIRST_HIT_MS"] != _NEVER_MS
+                DUE = HIT | (NOTE_START_MS + self.tolerance_ms < THROUGH_MS)
+                ONSET_MS = S["NOTE_FIRST_HIT_MS"][HIT] - NOTE_START_MS[HIT]
+                ON_TIME_CNT = int((ONSET_MS <= self.tolerance_ms).sum())
+                DUE_CNT = int(DUE.sum())
+                SCORE[SOURCE_METHOD] = {
+                    "INTONATION_PCT": round(100.0 * S["IN_TUNE_ROWS"] / S["PITCHED_ROWS"], 1) if S["PITCHED_ROWS"] else None,
+                    "MEAN_ABS_CENTS": round(S["ABS_CENTS_SUM"] / S["PITCHED_ROWS"], 1) if S["PITCHED_ROWS"] else None,
+                    "TIMING_PCT": round(100.0 * ON_TIME_CNT / DUE_CNT, 1) if DUE_CNT else None,
+                    "MEAN_ONSET_MS": round(float(ONSET_MS.mean()), 1) if ONSET_MS.size else None,
+                    "NOTES_DUE": DUE_CNT,
+                    "NOTES_HIT": int(HIT.sum()),
+                }
+        return SCORE
+
+    def forget_recording(self, RECORDING_ID: int) -> None:
+        with self.lock:
+            self.recordings.pop(int(RECORDING_ID), None)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": SONG_SCORE_YN == "Y",
+            "min_confidence": self.min_confidence,
+            "tolerance_cents": self.tolerance_cents,
+            "tolerance_ms": self.tolerance_ms,
+            "recordings": len(self.recordings),
+            "reference_index": SONG_REFERENCE_INDEX_CACHE.status(),
+        }
+
+# ─────────────────────────────────────────────────────────────
+# Global instance + hooks
+# ─────────────────────────────────────────────────────────────
+
+SONG_SCORE = SongScore(SONG_SCORE_MIN_CONFIDENCE, SONG_SCORE_INTONATION_TOLERANCE_CENTS, SONG_SCORE_TIMING_TOLERANCE_MS)
+
+def get_song_score_status() -> Dict[str, Any]:
+    return SONG_SCORE.status()
+
+
+async def SONG_SCORE_START(RECORDING_ID: int, SONG_ID: Any, SONG_VERSION: Any = None) -> None:
+    """START (PLAY/PRACTICE): attach the song's reference index. Scoring is optional: failures only log."""
+    if SONG_SCORE_YN != "Y":
+        return
+    try:
+        INDEX = await SONG_REFERENCE_INDEX_CACHE.get(RECORDING_ID, SONG_ID, SONG_VERSION)
+    except Exception as e:
+        CONSOLE_LOG(PREFIX, "INDEX_LOAD_FAILED", {"rid": RECORDING_ID, "song_id": SONG_ID, "error": str(e)})
+        return
+    if not isinstance(INDEX, dict) or INDEX["NOTE_START_MS"].size == 0:
+        CONSOLE_LOG(PREFIX, "NO_REFERENCE_NOTES", {"rid": RECORDING_ID, "song_id": SONG_ID})
+        return
+    SONG_SCORE.attach(RECORDING_ID, INDEX)
+
+
+def SONG_SCORE_PUT_HZ(RECORDING_ID: int, SOURCE_METHOD: str, rows_abs: Iterable[Tuple[int, int, float, float]]) -> None:
+    if SONG_SCORE_YN != "Y":
+        return
+    try:
+        SONG_SCORE.put_hz(RECORDING_ID, SOURCE_METHOD, rows_abs)
+    except Exception as e:
+        CONSOLE_LOG(PREFIX, "PUT_HZ_ERROR", {"rid": RECORDING_ID, "source": SOURCE_METHOD, "error": str(e)})
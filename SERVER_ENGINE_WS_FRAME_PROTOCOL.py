@@ -0,0 +1,69 @@
+# SERVER_ENGINE_WS_FRAME_PROTOCOL.py
+from __future__ import annotations
+
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+# ─────────────────────────────────────────────────────────────
+# /ws/stream frame wire formats
+# ─────────────────────────────────────────────────────────────
+# Legacy (no subprotocol): TEXT {MESSAGE_TYPE:'FRAME', RECORDING_ID, FRAME_NO, ...} then BINARY audio.
+# violin.frame.v1:         ONE BINARY message = 16-byte header + audio bytes. TEXT stays JSON
+#                          (START/STOP/...); only FRAME changes shape.
+#
+# Header, little-endian, "<BBHQI":
+#   VERSION(u8) ENCODING(u8) FRAME_DURATION_IN_MS(u16) RECORDING_ID(u64) AUDIO_FRAME_NO(u32)
+WS_SUBPROTOCOL_FRAME_V1 = "violin.frame.v1"
+WS_SUBPROTOCOLS_SUPPORTED: List[str] = [WS_SUBPROTOCOL_FRAME_V1]  # server preference order
+
+FRAME_HEADER_VERSION = 1
+FRAME_HEADER = struct.Struct("<BBHQI")
+FRAME_HEADER_SIZE = FRAME_HEADER.size  # 16
+
+FRAME_ENCODING_CODES: Dict[str, int] = {"raw": 0, "pcm16": 1}
+FRAME_ENCODING_NAMES: Dict[int, str] = {code: name for name, code in FRAME_ENCODING_CODES.items()}
+
+
+def WS_CHOOSE_SUBPROTOCOL(requested: List[str]) -> Optional[str]:
+    """First supported protocol in server preference order; None → legacy pairing mode."""
+    for protocol in WS_SUBPROTOCOLS_SUPPORTED:
+        if protocol in requested:
+            return protocol
+    return None
+
+
+def FRAME_PACK(RECORDING_ID: int, AUDIO_FRAME_NO: int, FRAME_DURATION_IN_MS: int, AUDIO_FRAME_BYTES: bytes,
+               AUDIO_FRAME_ENCODING: str = "raw") -> bytes:
+    """Build one violin.frame.v1 message (the client does the same in JS)."""
+    return FRAME_HEADER.pack(
+        FRAME_HEADER_VERSION,
+        FRAME_ENCODING_CODES[AUDIO_FRAME_ENCODING],
+        int(FRAME_DURATION_IN_MS),
+        int(RECORDING_ID),
+        int(AUDIO_FRAME_NO),
+    ) + bytes(AUDIO_FRAME_BYTES)
+
+
+def FRAME_HEADER_UNPACK(MESSAGE_BYTES: bytes) -> Dict[str, Any]:
+    """
+    Header fields of one violin.frame.v1 message, without touching the audio bytes.
+    Raises ValueError on a short message, unknown version or unknown encoding.
+    """
+    if len(MESSAGE_BYTES) < FRAME_HEADER_SIZE:
+        raise ValueError(f"frame shorter than header ({len(MESSAGE_BYTES)} < {FRAME_HEADER_SIZE} bytes)")
+    VERSION, ENCODING, FRAME_DURATION_IN_MS, RECORDING_ID, AUDIO_FRAME_NO = FRAME_HEADER.unpack_from(MESSAGE_BYTES)
+    if VERSION != FRAME_HEADER_VERSION:
+        raise ValueError(f"unsupported frame header version {VERSION}")
+    if ENCODING not in FRAME_ENCODING_NAMES:
+        raise ValueError(f"unknown frame encoding {ENCODING}")
+    return {
+        "RECORDING_ID": RECORDING_ID,
+        "AUDIO_FRAME_NO": AUDIO_FRAME_NO,
+        "FRAME_DURATION_IN_MS": FRAME_DURATION_IN_MS,
+        "AUDIO_FRAME_ENCODING": FRAME_ENCODING_NAMES[ENCODING],
+    }
+
+
+def FRAME_UNPACK(MESSAGE_BYTES: bytes) -> Tuple[Dict[str, Any], bytes]:
+    """Split one violin.frame.v1 message into (header fields, audio bytes); raises like FRAME_HEADER_UNPACK."""
+    return FRAME_HEADER_UNPACK(MESSAGE_BYTES), MESSAGE_BYTES[FRAME_HEADER_SIZE:]
@@ -0,0 +1,137 @@
+# SERVER_ENGINE_WS_OUTBOUND.py
+from __future__ import annotations
+
+import asyncio
+import json
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Hashable, Optional
+
+from fastapi import WebSocket
+from starlette.websockets import WebSocketState
+
+from SERVER_ENGINE_APP_VARIABLES import WS_OUTBOUND_QUEUE_MAXSIZE
+from SERVER_ENGINE_APP_FUNCTIONS import CONSOLE_LOG
+
+PREFIX = "WS_OUTBOUND"
+
+# ─────────────────────────────────────────────────────────────
+# Live WebSocket objects by connection id
+# ─────────────────────────────────────────────────────────────
+# The ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY rows are plain (loggable) dicts; the socket
+# itself lives here so scanners can reply to a client knowing only WEBSOCKET_CONNECTION_ID.
+_WEBSOCKET_ARRAY: Dict[int, WebSocket] = {}
+
+# ─────────────────────────────────────────────────────────────
+# Per-connection outbound queue (one writer task per socket)
+# ─────────────────────────────────────────────────────────────
+# Producers never await the network. Control messages (ACK, FLOW, START_ACK, ...) are always queued.
+# Messages sent with a COALESCE_KEY (live results) are merged into a still-unsent message with the
+# same key, and are the ones dropped (oldest first) once the queue holds WS_OUTBOUND_QUEUE_MAXSIZE.
+
+class _OutboundQueue:
+    def __init__(self, WEBSOCKET_CONNECTION_ID: int, WEBSOCKET: WebSocket):
+        self.conn_id = WEBSOCKET_CONNECTION_ID
+        self.websocket = WEBSOCKET
+        self.entries: Deque[Dict[str, Any]] = deque()
+        self.pending_by_key: Dict[Hashable, Dict[str, Any]] = {}
+        self.wakeup = asyncio.Event()
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.peak_depth = 0
+        self.writer: Optional[asyncio.Task] = None
+
+    def put(self, PAYLOAD: Dict[str, Any], COALESCE_KEY: Optional[Hashable], MERGE: Optional[Callable[[Dict[str, Any], Dict[str, Any]], None]]) -> None:
+        if COALESCE_KEY is not None and MERGE is not None and COALESCE_KEY in self.pending_by_key:
+            MERGE(self.pending_by_key[COALESCE_KEY]["PAYLOAD"], PAYLOAD)
+            self.coalesced += 1
+            return
+        if COALESCE_KEY is not None and len(self.entries) >= WS_OUTBOUND_QUEUE_MAXSIZE:
+            OLDEST = next((ENTRY for ENTRY in self.entries if ENTRY["KEY"] is not None), None)
+            if OLDEST is None:
+                self.dropped += 1
+                return
+            self.entries.remove(OLDEST)
+            self.pending_by_key.pop(OLDEST["KEY"], None)
+            self.dropped += 1
+        ENTRY = {"PAYLOAD": PAYLOAD, "KEY": COALESCE_KEY}
+        self.entries.append(ENTRY)
+        if COALESCE_KEY is not None:
+            self.pending_by_key[COALESCE_KEY] = ENTRY
+        self.peak_depth = max(self.peak_depth, len(self.entries))
+        self.wakeup.set()
+
+    async def run(self) -> None:
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            while self.entries:
+                ENTRY = self.entries.popleft()
+                if ENTRY["KEY"] is not None and self.pending_by_key.get(ENTRY["KEY"]) is ENTRY:
+                    del self.pending_by_key[ENTRY["KEY"]]
+                if self.websocket.client_state != WebSocketState.CONNECTED:
+                    continue
+                try:
+                    await self.websocket.send_text(json.dumps(ENTRY["PAYLOAD"], default=str))
+                    self.sent += 1
+                except Exception as e:
+                    CONSOLE_LOG(PREFIX, "SEND_FAILED", {"conn_id": self.conn_id, "type": ENTRY["PAYLOAD"].get("MESSAGE_TYPE"), "error": str(e)})
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "depth": len(self.entries),
+            "peak_depth": self.peak_depth,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+        }
+
+
+_OUTBOUND_QUEUE_ARRAY: Dict[int, _OutboundQueue] = {}
+
+
+def WS_REGISTER(WEBSOCKET_CONNECTION_ID: int, WEBSOCKET: WebSocket) -> None:
+    WEBSOCKET_CONNECTION_ID = int(WEBSOCKET_CONNECTION_ID)
+    _WEBSOCKET_ARRAY[WEBSOCKET_CONNECTION_ID] = WEBSOCKET
+    QUEUE = _OutboundQueue(WEBSOCKET_CONNECTION_ID, WEBSOCKET)
+    QUEUE.writer = asyncio.create_task(QUEUE.run(), name=f"ws_outbound_{WEBSOCKET_CONNECTION_ID}")
+    _OUTBOUND_QUEUE_ARRAY[WEBSOCKET_CONNECTION_ID] = QUEUE
+
+
+def WS_UNREGISTER(WEBSOCKET_CONNECTION_ID: int) -> None:
+    _WEBSOCKET_ARRAY.pop(int(WEBSOCKET_CONNECTION_ID), None)
+    QUEUE = _OUTBOUND_QUEUE_ARRAY.pop(int(WEBSOCKET_CONNECTION_ID), None)
+    if QUEUE is not None and QUEUE.writer is not None:
+        QUEUE.writer.cancel()
+
+
+def WS_GET(WEBSOCKET_CONNECTION_ID: Optional[int]) -> Optional[WebSocket]:
+    if WEBSOCKET_CONNECTION_ID is None:
+        return None
+    return _WEBSOCKET_ARRAY.get(int(WEBSOCKET_CONNECTION_ID))
+
+
+async def WS_SEND_JSON(
+    WEBSOCKET_CONNECTION_ID: Optional[int],
+    PAYLOAD: Dict[str, Any],
+    COALESCE_KEY: Optional[Hashable] = None,
+    MERGE: Optional[Callable[[Dict[str, Any], Dict[str, Any]], None]] = None,
+) -> bool:
+    """
+    Queue one JSON text message for the connection's writer; returns False (never raises)
+    if the client is gone. MERGE(pending, new) folds a new message into a pending one.
+    """
+    if WEBSOCKET_CONNECTION_ID is None:
+        return False
+    QUEUE = _OUTBOUND_QUEUE_ARRAY.get(int(WEBSOCKET_CONNECTION_ID))
+    if QUEUE is None or QUEUE.websocket.client_state != WebSocketState.CONNECTED:
+        return False
+    QUEUE.put(PAYLOAD, COALESCE_KEY, MERGE)
+    return True
+
+
+def get_ws_outbound_metrics() -> Dict[str, Any]:
+    return {
+        "queue_maxsize": WS_OUTBOUND_QUEUE_MAXSIZE,
+        "connections": {conn_id: QUEUE.metrics() for conn_id, QUEUE in list(_OUTBOUND_QUEUE_ARRAY.items())},
+    }
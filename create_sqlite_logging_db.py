@@ -104,6 +104,7 @@ def create_sqlite_logging_database():
             COMPOSE_PLAY_OR_PRACTICE TEXT,
             AUDIO_STREAM_FILE_NAME TEXT,
             COMPOSE_YN_RUN_FFT TEXT,
+            ADMISSION_DECISION TEXT,
             DT_ADDED TEXT,
             WEBSOCKET_CONNECTION_ID INTEGER,
             DT_RECORDING_END TEXT,
@@ -162,7 +163,10 @@ def create_sqlite_logging_database():
             AUDIO_FRAME_SHA256_HEX TEXT,
             DT_FRAME_DECODED_FROM_BYTES_INTO_AUDIO_SAMPLES TEXT,
             DT_FRAME_RESAMPLED_TO_44100 TEXT,
-            DT_PROCESSING_QUEUED_TO_START TEXT
+            DT_PROCESSING_QUEUED_TO_START TEXT,
+            ANALYZER_LADDER_RUNG INTEGER,
+            PYIN_OVERLAP_FOR_ACCURACY_OR_SPEED TEXT,
+            CREPE_HOP_IN_MS INTEGER
         )
     """)
     
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test for Stage-6 dispatch onto the bounded analyzer queues.
+A saturated analyzer must only hold back the frames that need it: the scanner defers those to its next
+pass instead of waiting on the queue, so other recordings' frames keep flowing, and the deferred frames
+still reach the analyzer in frame order. Because every pass re-sorts by deadline before taking a free
+slot, a PRACTICE frame arriving behind a COMPOSE backlog is admitted and run ahead of it.
+The analyzers, note segmenter and live push are swapped for in-memory ones; the scheduler is a small fresh one.
+"""
+
+import sys
+import os
+import asyncio
+from datetime import datetime, timedelta
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_analyzer_dispatch():
+    """Saturated CREPE on one recording vs VOLUME-only frames of another; PRACTICE vs a COMPOSE backlog."""
+
+    print("Testing analyzer dispatch...")
+    print("=" * 50)
+
+    import SERVER_ENGINE_LISTEN_6_FOR_AUDIO_FRAMES_TO_PROCESS as STAGE6
+    from SERVER_ENGINE_ANALYZER_SCHEDULER import AnalyzerScheduler
+    from SERVER_ENGINE_APP_VARIABLES import (
+        ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY, SPLIT_100_MS_AUDIO_FRAME_ARRAY, ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY,
+        RECORDING_OUTSTANDING_WORK_ARRAY,
+    )
+    from SERVER_ENGINE_LISTEN_7_FOR_FINISHED_RECORDINGS import RECORDING_WORK_ADD
+
+    CREPE_RUN_ARRAY = []  # (RECORDING_ID, AUDIO_FRAME_NO) in the order CREPE ran them
+
+    async def VOLUME(RECORDING_ID, AUDIO_FRAME_NO, AUDIO_ARRAY):
+        return 1
+
+    async def CREPE(RECORDING_ID, AUDIO_FRAME_NO, AUDIO_ARRAY):
+        CREPE_RUN_ARRAY.append((RECORDING_ID, AUDIO_FRAME_NO))
+        await STATE["CREPE_GATE"].wait()
+        await asyncio.sleep(STATE.get("CREPE_S", 0))
+        return 1
+
+    async def NOOP(*args):
+        return None
+
+    STATE = {}
+    STAGE6.SERVER_ENGINE_AUDIO_STREAM_PROCESS_VOLUME_1_MS = VOLUME
+    STAGE6.SERVER_ENGINE_AUDIO_STREAM_PROCESS_CREPE = CREPE
+    STAGE6.NOTE_SEGMENTER_FRAME_DONE = NOOP
+    STAGE6.LIVE_RESULT_PUSH = NOOP
+    STAGE6.ENGINE_DB_LOG_TABLE_INS = lambda *args: None
+
+    def NEW_SCHEDULER():
+        # 1 CREPE run at a time, 2 queued behind it; everything else waits for the scanner's next pass
+        STAGE6.ANALYZER_SCHEDULER = AnalyzerScheduler(
+            {"VOLUME_1_MS": 2, "CREPE": 1}, 2, set(), {"PRACTICE": 750, "PLAY": 1500, "COMPOSE": 10000},
+        )
+        CREPE_RUN_ARRAY.clear()
+        return STAGE6.ANALYZER_SCHEDULER
+
+    def ADD_FRAMES(RECORDING_ID, COMPOSE_PLAY_OR_PRACTICE, YN_RUN_CREPE, FRAME_CNT, DT_FRAME_RECEIVED):
+        ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY[RECORDING_ID] = {"RECORDING_ID": RECORDING_ID, "COMPOSE_PLAY_OR_PRACTICE": COMPOSE_PLAY_OR_PRACTICE}
+        for AUDIO_FRAME_NO in range(1, FRAME_CNT + 1):
+            DT = DT_FRAME_RECEIVED + timedelta(milliseconds=100 * AUDIO_FRAME_NO)
+            ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY.setdefault(RECORDING_ID, {})[AUDIO_FRAME_NO] = {
+                "RECORDING_ID": RECORDING_ID, "AUDIO_FRAME_NO": AUDIO_FRAME_NO,
+                "YN_RUN_FFT": "N", "YN_RUN_ONS": "N", "YN_RUN_PYIN": "N", "YN_RUN_CREPE": YN_RUN_CREPE,
+                "DT_FRAME_RECEIVED": DT, "DT_FRAME_RESAMPLED_22050": DT,
+            }
+            SPLIT_100_MS_AUDIO_FRAME_ARRAY.setdefault(RECORDING_ID, {})[AUDIO_FRAME_NO] = {
+                "AUDIO_ARRAY_16000": [0.0] * 1600, "AUDIO_ARRAY_22050": [0.0] * 2205,
+            }
+            RECORDING_WORK_ADD(RECORDING_ID)  # the frame's unit of work (Stage-3B)
+
+    def FRAMES_DONE(RECORDING_ID):
+        return [F for F, ROW in ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY[RECORDING_ID].items() if ROW.get("DT_PROCESSING_END")]
+
+    async def WAIT_FOR(CONDITION, TIMEOUT_S=3.0):
+        for _ in range(int(TIMEOUT_S / 0.02)):
+            if CONDITION():
+                return True
+            await asyncio.sleep(0.02)
+        return CONDITION()
+
+    checks = []
+
+    async def RUN_SATURATED():
+        SCHEDULER = NEW_SCHEDULER()
+        STATE["CREPE_GATE"] = asyncio.Event()
+        now = datetime.now()
+        ADD_FRAMES(990291, "COMPOSE", "Y", 8, now - timedelta(seconds=2))  # older: sorts first
+        ADD_FRAMES(990292, "COMPOSE", "N", 5, now)
+        SCANNER = asyncio.create_task(STAGE6.SERVER_ENGINE_LISTEN_6_FOR_AUDIO_FRAMES_TO_PROCESS())
+
+        OTHER_DONE = await WAIT_FOR(lambda: len(FRAMES_DONE(990292)) == 5, 1.0)
+        checks.append(("other recording's frames finish while CREPE is saturated", OTHER_DONE))
+        checks.append(("saturated recording holds 3 CREPE runs (1 running + 2 queued)", len(CREPE_RUN_ARRAY) == 1 and sum(
+            ROW.get("DT_PROCESSING_QUEUED_TO_START") is not None for ROW in ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY[990291].values()
+        ) == 3))
+        checks.append(("deferrals counted", SCHEDULER.metrics()["analyzers"]["CREPE"]["deferred"] > 0))
+
+        STATE["CREPE_GATE"].set()
+        ALL_DONE = await WAIT_FOR(lambda: len(FRAMES_DONE(990291)) == 8)
+        checks.append(("deferred frames finish once CREPE frees up", ALL_DONE))
+        checks.append(("deferred frames ran in frame order", [F for _, F in CREPE_RUN_ARRAY] == list(range(1, 9))))
+        checks.append(("no work outstanding", all(RECORDING_OUTSTANDING_WORK_ARRAY.get(R, 0) == 0 for R in (990291, 990292))))
+        checks.append(("payloads released", not any(SPLIT_100_MS_AUDIO_FRAME_ARRAY.get(R) for R in (990291, 990292))))
+        SCANNER.cancel()
+
+    async def RUN_PRACTICE():
+        NEW_SCHEDULER()
+        STATE["CREPE_GATE"] = asyncio.Event()
+        STATE["CREPE_GATE"].set()
+        STATE["CREPE_S"] = 0.05
+        ADD_FRAMES(990301, "COMPOSE", "Y", 12, datetime.now() - timedelta(seconds=2))
+        SCANNER = asyncio.create_task(STAGE6.SERVER_ENGINE_LISTEN_6_FOR_AUDIO_FRAMES_TO_PROCESS())
+
+        await asyncio.sleep(0.15)  # COMPOSE backlog: 1 running, 2 queued, the rest waiting for room
+        RUN_CNT_BEFORE = len(CREPE_RUN_ARRAY)
+        ADD_FRAMES(990302, "PRACTICE", "Y", 1, datetime.now() - timedelta(milliseconds=100))
+        ALL_DONE = await WAIT_FOR(lambda: len(FRAMES_DONE(990301)) == 12 and len(FRAMES_DONE(990302)) == 1)
+        SCANNER.cancel()
+
+        PRACTICE_RUN_NO = CREPE_RUN_ARRAY.index((990302, 1)) if (990302, 1) in CREPE_RUN_ARRAY else len(CREPE_RUN_ARRAY)
+        checks.append(("backlog and PRACTICE frame finish", ALL_DONE))
+        checks.append(("PRACTICE frame runs within 3 CREPE runs of arriving", PRACTICE_RUN_NO <= RUN_CNT_BEFORE + 2))
+        checks.append(("PRACTICE frame overtakes the COMPOSE backlog", len(CREPE_RUN_ARRAY) - PRACTICE_RUN_NO - 1 >= 5))
+        checks.append(("COMPOSE frames still ran in frame order", [F for R, F in CREPE_RUN_ARRAY if R == 990301] == list(range(1, 13))))
+
+    asyncio.run(RUN_SATURATED())
+    asyncio.run(RUN_PRACTICE())
+    for RECORDING_ID in (990291, 990292, 990301, 990302):
+        for ARRAY in (ENGINE_DB_LOG_SPLIT_100_MS_AUDIO_FRAME_ARRAY, SPLIT_100_MS_AUDIO_FRAME_ARRAY,
+                      ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY, RECORDING_OUTSTANDING_WORK_ARRAY):
+            ARRAY.pop(RECORDING_ID, None)
+
+    ok = True
+    for name, passed in checks:
+        print(f"{'✓' if passed else '✗'} {name}")
+        ok = ok and passed
+
+    print("\n" + "=" * 50)
+    print("✓ Analyzer dispatch OK" if ok else "✗ Analyzer dispatch FAILED")
+    return ok
+
+
+if __name__ == "__main__":
+    test_analyzer_dispatch()
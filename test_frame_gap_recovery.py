@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test for the Stage-4 reorder window.
+Feeds client frame numbers out of order, with duplicates and a permanent drop, through
+FRAME_WINDOW_MARK_RECEIVED and checks the contiguous base, the reported gaps and the refusals.
+"""
+
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+RECORDING_ID = 990034
+
+
+def test_frame_gap_recovery():
+    """Out-of-order arrival, duplicate refusal, gap listing and late-frame refusal."""
+
+    print("Testing Frame Gap Recovery...")
+    print("=" * 50)
+
+    from SERVER_ENGINE_APP_VARIABLES import RECORDING_FRAME_WINDOW_ARRAY, FRAME_REORDER_WINDOW_FRAMES
+    from SERVER_ENGINE_LISTEN_4_FOR_MISSING_FRAMES import (
+        FRAME_WINDOW_MARK_RECEIVED,
+        FRAME_WINDOW_LAST_CONTIGUOUS,
+        FRAME_WINDOW_MISSING,
+    )
+
+    RECORDING_FRAME_WINDOW_ARRAY.pop(RECORDING_ID, None)
+    checks = []
+
+    # 1..10 with 4 and 7 late, 9 lost
+    for fno in [1, 2, 3, 5, 6, 8, 10]:
+        FRAME_WINDOW_MARK_RECEIVED(RECORDING_ID, fno)
+    checks.append(("base after 1-3", FRAME_WINDOW_LAST_CONTIGUOUS(RECORDING_ID) == 3))
+    checks.append(("gaps 4,7,9", FRAME_WINDOW_MISSING(RECORDING_ID) == [4, 7, 9]))
+
+    checks.append(("duplicate refused", FRAME_WINDOW_MARK_RECEIVED(RECORDING_ID, 5) is False))
+
+    FRAME_WINDOW_MARK_RECEIVED(RECORDING_ID, 4)
+    FRAME_WINDOW_MARK_RECEIVED(RECORDING_ID, 7)
+    checks.append(("base slides to 8", FRAME_WINDOW_LAST_CONTIGUOUS(RECORDING_ID) == 8))
+    checks.append(("only 9 open", FRAME_WINDOW_MISSING(RECORDING_ID) == [9]))
+
+    # Stage-4 zero-fill goes through the same mark; the real frame arriving afterwards is late
+    FRAME_WINDOW_MARK_RECEIVED(RECORDING_ID, 9)
+    checks.append(("base after fill", FRAME_WINDOW_LAST_CONTIGUOUS(RECORDING_ID) == 10))
+    checks.append(("late frame refused", FRAME_WINDOW_MARK_RECEIVED(RECORDING_ID, 9) is False))
+
+    far = 11 + 2 * FRAME_REORDER_WINDOW_FRAMES
+    checks.append(("far frame refused", FRAME_WINDOW_MARK_RECEIVED(RECORDING_ID, far) is False))
+
+    W = RECORDING_FRAME_WINDOW_ARRAY[RECORDING_ID]
+    checks.append(("counters", W["LATE_OR_DUPLICATE_FRAME_CNT"] == 2 and W["OUT_OF_WINDOW_FRAME_CNT"] == 1))
+
+    ok = True
+    for name, passed in checks:
+        print(f"{'✓' if passed else '✗'} {name}")
+        ok = ok and passed
+
+    RECORDING_FRAME_WINDOW_ARRAY.pop(RECORDING_ID, None)
+    print("\n" + "=" * 50)
+    print("✓ Frame gap recovery OK" if ok else "✗ Frame gap recovery FAILED")
+    return ok
+
+
+if __name__ == "__main__":
+    test_frame_gap_recovery()
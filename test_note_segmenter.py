@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test for the streaming note segmenter.
+Feeds six AUDIO_FRAME_MS frames of PYIN-style pitch rows and 1 ms volume (two of them out of order) and
+checks the notes closed per frame: a silence ends a note, a short vibrato excursion does not,
+a held new semitone does, and finalize flushes the last note.
+"""
+
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+RECORDING_ID = 990045
+
+
+def test_note_segmenter():
+    """Note boundaries carried across frame boundaries."""
+
+    print("Testing Note Segmenter...")
+    print("=" * 50)
+
+    from SERVER_ENGINE_NOTE_SEGMENTER import NoteSegmenter
+    from SERVER_ENGINE_APP_VARIABLES import AUDIO_FRAME_MS
+
+    checks = []
+    K = AUDIO_FRAME_MS / 100.0              # breakpoints below are laid out for 100 ms frames
+
+    def HZ(midi):
+        return 440.0 * 2 ** ((midi - 69) / 12.0)
+
+    def MIDI_AT(ms):
+        if ms < 250 * K:
+            return 60
+        if ms < 300 * K:
+            return None                     # silence
+        if 350 * K <= ms < 350 * K + 20:
+            return 63                       # 20 ms vibrato excursion
+        if ms < 450 * K:
+            return 62
+        return 64
+
+    SEG = NoteSegmenter(MIN_CONFIDENCE=0.5, MIN_DB=-50, MAX_GAP_MS=30, MIN_CHANGE_MS=40, MIN_NOTE_MS=60)
+
+    def MS_RANGE(AUDIO_FRAME_NO):
+        START_MS = AUDIO_FRAME_MS * (AUDIO_FRAME_NO - 1)
+        return START_MS, START_MS + AUDIO_FRAME_MS - 1
+
+    def FEED(AUDIO_FRAME_NO):
+        START_MS, END_MS = MS_RANGE(AUDIO_FRAME_NO)
+        SEG.put_hz(RECORDING_ID, AUDIO_FRAME_NO, "PYIN", [
+            (ms, ms + 9, HZ(MIDI_AT(ms)), 0.9) for ms in range(START_MS, END_MS + 1, 10) if MIDI_AT(ms) is not None
+        ])
+        SEG.put_volume(RECORDING_ID, AUDIO_FRAME_NO, [
+            (ms, 0.1, -80.0 if MIDI_AT(ms) is None else -20.0) for ms in range(START_MS, END_MS + 1)
+        ])
+
+    def DONE(AUDIO_FRAME_NO):
+        return SEG.frame_done(RECORDING_ID, AUDIO_FRAME_NO, *MS_RANGE(AUDIO_FRAME_NO))
+
+    def NOTE(START_MS_100, END_MS_100, MIDI):
+        return (int(START_MS_100 * K), int(END_MS_100 * K) - 1, MIDI, 76, "SEG")
+
+    for AUDIO_FRAME_NO in range(1, 7):
+        FEED(AUDIO_FRAME_NO)
+
+    # Frame 2 finishes before frame 1 → nothing yet, it waits
+    checks.append(("out of order waits", DONE(2) == [] and SEG.stats["frames_waited"] == 1))
+    checks.append(("frames 1-2 open note", DONE(1) == []))
+    checks.append(("silence closes note", DONE(3) == [NOTE(0, 250, 60)]))
+    checks.append(("vibrato bridged", DONE(4) == []))
+    checks.append(("held change closes note", DONE(5) == [NOTE(300, 450, 62)]))
+    checks.append(("frame 6 open note", DONE(6) == []))
+    checks.append(("finalize flushes", SEG.finalize(RECORDING_ID) == [NOTE(450, 600, 64)]))
+    checks.append(("state dropped", RECORDING_ID not in SEG.recordings))
+
+    ok = True
+    for name, passed in checks:
+        print(f"{'✓' if passed else '✗'} {name}")
+        ok = ok and passed
+
+    print("\n" + "=" * 50)
+    print("✓ Note segmenter OK" if ok else "✗ Note segmenter FAILED")
+    return ok
+
+
+if __name__ == "__main__":
+    test_note_segmenter()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test for the pooled O&F session client against a local stub server (stdlib, HTTP/1.1 keep-alive).
+Checks session start, that one session's ingests arrive in call order even when fired together,
+that calls reuse pooled connections, and that the circuit breaker opens on 5xx, fails fast,
+and closes again after a successful trial call.
+"""
+
+import asyncio
+import json
+import sys
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+class _Stub:
+    FAIL = False
+    OFFSETS = []            # X-Offset-Ms per ingest, arrival order
+    PEERS = set()           # client (host, port) pairs seen → distinct TCP connections
+    LOCK = threading.Lock()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        payload = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with _Stub.LOCK:
+            _Stub.PEERS.add(self.client_address)
+        if _Stub.FAIL:
+            return self._reply(500, {"ok": False, "error": "stub failure"})
+        if self.path == "/session/start":
+            return self._reply(200, {"ok": True, "session_id": "S1"})
+        if self.path == "/session/ingest":
+            offset_ms = int(self.headers["X-Offset-Ms"])
+            with _Stub.LOCK:
+                _Stub.OFFSETS.append(offset_ms)
+            return self._reply(200, {"ok": True, "commit_ms": offset_ms, "notes": [], "bytes": len(payload)})
+        self._reply(404, {"ok": False})
+
+
+def test_oaf_client():
+    """Keep-alive pool, per-session ordering and circuit breaker."""
+
+    print("Testing OAF Client...")
+    print("=" * 50)
+
+    from SERVER_ENGINE_OAF_CLIENT import OafClient
+
+    SERVER = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=SERVER.serve_forever, daemon=True).start()
+    BASE_URL = f"http://127.0.0.1:{SERVER.server_address[1]}"
+
+    checks = []
+
+    async def RUN():
+        CLIENT = OafClient(BASE_URL, MAX_CONNECTIONS=4, CONNECT_TIMEOUT_S=1, FAILURE_THRESHOLD=3, RESET_MS=200)
+        try:
+            status, body = await CLIENT.start_session(16000)
+            checks.append(("session start", status == 200 and body["session_id"] == "S1"))
+
+            OFFSETS = [100 * i for i in range(20)]
+            RESULTS = await asyncio.gather(*[
+                CLIENT.ingest("S1", offset_ms, b"\x00\x00" * 1600, False, 16000) for offset_ms in OFFSETS
+            ])
+            checks.append(("all ingests ok", all(r is not None and r[0] == 200 for r in RESULTS)))
+            checks.append(("ingests arrive in order", _Stub.OFFSETS == OFFSETS))
+            checks.append(("connections reused", len(_Stub.PEERS) <= 2))
+            checks.append(("latency measured", CLIENT.status()["latency_ms"]["/session/ingest"]["count"] == 20))
+
+            _Stub.FAIL = True
+            for _ in range(3):
+                await CLIENT.ingest("S1", 0, b"", False, 16000)
+            checks.append(("circuit opens", CLIENT.state == "OPEN"))
+            CALLS = CLIENT.stats["calls"]
+            checks.append(("open circuit fails fast", await CLIENT.ingest("S1", 0, b"", False, 16000) is None
+                           and CLIENT.stats["calls"] == CALLS and CLIENT.stats["short_circuited"] == 1))
+
+            _Stub.FAIL = False
+            await asyncio.sleep(0.25)
+            r = await CLIENT.ingest("S1", 9900, b"", False, 16000)
+            checks.append(("trial call closes circuit", r is not None and r[0] == 200 and CLIENT.state == "CLOSED"))
+        finally:
+            await CLIENT.aclose()
+
+    try:
+        asyncio.run(RUN())
+    finally:
+        SERVER.shutdown()
+
+    ok = True
+    for name, passed in checks:
+        print(f"{'✓' if passed else '✗'} {name}")
+        ok = ok and passed
+
+    print("\n" + "=" * 50)
+    print("✓ OAF client OK" if ok else "✗ OAF client FAILED")
+    return ok
+
+
+if __name__ == "__main__":
+    test_oaf_client()
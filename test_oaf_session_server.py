@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test for the O&F microservice session API, using the CPU stand-in model (no TensorFlow / weights).
+Streams two synthetic phrases in 100 ms PCM16 chunks over two concurrent sessions and checks
+the notes and commit watermarks returned, that both sessions shared model batches, and that
+finalize flushes the last note and closes the session.
+"""
+
+import os
+import sys
+import threading
+import numpy as np
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ["OAF_MODEL"] = "STANDIN"
+os.environ["OAF_BATCH_WAIT_MS"] = "50"      # wide enough for the two sessions to meet in one batch
+
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = 1600
+TOLERANCE_MS = 64                           # two 32 ms model frames
+
+
+def _synth(MIDIS, seed):
+    """250 ms harmonic tones separated by 50 ms of silence; returns audio and (start_ms, midi) pairs."""
+    rng = np.random.default_rng(seed)
+    PARTS, NOTES, t_ms = [np.zeros(SAMPLE_RATE // 10, np.float32)], [], 100
+    for midi in MIDIS:
+        t = np.arange(SAMPLE_RATE // 4) / SAMPLE_RATE
+        f0 = 440.0 * 2 ** ((midi - 69) / 12.0)
+        x = sum((0.6 ** h) * np.sin(2 * np.pi * (h + 1) * f0 * t) for h in range(5))
+        PARTS.append((0.25 * np.minimum(1.0, t / 0.01) * x).astype(np.float32))
+        PARTS.append(np.zeros(SAMPLE_RATE // 20, np.float32))
+        NOTES.append((t_ms, midi))
+        t_ms += 300
+    AUDIO = np.concatenate(PARTS)
+    return AUDIO + (rng.standard_normal(AUDIO.size) * 1e-4).astype(np.float32), NOTES
+
+
+def _stream(client, AUDIO, RESULT):
+    session_id = client.post("/session/start", json={"sample_rate": SAMPLE_RATE}).get_json()["session_id"]
+    NOTES, COMMITS, WITHIN_COMMIT = [], [], True
+    for i in range(0, AUDIO.size, FRAME_SAMPLES):
+        PCM = (np.clip(AUDIO[i:i + FRAME_SAMPLES], -1, 1) * 32767).astype("<i2").tobytes()
+        body = client.post("/session/ingest", data=PCM, headers={
+            "X-Session-Id": session_id, "X-Offset-Ms": str(i * 1000 // SAMPLE_RATE),
+            "X-Finalize": "0", "X-Sample-Rate": str(SAMPLE_RATE),
+        }).get_json()
+        COMMITS.append(body["commit_ms"])
+        WITHIN_COMMIT = WITHIN_COMMIT and all(n["end_ms"] <= body["commit_ms"] for n in body["notes"])
+        NOTES.extend(body["notes"])
+    body = client.post("/session/ingest", data=b"", headers={
+        "X-Session-Id": session_id, "X-Offset-Ms": "0", "X-Finalize": "1", "X-Sample-Rate": str(SAMPLE_RATE),
+    }).get_json()
+    RESULT.update(session_id=session_id, notes=NOTES, final_notes=body["notes"], commits=COMMITS,
+                  within_commit=WITHIN_COMMIT, final_commit=body["commit_ms"])
+
+
+def _matches(REFERENCE, DETECTED):
+    return len(DETECTED) == len(REFERENCE) and all(
+        abs(n["start_ms"] - start_ms) <= TOLERANCE_MS and n["pitch"] == midi
+        for (start_ms, midi), n in zip(REFERENCE, sorted(DETECTED, key=lambda n: n["start_ms"]))
+    )
+
+
+def test_oaf_session_server():
+    """Streaming sessions, commit watermarks and cross-session batching."""
+
+    print("Testing OAF Session Server (stand-in model)...")
+    print("=" * 50)
+
+    import DOCKER_ONSETS_AND_FRAMES_SERVER as OAF
+
+    client = OAF.app.test_client()
+    checks = []
+
+    AUDIO_A, REF_A = _synth([60, 64, 67, 72, 76], seed=1)
+    AUDIO_B, REF_B = _synth([55, 62, 69, 74, 81], seed=2)
+    RESULT_A, RESULT_B = {}, {}
+    THREADS = [threading.Thread(target=_stream, args=(client, AUDIO_A, RESULT_A)),
+               threading.Thread(target=_stream, args=(client, AUDIO_B, RESULT_B))]
+    for T in THREADS:
+        T.start()
+    for T in THREADS:
+        T.join()
+
+    for NAME, RESULT, REF in (("A", RESULT_A, REF_A), ("B", RESULT_B, REF_B)):
+        ALL = RESULT["notes"] + RESULT["final_notes"]
+        checks.append((f"{NAME}: notes and pitches", _matches(REF, ALL)))
+        # the last ~500 ms (lookahead + step) is only decoded at finalize
+        checks.append((f"{NAME}: earlier notes before finalize", len(RESULT["notes"]) >= len(REF) - 2))
+        checks.append((f"{NAME}: commit_ms never goes back", RESULT["commits"] == sorted(RESULT["commits"])))
+        checks.append((f"{NAME}: notes only once committed", RESULT["within_commit"]))
+        checks.append((f"{NAME}: finalize commits everything", all(n["end_ms"] <= RESULT["final_commit"] for n in ALL)))
+        checks.append((f"{NAME}: session closed", RESULT["session_id"] not in OAF.SESSIONS))
+
+    checks.append(("sessions shared a batch", OAF.BATCHER.stats["max_batch"] >= 2))
+    checks.append(("unknown session → 404", client.post("/session/ingest", data=b"", headers={"X-Session-Id": "nope"}).status_code == 404))
+
+    ok = True
+    for name, passed in checks:
+        print(f"{'✓' if passed else '✗'} {name}")
+        ok = ok and passed
+
+    print("\n" + "=" * 50)
+    print("✓ OAF session server OK" if ok else "✗ OAF session server FAILED")
+    return ok
+
+
+if __name__ == "__main__":
+    test_oaf_session_server()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark: in-process spectral-flux ONS vs. the Onsets & Frames (OAF) container.
+Streams a synthetic violin-like phrase with known notes through both paths 100 ms at a time and
+reports ms per frame, onset precision/recall/F1 (±50 ms) and pitch accuracy of matched notes.
+The OAF half runs only when the container answers on OAF_HOST:OAF_PORT.
+"""
+
+import time
+import numpy as np
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = 1600            # AUDIO_FRAME_MS = 100
+ONSET_TOLERANCE_MS = 50
+RECORDING_ID = 990046
+
+
+def _synth_phrase(seed: int = 7):
+    """Harmonic tones with a 10 ms attack, light vibrato, decaying partials; half legato, half detached."""
+    rng = np.random.default_rng(seed)
+    NOTES, PARTS, t_ms = [], [], 100
+    PARTS.append(np.zeros(SAMPLE_RATE // 10, dtype=np.float32))
+    for i in range(40):
+        midi = int(rng.integers(55, 89))
+        dur_ms = int(rng.integers(150, 500))
+        n = SAMPLE_RATE * dur_ms // 1000
+        t = np.arange(n) / SAMPLE_RATE
+        f0 = 440.0 * 2 ** ((midi - 69) / 12.0) * (1 + 0.003 * np.sin(2 * np.pi * 5.5 * t))
+        phase = 2 * np.pi * np.cumsum(f0) / SAMPLE_RATE
+        x = sum((0.6 ** h) * np.sin((h + 1) * phase) for h in range(6))
+        env = np.minimum(1.0, t / 0.010) * np.minimum(1.0, (t[-1] - t + 1e-3) / 0.015)
+        PARTS.append((0.25 * env * x).astype(np.float32))
+        NOTES.append((t_ms, t_ms + dur_ms - 1, midi))
+        t_ms += dur_ms
+        if i % 2:                               # detached: 40 ms of silence before the next note
+            PARTS.append(np.zeros(SAMPLE_RATE * 40 // 1000, dtype=np.float32))
+            t_ms += 40
+    AUDIO = np.concatenate(PARTS)
+    AUDIO += (rng.standard_normal(AUDIO.size) * 1e-3).astype(np.float32)  # −60 dB noise floor
+    return AUDIO, NOTES
+
+
+def _score(REFERENCE, DETECTED):
+    """Greedy onset matching within ±ONSET_TOLERANCE_MS; pitch accuracy over matched pairs."""
+    USED, MATCHED, PITCH_OK = set(), 0, 0
+    for (ref_start, _ref_end, ref_midi) in REFERENCE:
+        BEST = None
+        for j, (start_ms, _end_ms, midi, *_rest) in enumerate(DETECTED):
+            if j not in USED and abs(start_ms - ref_start) <= ONSET_TOLERANCE_MS:
+                if BEST is None or abs(start_ms - ref_start) < abs(DETECTED[BEST][0] - ref_start):
+                    BEST = j
+        if BEST is not None:
+            USED.add(BEST)
+            MATCHED += 1
+            PITCH_OK += int(DETECTED[BEST][2] == ref_midi)
+    PRECISION = MATCHED / len(DETECTED) if DETECTED else 0.0
+    RECALL = MATCHED / len(REFERENCE) if REFERENCE else 0.0
+    F1 = 2 * PRECISION * RECALL / (PRECISION + RECALL) if PRECISION + RECALL else 0.0
+    return PRECISION, RECALL, F1, (PITCH_OK / MATCHED if MATCHED else 0.0)
+
+
+def _frames(AUDIO):
+    for i in range(0, AUDIO.size, FRAME_SAMPLES):
+        yield i // FRAME_SAMPLES + 1, AUDIO[i:i + FRAME_SAMPLES]
+
+
+def _run_flux(AUDIO):
+    from SERVER_ENGINE_AUDIO_STREAM_PROCESS_ONS_FLUX import ONS_FLUX_PROCESS_FRAME, ONS_FLUX_FLUSH
+    NOTES, FRAME_MS = [], []
+    for AUDIO_FRAME_NO, X in _frames(AUDIO):
+        t0 = time.perf_counter()
+        NOTES.extend(ONS_FLUX_PROCESS_FRAME(RECORDING_ID, AUDIO_FRAME_NO, X))
+        FRAME_MS.append((time.perf_counter() - t0) * 1000.0)
+    NOTES.extend(ONS_FLUX_FLUSH(RECORDING_ID))
+    return NOTES, FRAME_MS
+
+
+def _run_oaf(AUDIO):
+    import asyncio
+    return asyncio.run(_run_oaf_async(AUDIO))
+
+
+async def _run_oaf_async(AUDIO):
+    from SERVER_ENGINE_AUDIO_STREAM_PROCESS_ONS import (
+        _get_or_open_session,
+        _session_ingest_and_get_notes,
+        _float32_to_pcm16le_bytes,
+    )
+    from SERVER_ENGINE_OAF_CLIENT import OAF_CLIENT
+    try:
+        session_id = await _get_or_open_session(RECORDING_ID)
+        if not session_id:
+            print("  OAF not reachable or session refused — skipped")
+            return None, None
+        NOTES, FRAME_MS = {}, []
+        for AUDIO_FRAME_NO, X in _frames(AUDIO):
+            t0 = time.perf_counter()
+            resp = await _session_ingest_and_get_notes(session_id, (AUDIO_FRAME_NO - 1) * 100, _float32_to_pcm16le_bytes(X))
+            FRAME_MS.append((time.perf_counter() - t0) * 1000.0)
+            for n in (resp or {}).get("notes", []):
+                NOTES[(n["start_ms"], n["pitch"])] = (n["start_ms"], n["end_ms"], n["pitch"])
+        resp = await _session_ingest_and_get_notes(session_id, 0, b"", finalize=True)
+        for n in (resp or {}).get("notes", []):
+            NOTES[(n["start_ms"], n["pitch"])] = (n["start_ms"], n["end_ms"], n["pitch"])
+        return sorted(NOTES.values()), FRAME_MS
+    finally:
+        await OAF_CLIENT.aclose()
+
+
+def test_ons_flux_benchmark():
+    """Cost and accuracy of FLUX vs. OAF on the same stream."""
+
+    print("Benchmarking ONS: FLUX vs OAF...")
+    print("=" * 50)
+
+    AUDIO, REFERENCE = _synth_phrase()
+    print(f"Phrase: {len(REFERENCE)} notes, {AUDIO.size / SAMPLE_RATE:.1f} s, {-(-AUDIO.size // FRAME_SAMPLES)} frames")
+
+    RESULTS = {}
+    print("\nFLUX (in-process)...")
+    RESULTS["FLUX"] = _run_flux(AUDIO)
+    print("\nOAF (container)...")
+    RESULTS["OAF"] = _run_oaf(AUDIO)
+
+    print("\n" + "=" * 50)
+    print(f"{'ENGINE':<6} {'ms/frame':>9} {'p95 ms':>7} {'RT factor':>9} {'P':>6} {'R':>6} {'F1':>6} {'pitch':>6}")
+    for ENGINE, (NOTES, FRAME_MS) in RESULTS.items():
+        if NOTES is None:
+            print(f"{ENGINE:<6} {'—':>9}")
+            continue
+        P, R, F1, PITCH = _score(REFERENCE, NOTES)
+        MEAN_MS = float(np.mean(FRAME_MS))
+        print(f"{ENGINE:<6} {MEAN_MS:>9.2f} {float(np.percentile(FRAME_MS, 95)):>7.2f} {100.0 / MEAN_MS:>8.0f}x "
+              f"{P:>6.2f} {R:>6.2f} {F1:>6.2f} {PITCH:>6.2f}")
+    print("(RT factor = audio ms per ms of analysis, one recording, one core)")
+
+    ok = RESULTS["FLUX"][0] is not None and _score(REFERENCE, RESULTS["FLUX"][0])[2] > 0.8
+    print("\n✓ ONS flux benchmark completed" if ok else "\n✗ ONS flux F1 below 0.8")
+    return ok
+
+
+if __name__ == "__main__":
+    test_ons_flux_benchmark()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Soak benchmark for reference-counted payload lifetimes.
+Pushes a simulated 30-minute recording through the same register/done calls used by
+Stage-2 (receive), Stage-3B (split) and Stage-6 (analyzers) and checks that the audio
+payload held in memory stays flat instead of growing with recording length.
+"""
+
+import sys
+import os
+import time
+import tracemalloc
+from collections import deque
+
+import numpy as np
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+RECORDING_MINUTES = 30
+IN_FLIGHT_FRAMES = 8          # analyzer lag: frames still being analyzed at any moment
+
+
+def test_payload_lifetime_soak():
+    """Simulate a 30-minute recording and sample held payload bytes every 5 minutes."""
+
+    print("Testing Payload Lifetime Soak...")
+    print("=" * 50)
+
+    from SERVER_ENGINE_APP_VARIABLES import (
+        PRE_SPLIT_AUDIO_FRAME_ARRAY,
+        SPLIT_100_MS_AUDIO_FRAME_ARRAY,
+        AUDIO_FRAME_MS,
+        AUDIO_BYTES_PER_FRAME,
+    )
+    from SERVER_ENGINE_PAYLOAD_LIFETIME import (
+        PAYLOAD_REGISTER_CONSUMERS,
+        PAYLOAD_CONSUMER_DONE,
+        PAYLOAD_FORGET_RECORDING,
+        PRE_SPLIT,
+        SPLIT_100_MS,
+    )
+    from SERVER_ENGINE_MEMORY_MONITOR import MEMORY_RECORDING_BYTES_GET
+
+    RECORDING_ID = 999_001
+    ANALYZERS = ("VOLUME_1_MS", "PYIN", "CREPE")
+    FRAME_CNT = RECORDING_MINUTES * 60 * 1000 // AUDIO_FRAME_MS
+    SAMPLE_EVERY = 5 * 60 * 1000 // AUDIO_FRAME_MS
+
+    PRE_SPLIT_AUDIO_FRAME_ARRAY[RECORDING_ID] = {}
+    SPLIT_100_MS_AUDIO_FRAME_ARRAY[RECORDING_ID] = {}
+    ACCUMULATOR = bytearray()
+    IN_FLIGHT: deque = deque()
+
+    tracemalloc.start()
+    t0 = time.time()
+    samples = []
+
+    for AUDIO_FRAME_NO in range(1, FRAME_CNT + 1):
+        # Stage-2: chunk arrives
+        PRE_SPLIT_AUDIO_FRAME_ARRAY[RECORDING_ID][AUDIO_FRAME_NO] = {
+            "RECORDING_ID": RECORDING_ID,
+            "AUDIO_FRAME_NO": AUDIO_FRAME_NO,
+            "AUDIO_FRAME_BYTES": bytes(AUDIO_BYTES_PER_FRAME),
+        }
+        PAYLOAD_REGISTER_CONSUMERS(PRE_SPLIT, RECORDING_ID, AUDIO_FRAME_NO, ("SPLIT",))
+
+        # Stage-3B: split into the accumulator, then build analyzer arrays
+        ACCUMULATOR.extend(PRE_SPLIT_AUDIO_FRAME_ARRAY[RECORDING_ID][AUDIO_FRAME_NO]["AUDIO_FRAME_BYTES"])
+        PAYLOAD_CONSUMER_DONE(PRE_SPLIT, RECORDING_ID, AUDIO_FRAME_NO, "SPLIT")
+        del ACCUMULATOR[:AUDIO_BYTES_PER_FRAME]
+        SPLIT_100_MS_AUDIO_FRAME_ARRAY[RECORDING_ID][AUDIO_FRAME_NO] = {
+            "RECORDING_ID": RECORDING_ID,
+            "AUDIO_FRAME_NO": AUDIO_FRAME_NO,
+            "AUDIO_ARRAY_16000": np.zeros(16000 * AUDIO_FRAME_MS // 1000, dtype=np.float32),
+            "AUDIO_ARRAY_22050": np.zeros(22050 * AUDIO_FRAME_MS // 1000, dtype=np.float32),
+        }
+
+        # Stage-6: dispatch; analyzers finish IN_FLIGHT_FRAMES later
+        PAYLOAD_REGISTER_CONSUMERS(SPLIT_100_MS, RECORDING_ID, AUDIO_FRAME_NO, ANALYZERS)
+        IN_FLIGHT.append(AUDIO_FRAME_NO)
+        if len(IN_FLIGHT) > IN_FLIGHT_FRAMES:
+            DONE_FRAME_NO = IN_FLIGHT.popleft()
+            for ANALYZER_NAME in ANALYZERS:
+                PAYLOAD_CONSUMER_DONE(SPLIT_100_MS, RECORDING_ID, DONE_FRAME_NO, ANALYZER_NAME)
+
+        if AUDIO_FRAME_NO % SAMPLE_EVERY == 0:
+            held = MEMORY_RECORDING_BYTES_GET(RECORDING_ID)["TOTAL"]
+            traced, _ = tracemalloc.get_traced_memory()
+            samples.append((AUDIO_FRAME_NO * AUDIO_FRAME_MS // 60000, held, traced))
+
+    elapsed = time.time() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"Frames simulated: {FRAME_CNT} ({RECORDING_MINUTES} min @ {AUDIO_FRAME_MS}ms)")
+    print(f"Elapsed: {elapsed:.2f}s, tracemalloc peak: {peak / 1024 / 1024:.2f} MB")
+    print("\n  minute   payload_held_kb   traced_kb")
+    for minute, held, traced in samples:
+        print(f"  {minute:>6}   {held / 1024:>15.1f}   {traced / 1024:>9.1f}")
+
+    frame_payload = (16000 + 22050) * AUDIO_FRAME_MS // 1000 * 4
+    bound = (IN_FLIGHT_FRAMES + 1) * frame_payload + AUDIO_BYTES_PER_FRAME
+    held_values = [held for _, held, _ in samples]
+    flat = max(held_values) <= bound and max(held_values) == min(held_values)
+
+    print("\n" + "=" * 50)
+    if flat:
+        print(f"✓ Payload held stays flat at {max(held_values) / 1024:.1f} KB (bound {bound / 1024:.1f} KB)")
+    else:
+        print(f"✗ Payload held grows: {[round(h / 1024, 1) for h in held_values]} KB (bound {bound / 1024:.1f} KB)")
+
+    PAYLOAD_FORGET_RECORDING(RECORDING_ID)
+    PRE_SPLIT_AUDIO_FRAME_ARRAY.pop(RECORDING_ID, None)
+    SPLIT_100_MS_AUDIO_FRAME_ARRAY.pop(RECORDING_ID, None)
+    return flat
+
+
+if __name__ == "__main__":
+    test_payload_lifetime_soak()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test for streaming pYIN vs. per-frame librosa.pyin.
+Streams a synthetic bowed tone (slow glide plus vibrato, known f0) frame by frame through both paths
+and compares pitch error against the true f0, the pitch jump between neighbouring rows across a
+frame boundary vs. inside a frame (continuity), and ms per frame.
+Also checks the streaming rows stay on the START_MS grid (one row per hop, no overlap).
+"""
+
+import time
+import numpy as np
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE_RATE = 22050
+RECORDING_ID = 990050
+N_FRAMES = 12
+
+
+def _synth(FRAME_SAMPLES):
+    """A4 gliding up a fifth over the clip with 5.5 Hz / ±20 cent vibrato; returns audio and f0(t)."""
+    t = np.arange(FRAME_SAMPLES * N_FRAMES) / SAMPLE_RATE
+    MIDI = 69 + 7 * t / t[-1] + 0.2 * np.sin(2 * np.pi * 5.5 * t)
+    F0 = 440.0 * 2 ** ((MIDI - 69) / 12.0)
+    PHASE = 2 * np.pi * np.cumsum(F0) / SAMPLE_RATE
+    AUDIO = sum((0.6 ** h) * np.sin((h + 1) * PHASE) for h in range(6))
+    rng = np.random.default_rng(5)
+    return (0.2 * AUDIO + 1e-3 * rng.standard_normal(t.size)).astype(np.float32), F0
+
+
+def _cents(ROWS):
+    HZ = np.array([hz for (_s, _e, hz, _c) in ROWS], dtype=float)
+    return np.where(np.isfinite(HZ) & (HZ > 0), 1200.0 * np.log2(np.where(HZ > 0, HZ, 1.0) / 440.0), np.nan)
+
+
+def _errors(ROWS, F0, FRAME_MS):
+    """
+    |cents| per row against the true f0 at the row start (unvoiced rows count as 1200), and
+    |cents| between neighbouring rows split into across-a-frame-boundary / inside-a-frame.
+    """
+    STARTS = np.array([s for (s, _e, _hz, _c) in ROWS])
+    TRUE = 1200.0 * np.log2(F0[np.minimum(STARTS * SAMPLE_RATE // 1000, F0.size - 1)] / 440.0)
+    CENTS = _cents(ROWS)
+    ERR = np.where(np.isnan(CENTS), 1200.0, np.abs(CENTS - TRUE))
+    JUMP = np.abs(np.diff(CENTS))
+    JUMP = np.where(np.isnan(JUMP), 1200.0, JUMP)
+    ACROSS = STARTS[1:] % FRAME_MS == 0
+    return ERR, JUMP[ACROSS], JUMP[~ACROSS]
+
+
+def test_pyin_streaming():
+    """Boundary glitches and cost: streaming vs per-frame pYIN."""
+
+    print("Testing Streaming PYIN...")
+    print("=" * 50)
+
+    import SERVER_ENGINE_AUDIO_STREAM_PROCESS_PYIN as PYIN
+    from SERVER_ENGINE_APP_VARIABLES import AUDIO_FRAME_MS, PYIN_HOP_IN_MS
+
+    checks = []
+    FRAME_SAMPLES = SAMPLE_RATE * AUDIO_FRAME_MS // 1000
+    AUDIO, F0 = _synth(FRAME_SAMPLES)
+
+    RESULTS = {}
+    for MODE in ("PER_FRAME", "STREAMING"):
+        ROWS, FRAME_MS_LIST, GRID_OK = [], [], True
+        PYIN.PYIN_FORGET_RECORDING(RECORDING_ID)
+        for AUDIO_FRAME_NO in range(1, N_FRAMES + 1):
+            X = AUDIO[(AUDIO_FRAME_NO - 1) * FRAME_SAMPLES:AUDIO_FRAME_NO * FRAME_SAMPLES]
+            START_MS = AUDIO_FRAME_MS * (AUDIO_FRAME_NO - 1)
+            t0 = time.perf_counter()
+            if MODE == "STREAMING":
+                REL = PYIN._pyin_stream_rows(RECORDING_ID, AUDIO_FRAME_NO, X, sample_rate=SAMPLE_RATE, overlap="speed")
+                GRID_OK = GRID_OK and [r[0] for r in REL] == list(range(0, AUDIO_FRAME_MS, PYIN_HOP_IN_MS))
+            else:
+                REL = PYIN._pyin_relative_rows_optimized(X, sample_rate=SAMPLE_RATE, overlap="speed")
+                REL = [r for r in REL if r[0] < AUDIO_FRAME_MS]   # drop the row centred on the next frame's start
+            FRAME_MS_LIST.append((time.perf_counter() - t0) * 1000.0)
+            ROWS.extend((START_MS + s, START_MS + e, hz, c) for (s, e, hz, c) in REL)
+        ERR, ACROSS, INSIDE = _errors(ROWS[1:], F0, AUDIO_FRAME_MS)   # first row has no audio history in either mode
+        RESULTS[MODE] = (ERR, ACROSS, INSIDE, float(np.mean(FRAME_MS_LIST[1:])), GRID_OK)   # frame 1 warms caches
+
+    print(f"{'MODE':<10} {'ms/frame':>9} {'median¢':>8} {'jump¢ at edge':>14} {'jump¢ inside':>13}")
+    for MODE, (ERR, ACROSS, INSIDE, MS, _) in RESULTS.items():
+        print(f"{MODE:<10} {MS:>9.2f} {np.median(ERR):>8.1f} {np.mean(ACROSS):>14.1f} {np.mean(INSIDE):>13.1f}")
+
+    ERR_S, ACROSS_S, INSIDE_S, MS_S, GRID_OK = RESULTS["STREAMING"]
+    ERR_F, _, _, MS_F, _ = RESULTS["PER_FRAME"]
+    checks.append(("rows on the START_MS grid", GRID_OK))
+    checks.append(("median error no worse than per-frame", float(np.median(ERR_S)) <= float(np.median(ERR_F)) + 2.0))
+    checks.append(("continuous across frame edges", np.mean(ACROSS_S) <= 1.25 * np.mean(INSIDE_S)))
+    checks.append(("cheaper than per-frame", MS_S < MS_F))
+
+    ok = True
+    for name, passed in checks:
+        print(f"{'✓' if passed else '✗'} {name}")
+        ok = ok and passed
+
+    print("\n" + "=" * 50)
+    print("✓ Streaming PYIN OK" if ok else "✗ Streaming PYIN FAILED")
+    return ok
+
+
+if __name__ == "__main__":
+    test_pyin_streaming()
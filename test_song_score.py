@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test for the song reference index and the running practice score.
+Builds an index from three notes, feeds PYIN-style rows frame by frame and checks the intonation
+and timing figures, and that low-confidence rows and rests are ignored.
+"""
+
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+RECORDING_ID = 990044
+
+
+def test_song_score():
+    """Reference index arrays and running score."""
+
+    print("Testing Song Score...")
+    print("=" * 50)
+
+    import numpy as np
+    from SERVER_ENGINE_SONG_REFERENCE_INDEX import BUILD_SONG_REFERENCE_INDEX
+    from SERVER_ENGINE_SONG_SCORE import SongScore
+
+    checks = []
+
+    # A4 0–199 ms, rest, C5 300–499 ms, E5 500–699 ms
+    INDEX = BUILD_SONG_REFERENCE_INDEX([
+        {"START_MS": 300, "END_MS": 499, "MIDI": 72},
+        {"START_MS": 0, "END_MS": 199, "MIDI": 69},
+        {"START_MS": 500, "END_MS": 699, "MIDI": 76},
+    ])
+    checks.append(("index length", INDEX["EXPECTED_MIDI"].size == 700))
+    checks.append(("notes sorted", list(INDEX["NOTE_START_MS"]) == [0, 300, 500]))
+    checks.append(("rest is NaN / -1", np.isnan(INDEX["EXPECTED_MIDI"][250]) and INDEX["NOTE_NO"][250] == -1))
+    checks.append(("expected pitch", INDEX["EXPECTED_MIDI"][350] == 72 and INDEX["NOTE_NO"][350] == 1))
+
+    def HZ(midi):
+        return 440.0 * 2 ** ((midi - 69) / 12.0)
+
+    SCORE = SongScore(MIN_CONFIDENCE=0.5, TOLERANCE_CENTS=50, TOLERANCE_MS=100)
+    SCORE.attach(RECORDING_ID, INDEX)
+
+    # Frame 1-2: A4 in tune from 20 ms, plus a low-confidence wrong row and a row in the rest
+    SCORE.put_hz(RECORDING_ID, "PYIN", [(ms, ms + 9, HZ(69), 0.9) for ms in range(20, 200, 10)]
+                 + [(10, 19, HZ(60), 0.1), (250, 259, HZ(69), 0.9)])
+    # Frame 4-5: C5 sung 30 cents flat, entered 150 ms late (→ late)
+    SCORE.put_hz(RECORDING_ID, "PYIN", [(ms, ms + 9, HZ(72 - 0.3), 0.9) for ms in range(450, 500, 10)])
+    RESULT = SCORE.score(RECORDING_ID, 500)["PYIN"]
+    checks.append(("intonation all in tune", RESULT["INTONATION_PCT"] == 100.0))
+    checks.append(("two notes due", RESULT["NOTES_DUE"] == 2 and RESULT["NOTES_HIT"] == 2))
+    checks.append(("one note on time", RESULT["TIMING_PCT"] == 50.0))
+
+    # Frame 6-7: E5 sung a semitone sharp → pitched but out of tune, note never hit
+    SCORE.put_hz(RECORDING_ID, "PYIN", [(ms, ms + 9, HZ(77), 0.9) for ms in range(500, 700, 10)])
+    RESULT = SCORE.score(RECORDING_ID, 700)["PYIN"]
+    checks.append(("out of tune rows counted", RESULT["INTONATION_PCT"] == round(100.0 * 23 / 43, 1)))
+    checks.append(("missed note due", RESULT["NOTES_DUE"] == 3 and RESULT["NOTES_HIT"] == 2))
+
+    SCORE.forget_recording(RECORDING_ID)
+    checks.append(("forgotten", SCORE.score(RECORDING_ID, 700) is None))
+
+    ok = True
+    for name, passed in checks:
+        print(f"{'✓' if passed else '✗'} {name}")
+        ok = ok and passed
+
+    print("\n" + "=" * 50)
+    print("✓ Song score OK" if ok else "✗ Song score FAILED")
+    return ok
+
+
+if __name__ == "__main__":
+    test_song_score()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test for recordings whose START is not admitted (BUSY) or fails.
+The client streams right after START without waiting for START_ACK, so frames are staged before the
+decision. Checks that those frames, their payload refs and work units are released, that the recording
+is purged at once (STOP afterwards is a no-op), and that frames still in flight are dropped as PURGED.
+The SP call, the admission decision and the WS send are swapped for in-memory ones.
+"""
+
+import sys
+import os
+import asyncio
+from datetime import datetime
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+CONNECTION_ID = 990032
+
+
+def test_start_not_admitted():
+    """BUSY / failed START with early frames, then STOP."""
+
+    print("Testing START not admitted...")
+    print("=" * 50)
+
+    import SERVER_ENGINE_LISTEN_3A_FOR_START as START
+    from SERVER_ENGINE_LISTEN_3C_FOR_STOP import PROCESS_WEBSOCKET_STOP_MESSAGE
+    from SERVER_ENGINE_LISTEN_2_FOR_WS_MESSAGES import INGEST_AUDIO_FRAME
+    from SERVER_ENGINE_PAYLOAD_LIFETIME import PAYLOAD_LIFETIME_STATUS_GET
+    from SERVER_ENGINE_APP_VARIABLES import (
+        ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ARRAY, ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY, ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY,
+        ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_ARRAY, PRE_SPLIT_AUDIO_FRAME_ARRAY, RECORDING_OUTSTANDING_WORK_ARRAY,
+        PURGED_RECORDING_ARRAY,
+    )
+
+    SENT = []
+
+    async def WS_SEND_JSON(WEBSOCKET_CONNECTION_ID, MESSAGE):
+        SENT.append(MESSAGE)
+        return True
+
+    async def PARAMETERS_GET(SP_NAME, RECORDING_ID):
+        if RECORDING_ID == 990034:
+            raise RuntimeError("parameters SP unavailable")
+        return {"COMPOSE_PLAY_OR_PRACTICE": "COMPOSE", "COMPOSE_YN_RUN_FFT": "N"}
+
+    START.WS_SEND_JSON = WS_SEND_JSON
+    START.DB_EXEC_SP_SINGLE_ROW_ASYNC = PARAMETERS_GET
+    START.ADMISSION_DECIDE = lambda *args: ("BUSY", {"RETRY_AFTER_MS": 5000})
+    ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY[CONNECTION_ID] = {"WEBSOCKET_CONNECTION_ID": CONNECTION_ID, "ACTIVE_RECORDING_IDS": set()}
+
+    checks = []
+
+    async def RUN(RECORDING_ID, MESSAGE_ID, EXPECTED_ADMISSION):
+        now = datetime.now()
+        ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ARRAY[MESSAGE_ID] = {
+            "MESSAGE_ID": MESSAGE_ID, "RECORDING_ID": RECORDING_ID, "MESSAGE_TYPE": "START",
+            "DT_MESSAGE_RECEIVED": now, "WEBSOCKET_CONNECTION_ID": CONNECTION_ID,
+        }
+        # Frames sent right behind START, staged before it is processed
+        for AUDIO_FRAME_NO in (1, 2, 3):
+            INGEST_AUDIO_FRAME(RECORDING_ID, AUDIO_FRAME_NO, bytes([AUDIO_FRAME_NO]) * 1600, now, CONNECTION_ID)
+        STAGED = len(PRE_SPLIT_AUDIO_FRAME_ARRAY.get(RECORDING_ID, {}))
+        RELEASED_0 = PAYLOAD_LIFETIME_STATUS_GET()["released_payload_cnt"]
+
+        try:
+            await START.PROCESS_WEBSOCKET_START_MESSAGE(MESSAGE_ID=MESSAGE_ID)
+        except Exception:
+            pass  # the failed START re-raises after cleaning up
+
+        # A frame still in flight, then the client's STOP
+        INGEST_AUDIO_FRAME(RECORDING_ID, 4, b"\x04" * 1600, now, CONNECTION_ID)
+        ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ARRAY[MESSAGE_ID + 1] = {
+            "MESSAGE_ID": MESSAGE_ID + 1, "RECORDING_ID": RECORDING_ID, "MESSAGE_TYPE": "STOP",
+            "DT_MESSAGE_RECEIVED": now, "WEBSOCKET_CONNECTION_ID": CONNECTION_ID,
+        }
+        await PROCESS_WEBSOCKET_STOP_MESSAGE(MESSAGE_ID=MESSAGE_ID + 1)
+
+        checks.append((f"{EXPECTED_ADMISSION}: early frames staged", STAGED == 3))
+        checks.append((f"{EXPECTED_ADMISSION}: START_ACK sent", SENT and SENT[-1].get("ADMISSION") == EXPECTED_ADMISSION))
+        checks.append((f"{EXPECTED_ADMISSION}: payloads released", PAYLOAD_LIFETIME_STATUS_GET()["released_payload_cnt"] - RELEASED_0 == 3))
+        checks.append((f"{EXPECTED_ADMISSION}: no work outstanding", RECORDING_OUTSTANDING_WORK_ARRAY.get(RECORDING_ID, 0) == 0))
+        checks.append((f"{EXPECTED_ADMISSION}: recording purged", not any(RECORDING_ID in A for A in (
+            ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY, PRE_SPLIT_AUDIO_FRAME_ARRAY, ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_ARRAY,
+        )) and RECORDING_ID in PURGED_RECORDING_ARRAY))
+        checks.append((f"{EXPECTED_ADMISSION}: later frame dropped", ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY[CONNECTION_ID].get("PURGED_FRAME_CNT", 0) >= 1))
+        checks.append((f"{EXPECTED_ADMISSION}: messages gone", not any(
+            ROW.get("RECORDING_ID") == RECORDING_ID for ROW in ENGINE_DB_LOG_WEBSOCKET_MESSAGE_ARRAY.values()
+        )))
+
+    asyncio.run(RUN(990032, 9_903_201, "BUSY"))
+    START.ADMISSION_DECIDE = lambda *args: ("ADMITTED", {})
+    asyncio.run(RUN(990034, 9_903_401, "FAILED"))
+    ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY.pop(CONNECTION_ID, None)
+
+    ok = True
+    for name, passed in checks:
+        print(f"{'✓' if passed else '✗'} {name}")
+        ok = ok and passed
+
+    print("\n" + "=" * 50)
+    print("✓ START not admitted OK" if ok else "✗ START not admitted FAILED")
+    return ok
+
+
+if __name__ == "__main__":
+    test_start_not_admitted()
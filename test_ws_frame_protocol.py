@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Round-trip test for the violin.frame.v1 single-message binary frame format.
+Packs frames the way CLIENT_AUDIO_STREAM_MASTER.js does, unpacks them the way Stage-2 does,
+and compares message count / decode time against the legacy JSON header + BINARY pair.
+"""
+
+import sys
+import os
+import json
+import time
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+FRAME_CNT = 2000
+FRAME_BYTES = 8820  # 100 ms of 44.1 kHz PCM16
+
+
+def test_ws_frame_protocol():
+    """Round-trip header fields and payload; reject malformed frames; negotiate subprotocol."""
+
+    print("Testing WS Frame Protocol...")
+    print("=" * 50)
+
+    from SERVER_ENGINE_WS_FRAME_PROTOCOL import (
+        FRAME_PACK,
+        FRAME_UNPACK,
+        FRAME_HEADER_SIZE,
+        WS_CHOOSE_SUBPROTOCOL,
+        WS_SUBPROTOCOL_FRAME_V1,
+    )
+
+    ok = True
+    payload = bytes(range(256)) * (FRAME_BYTES // 256) + bytes(FRAME_BYTES % 256)
+
+    # 1) Round trip, including a RECORDING_ID above 2^32 (client writes it as two u32 words)
+    for rid, fno, dur in [(1, 1, 100), (2**32 + 7, 123456, 500), (2**53 - 1, 2**32 - 1, 65535)]:
+        message = FRAME_PACK(rid, fno, dur, payload)
+        header, body = FRAME_UNPACK(message)
+        same = (
+            len(message) == FRAME_HEADER_SIZE + len(payload)
+            and header["RECORDING_ID"] == rid
+            and header["AUDIO_FRAME_NO"] == fno
+            and header["FRAME_DURATION_IN_MS"] == dur
+            and header["AUDIO_FRAME_ENCODING"] == "raw"
+            and body == payload
+        )
+        print(f"{'✓' if same else '✗'} round trip rid={rid} fno={fno} dur={dur}")
+        ok = ok and same
+
+    # 2) Malformed frames raise ValueError
+    good = FRAME_PACK(1, 1, 100, payload)
+    for name, bad in [
+        ("short", good[:FRAME_HEADER_SIZE - 1]),
+        ("version", bytes([9]) + good[1:]),
+        ("encoding", good[:1] + bytes([200]) + good[2:]),
+    ]:
+        try:
+            FRAME_UNPACK(bad)
+            print(f"✗ {name}: accepted")
+            ok = False
+        except ValueError as e:
+            print(f"✓ {name}: rejected ({e})")
+
+    # 3) Negotiation: whitelist only, legacy when nothing matches
+    negotiated = (
+        WS_CHOOSE_SUBPROTOCOL(["chat", WS_SUBPROTOCOL_FRAME_V1]) == WS_SUBPROTOCOL_FRAME_V1
+        and WS_CHOOSE_SUBPROTOCOL(["chat"]) is None
+        and WS_CHOOSE_SUBPROTOCOL([]) is None
+    )
+    print(f"{'✓' if negotiated else '✗'} subprotocol whitelist")
+    ok = ok and negotiated
+
+    # 4) Decode cost: legacy json.loads per frame vs struct header
+    legacy = [json.dumps({"MESSAGE_TYPE": "FRAME", "RECORDING_ID": "42", "FRAME_NO": str(n),
+                          "FRAME_DURATION_IN_MS": 100, "BYTES_LEN": FRAME_BYTES}) for n in range(1, FRAME_CNT + 1)]
+    binary = [FRAME_PACK(42, n, 100, payload) for n in range(1, FRAME_CNT + 1)]
+
+    t0 = time.perf_counter()
+    for text in legacy:
+        meta = json.loads(text)
+        int(meta.get("RECORDING_ID") or 0), int(meta.get("FRAME_NO"))
+    legacy_us = (time.perf_counter() - t0) * 1e6 / FRAME_CNT
+
+    t0 = time.perf_counter()
+    for message in binary:
+        FRAME_UNPACK(message)
+    binary_us = (time.perf_counter() - t0) * 1e6 / FRAME_CNT
+
+    print(f"\nMessages for {FRAME_CNT} frames: legacy {2 * FRAME_CNT}, violin.frame.v1 {FRAME_CNT}")
+    print(f"Header decode per frame: legacy json {legacy_us:.2f} µs, struct {binary_us:.2f} µs (incl. payload slice)")
+
+    print("\n" + "=" * 50)
+    print("✓ WS frame protocol OK" if ok else "✗ WS frame protocol FAILED")
+    return ok
+
+
+if __name__ == "__main__":
+    test_ws_frame_protocol()
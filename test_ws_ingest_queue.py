@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test for the /ws/stream ingest queue.
+Checks the RFC 3550 style receive jitter on evenly and unevenly spaced arrivals (also with two
+recordings interleaved on one connection), that a frame finding the ingest queue full is
+counted as dropped instead of blocking the receive loop (in violin.frame.v1 mode under the RECORDING_ID
+and AUDIO_FRAME_NO read from its header, and requested again on Stage-4's next scan), and that a frame
+for a recording already purged is dropped as PURGED without re-creating any state (until the reaper
+forgets the id).
+"""
+
+import sys
+import os
+import asyncio
+from datetime import datetime, timedelta
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+RECORDING_ID = 990041
+
+
+def test_ws_ingest_queue():
+    """Receive jitter and non-blocking enqueue."""
+
+    print("Testing WS Ingest Queue...")
+    print("=" * 50)
+
+    from SERVER_ENGINE_LISTEN_2_FOR_WS_MESSAGES import _RECEIVE_JITTER, _ENQUEUE_FRAME, INGEST_AUDIO_FRAME
+    import SERVER_ENGINE_LISTEN_4_FOR_MISSING_FRAMES as STAGE4
+    from SERVER_ENGINE_WS_FRAME_PROTOCOL import FRAME_PACK
+    from SERVER_ENGINE_APP_VARIABLES import (
+        ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY, ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_ARRAY, PRE_SPLIT_AUDIO_FRAME_ARRAY,
+        RECORDING_FRAME_WINDOW_ARRAY, RECORDING_OUTSTANDING_WORK_ARRAY, PURGED_RECORDING_ARRAY, PURGED_RECORDING_TTL_MS,
+        ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY,
+    )
+    from SERVER_ENGINE_CONNECTION_REAPER import CONNECTION_REAPER
+
+    checks = []
+    t0 = datetime(2025, 1, 1)
+
+    # Frames exactly 100 ms apart → no jitter
+    ROW = {}
+    for fno in range(1, 11):
+        _RECEIVE_JITTER(ROW, RECORDING_ID, fno, 100, t0 + timedelta(milliseconds=100 * fno))
+    checks.append(("steady arrivals", ROW.get("RECEIVE_JITTER_MS", 0.0) == 0.0))
+
+    # One frame 40 ms late (the next one on time again) → |D| of 40 twice, max 40
+    _RECEIVE_JITTER(ROW, RECORDING_ID, 11, 100, t0 + timedelta(milliseconds=1140))
+    _RECEIVE_JITTER(ROW, RECORDING_ID, 12, 100, t0 + timedelta(milliseconds=1200))
+    checks.append(("late frame raises jitter", 0.0 < ROW["RECEIVE_JITTER_MS"] < 40.0))
+    checks.append(("max jitter 40 ms", round(ROW["RECEIVE_JITTER_MAX_MS"]) == 40))
+
+    # A resend of an older frame does not count as an arrival gap
+    J = ROW["RECEIVE_JITTER_MS"]
+    _RECEIVE_JITTER(ROW, RECORDING_ID, 5, 100, t0 + timedelta(milliseconds=5000))
+    checks.append(("resend ignored", ROW["RECEIVE_JITTER_MS"] == J))
+
+    # Two recordings multiplexed on one connection, interleaved, each on time → no jitter
+    ROW_M = {}
+    for fno in range(1, 11):
+        _RECEIVE_JITTER(ROW_M, RECORDING_ID, fno, 100, t0 + timedelta(milliseconds=100 * fno))
+        _RECEIVE_JITTER(ROW_M, RECORDING_ID + 1, fno, 100, t0 + timedelta(milliseconds=100 * fno + 30))
+    checks.append(("multiplexed arrivals", ROW_M.get("RECEIVE_JITTER_MS", 0.0) == 0.0))
+
+    # Full queue: the frame is dropped and counted, never awaited
+    async def _FULL_QUEUE():
+        QUEUE = asyncio.Queue(maxsize=2)
+        ROW_2 = {}
+        for fno in (1, 2, 3):
+            _ENQUEUE_FRAME(QUEUE, ("FRAME", RECORDING_ID, fno, 100, b"\0", t0), None, ROW_2)
+        return QUEUE.qsize(), ROW_2
+    DEPTH, ROW_2 = asyncio.run(_FULL_QUEUE())
+    checks.append(("queue bounded", DEPTH == 2 and ROW_2["INGEST_QUEUE_PEAK_DEPTH"] == 2))
+    checks.append(("dropped legacy frame listed missing", STAGE4.FRAME_WINDOW_MISSING(RECORDING_ID) == [3]))
+    RECORDING_FRAME_WINDOW_ARRAY.pop(RECORDING_ID, None)
+
+    # violin.frame.v1: the drop is attributed from the binary header and the resend goes out on the next scan
+    BINARY_RECORDING_ID, BINARY_CONNECTION_ID = RECORDING_ID + 1, 990042
+    ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY[BINARY_CONNECTION_ID] = {"WEBSOCKET_CONNECTION_ID": BINARY_CONNECTION_ID}
+    ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY[BINARY_RECORDING_ID] = {
+        "RECORDING_ID": BINARY_RECORDING_ID, "WEBSOCKET_CONNECTION_ID": BINARY_CONNECTION_ID,
+        "DT_PROCESS_WEBSOCKET_START_MESSAGE_DONE": t0,
+    }
+    SENT = []
+
+    async def WS_SEND_JSON(WEBSOCKET_CONNECTION_ID, MESSAGE):
+        SENT.append(MESSAGE)
+        return True
+    STAGE4.WS_SEND_JSON = WS_SEND_JSON
+
+    async def _FULL_BINARY_QUEUE():
+        QUEUE = asyncio.Queue(maxsize=1)
+        ROW_3 = ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY[BINARY_CONNECTION_ID]
+        for fno in (1, 2, 3):
+            _ENQUEUE_FRAME(QUEUE, ("BINARY", FRAME_PACK(BINARY_RECORDING_ID, fno, 100, b"\0\0" * 800), t0), BINARY_CONNECTION_ID, ROW_3)
+        STAGE4.FRAME_WINDOW_MARK_RECEIVED(BINARY_RECORDING_ID, 1)  # the queued frame is ingested
+        await STAGE4.PROCESS_RECORDING_FRAME_GAPS(BINARY_RECORDING_ID)  # well before FRAME_GAP_RESEND_AFTER_MS
+    asyncio.run(_FULL_BINARY_QUEUE())
+    W = RECORDING_FRAME_WINDOW_ARRAY.get(BINARY_RECORDING_ID) or {}
+    checks.append(("binary drops counted", ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY[BINARY_CONNECTION_ID].get("QUEUE_FULL_FRAME_CNT") == 2))
+    checks.append(("binary drops attributed to the header's recording", W.get("INGEST_DROPPED_FRAME_CNT") == 2 and 0 not in RECORDING_FRAME_WINDOW_ARRAY))
+    checks.append(("dropped binary frames listed missing", STAGE4.FRAME_WINDOW_MISSING(BINARY_RECORDING_ID) == [2, 3]))
+    checks.append(("resend requested at once", [M.get("MISSING_FRAMES") for M in SENT] == [[2, 3]]))
+    STAGE4.FRAME_WINDOW_MARK_RECEIVED(BINARY_RECORDING_ID, 2)
+    checks.append(("resent frame recovered", STAGE4.FRAME_WINDOW_MISSING(BINARY_RECORDING_ID) == [3] and W.get("FRAMES_RECOVERED_CNT") == 1))
+    for ARRAY, KEY in ((RECORDING_FRAME_WINDOW_ARRAY, BINARY_RECORDING_ID), (ENGINE_DB_LOG_RECORDING_CONFIG_ARRAY, BINARY_RECORDING_ID),
+                       (ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY, BINARY_CONNECTION_ID)):
+        ARRAY.pop(KEY, None)
+
+    # Resend arriving after the recording was finalized + purged → dropped, nothing re-created
+    CONNECTION_ID = 990041
+    ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY[CONNECTION_ID] = {"WEBSOCKET_CONNECTION_ID": CONNECTION_ID}
+    PURGED_RECORDING_ARRAY[RECORDING_ID] = t0
+    INGEST_AUDIO_FRAME(RECORDING_ID, 7, b"\0\0" * 800, t0, CONNECTION_ID)
+    checks.append(("purged recording frame dropped", ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY[CONNECTION_ID].get("PURGED_FRAME_CNT") == 1))
+    checks.append(("no state re-created", not any(RECORDING_ID in A for A in (
+        ENGINE_DB_LOG_PRE_SPLIT_AUDIO_FRAME_ARRAY, PRE_SPLIT_AUDIO_FRAME_ARRAY, RECORDING_FRAME_WINDOW_ARRAY, RECORDING_OUTSTANDING_WORK_ARRAY,
+    ))))
+    CONNECTION_REAPER.forget_purged_recordings(t0 + timedelta(milliseconds=PURGED_RECORDING_TTL_MS - 1))
+    KEPT = RECORDING_ID in PURGED_RECORDING_ARRAY
+    CONNECTION_REAPER.forget_purged_recordings(t0 + timedelta(milliseconds=PURGED_RECORDING_TTL_MS))
+    checks.append(("purged id forgotten after TTL", KEPT and RECORDING_ID not in PURGED_RECORDING_ARRAY))
+    ENGINE_DB_LOG_WEBSOCKET_CONNECTION_ARRAY.pop(CONNECTION_ID, None)
+
+    ok = True
+    for name, passed in checks:
+        print(f"{'✓' if passed else '✗'} {name}")
+        ok = ok and passed
+
+    print("\n" + "=" * 50)
+    print("✓ WS ingest queue OK" if ok else "✗ WS ingest queue FAILED")
+    return ok
+
+
+if __name__ == "__main__":
+    test_ws_ingest_queue()